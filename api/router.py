@@ -1,84 +1,137 @@
 # api/router.py
-import io
-import os
-import tempfile
-import shutil
-from typing import Dict, Any
-
-from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks
-from core.agent import process_user_request
-from tools.speech_to_text import SpeechToTextTool
-from schemas import UserRequest, FinalResponse, ChatHistoryItem
+import json
+from typing import Any, AsyncIterator, Dict
+
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from services.stt_engine import SpeechToTextEngine, STTQueueFullError
+from schemas import (
+    UserRequest,
+    FinalResponse,
+    ChatHistoryItem,
+    ChatMessagesItem,
+    TextBatchRequest,
+    AnswerEvaluationBatchRequest,
+)
 from fastapi.responses import StreamingResponse
 from tools.text_to_speech import TextToSpeechTool
-from db.vector_db import add_chat_history_to_db
+from db.vector_db import (
+    add_chat_history_to_db,
+    append_chat_messages,
+    chat_indexer,
+    request_chatroom_index,
+)
+from core.concurrency import run_blocking
+from core.scheduler import get_scheduler_stats
+from services.embedding_service import get_batcher_stats, get_cache_stats
+from services.session_context import session_store
 
 
+# 에이전트/툴 모듈(core.agent, services.batch_service, tools.*)은 langchain import가 무거워
+# 서버 시작 속도를 위해 핸들러 안에서 불러옵니다. (시작 시 main의 워밍업에서 미리 로드됩니다)
 router = APIRouter()
-stt_transcriber = SpeechToTextTool(whisper_model_name="base")
+stt_engine = SpeechToTextEngine()
 tts_synthesizer = TextToSpeechTool()
 
 
-router.post(
-    "/chatrooms/",
-    status_code=202,
-    summary="채팅 기록을 DB에 비동기로 추가",
-    description="채팅 기록을 받아 백그라운드에서 임베딩하고 Vector DB에 저장합니다.",
-)
+# 원문 저장소 쓰기 실패(SQLite 잠금, 디스크 오류 등)는 잠시 후 다시 시도하면 되는 경우가 대부분입니다.
+_TRANSCRIPT_WRITE_FAILED = "채팅 기록을 저장하지 못했습니다. 잠시 후 다시 시도해주세요."
 
 
-#  대화가 어느 정도 쌓이거나, 대화 세션이 종료될 때 호출합니다. 매번 메시지를 보낼 때마다 전체 대화 로그를 임베딩하여 저장하는 것은 매우 비효율적.
-async def add_chatroom_data(item: ChatHistoryItem, background_tasks: BackgroundTasks):
+#  대화가 어느 정도 쌓이거나, 대화 세션이 종료될 때 호출합니다. 원문은 바로 저장되고, 임베딩은 색인 대상 채팅방만 나중에 계산합니다.
+@router.post(
+    "/chatrooms/",
+    summary="채팅 기록을 DB에 저장",
+    description="채팅 기록 원문을 바로 저장합니다. index가 true인 채팅방은 백그라운드에서 임베딩해 Vector DB에 색인합니다.",
+)
+async def add_chatroom_data(item: ChatHistoryItem):
     """
-    이 엔드포인트는 임베딩처럼 오래 걸릴 수 있는 작업을
-    백그라운드로 보내고 즉시 응답을 반환합니다.
+    원문 저장은 기본 키 한 번의 SQLite 쓰기라 응답 전에 끝내고(200), 저장하지 못하면 503을 반환합니다.
+    임베딩처럼 오래 걸리는 색인은 백그라운드 색인기(낮은 우선순위)에 맡깁니다.
     """
     if not item.chatroom_id or not item.content:
         raise HTTPException(
             status_code=400, detail="chatroom_id와 content가 필요합니다."
         )
 
-    background_tasks.add_task(
-        add_chat_history_to_db, chatroom_id=item.chatroom_id, chat_content=item.content
-    )
+    if not await run_blocking(add_chat_history_to_db, item.chatroom_id, item.content, index=item.index):
+        raise HTTPException(status_code=503, detail=_TRANSCRIPT_WRITE_FAILED)
 
     return {
-        "message": f"'{item.chatroom_id}'의 채팅 기록이 성공적으로 접수되었습니다. 백그라운드에서 처리됩니다."
+        "message": f"'{item.chatroom_id}'의 채팅 기록이 저장되었습니다."
     }
 
 
+@router.post(
+    "/chatrooms/{chatroom_id}/messages",
+    summary="채팅방에 새 메시지만 이어서 추가",
+    description="전체 로그 대신 새 메시지만 받아 기존 대화 뒤에 이어 저장합니다.",
+)
+async def append_chatroom_messages(chatroom_id: str, item: ChatMessagesItem):
+    if not item.content:
+        raise HTTPException(status_code=400, detail="content가 필요합니다.")
+
+    if not await run_blocking(append_chat_messages, chatroom_id, item.content, index=item.index):
+        raise HTTPException(status_code=503, detail=_TRANSCRIPT_WRITE_FAILED)
+
+    return {
+        "message": f"'{chatroom_id}'의 새 메시지가 저장되었습니다."
+    }
+
+
+@router.post(
+    "/chatrooms/{chatroom_id}/index",
+    status_code=202,
+    summary="채팅방을 유사도 검색 대상으로 색인",
+    description="저장된 채팅방을 색인 대상으로 표시합니다. 임베딩은 백그라운드 색인기가 계산합니다.",
+)
+async def index_chatroom(chatroom_id: str):
+    if not await run_blocking(request_chatroom_index, chatroom_id):
+        raise HTTPException(
+            status_code=404, detail=f"'{chatroom_id}'에 해당하는 채팅방을 찾을 수 없습니다."
+        )
+    return {"message": f"'{chatroom_id}'의 색인이 예약되었습니다."}
+
+
 @router.post(
     "/process-voice/", response_model=FinalResponse, summary="음성 입력을 받아 처리"
 )
-async def handle_voice_input(audio_file: UploadFile = File(...)):
+async def handle_voice_input(
+    audio_file: UploadFile = File(...),
+    session_id: str | None = Form(None),
+    language: str | None = Form(None),
+    model: str | None = Form(None),
+):
     """
     음성 파일을 받아 텍스트로 변환하고, AI 에이전트를 통해 최종 응답을 반환합니다.
+    language("ko", "en", "auto" 등)와 model(Whisper 모델 크기)을 생략하면 서버 기본값을 씁니다.
     """
-    temp_path = None
     try:
-        with tempfile.NamedTemporaryFile(
-            delete=False, suffix=os.path.splitext(audio_file.filename)[1]
-        ) as temp:
-            shutil.copyfileobj(audio_file.file, temp)
-            temp_path = temp.name
+        audio_bytes = await audio_file.read()
+    finally:
+        await audio_file.close()
 
-        transcribed_text = stt_transcriber(audio_path=temp_path)
+    if not audio_bytes:
+        raise HTTPException(status_code=400, detail="음성 파일이 비어 있습니다.")
 
-        if not transcribed_text.strip():
-            raise HTTPException(status_code=400, detail="음성을 인식하지 못했습니다.")
+    try:
+        transcribed_text = await stt_engine.transcribe(audio_bytes, language=language, model_name=model)
+    except STTQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-        agent_response = await process_user_request(transcribed_text)
+    if not transcribed_text.strip():
+        raise HTTPException(status_code=400, detail="음성을 인식하지 못했습니다.")
 
-        return {
-            "input_type": "voice",
-            "transcribed_text": transcribed_text,
-            "response": agent_response,
-        }
+    from core.agent import process_user_request
 
-    finally:
-        if temp_path and os.path.exists(temp_path):
-            os.unlink(temp_path)
-        await audio_file.close()
+    agent_response = await process_user_request(transcribed_text, session_id=session_id)
+
+    return {
+        "input_type": "voice",
+        "transcribed_text": transcribed_text,
+        "response": agent_response,
+    }
 
 
 @router.post("/process-text/", summary="텍스트 입력을 받아 처리")
@@ -91,7 +144,9 @@ async def handle_text_input(request: UserRequest) -> Dict[str, Any]:
     if not user_text:
         raise HTTPException(status_code=400, detail="'text' 필드가 필요합니다.")
 
-    agent_response = await process_user_request(user_text)
+    from core.agent import process_user_request
+
+    agent_response = await process_user_request(user_text, session_id=request.session_id)
 
     return {
         "input_type": "text",
@@ -100,6 +155,63 @@ async def handle_text_input(request: UserRequest) -> Dict[str, Any]:
     }
 
 
+async def _batch_response(results: AsyncIterator[Dict[str, Any]], stream: bool):
+    """배치 결과를 한 번에 JSON으로 반환하거나, 끝나는 대로 NDJSON 한 줄씩 스트리밍합니다."""
+    if not stream:
+        return {"results": [result async for result in results]}
+
+    async def ndjson_lines():
+        async for result in results:
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+
+def _check_batch_size(count: int):
+    from services.batch_service import BATCH_MAX_ITEMS
+
+    if count == 0:
+        raise HTTPException(status_code=400, detail="처리할 항목이 없습니다.")
+    if count > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"한 번에 최대 {BATCH_MAX_ITEMS}개까지 처리할 수 있습니다.",
+        )
+
+
+@router.post("/process-text/batch", summary="여러 텍스트 입력을 한 번에 처리")
+async def handle_text_batch_input(request: TextBatchRequest):
+    """
+    여러 텍스트를 동시에(최대 동시 처리 수 제한) 처리하고 결과를 입력 순서대로 반환합니다.
+    stream=True면 각 결과를 NDJSON 한 줄로 스트리밍합니다.
+    """
+    _check_batch_size(len(request.texts))
+    if not all(text.strip() for text in request.texts):
+        raise HTTPException(status_code=400, detail="빈 텍스트가 포함되어 있습니다.")
+
+    from services.batch_service import process_text_batch
+
+    return await _batch_response(process_text_batch(request.texts), request.stream)
+
+
+@router.post("/interview/evaluate/batch", summary="면접 답변 여러 개를 한 번에 평가")
+async def evaluate_interview_answers_batch(request: AnswerEvaluationBatchRequest):
+    """
+    모의 면접 세션의 답변들을 한 번에 평가합니다. 라우팅 없이 바로 답변 평가를 실행하며,
+    include_references=True면 질문별로 유사한 모범 질문-답변 쌍을 함께 반환합니다.
+    """
+    _check_batch_size(len(request.items))
+    items = [item.model_dump() for item in request.items]
+    from services.batch_service import evaluate_answers_batch
+
+    results = evaluate_answers_batch(
+        items,
+        include_references=request.include_references,
+        n_references=request.n_references,
+    )
+    return await _batch_response(results, request.stream)
+
+
 @router.post("/process-tts/", summary="텍스트를 음성으로 변환")
 async def handle_tts_input(request_data: Dict[str, str]):
     text_to_speak = request_data.get("text")
@@ -107,8 +219,66 @@ async def handle_tts_input(request_data: Dict[str, str]):
     if not text_to_speak:
         raise HTTPException(status_code=400, detail="'text' 필드가 필요합니다.")
 
+    audio_stream = tts_synthesizer.stream(text=text_to_speak)
     try:
-        audio_bytes = tts_synthesizer(text=text_to_speak)
-        return StreamingResponse(io.BytesIO(audio_bytes), media_type="audio/mpeg")
+        # 첫 문장이 합성될 때까지만 기다리고, 나머지는 합성되는 대로 스트리밍합니다.
+        first_chunk = await anext(audio_stream)
     except Exception as e:
+        await audio_stream.aclose()
         raise HTTPException(status_code=500, detail=f"음성 생성 중 오류 발생: {e}")
+
+    async def audio_chunks():
+        yield first_chunk
+        async for chunk in audio_stream:
+            yield chunk
+
+    return StreamingResponse(audio_chunks(), media_type="audio/mpeg")
+
+
+def _tool_response_cache_stats() -> Dict[str, Any]:
+    from tools.agent_tools import response_cache
+
+    return response_cache.stats()
+
+
+def _llm_gateway_stats() -> Dict[str, Any]:
+    from core.llm import gateway
+
+    return gateway.stats()
+
+
+@router.get("/stats/cache", summary="캐시 및 임베딩 배치 통계 조회")
+def get_cache_statistics() -> Dict[str, Any]:
+    """임베딩 캐시, 임베딩 마이크로 배치, 툴 응답 캐시의 적중률과 LLM 게이트웨이(재시도, 중복 합치기) 통계를 반환합니다."""
+    return {
+        "embedding_cache": get_cache_stats(),
+        "embedding_batcher": get_batcher_stats(),
+        "tool_response_cache": _tool_response_cache_stats(),
+        "llm_gateway": _llm_gateway_stats(),
+        "session_context": session_store.stats(),
+        "chat_index": chat_indexer.stats(),
+    }
+
+
+@router.get("/sessions/{session_id}/usage", summary="세션의 턴별 프롬프트 토큰 사용량 조회")
+def get_session_usage(session_id: str) -> Dict[str, Any]:
+    """
+    턴마다 라우팅 LLM 프롬프트 토큰 수, 제공자 캐시에 맞은 토큰 수(cached_tokens),
+    이전 턴과 같을 것으로 예상되는 앞부분 토큰 수(cacheable_prefix_tokens), 예산 때문에 창에서 뺀 토큰 수를 반환합니다.
+    """
+    usage = session_store.usage(session_id)
+    if usage is None:
+        raise HTTPException(status_code=404, detail=f"'{session_id}' 세션을 찾을 수 없습니다.")
+    return usage
+
+
+@router.delete("/sessions/{session_id}", summary="세션 대화 기록 삭제")
+def delete_session(session_id: str) -> Dict[str, Any]:
+    session_store.clear(session_id)
+    return {"message": f"'{session_id}' 세션 기록을 삭제했습니다."}
+
+
+@router.get("/stats/scheduler", summary="우선순위 스케줄러 통계 조회")
+def get_scheduler_statistics() -> Dict[str, Any]:
+    """LLM/임베딩 스케줄러의 우선순위 클래스별 실행 수, 대기열 길이, 대기 시간을 반환합니다."""
+    return get_scheduler_stats()
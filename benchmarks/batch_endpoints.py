@@ -0,0 +1,110 @@
+# benchmarks/batch_endpoints.py
+"""
+N개의 요청을 하나씩 순서대로 처리할 때와 배치로 처리할 때의 전체 소요 시간을 비교합니다.
+
+  - text      : process_user_request N회 순차 호출 vs process_text_batch
+  - evaluation: evaluate_user_answer N회 순차 호출 vs evaluate_answers_batch
+
+실제 LLM을 호출하므로 .env의 OPENAI_API_KEY, LLM_MODEL_NAME이 필요합니다.
+
+사용법:
+    python -m benchmarks.batch_endpoints --items 10 20
+    python -m benchmarks.batch_endpoints --items 15 --skip-text
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import time
+
+from core.agent import process_user_request
+from services import batch_service
+from tools.interview_tools import evaluate_user_answer
+
+SAMPLES_PATH = os.path.join(os.path.dirname(__file__), "data", "intent_samples.jsonl")
+
+_QUESTIONS = [
+    "자기소개를 해주세요.",
+    "지원동기가 무엇인가요?",
+    "본인의 장단점을 말씀해주세요.",
+    "팀원과 갈등이 있었던 경험과 해결 방법을 말씀해주세요.",
+    "입사 후 포부를 말씀해주세요.",
+]
+_ANSWERS = [
+    "저는 맡은 일을 끝까지 책임지는 개발자입니다. 지난 프로젝트에서 일정이 밀렸을 때 주말까지 나와 마무리했습니다.",
+    "회사의 서비스를 오래 써 왔고, 사용자 입장에서 느낀 불편함을 직접 개선해 보고 싶어서 지원했습니다.",
+    "장점은 꼼꼼함이고 단점은 속도가 느린 편이라 체크리스트로 보완하고 있습니다.",
+    "의견이 달랐던 팀원과 따로 만나 서로의 근거를 정리했고, 작은 실험으로 결론을 냈습니다.",
+]
+
+
+def _load_texts(count: int) -> list[str]:
+    with open(SAMPLES_PATH, "r", encoding="utf-8") as f:
+        texts = [json.loads(line)["text"] for line in f if line.strip()]
+    return list(itertools.islice(itertools.cycle(texts), count))
+
+
+def _make_evaluation_items(count: int) -> list[dict]:
+    return [
+        {"question": _QUESTIONS[i % len(_QUESTIONS)], "user_answer": _ANSWERS[i % len(_ANSWERS)]}
+        for i in range(count)
+    ]
+
+
+async def _timed(coro) -> float:
+    started = time.perf_counter()
+    await coro
+    return round(time.perf_counter() - started, 2)
+
+
+async def bench_text(count: int) -> dict:
+    texts = _load_texts(count)
+
+    async def sequential():
+        for text in texts:
+            await process_user_request(text)
+
+    async def batch():
+        return [result async for result in batch_service.process_text_batch(texts)]
+
+    return {"sequential_s": await _timed(sequential()), "batch_s": await _timed(batch())}
+
+
+async def bench_evaluation(count: int) -> dict:
+    items = _make_evaluation_items(count)
+
+    async def sequential():
+        for item in items:
+            await evaluate_user_answer.ainvoke(item)
+
+    async def batch():
+        return [result async for result in batch_service.evaluate_answers_batch(items)]
+
+    return {"sequential_s": await _timed(sequential()), "batch_s": await _timed(batch())}
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, nargs="+", default=[10, 20])
+    parser.add_argument("--skip-text", action="store_true")
+    parser.add_argument("--skip-evaluation", action="store_true")
+    args = parser.parse_args()
+
+    # 모델 로드/분류기 학습 같은 첫 호출 비용은 측정에서 제외합니다.
+    await process_user_request(_load_texts(1)[0])
+
+    report = []
+    for count in args.items:
+        row = {"items": count, "max_concurrency": batch_service.BATCH_MAX_CONCURRENCY}
+        if not args.skip_text:
+            row["text"] = await bench_text(count)
+        if not args.skip_evaluation:
+            row["evaluation"] = await bench_evaluation(count)
+        report.append(row)
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,81 @@
+# benchmarks/embedding_startup.py
+"""
+임베딩 모델 로딩 방식에 따른 상주 메모리(RSS)와 콜드 스타트 시간을 측정합니다.
+
+  - before: 모듈마다 SentenceTransformer를 따로 생성하던 기존 방식 (2개 인스턴스)
+  - after : services.embedding_service의 공유 모델 1개
+
+각 모드는 별도 프로세스에서 실행되어 서로의 메모리에 영향을 주지 않습니다.
+
+사용법:
+    python -m benchmarks.embedding_startup
+"""
+import json
+import subprocess
+import sys
+import time
+
+
+def _rss_mb() -> float:
+    """현재 프로세스의 상주 메모리(MB)를 반환합니다. (Linux /proc 기준)"""
+    with open("/proc/self/status", "r", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def _run_before() -> dict:
+    start = time.perf_counter()
+    from sentence_transformers import SentenceTransformer
+
+    models = [SentenceTransformer("dragonkue/bge-m3-ko") for _ in range(2)]
+    load_s = time.perf_counter() - start
+    models[0].encode("자기소개")
+    models[1].encode("자기소개")
+    return {
+        "mode": "before",
+        "cold_start_s": round(load_s, 3),
+        "first_query_s": round(time.perf_counter() - start, 3),
+        "rss_mb": round(_rss_mb(), 1),
+    }
+
+
+def _run_after() -> dict:
+    start = time.perf_counter()
+    from services import embedding_service
+
+    import_s = time.perf_counter() - start
+    embedding_service.get_embedding_model()
+    load_s = time.perf_counter() - start
+    embedding_service.embed_text("자기소개")
+    return {
+        "mode": "after",
+        "import_s": round(import_s, 3),
+        "cold_start_s": round(load_s, 3),
+        "first_query_s": round(time.perf_counter() - start, 3),
+        "rss_mb": round(_rss_mb(), 1),
+    }
+
+
+def main():
+    if len(sys.argv) > 1:
+        result = _run_before() if sys.argv[1] == "before" else _run_after()
+        print(json.dumps(result))
+        return
+
+    report = []
+    for mode in ("before", "after"):
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.embedding_startup", mode],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        report.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# benchmarks/intent_router.py
+"""
+로컬 임베딩 라우터와 LLM 라우터(get_llm_with_tools())의 라우팅 정확도와 지연 시간을 비교합니다.
+
+  - local: 전체 정확도(분류 결과 기준), 임계값별 로컬 처리 비율과 로컬 처리분의 정확도
+  - llm  : tool_calls[0] 기준 정확도 (툴 호출이 없으면 GeneralLLM)
+
+사용법:
+    python -m benchmarks.intent_router
+    python -m benchmarks.intent_router --thresholds 0.5 0.6 0.7 --skip-llm
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+import numpy as np
+
+from core.agent import get_llm_with_tools, intent_router
+
+SAMPLES_PATH = os.path.join(os.path.dirname(__file__), "data", "intent_samples.jsonl")
+
+
+def _load_samples(path: str) -> list[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _latency_summary(latencies_ms: list[float]) -> dict:
+    return {
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 1),
+        "p95_ms": round(float(np.percentile(latencies_ms, 95)), 1),
+    }
+
+
+def bench_local(samples: list[dict], thresholds: list[float]) -> dict:
+    intent_router.route(samples[0]["text"])  # 분류기 학습 및 모델 로드는 측정에서 제외합니다.
+    decisions = [intent_router.route(s["text"]) for s in samples]
+
+    report = {
+        "accuracy": sum(d.label == s["label"] for d, s in zip(decisions, samples)) / len(samples),
+        **_latency_summary([d.latency_ms for d in decisions]),
+        "thresholds": [],
+    }
+    original_threshold = intent_router.threshold
+    for threshold in thresholds:
+        intent_router.threshold = threshold
+        routed = [
+            (d, s)
+            for s in samples
+            if (d := intent_router.route(s["text"])).tool_name is not None
+        ]
+        report["thresholds"].append(
+            {
+                "threshold": threshold,
+                "local_coverage": len(routed) / len(samples),
+                "local_precision": (
+                    sum(d.tool_name == s["label"] for d, s in routed) / len(routed)
+                    if routed
+                    else None
+                ),
+            }
+        )
+    intent_router.threshold = original_threshold
+    return report
+
+
+async def bench_llm(samples: list[dict]) -> dict:
+    correct, latencies = 0, []
+    for sample in samples:
+        started = time.perf_counter()
+        ai_message = await get_llm_with_tools().ainvoke(sample["text"])
+        latencies.append((time.perf_counter() - started) * 1000)
+        label = ai_message.tool_calls[0]["name"] if ai_message.tool_calls else "GeneralLLM"
+        correct += label == sample["label"]
+    return {"accuracy": correct / len(samples), **_latency_summary(latencies)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--samples", default=SAMPLES_PATH)
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.4, 0.5, 0.6, 0.7, 0.8])
+    parser.add_argument("--skip-llm", action="store_true", help="LLM 라우터 측정 생략 (API 키 불필요)")
+    args = parser.parse_args()
+
+    samples = _load_samples(args.samples)
+    report = {"samples": len(samples), "local": bench_local(samples, args.thresholds)}
+    if not args.skip_llm:
+        report["llm"] = asyncio.run(bench_llm(samples))
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
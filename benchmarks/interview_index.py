@@ -0,0 +1,141 @@
+# benchmarks/interview_index.py
+"""
+면접 질문 검색을 ChromaDB(HNSW) 조회와 메모리 인덱스(db/interview_index.py)로 각각 수행해
+정확도(recall@k)와 지연 시간을 비교합니다. 정답은 float32 전수 탐색(brute force) 결과입니다.
+
+  - chroma      : collection.query를 질문마다 한 번씩 / 여러 질문을 한 번에
+  - index_<형식>: InterviewIndex.query (float32, float16, int8)
+
+쿼리 벡터는 컬렉션에 저장된 벡터에 잡음을 더해 만들므로 임베딩 모델이 필요 없습니다.
+--synthetic N을 주면 임시 디렉터리에 N개짜리 가짜 컬렉션을 만들어 측정합니다.
+
+사용법:
+    python -m benchmarks.interview_index                       # my_interview_db 사용
+    python -m benchmarks.interview_index --synthetic 20000 --dim 1024 --queries 200 --k 5
+"""
+import argparse
+import json
+import tempfile
+import time
+
+import numpy as np
+
+from db.interview_index import InterviewIndex
+
+COLLECTION_NAME = "my_interviews_with_bge_m3"
+
+
+def _open_collection(db_path: str):
+    import chromadb
+
+    client = chromadb.PersistentClient(path=db_path)
+    return client.get_or_create_collection(
+        name=COLLECTION_NAME, metadata={"hnsw:space": "cosine"}
+    )
+
+
+def _fill_synthetic(collection, count: int, dim: int, seed: int):
+    """주제별로 뭉친 벡터를 만들어 실제 질문 임베딩처럼 이웃이 몰려 있는 분포를 흉내 냅니다."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(1, count // 50), dim)).astype(np.float32)
+    batch = 5000
+    for start in range(0, count, batch):
+        size = min(batch, count - start)
+        vectors = centers[rng.integers(0, len(centers), size)] + 0.5 * rng.standard_normal(
+            (size, dim)
+        ).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        ids = [f"q{start + i}" for i in range(size)]
+        collection.add(
+            ids=ids,
+            embeddings=vectors.tolist(),
+            documents=[f"{i}번 질문" for i in ids],
+            metadatas=[{"answer": f"{i}번 답변"} for i in ids],
+        )
+
+
+def _make_queries(matrix: np.ndarray, count: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed + 1)
+    picked = matrix[rng.integers(0, len(matrix), count)]
+    # 잡음 벡터의 크기가 약 0.5가 되도록 더합니다. (원래 벡터와의 코사인 유사도 약 0.9)
+    noise = rng.standard_normal(picked.shape).astype(np.float32) / np.sqrt(matrix.shape[1])
+    queries = picked.astype(np.float32) + 0.5 * noise
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+
+def _recall(results: list[list[str]], truth: list[list[str]]) -> float:
+    hits = sum(len(set(r) & set(t)) for r, t in zip(results, truth))
+    return hits / sum(len(t) for t in truth)
+
+
+def _latency(single_ms: list[float], batch_s: float, queries: int) -> dict:
+    return {
+        "single_p50_ms": round(float(np.percentile(single_ms, 50)), 3),
+        "single_p95_ms": round(float(np.percentile(single_ms, 95)), 3),
+        "batch_total_ms": round(batch_s * 1000, 2),
+        "batch_per_query_ms": round(batch_s * 1000 / queries, 3),
+    }
+
+
+def _measure(query_fn, queries: np.ndarray, k: int) -> tuple[list[list[str]], dict]:
+    query_fn(queries[:1].tolist(), k)  # 첫 호출 비용은 제외합니다.
+    single_ms, results = [], []
+    for query in queries:
+        started = time.perf_counter()
+        result = query_fn([query.tolist()], k)
+        single_ms.append((time.perf_counter() - started) * 1000)
+        results.append(result["ids"][0])
+    started = time.perf_counter()
+    query_fn(queries.tolist(), k)
+    batch_s = time.perf_counter() - started
+    return results, _latency(single_ms, batch_s, len(queries))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ChromaDB 조회와 메모리 인덱스의 recall/지연 시간 비교")
+    parser.add_argument("--db-path", default="my_interview_db")
+    parser.add_argument("--synthetic", type=int, default=0, help="가짜 컬렉션 항목 수 (0이면 --db-path 사용)")
+    parser.add_argument("--dim", type=int, default=1024, help="가짜 컬렉션 벡터 차원")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    db_path = tempfile.mkdtemp(prefix="interview_index_") if args.synthetic else args.db_path
+    collection = _open_collection(db_path)
+    if args.synthetic:
+        print(f"가짜 컬렉션 {args.synthetic}개 생성 중... ({db_path})")
+        _fill_synthetic(collection, args.synthetic, args.dim, args.seed)
+    if collection.count() == 0:
+        print(f"'{db_path}' 컬렉션이 비어 있습니다. embedding_data.py로 적재하거나 --synthetic을 사용하세요.")
+        return
+
+    exact = InterviewIndex(lambda: collection, db_path=db_path, dtype="float32")
+    exact.load()
+    matrix = exact._snapshot.matrix
+    queries = _make_queries(matrix, args.queries, args.seed)
+    truth = [[exact._snapshot.ids[i] for i, _ in row] for row in exact.search(queries, args.k)]
+
+    report = {"items": collection.count(), "dim": int(matrix.shape[1]), "queries": args.queries, "k": args.k}
+
+    def chroma_query(embeddings, n):
+        return collection.query(query_embeddings=embeddings, n_results=n, include=["documents", "metadatas"])
+
+    results, latency = _measure(chroma_query, queries, args.k)
+    report["chroma"] = {"recall": round(_recall(results, truth), 4), **latency}
+
+    for dtype in ("float32", "float16", "int8"):
+        index = InterviewIndex(lambda: collection, db_path=db_path, dtype=dtype)
+        index.load()
+        results, latency = _measure(index.query, queries, args.k)
+        report[f"index_{dtype}"] = {
+            "recall": round(_recall(results, truth), 4),
+            "matrix_mb": round(index.stats()["bytes"] / 1e6, 1),
+            **latency,
+        }
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
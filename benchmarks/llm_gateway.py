@@ -0,0 +1,209 @@
+# benchmarks/llm_gateway.py
+"""
+로컬 모의 OpenAI 서버(benchmarks/mock_openai_server.py)를 띄워 두고,
+ChatOpenAI를 직접 쓰는 경우(SDK 기본 재시도, 호출부마다 별도 클라이언트)와 LLM 게이트웨이(core/llm.py)를 비교합니다.
+
+  - burst     : 서버가 동시 요청 --server-limit개까지만 받는 상황에서 서로 다른 프롬프트를 한꺼번에 보냄
+  - duplicates: 같은 프롬프트를 한꺼번에 보냄 (서버가 실제로 받은 요청 수 비교)
+  - flaky     : 서버가 --error-rate 비율로 503을 돌려주는 상황
+  - priority  : background 요청이 몰린 중에 들어온 interactive 요청의 지연 시간
+                (우선순위 스케줄러 vs 모두 같은 클래스로 처리하던 기존 방식)
+  - stream    : 게이트웨이를 거친 astream / 동기 invoke가 정상 동작하는지 확인
+
+사용법:
+    python -m benchmarks.llm_gateway
+    python -m benchmarks.llm_gateway --requests 128 --server-limit 8 --latency-ms 100
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import threading
+import time
+
+import numpy as np
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_server(app, port: int):
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def _fire(llm, prompts: list[str]) -> dict:
+    latencies, errors = [], 0
+
+    async def one(prompt: str):
+        nonlocal errors
+        started = time.perf_counter()
+        try:
+            await llm.ainvoke(prompt)
+        except Exception:
+            errors += 1
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(prompt) for prompt in prompts))
+    return {
+        "ok": len(prompts) - errors,
+        "errors": errors,
+        "wall_s": round(time.perf_counter() - started, 2),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 1),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 1),
+    }
+
+
+async def _compare(name: str, app, direct, prompts: list[str], **server_config) -> dict:
+    from core.llm import gateway, get_chat_model
+
+    app.state.config.update(server_config)
+    row = {}
+    for label, llm in (("direct", direct), ("gateway", get_chat_model(temperature=0.7))):
+        for key in app.state.stats:
+            if key != "active":
+                app.state.stats[key] = 0
+        before = gateway.stats()
+        result = await _fire(llm, prompts)
+        after = gateway.stats()
+        result["server"] = {
+            key: app.state.stats[key] for key in ("requests", "rate_limited", "server_errors", "max_active")
+        }
+        if label == "gateway":
+            result["retries"] = after["retries"] - before["retries"]
+            result["coalesced"] = after["coalesced"] - before["coalesced"]
+        row[label] = result
+    print(f"[{name}] {json.dumps(row, ensure_ascii=False)}")
+    return row
+
+
+async def _priority_burst(llm, background: int, interactive: int, use_priority: bool) -> dict:
+    """background 요청을 한꺼번에 보낸 뒤, interactive 요청을 20ms 간격으로 보냅니다."""
+    from core.scheduler import priority
+
+    async def one(prompt: str, name: str) -> float:
+        started = time.perf_counter()
+        with priority(name if use_priority else "interactive"):
+            await llm.ainvoke(prompt)
+        return (time.perf_counter() - started) * 1000
+
+    async def interactive_stream():
+        await asyncio.sleep(0.05)
+        tasks = []
+        for i in range(interactive):
+            tasks.append(asyncio.ensure_future(one(f"{i}번째 대화 요청입니다.", "interactive")))
+            await asyncio.sleep(0.02)
+        return await asyncio.gather(*tasks)
+
+    started = time.perf_counter()
+    background_task = asyncio.gather(
+        *(one(f"{i}번째 페르소나 분석 요청입니다.", "background") for i in range(background))
+    )
+    interactive_ms = await interactive_stream()
+    await background_task
+    return {
+        "interactive_p50_ms": round(float(np.percentile(interactive_ms, 50)), 1),
+        "interactive_p99_ms": round(float(np.percentile(interactive_ms, 99)), 1),
+        "background_wall_s": round(time.perf_counter() - started, 2),
+    }
+
+
+async def run(args, app) -> dict:
+    from langchain_openai import ChatOpenAI
+
+    from core.llm import gateway, get_chat_model
+
+    # 게이트웨이 도입 전처럼 SDK 기본 설정(재시도 2회, 자체 연결 풀)을 쓰는 모델
+    direct = ChatOpenAI(model=os.environ["LLM_MODEL_NAME"], temperature=0.7)
+    base = {"latency_ms": args.latency_ms, "error_rate": 0.0, "rate_limit_concurrency": 0}
+    report = {
+        "config": {
+            "requests": args.requests,
+            "latency_ms": args.latency_ms,
+            "server_limit": args.server_limit,
+            "error_rate": args.error_rate,
+            "gateway_max_concurrency": gateway.max_concurrency,
+            "gateway_max_retries": gateway.max_retries,
+        }
+    }
+
+    report["burst"] = await _compare(
+        "burst",
+        app,
+        direct,
+        [f"{i}번째 질문입니다." for i in range(args.requests)],
+        **{**base, "rate_limit_concurrency": args.server_limit},
+    )
+    report["duplicates"] = await _compare(
+        "duplicates", app, direct, ["같은 질문입니다."] * args.requests, **base
+    )
+    report["flaky"] = await _compare(
+        "flaky",
+        app,
+        direct,
+        [f"{i}번째 불안정한 요청입니다." for i in range(args.requests)],
+        **{**base, "error_rate": args.error_rate},
+    )
+
+    app.state.config.update(base)
+    llm = get_chat_model(temperature=0.7)
+    report["priority"] = {
+        "single_class": await _priority_burst(llm, args.requests, 16, use_priority=False),
+        "scheduler": await _priority_burst(llm, args.requests, 16, use_priority=True),
+    }
+    print(f"[priority] {json.dumps(report['priority'], ensure_ascii=False)}")
+
+    tokens = [chunk.content async for chunk in llm.astream("스트리밍 확인")]
+    sync_answer = await asyncio.to_thread(lambda: llm.invoke("동기 호출 확인").content)
+    report["stream"] = {"chunks": len(tokens), "text": "".join(tokens), "sync_invoke": sync_answer}
+    report["gateway_stats"] = gateway.stats()
+    print(f"[stream] {json.dumps(report['stream'], ensure_ascii=False)}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="모의 OpenAI 서버로 LLM 게이트웨이 시험")
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--latency-ms", type=float, default=100)
+    parser.add_argument("--server-limit", type=int, default=8, help="모의 서버가 동시에 받는 요청 수 (넘으면 429)")
+    parser.add_argument("--error-rate", type=float, default=0.2)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    from benchmarks.mock_openai_server import create_app
+
+    app = create_app()
+    port = _free_port()
+    _start_server(app, port)
+
+    # core.llm은 import 시점에 설정을 읽으므로 환경 변수를 먼저 정합니다.
+    os.environ.update(
+        LLM_BACKEND="openai",
+        OPENAI_BASE_URL=f"http://127.0.0.1:{port}/v1",
+        OPENAI_API_KEY="mock",
+        LLM_MODEL_NAME="mock-model",
+    )
+    os.environ.setdefault("LLM_MAX_CONCURRENCY", str(args.server_limit))
+    os.environ.setdefault("LLM_RETRY_BASE_DELAY_S", "0.1")
+
+    report = asyncio.run(run(args, app))
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+# benchmarks/load_test.py
+"""
+가짜 LLM/임베딩/STT/TTS 백엔드(core/fake_backends.py)로 API 엔드포인트에 동시 요청을 보내
+엔드포인트별 지연 시간(p50/p95/p99)과 처리량(RPS)을 JSON으로 기록합니다.
+네트워크나 모델 다운로드 없이 실행되므로, 커밋마다 결과 파일을 비교할 수 있습니다.
+
+  - process_text  : POST /api/process-text/
+  - process_voice : POST /api/process-voice/ (test.wav 업로드)
+  - process_tts   : POST /api/process-tts/   (매 요청 다른 문장 → 캐시 미스)
+  - chatrooms     : POST /api/chatrooms/
+  - analyze       : POST /analyze/chatroom/{id}
+
+ChromaDB, 캐시, 요약 DB는 임시 작업 디렉터리에 만들어지므로 저장소의 데이터는 건드리지 않습니다.
+httpx의 ASGITransport는 백그라운드 작업까지 끝난 뒤 응답을 돌려주므로, 백그라운드로 처리하는 작업도
+지연 시간에 포함됩니다. chatrooms는 원문 저장 시간만 포함하며, 임베딩은 색인 대상 채팅방만 색인기가 나중에 계산합니다.
+
+사용법:
+    python -m benchmarks.load_test --output bench.json
+    python -m benchmarks.load_test --concurrency 32 --requests 500 --scenarios process_text process_tts
+    python -m benchmarks.load_test --llm-latency-ms 800 --stt-latency-ms 500
+    python -m benchmarks.load_test --scenarios chatrooms --embedding-latency-ms 200
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLES_PATH = os.path.join(REPO_ROOT, "benchmarks", "data", "intent_samples.jsonl")
+AUDIO_PATH = os.path.join(REPO_ROOT, "test.wav")
+SCENARIOS = ["process_text", "process_voice", "process_tts", "chatrooms", "analyze"]
+ANALYZE_ROOMS = 8
+
+
+def _chat_log(room_index: int, messages: int = 40) -> str:
+    lines = []
+    for i in range(messages):
+        speaker = "A" if i % 2 == 0 else "B"
+        lines.append(f"{speaker}: {room_index}번 방의 {i}번째 메시지입니다. 오늘 일정 정리해볼까?\n")
+    return "".join(lines)
+
+
+def _build_requests(scenario: str):
+    """요청 번호를 받아 (method, url, kwargs)를 만드는 함수를 반환합니다."""
+    if scenario == "process_text":
+        with open(SAMPLES_PATH, "r", encoding="utf-8") as f:
+            texts = [json.loads(line)["text"] for line in f if line.strip()]
+        return lambda i: (
+            "POST",
+            "/api/process-text/",
+            {"json": {"user_text": texts[i % len(texts)], "session_id": f"load-{i}"}},
+        )
+    if scenario == "process_voice":
+        with open(AUDIO_PATH, "rb") as f:
+            audio = f.read()
+        return lambda i: (
+            "POST",
+            "/api/process-voice/",
+            {"files": {"audio_file": ("test.wav", audio, "audio/wav")}},
+        )
+    if scenario == "process_tts":
+        return lambda i: (
+            "POST",
+            "/api/process-tts/",
+            {"json": {"text": f"{i}번째 질문입니다. 준비되셨나요? 천천히 답변해주세요."}},
+        )
+    if scenario == "chatrooms":
+        return lambda i: (
+            "POST",
+            "/api/chatrooms/",
+            {"json": {"chatroom_id": f"load-room-{i}", "content": _chat_log(i)}},
+        )
+    if scenario == "analyze":
+        return lambda i: ("POST", f"/analyze/chatroom/analyze-room-{i % ANALYZE_ROOMS}", {})
+    raise ValueError(f"알 수 없는 시나리오: {scenario}")
+
+
+def _summarize(latencies_s: list[float], errors: int, wall_s: float) -> dict:
+    latencies_ms = np.asarray(latencies_s) * 1000
+    return {
+        "requests": len(latencies_s),
+        "errors": errors,
+        "rps": round(len(latencies_s) / wall_s, 2) if wall_s else None,
+        "mean_ms": round(float(latencies_ms.mean()), 1),
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 1),
+        "p95_ms": round(float(np.percentile(latencies_ms, 95)), 1),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 1),
+        "max_ms": round(float(latencies_ms.max()), 1),
+    }
+
+
+async def run_scenario(client, build_request, total: int, concurrency: int) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    counter = itertools.count()
+
+    async def worker():
+        nonlocal errors
+        while (i := next(counter)) < total:
+            method, url, kwargs = build_request(i)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                failed = response.status_code >= 400
+            except Exception:
+                failed = True
+            latencies.append(time.perf_counter() - started)
+            errors += failed
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return _summarize(latencies, errors, time.perf_counter() - started)
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+async def run(args) -> dict:
+    import httpx
+
+    import main
+    from db.vector_db import add_chat_history_to_db
+
+    report = {
+        "commit": _git_commit(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "config": {
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "backends": {
+                name: os.environ.get(name)
+                for name in ("LLM_BACKEND", "EMBEDDING_BACKEND", "STT_BACKEND", "TTS_BACKEND")
+            },
+            "latency_ms": {
+                name: os.environ.get(name)
+                for name in (
+                    "FAKE_LLM_LATENCY_MS",
+                    "FAKE_LLM_TOKEN_DELAY_MS",
+                    "FAKE_EMBEDDING_LATENCY_MS",
+                    "FAKE_STT_LATENCY_MS",
+                    "FAKE_TTS_LATENCY_MS",
+                )
+            },
+        },
+        "scenarios": {},
+    }
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with main.lifespan(main.app):
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", timeout=None
+        ) as client:
+            if "analyze" in args.scenarios:
+                for room in range(ANALYZE_ROOMS):
+                    add_chat_history_to_db(f"analyze-room-{room}", _chat_log(room))
+
+            for scenario in args.scenarios:
+                build_request = _build_requests(scenario)
+                if args.warmup:
+                    await run_scenario(
+                        client, lambda i: build_request(args.requests + i), args.warmup, 1
+                    )
+                result = await run_scenario(client, build_request, args.requests, args.concurrency)
+                report["scenarios"][scenario] = result
+                print(f"[{scenario}] {json.dumps(result, ensure_ascii=False)}", file=sys.stderr)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="가짜 백엔드로 API 엔드포인트 부하 테스트")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="시나리오별 요청 수")
+    parser.add_argument("--warmup", type=int, default=5, help="측정 전 순차로 보낼 요청 수")
+    parser.add_argument("--llm-latency-ms", type=float, default=None)
+    parser.add_argument("--stt-latency-ms", type=float, default=None)
+    parser.add_argument("--tts-latency-ms", type=float, default=None)
+    parser.add_argument("--embedding-latency-ms", type=float, default=None, help="encode 호출 한 번의 지연")
+    parser.add_argument("--real-backends", action="store_true", help="가짜 백엔드 대신 .env 설정 사용")
+    parser.add_argument("--workdir", default=None, help="DB/캐시를 만들 디렉터리 (기본: 임시 디렉터리)")
+    parser.add_argument("--output", default=None, help="결과 JSON 파일 경로 (기본: 표준 출력)")
+    args = parser.parse_args()
+
+    # 앱 모듈은 import 시점에 설정을 읽으므로, 환경 변수를 먼저 정한 뒤 import합니다.
+    if not args.real_backends:
+        for name in ("LLM_BACKEND", "EMBEDDING_BACKEND", "STT_BACKEND", "TTS_BACKEND"):
+            os.environ[name] = "fake"
+        os.environ.setdefault("OPENAI_API_KEY", "fake")
+    for name, value in (
+        ("FAKE_LLM_LATENCY_MS", args.llm_latency_ms),
+        ("FAKE_STT_LATENCY_MS", args.stt_latency_ms),
+        ("FAKE_TTS_LATENCY_MS", args.tts_latency_ms),
+        ("FAKE_EMBEDDING_LATENCY_MS", args.embedding_latency_ms),
+    ):
+        if value is not None:
+            os.environ[name] = str(value)
+
+    output = os.path.abspath(args.output) if args.output else None
+    workdir = args.workdir or tempfile.mkdtemp(prefix="load_test_")
+    os.makedirs(workdir, exist_ok=True)
+    os.chdir(workdir)  # ./chat_db 등 상대 경로 저장소가 작업 디렉터리에 만들어집니다.
+    sys.path.insert(0, REPO_ROOT)
+
+    report = asyncio.run(run(args))
+    report["config"]["workdir"] = workdir
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"결과를 '{output}'에 저장했습니다.", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
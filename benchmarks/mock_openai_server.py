@@ -0,0 +1,203 @@
+# benchmarks/mock_openai_server.py
+"""
+LLM 게이트웨이(core/llm.py)를 시험하기 위한 OpenAI 호환 모의 서버입니다.
+POST /v1/chat/completions 만 흉내 내며, 스트리밍(SSE)도 지원합니다.
+
+  - 응답마다 --latency-ms 만큼 걸립니다.
+  - 동시에 처리 중인 요청이 --rate-limit-concurrency를 넘으면 429(Retry-After 포함)를 돌려줍니다.
+  - --error-rate 비율만큼 무작위로 503을 돌려줍니다.
+  - GET /stats 로 받은 요청 수, 최대 동시 요청 수, 돌려준 오류 수를 확인합니다. (POST /stats/reset 으로 초기화)
+  - usage에 프롬프트 토큰 수와 캐시된 토큰 수(prompt_tokens_details.cached_tokens)를 넣습니다.
+    OpenAI 프롬프트 캐시처럼, 툴 정의와 메시지를 이어 붙인 요청 앞부분이 이전 요청과 1024토큰 이상
+    같으면 128토큰 단위로 캐시된 것으로 셉니다. (토큰 수는 문자 4개당 1개로 어림합니다)
+
+사용법:
+    python -m benchmarks.mock_openai_server --port 8001 --latency-ms 200 --rate-limit-concurrency 8
+    OPENAI_BASE_URL=http://127.0.0.1:8001/v1 OPENAI_API_KEY=mock uvicorn main:app
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+def create_app(
+    latency_ms: float = 200,
+    token_delay_ms: float = 5,
+    rate_limit_concurrency: int = 0,
+    error_rate: float = 0.0,
+    retry_after_s: float = 0.2,
+) -> FastAPI:
+    app = FastAPI(title="Mock OpenAI")
+    app.state.config = {
+        "latency_ms": latency_ms,
+        "token_delay_ms": token_delay_ms,
+        "rate_limit_concurrency": rate_limit_concurrency,
+        "error_rate": error_rate,
+        "retry_after_s": retry_after_s,
+    }
+    stats = {
+        "requests": 0,
+        "completed": 0,
+        "rate_limited": 0,
+        "server_errors": 0,
+        "active": 0,
+        "max_active": 0,
+        "prompt_tokens": 0,
+        "cached_tokens": 0,
+    }
+    app.state.stats = stats
+    # 지금까지 받은 요청 앞부분(128토큰 단위)의 해시
+    seen_prefixes: set[str] = set()
+
+    def _usage(body: dict, content: str) -> dict:
+        # 툴 정의가 메시지보다 앞에 오는 순서로 이어 붙입니다.
+        prompt = json.dumps(body.get("tools"), ensure_ascii=False) + json.dumps(
+            body.get("messages"), ensure_ascii=False
+        )
+        prompt_tokens = max(1, len(prompt) // 4)
+        block_chars = 128 * 4
+        cached_tokens = 0
+        for end in range(block_chars, len(prompt) + 1, block_chars):
+            digest = hashlib.sha1(prompt[:end].encode("utf-8")).hexdigest()
+            if digest in seen_prefixes and end // 4 >= 1024:
+                cached_tokens = end // 4
+            seen_prefixes.add(digest)
+        stats["prompt_tokens"] += prompt_tokens
+        stats["cached_tokens"] += cached_tokens
+        completion_tokens = len(content.split())
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": cached_tokens},
+        }
+
+    def _answer(body: dict) -> str:
+        prompt = str(body.get("messages", [{}])[-1].get("content", ""))
+        return f"(모의 응답) {prompt[:40]} 에 대한 답변입니다."
+
+    def _completion(body: dict, content: str, usage: dict) -> dict:
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": usage,
+        }
+
+    def _chunk(body: dict, chunk_id: str, delta: dict | None, finish_reason=None, usage=None) -> str:
+        payload = {
+            "id": chunk_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [] if delta is None else [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        if usage is not None:
+            payload["usage"] = usage
+        return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        config = app.state.config
+        body = await request.json()
+        stats["requests"] += 1
+
+        limit = config["rate_limit_concurrency"]
+        if limit and stats["active"] >= limit:
+            stats["rate_limited"] += 1
+            return JSONResponse(
+                {"error": {"message": "Rate limit reached", "type": "rate_limit_error"}},
+                status_code=429,
+                headers={"retry-after": str(config["retry_after_s"])},
+            )
+        if random.random() < config["error_rate"]:
+            stats["server_errors"] += 1
+            return JSONResponse(
+                {"error": {"message": "Service unavailable", "type": "server_error"}}, status_code=503
+            )
+
+        stats["active"] += 1
+        stats["max_active"] = max(stats["max_active"], stats["active"])
+        content = _answer(body)
+        usage = _usage(body, content)
+
+        if not body.get("stream"):
+            try:
+                await asyncio.sleep(config["latency_ms"] / 1000)
+            finally:
+                stats["active"] -= 1
+            stats["completed"] += 1
+            return JSONResponse(_completion(body, content, usage))
+
+        async def events():
+            chunk_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+            try:
+                await asyncio.sleep(config["latency_ms"] / 1000)
+                yield _chunk(body, chunk_id, {"role": "assistant", "content": ""})
+                for index, word in enumerate(content.split()):
+                    await asyncio.sleep(config["token_delay_ms"] / 1000)
+                    yield _chunk(body, chunk_id, {"content": word if index == 0 else f" {word}"})
+                yield _chunk(body, chunk_id, {}, finish_reason="stop")
+                if (body.get("stream_options") or {}).get("include_usage"):
+                    yield _chunk(body, chunk_id, None, usage=usage)
+                yield "data: [DONE]\n\n"
+            finally:
+                stats["active"] -= 1
+            stats["completed"] += 1
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    @app.post("/stats/reset")
+    async def reset_stats():
+        for key in stats:
+            if key != "active":
+                stats[key] = 0
+        return stats
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="OpenAI 호환 모의 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--token-delay-ms", type=float, default=5)
+    parser.add_argument("--rate-limit-concurrency", type=int, default=0, help="0이면 제한 없음")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after-s", type=float, default=0.2)
+    args = parser.parse_args()
+
+    app = create_app(
+        latency_ms=args.latency_ms,
+        token_delay_ms=args.token_delay_ms,
+        rate_limit_concurrency=args.rate_limit_concurrency,
+        error_rate=args.error_rate,
+        retry_after_s=args.retry_after_s,
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# benchmarks/persona_summary.py
+"""
+긴 합성 대화 기록에서 페르소나 분석의 두 경로를 비교합니다.
+
+  - full   : 전체 대화를 프롬프트에 그대로 넣는 기존 방식
+  - rolling: 채팅방별 누적 요약 + 최근 대화 (첫 분석 / 메시지 추가 후 재분석)
+
+실제 LLM을 호출하므로 .env의 OPENAI_API_KEY, LLM_MODEL_NAME이 필요합니다.
+
+사용법:
+    python -m benchmarks.persona_summary --messages 500 2000
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from db import persona_summary_store
+from db.persona_summary_store import PersonaSummaryStore
+from services import persona_analyzer
+
+_A_LINES = [
+    "요즘 프로젝트는 어떻게 돼가?",
+    "주말에 뭐 할 거야?",
+    "그 얘기 좀 더 자세히 해줄래?",
+    "그건 좀 의외인데, 왜 그렇게 생각해?",
+]
+_B_LINES = [
+    "일정표를 다시 짜서 이번 주 목표를 세 단계로 나눴어. 하나씩 체크하는 중이야.",
+    "와 진짜 대박이다 ㅋㅋ 다 같이 모여서 파티하자! 내가 장소 알아볼게!",
+    "많이 힘들었겠다... 천천히 얘기해도 괜찮아. 나는 네 편이야.",
+    "솔직히 말하면 그 방식은 원칙에 안 맞는다고 생각해. 돌려 말하고 싶진 않아.",
+    "그냥 내 방식대로 할래. 남들이 뭐라 하든 크게 신경 안 써.",
+    "만약 바다 밑에 도시가 있다면 사람들은 어떤 언어를 쓸까? 상상만 해도 재밌다.",
+]
+
+
+def make_history(num_messages: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    lines = []
+    for i in range(num_messages):
+        speaker, pool = ("A", _A_LINES) if i % 2 == 0 else ("B", _B_LINES)
+        lines.append(f"{speaker}: {rng.choice(pool)}\n")
+    return "".join(lines)
+
+
+class _CountingLLM:
+    """LLM 호출마다 프롬프트 토큰 수를 기록하는 래퍼입니다."""
+
+    def __init__(self, llm):
+        self.llm = llm
+        self.prompt_tokens = []
+
+    def invoke(self, prompt, *args, **kwargs):
+        self.prompt_tokens.append(self.llm.get_num_tokens(prompt))
+        return self.llm.invoke(prompt, *args, **kwargs)
+
+    def get_num_tokens(self, text: str) -> int:
+        return self.llm.get_num_tokens(text)
+
+
+def _timed_analysis(history: str, chatroom_id: str | None) -> dict:
+    original_llm = persona_analyzer._llm
+    counting_llm = _CountingLLM(original_llm())
+    persona_analyzer._llm = lambda: counting_llm
+    try:
+        started = time.perf_counter()
+        result = persona_analyzer.analyze_persona_from_history(history, chatroom_id)
+        elapsed = time.perf_counter() - started
+    finally:
+        persona_analyzer._llm = original_llm
+
+    calls = counting_llm.prompt_tokens
+    return {
+        "latency_s": round(elapsed, 2),
+        "llm_calls": len(calls),
+        "prompt_tokens_total": sum(calls),
+        "final_prompt_tokens": calls[-1] if calls else 0,
+        "persona": (result or {}).get("persona"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, nargs="+", default=[200, 1000, 3000])
+    parser.add_argument("--append", type=float, default=0.05, help="재분석 전 추가할 메시지 비율")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        persona_summary_store._store = PersonaSummaryStore(os.path.join(tmp, "s.db"))
+        report = []
+        for n in args.messages:
+            history = make_history(n)
+            grown = history + make_history(max(2, int(n * args.append)), seed=n)
+            chatroom_id = f"bench-{n}"
+            report.append(
+                {
+                    "messages": n,
+                    "transcript_tokens": persona_analyzer._count_tokens(history),
+                    "full": _timed_analysis(history, None),
+                    "rolling_first": _timed_analysis(history, chatroom_id),
+                    "rolling_incremental": _timed_analysis(grown, chatroom_id),
+                }
+            )
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
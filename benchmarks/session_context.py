@@ -0,0 +1,120 @@
+# benchmarks/session_context.py
+"""
+로컬 모의 OpenAI 서버(benchmarks/mock_openai_server.py)로 여러 턴의 대화를 보내,
+세션 대화 창(services/session_context.py)을 쓸 때의 턴별 프롬프트 토큰과 캐시된 토큰을 비교합니다.
+모의 서버는 OpenAI처럼 요청 앞부분이 이전 요청과 같으면 캐시된 토큰으로 셉니다.
+
+  - resend : 세션 없이 클라이언트가 이전 대화를 모두 user_text에 다시 넣어 보냄 (기존 방식)
+  - sliding: 세션 창을 쓰되 예산을 넘으면 매 턴 오래된 턴을 조금씩 밀어냄 (SESSION_WINDOW_KEEP_RATIO=0.98)
+  - session: 세션 창을 쓰고, 예산을 넘을 때만 창을 한꺼번에 옮김 (기본 설정)
+
+사용법:
+    python -m benchmarks.session_context
+    python -m benchmarks.session_context --turns 40 --budget 1500 --message-chars 300
+"""
+import argparse
+import asyncio
+import json
+import os
+
+from benchmarks.llm_gateway import _free_port, _start_server
+
+
+def _user_message(turn: int, chars: int) -> str:
+    text = f"{turn}번째 질문입니다. 지난번에 이야기한 발표 준비와 이어지는 내용이에요. "
+    return (text * (chars // len(text) + 1))[:chars]
+
+
+async def _run_scenario(name: str, app, args) -> dict:
+    from core.agent import process_user_request
+    from services.session_context import session_store
+
+    session_store.keep_ratio = 0.98 if name == "sliding" else args.keep_ratio
+    session_id = f"bench-{name}"
+    session_store.clear(session_id)
+    transcript, turns = [], []
+    for turn in range(1, args.turns + 1):
+        message = _user_message(turn, args.message_chars)
+        before = dict(app.state.stats)
+        if name == "resend":
+            user_text = "\n".join(transcript + [f"사용자: {message}"])
+            result = await process_user_request(user_text)
+        else:
+            result = await process_user_request(message, session_id=session_id)
+        transcript += [f"사용자: {message}", f"어시스턴트: {result.get('response')}"]
+        prompt = app.state.stats["prompt_tokens"] - before["prompt_tokens"]
+        cached = app.state.stats["cached_tokens"] - before["cached_tokens"]
+        turns.append({"turn": turn, "prompt_tokens": prompt, "cached_tokens": cached})
+
+    prompt_total = sum(t["prompt_tokens"] for t in turns)
+    cached_total = sum(t["cached_tokens"] for t in turns)
+    row = {
+        "prompt_tokens": prompt_total,
+        "cached_tokens": cached_total,
+        "uncached_tokens": prompt_total - cached_total,
+        "cached_ratio": round(cached_total / prompt_total, 3) if prompt_total else 0.0,
+        "last_turn": turns[-1],
+        "turns": turns,
+    }
+    if name != "resend":
+        usage = session_store.usage(session_id)
+        row["reported_by_session_store"] = usage["totals"]
+    summary = {key: value for key, value in row.items() if key != "turns"}
+    print(f"[{name}] {json.dumps(summary, ensure_ascii=False)}")
+    return row
+
+
+async def run(args, app) -> dict:
+    from core.agent import get_fixed_prefix_tokens, process_user_request
+
+    # 시스템 프롬프트와 툴 정의는 모든 사용자가 공유하므로, 한 번 보내 두고 모든 시나리오를 같은 조건에서 시작합니다.
+    await process_user_request("준비 요청입니다.")
+    report = {
+        "config": {
+            "turns": args.turns,
+            "message_chars": args.message_chars,
+            "token_budget": args.budget,
+            "keep_ratio": args.keep_ratio,
+            "fixed_prefix_tokens": get_fixed_prefix_tokens(),
+        }
+    }
+    for name in ("resend", "sliding", "session"):
+        report[name] = await _run_scenario(name, app, args)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="세션 대화 창의 프롬프트 토큰/캐시 절약량 측정")
+    parser.add_argument("--turns", type=int, default=30)
+    parser.add_argument("--message-chars", type=int, default=200)
+    parser.add_argument("--budget", type=int, default=2000, help="SESSION_CONTEXT_TOKEN_BUDGET")
+    parser.add_argument("--keep-ratio", type=float, default=0.5, help="SESSION_WINDOW_KEEP_RATIO")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    from benchmarks.mock_openai_server import create_app
+
+    app = create_app(latency_ms=5, token_delay_ms=0)
+    port = _free_port()
+    _start_server(app, port)
+
+    # 설정은 import 시점에 읽으므로 환경 변수를 먼저 정합니다.
+    os.environ.update(
+        LLM_BACKEND="openai",
+        OPENAI_BASE_URL=f"http://127.0.0.1:{port}/v1",
+        OPENAI_API_KEY="mock",
+        LLM_MODEL_NAME="gpt-4o-mini",
+        INTENT_ROUTER_ENABLED="false",
+        SESSION_CONTEXT_TOKEN_BUDGET=str(args.budget),
+        SESSION_STORE_PATH="",
+    )
+
+    report = asyncio.run(run(args, app))
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
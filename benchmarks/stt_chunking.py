@@ -0,0 +1,130 @@
+# benchmarks/stt_chunking.py
+"""
+녹음 하나의 음성 인식 시간을 비교합니다. 가짜 음성 인식(core/fake_backends.py)은 호출마다
+FAKE_STT_LATENCY_MS에 오디오 길이 × FAKE_STT_SECONDS_PER_AUDIO_S만큼 걸리도록 해 Whisper의 비용을 흉내 냅니다.
+
+  - whole: 녹음 전체를 워커 하나가 한 번에 변환 (STT_VAD_ENABLED=false, 기존 방식)
+  - vad  : 침묵을 잘라내고 쉼에서 30초 미만 청크로 나눠 여러 워커가 동시에 변환한 뒤 이어 붙임
+
+녹음은 test.wav와, 톤 구간 사이에 짧은 쉼과 긴 쉼(생각하는 시간)이 섞인 합성 녹음(모의 면접 답변)입니다.
+--real을 주면 .env의 Whisper 설정과 ffmpeg로 실제 변환 시간을 잽니다.
+
+사용법:
+    python -m benchmarks.stt_chunking
+    python -m benchmarks.stt_chunking --workers 4 --lengths 60 180 300 --seconds-per-audio-s 0.2
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import time
+import wave
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+AUDIO_PATH = os.path.join(REPO_ROOT, "test.wav")
+SAMPLE_RATE = 16000
+
+
+def _recording(seconds: float, seed: int) -> np.ndarray:
+    """2~8초 발화 사이에 0.3~1.5초 쉼, 가끔 4~10초의 긴 쉼이 있는 녹음을 만듭니다."""
+    rng = np.random.default_rng(seed)
+    parts, total = [], 0.0
+    while total < seconds:
+        length = rng.uniform(2, 8)
+        t = np.arange(int(length * SAMPLE_RATE)) / SAMPLE_RATE
+        pitch = rng.uniform(150, 250)
+        parts.append(0.3 * np.sin(2 * np.pi * pitch * t) * (0.6 + 0.4 * np.sin(2 * np.pi * 3 * t)))
+        pause = rng.uniform(4, 10) if rng.random() < 0.2 else rng.uniform(0.3, 1.5)
+        parts.append(np.zeros(int(pause * SAMPLE_RATE)))
+        total += length + pause
+    audio = np.concatenate(parts)[: int(seconds * SAMPLE_RATE)]
+    return (audio + 0.002 * rng.standard_normal(len(audio))).astype(np.float32)
+
+
+def _wav(audio: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes((np.clip(audio, -1, 1) * 32767).astype("<i2").tobytes())
+    return buffer.getvalue()
+
+
+async def _measure(engine, data: bytes, repeat: int) -> dict:
+    times, text = [], ""
+    for _ in range(repeat):
+        started = time.perf_counter()
+        text = await engine.transcribe(data)
+        times.append((time.perf_counter() - started) * 1000)
+    return {"ms": round(float(np.median(times)), 1), "text_chars": len(text)}
+
+
+async def run(args) -> dict:
+    from services.stt_engine import SpeechToTextEngine, _decode, split_for_transcription
+
+    recordings = {"test.wav": open(AUDIO_PATH, "rb").read()}
+    for seconds in args.lengths:
+        recordings[f"synthetic_{seconds}s"] = _wav(_recording(seconds, seed=seconds))
+
+    engines = {
+        "whole": SpeechToTextEngine(workers=args.workers, vad=False),
+        "vad": SpeechToTextEngine(workers=args.workers, vad=True),
+    }
+    for engine in engines.values():
+        engine.warmup()
+
+    report = {}
+    try:
+        for name, data in recordings.items():
+            audio = _decode(data)
+            chunks = split_for_transcription(audio)
+            row = {
+                "duration_s": round(len(audio) / SAMPLE_RATE, 1),
+                "speech_s": round(sum(len(c) for c in chunks) / SAMPLE_RATE, 1),
+                "chunks": len(chunks),
+            }
+            for mode, engine in engines.items():
+                row[mode] = await _measure(engine, data, args.repeat)
+            row["speedup"] = round(row["whole"]["ms"] / row["vad"]["ms"], 2)
+            report[name] = row
+            print(f"[{name}] {json.dumps(row, ensure_ascii=False)}")
+    finally:
+        for engine in engines.values():
+            engine.shutdown()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="긴 녹음 음성 인식: 전체 변환 vs VAD 청크 병렬 변환")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[60, 180, 300], help="합성 녹음 길이(초)")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--latency-ms", type=float, default=200, help="호출 한 번의 고정 지연")
+    parser.add_argument("--seconds-per-audio-s", type=float, default=0.1, help="오디오 1초당 인식 시간")
+    parser.add_argument("--real", action="store_true", help="가짜 음성 인식 대신 .env 설정(Whisper) 사용")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    # 설정은 import 시점에 읽으므로 환경 변수를 먼저 정합니다. (spawn 워커도 이 환경을 물려받습니다)
+    if not args.real:
+        os.environ.update(
+            STT_BACKEND="fake",
+            FAKE_STT_LATENCY_MS=str(args.latency_ms),
+            FAKE_STT_SECONDS_PER_AUDIO_S=str(args.seconds_per_audio_s),
+        )
+
+    report = {"config": vars(args), "recordings": asyncio.run(run(args))}
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
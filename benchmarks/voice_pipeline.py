@@ -0,0 +1,192 @@
+# benchmarks/voice_pipeline.py
+"""
+가짜 LLM/STT/TTS 백엔드(core/fake_backends.py)로 음성 한 턴의 "말을 마친 뒤 첫 음성을 듣기까지의 시간"을 비교합니다.
+
+  - sequential: 녹음 전체를 POST /api/process-voice/ 로 올리고, 답변 전체를 받은 뒤
+                POST /api/process-tts/ 로 음성을 요청 (기존 방식)
+  - pipelined : /ws/voice 로 오디오를 실시간 속도로 흘려보내고, VAD 구간별 음성 인식,
+                답변 토큰의 문장 단위 음성 합성이 겹쳐 진행되는 방식
+
+합성 음성은 쉼으로 나뉜 톤 구간 여러 개로 만들며, 양쪽 모두 마지막 음성 샘플을 보낸 시점부터 잽니다.
+pipelined에는 발화 종료 판단을 위한 침묵 대기(VAD_TURN_SILENCE_MS)가 포함되므로 서버가 보고한
+time_to_first_audio_ms(발화 종료 판단 시점부터)도 함께 기록합니다.
+
+사용법:
+    python -m benchmarks.voice_pipeline
+    python -m benchmarks.voice_pipeline --turns 5 --llm-latency-ms 800 --stt-latency-ms 400
+"""
+import argparse
+import io
+import json
+import os
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+FRAME_MS = 20
+
+
+def _utterance(segments: int, seconds: float, pause_s: float, seed: int) -> np.ndarray:
+    """톤과 약한 잡음으로 만든 발화입니다. 구간 사이에는 pause_s만큼 쉼이 있습니다."""
+    rng = np.random.default_rng(seed)
+    parts = []
+    for index in range(segments):
+        t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+        tone = 0.3 * np.sin(2 * np.pi * (180 + 40 * index) * t) * (0.6 + 0.4 * np.sin(2 * np.pi * 3 * t))
+        parts.append(tone)
+        if index < segments - 1:
+            parts.append(np.zeros(int(pause_s * SAMPLE_RATE)))
+    audio = np.concatenate(parts)
+    return (audio + 0.002 * rng.standard_normal(len(audio))).astype(np.float32)
+
+
+def _pcm(audio: np.ndarray) -> bytes:
+    return (np.clip(audio, -1, 1) * 32767).astype("<i2").tobytes()
+
+
+def _wav(audio: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(_pcm(audio))
+    return buffer.getvalue()
+
+
+def _general_llm_text(segments: int) -> str:
+    """
+    가짜 LLM이 툴 대신 일반 답변을 하도록 만드는 발화 텍스트를 고릅니다.
+    가짜 음성 인식은 구간마다 같은 문장을 돌려주므로, 구간별 결과를 이어 붙인 문장도 일반 답변이 되어야 합니다.
+    """
+    from core.agent import available_tools
+    from core.fake_backends import _digest
+
+    def general(text: str) -> bool:
+        return _digest(text) % (len(available_tools) + 1) == len(available_tools)
+
+    for i in range(5000):
+        text = f"오늘 발표 준비가 걱정돼요 {i}"
+        if general(text) and general(" ".join([text] * segments)):
+            return text
+    raise RuntimeError("일반 답변을 하는 문장을 찾지 못했습니다.")
+
+
+def _sequential(client, audio: np.ndarray) -> dict:
+    started = time.perf_counter()
+    response = client.post(
+        "/api/process-voice/", files={"audio_file": ("turn.wav", _wav(audio), "audio/wav")}
+    ).json()
+    answer_at = time.perf_counter()
+    text = str(response["response"].get("response") or "")
+    with client.stream("POST", "/api/process-tts/", json={"text": text}) as tts:
+        chunks = tts.iter_bytes()
+        next(chunks)
+        first_audio_at = time.perf_counter()
+        for _ in chunks:
+            pass
+    return {
+        "first_audio_ms": round((first_audio_at - started) * 1000, 1),
+        "answer_ms": round((answer_at - started) * 1000, 1),
+    }
+
+
+def _pipelined(client, audio: np.ndarray, tail_silence_s: float, realtime: bool) -> dict:
+    frame = SAMPLE_RATE * FRAME_MS // 1000
+    silence = np.zeros(int(tail_silence_s * SAMPLE_RATE), dtype=np.float32)
+    with client.websocket_connect("/ws/voice?session_id=bench-voice") as ws:
+        started = time.perf_counter()
+        speech_end_at = None
+        for offset in range(0, len(audio) + len(silence), frame):
+            chunk = np.concatenate((audio, silence))[offset : offset + frame]
+            ws.send_bytes(_pcm(chunk))
+            if speech_end_at is None and offset + frame >= len(audio):
+                speech_end_at = time.perf_counter()
+            if realtime:
+                time.sleep(max(0.0, started + (offset + frame) / SAMPLE_RATE - time.perf_counter()))
+
+        first_audio_at = None
+        while True:
+            message = ws.receive()
+            if message.get("bytes") is not None:
+                first_audio_at = first_audio_at or time.perf_counter()
+                continue
+            event = json.loads(message["text"])
+            if event["type"] == "turn_done":
+                return {
+                    "first_audio_ms": round((first_audio_at - speech_end_at) * 1000, 1)
+                    if first_audio_at
+                    else None,
+                    "server": event["metrics"],
+                }
+            if event["type"] == "error":
+                raise RuntimeError(event["detail"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="음성 한 턴의 첫 음성까지 시간: 순차 처리 vs 파이프라인")
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--segments", type=int, default=3, help="발화 하나의 쉼으로 나뉜 구간 수")
+    parser.add_argument("--segment-s", type=float, default=1.2)
+    parser.add_argument("--pause-s", type=float, default=0.5)
+    parser.add_argument("--llm-latency-ms", type=float, default=300)
+    parser.add_argument("--llm-token-delay-ms", type=float, default=20)
+    parser.add_argument("--stt-latency-ms", type=float, default=300)
+    parser.add_argument("--tts-latency-ms", type=float, default=150)
+    parser.add_argument("--no-realtime", action="store_true", help="오디오를 실시간 속도가 아니라 한꺼번에 보냄")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    # 설정은 import 시점에 읽으므로 환경 변수를 먼저 정합니다. 저장소의 DB/캐시는 건드리지 않습니다.
+    workdir = tempfile.mkdtemp(prefix="voice_bench_")
+    os.chdir(workdir)
+    os.environ.update(
+        LLM_BACKEND="fake",
+        EMBEDDING_BACKEND="fake",
+        STT_BACKEND="fake",
+        TTS_BACKEND="fake",
+        INTENT_ROUTER_ENABLED="false",
+        FAKE_LLM_LATENCY_MS=str(args.llm_latency_ms),
+        FAKE_LLM_TOKEN_DELAY_MS=str(args.llm_token_delay_ms),
+        FAKE_STT_LATENCY_MS=str(args.stt_latency_ms),
+        FAKE_TTS_LATENCY_MS=str(args.tts_latency_ms),
+        TTS_CACHE_DIR="",
+    )
+    os.environ["FAKE_STT_TEXT"] = _general_llm_text(args.segments)
+
+    from fastapi.testclient import TestClient
+
+    import main as app_module
+    from services.vad import VAD_TURN_SILENCE_MS
+
+    report = {"config": {**vars(args), "vad_turn_silence_ms": VAD_TURN_SILENCE_MS}}
+    with TestClient(app_module.app) as client:
+        app_module.stt_engine.warmup()
+        rows = {"sequential": [], "pipelined": []}
+        for turn in range(args.turns):
+            # 매 턴 다른 답변이 되도록 TTS 캐시를 비웁니다.
+            app_module.tts_synthesizer.cache._memory.clear()
+            audio = _utterance(args.segments, args.segment_s, args.pause_s, seed=turn)
+            rows["sequential"].append(_sequential(client, audio))
+            app_module.tts_synthesizer.cache._memory.clear()
+            rows["pipelined"].append(
+                _pipelined(client, audio, VAD_TURN_SILENCE_MS / 1000 + 0.3, not args.no_realtime)
+            )
+        for name, turns in rows.items():
+            first = [t["first_audio_ms"] for t in turns]
+            report[name] = {"first_audio_ms_mean": round(float(np.mean(first)), 1), "turns": turns}
+        server = [t["server"]["time_to_first_audio_ms"] for t in rows["pipelined"]]
+        report["pipelined"]["server_time_to_first_audio_ms_mean"] = round(float(np.mean(server)), 1)
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
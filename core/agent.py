@@ -1,6 +1,10 @@
 # core/agent.py
-from langchain_openai import ChatOpenAI
-from typing import Any, Dict
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator, Dict, List
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
 
 from tools.agent_tools import (
     predict_recipient_reaction,
@@ -13,11 +17,28 @@ from tools.interview_tools import (
     evaluate_user_answer,
     find_similar_qa_pairs,
 )
+from core.intent_router import INTENT_ROUTER_ENABLED, IntentRouter
+from core.llm import get_chat_model
+from core.concurrency import run_blocking
+from core.metrics import LLM_PROMPT_TOKENS, record_stage, stage_timer
+from services.session_context import (
+    ASSISTANT,
+    SESSION_ASSISTANT_MAX_CHARS,
+    SESSION_CONTEXT_ENABLED,
+    ContextWindow,
+    session_store,
+)
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# LLM이 여러 툴을 한 번에 호출할 때 툴 하나에 허용하는 최대 실행 시간(초)
+TOOL_CALL_TIMEOUT_S = float(os.getenv("TOOL_CALL_TIMEOUT_S", "60"))
+# 툴 스트리밍 시 소비자가 아직 가져가지 않은 이벤트의 최대 개수.
+# 가득 차면 툴 쪽의 LLM 스트림 읽기가 멈추므로, 느린 소비자 때문에 토큰이 메모리에 쌓이지 않습니다.
+AGENT_STREAM_QUEUE_SIZE = int(os.getenv("AGENT_STREAM_QUEUE_SIZE", "64"))
+
 available_tools = [
     predict_recipient_reaction,
     advise_on_communication_style,
@@ -27,35 +48,324 @@ available_tools = [
     find_similar_qa_pairs,
     find_similar_questions,
 ]
-llm = ChatOpenAI(model=os.getenv("LLM_MODEL_NAME"), temperature=0.7)
-
-llm_with_tools = llm.bind_tools(available_tools)
+_llm_with_tools = None
+_fixed_prefix_tokens: int | None = None
 tool_map = {tool.name: tool for tool in available_tools}
+intent_router = IntentRouter({tool.name: tool.description for tool in available_tools})
+
+
+# 라우팅 LLM의 시스템 프롬프트입니다. 세션, 시각 등 요청마다 바뀌는 값을 넣지 않아야
+# 시스템 프롬프트와 툴 정의가 모든 요청에서 바이트 단위로 같은 앞부분이 되어 제공자의 프롬프트 캐시가 맞습니다.
+ROUTING_SYSTEM_PROMPT = (
+    "당신은 사용자의 대화와 면접 준비를 돕는 AI 어시스턴트입니다. "
+    "사용자의 마지막 메시지에 맞는 도구가 있으면 도구를 호출하고, 없으면 한국어로 직접 답변하세요. "
+    "이전 대화가 주어지면 맥락을 파악하는 데만 참고하세요."
+)
+
+
+def get_llm_with_tools():
+    """툴 선택용 LLM을 반환합니다. import 시점이 아니라 처음 필요할 때 만듭니다."""
+    global _llm_with_tools
+    if _llm_with_tools is None:
+        _llm_with_tools = get_chat_model(temperature=0.7).bind_tools(available_tools)
+    return _llm_with_tools
+
+
+def get_fixed_prefix_tokens() -> int:
+    """모든 요청에 공통인 프롬프트 앞부분(시스템 프롬프트 + 툴 정의)의 토큰 수를 처음 한 번만 셉니다."""
+    global _fixed_prefix_tokens
+    if _fixed_prefix_tokens is None:
+        from langchain_core.utils.function_calling import convert_to_openai_tool
+
+        schemas = json.dumps(
+            [convert_to_openai_tool(tool) for tool in available_tools], ensure_ascii=False
+        )
+        _fixed_prefix_tokens = session_store.count_tokens(ROUTING_SYSTEM_PROMPT + schemas)
+    return _fixed_prefix_tokens
+
+
+async def _session_call(func, *args):
+    """세션 저장소를 디스크에 기록하는 경우에만 스레드 풀에서 실행합니다."""
+    if session_store.persistent:
+        return await run_blocking(func, *args)
+    return func(*args)
+
+
+async def _load_window(session_id: str | None) -> ContextWindow:
+    return await _session_call(session_store.window, session_id)
+
+
+def _routing_messages(user_text: str, window: ContextWindow) -> List[BaseMessage]:
+    """[고정 시스템 프롬프트, 이전 대화 창, 이번 사용자 메시지] 순서로 라우팅 LLM 입력을 만듭니다."""
+    history = [
+        AIMessage(content=turn.content) if turn.role == ASSISTANT else HumanMessage(content=turn.content)
+        for turn in window.turns
+    ]
+    return [SystemMessage(content=ROUTING_SYSTEM_PROMPT), *history, HumanMessage(content=user_text)]
+
+
+def _assistant_text(result: Dict[str, Any]) -> str:
+    """세션 기록에 남길 답변입니다. 툴 결과는 툴 이름과 함께 길이를 제한해 저장합니다."""
+    if result.get("agent_name") == "GeneralLLM":
+        return str(result.get("response") or "")
+    if "error" in result and "response" not in result:
+        return ""
+    body = json.dumps(result.get("response"), ensure_ascii=False, default=str)
+    return f"[{result.get('agent_name')}] {body}"[:SESSION_ASSISTANT_MAX_CHARS]
+
+
+def _prompt_usage(
+    session_id: str | None, user_text: str, window: ContextWindow, ai_message
+) -> Dict[str, Any]:
+    """
+    이번 턴의 라우팅 LLM 프롬프트 토큰 사용량입니다. 제공자가 알려준 값(usage_metadata)이 있으면 그대로 쓰고,
+    없으면(가짜 백엔드 등) 토큰 수를 세어 추정합니다.
+    """
+    fixed_tokens = get_fixed_prefix_tokens()
+    usage_metadata = getattr(ai_message, "usage_metadata", None) or {}
+    if usage_metadata.get("input_tokens"):
+        prompt_tokens = usage_metadata["input_tokens"]
+        cached_tokens = (usage_metadata.get("input_token_details") or {}).get("cache_read", 0)
+        source = "provider"
+    else:
+        prompt_tokens = fixed_tokens + window.tokens + session_store.count_tokens(user_text)
+        cached_tokens = None
+        source = "estimate"
+    LLM_PROMPT_TOKENS.inc(prompt_tokens, kind="prompt")
+    LLM_PROMPT_TOKENS.inc(cached_tokens or 0, kind="cached")
+    LLM_PROMPT_TOKENS.inc(window.trimmed_tokens, kind="trimmed")
+    cacheable = session_store.cacheable_prefix(session_id, window.start, fixed_tokens)
+    session_store.remember_prompt(session_id, window.start, prompt_tokens)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "cached_tokens": cached_tokens,
+        "cacheable_prefix_tokens": min(cacheable, prompt_tokens),
+        "history_turns": len(window.turns),
+        "history_tokens": window.tokens,
+        "trimmed_tokens": window.trimmed_tokens,
+        "usage_source": source,
+    }
+
+
+async def _record_turn(
+    session_id: str | None,
+    user_text: str,
+    window: ContextWindow,
+    result: Dict[str, Any],
+    ai_message=None,
+):
+    if not session_id:
+        return
+    usage = _prompt_usage(session_id, user_text, window, ai_message) if ai_message is not None else None
+    await _session_call(session_store.record_turn, session_id, user_text, _assistant_text(result), usage)
+
+
+async def _route_locally(
+    user_text: str, embedding: List[float] | None = None
+) -> Dict[str, Any] | None:
+    """
+    로컬 임베딩 분류기가 충분히 확신하고 인자까지 뽑아낸 경우 툴 호출 정보를 반환합니다.
+    그 외에는 None을 반환하여 LLM 라우팅을 사용합니다.
+    """
+    if not INTENT_ROUTER_ENABLED:
+        return None
+    try:
+        with stage_timer("routing_local"):
+            decision = await intent_router.aroute(user_text, embedding)
+    except Exception as e:
+        print(f"로컬 라우팅 중 오류 발생, LLM 라우팅을 사용합니다: {e}")
+        return None
 
+    if decision.tool_name is None:
+        return None
+    print(
+        f"[로컬 라우팅] {decision.tool_name} "
+        f"(확신도 {decision.confidence:.2f}, {decision.latency_ms:.1f}ms)"
+    )
+    return {"name": decision.tool_name, "args": decision.args}
 
-async def process_user_request(user_text: str) -> Dict[str, Any]:
+
+def _tool_error(tool_call: Dict[str, Any], error: Exception) -> Dict[str, Any]:
+    if isinstance(error, asyncio.TimeoutError):
+        return {"error": f"툴 '{tool_call['name']}' 실행 시간 초과 ({TOOL_CALL_TIMEOUT_S:g}초)"}
+    return {"error": f"툴 '{tool_call['name']}' 실행 중 오류: {error}"}
+
+
+async def _run_tool_call(tool_call: Dict[str, Any]) -> Dict[str, Any]:
+    """툴 호출 하나를 제한 시간 안에 실행합니다. 실패해도 예외 대신 {"error": ...}를 반환합니다."""
+    chosen_tool = tool_map.get(tool_call["name"])
+    if not chosen_tool:
+        return {"error": f"알 수 없는 도구 '{tool_call['name']}' 호출"}
+
+    tool_args = tool_call["args"]
+    try:
+        with stage_timer(f"tool.{tool_call['name']}"):
+            result = await asyncio.wait_for(chosen_tool.ainvoke(tool_args), TOOL_CALL_TIMEOUT_S)
+    except Exception as e:
+        return _tool_error(tool_call, e)
+    return {
+        "agent_name": tool_call["name"],
+        "request_args": tool_args,
+        "response": result,
+    }
+
+
+def _merge_tool_results(
+    tool_calls: List[Dict[str, Any]], results: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    툴이 하나면 그 결과를 그대로 반환하고, 여럿이면 호출 순서대로 한 응답으로 합칩니다.
+    일부 툴만 실패한 경우 성공한 결과는 response에, 실패한 툴은 errors에 담습니다.
+    """
+    if len(results) == 1:
+        return results[0]
+
+    responses, errors = [], []
+    for tool_call, result in zip(tool_calls, results):
+        if "error" in result:
+            errors.append({"agent_name": tool_call["name"], "error": result["error"]})
+        else:
+            responses.append(result)
+
+    if not responses:
+        return {"error": " / ".join(error["error"] for error in errors), "errors": errors}
+    return {"agent_name": "MultiTool", "response": responses, "errors": errors}
+
+
+async def process_user_request(
+    user_text: str, embedding: List[float] | None = None, session_id: str | None = None
+) -> Dict[str, Any]:
     """
     사용자 입력을 받아 적절한 툴을 실행하거나 LLM 답변을 반환합니다.
     이 함수가 에이전트의 핵심 두뇌 역할을 합니다.
+    LLM이 여러 툴을 호출하면 모두 동시에 실행하여 결과를 하나로 합칩니다.
+    embedding은 배치 처리에서 미리 계산한 user_text의 임베딩입니다. (로컬 라우팅에 사용)
+    session_id가 주어지면 그 세션의 이전 대화를 토큰 예산 안에서 라우팅 LLM에 함께 넘기고, 이번 턴을 기록합니다.
     """
-    ai_message = llm_with_tools.invoke(user_text)
+    session_id = session_id if SESSION_CONTEXT_ENABLED else None
+    window = await _load_window(session_id)
+    local_tool_call = await _route_locally(user_text, embedding)
+    ai_message = None
+
+    if local_tool_call is None:
+        with stage_timer("routing_llm"):
+            ai_message = await get_llm_with_tools().ainvoke(_routing_messages(user_text, window))
 
-    if not ai_message.tool_calls:
-        return {"agent_name": "GeneralLLM", "response": ai_message.content}
+        if not ai_message.tool_calls:
+            result = {"agent_name": "GeneralLLM", "response": ai_message.content}
+            await _record_turn(session_id, user_text, window, result, ai_message)
+            return result
 
-    chosen_tool_call = ai_message.tool_calls[0]
-    chosen_tool = tool_map.get(chosen_tool_call["name"])
+        tool_calls = ai_message.tool_calls
+    else:
+        tool_calls = [local_tool_call]
 
+    results = await asyncio.gather(*(_run_tool_call(call) for call in tool_calls))
+    result = _merge_tool_results(tool_calls, list(results))
+    await _record_turn(session_id, user_text, window, result, ai_message)
+    return result
+
+
+async def _stream_tool_call(
+    tool_call: Dict[str, Any], queue: asyncio.Queue, tag_tokens: bool
+) -> Dict[str, Any]:
+    """툴 하나를 실행하며 이벤트를 queue에 넣고, process_user_request와 같은 형식의 결과를 반환합니다."""
+    chosen_tool = tool_map.get(tool_call["name"])
     if not chosen_tool:
-        return {"error": f"알 수 없는 도구 '{chosen_tool_call['name']}' 호출"}
+        return {"error": f"알 수 없는 도구 '{tool_call['name']}' 호출"}
+
+    tool_args = tool_call["args"]
+    await queue.put({"type": "tool_start", "tool": tool_call["name"], "args": tool_args})
+
+    async def consume() -> Any:
+        output = None
+        async for event in chosen_tool.astream_events(tool_args, version="v2"):
+            if event["event"] == "on_chat_model_stream":
+                content = event["data"]["chunk"].content
+                if content:
+                    token = {"type": "token", "content": content}
+                    if tag_tokens:
+                        token["tool"] = tool_call["name"]
+                    await queue.put(token)
+            elif event["event"] == "on_tool_end" and event["name"] == chosen_tool.name:
+                output = event["data"].get("output")
+        return output
 
     try:
-        tool_args = chosen_tool_call["args"]
-        result = chosen_tool.invoke(tool_args)
-        return {
-            "agent_name": chosen_tool_call["name"],
-            "request_args": tool_args,
-            "response": result,
-        }
+        with stage_timer(f"tool.{tool_call['name']}"):
+            result = await asyncio.wait_for(consume(), TOOL_CALL_TIMEOUT_S)
     except Exception as e:
-        return {"error": f"툴 '{chosen_tool_call['name']}' 실행 중 오류: {e}"}
+        await queue.put({"type": "tool_end", "tool": tool_call["name"], "error": True})
+        return _tool_error(tool_call, e)
+
+    await queue.put({"type": "tool_end", "tool": tool_call["name"]})
+    return {
+        "agent_name": tool_call["name"],
+        "request_args": tool_args,
+        "response": result,
+    }
+
+
+async def stream_user_request(
+    user_text: str, session_id: str | None = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    process_user_request와 같은 라우팅/툴 실행을 하되, 생성되는 토큰과 툴 이벤트를 순서대로 흘려보냅니다.
+
+    이벤트 형식:
+        {"type": "token", "content": ...}                     LLM이 생성한 토큰 조각
+                                                              (툴이 여럿이면 "tool"에 어느 툴의 토큰인지 담깁니다)
+        {"type": "tool_start", "tool": ..., "args": ...}      툴 실행 시작
+        {"type": "tool_end", "tool": ...}                     툴 실행 종료 (실패 시 "error": True)
+        {"type": "final", "result": {...}}                    process_user_request와 같은 형식의 최종 결과
+    """
+    session_id = session_id if SESSION_CONTEXT_ENABLED else None
+    window = await _load_window(session_id)
+    local_tool_call = await _route_locally(user_text)
+    ai_message = None
+
+    if local_tool_call is None:
+        started = time.perf_counter()
+        async for chunk in get_llm_with_tools().astream(_routing_messages(user_text, window)):
+            ai_message = chunk if ai_message is None else ai_message + chunk
+            # 툴 호출이 아닌 일반 답변일 때만 라우팅 단계의 토큰을 바로 내보냅니다.
+            if chunk.content and not ai_message.tool_call_chunks:
+                yield {"type": "token", "content": chunk.content}
+        record_stage("routing_llm", time.perf_counter() - started)
+
+        if ai_message is None or not ai_message.tool_calls:
+            content = ai_message.content if ai_message is not None else ""
+            result = {"agent_name": "GeneralLLM", "response": content}
+            await _record_turn(session_id, user_text, window, result, ai_message)
+            yield {"type": "final", "result": result}
+            return
+
+        tool_calls = ai_message.tool_calls
+    else:
+        tool_calls = [local_tool_call]
+
+    # 툴들을 동시에 실행하고, 각 툴이 내는 이벤트를 도착하는 순서대로 내보냅니다.
+    queue: asyncio.Queue = asyncio.Queue(maxsize=AGENT_STREAM_QUEUE_SIZE)
+    tag_tokens = len(tool_calls) > 1
+    gathered = asyncio.ensure_future(
+        asyncio.gather(*(_stream_tool_call(call, queue, tag_tokens) for call in tool_calls))
+    )
+    getter: asyncio.Future | None = None
+    try:
+        while not (gathered.done() and queue.empty()):
+            getter = asyncio.ensure_future(queue.get())
+            await asyncio.wait({getter, gathered}, return_when=asyncio.FIRST_COMPLETED)
+            if getter.done():
+                yield getter.result()
+            else:
+                getter.cancel()
+        results = gathered.result()
+    finally:
+        # 소비자가 기다리는 도중에 스트림을 닫으면 대기 중인 queue.get()도 함께 취소합니다.
+        if getter is not None:
+            getter.cancel()
+        gathered.cancel()
+
+    result = _merge_tool_results(tool_calls, list(results))
+    await _record_turn(session_id, user_text, window, result, ai_message)
+    yield {"type": "final", "result": result}
@@ -0,0 +1,56 @@
+# core/concurrency.py
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, TypeVar
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+BLOCKING_POOL_MAX_WORKERS = int(os.getenv("BLOCKING_POOL_MAX_WORKERS", "8"))
+
+# 임베딩, ChromaDB 조회처럼 이벤트 루프를 막는 작업 전용 스레드 풀 (크기 제한)
+_blocking_executor = ThreadPoolExecutor(
+    max_workers=BLOCKING_POOL_MAX_WORKERS, thread_name_prefix="blocking-pool"
+)
+
+
+async def run_blocking(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    블로킹 함수를 전용 스레드 풀에서 실행하고, 이벤트 루프는 다른 요청을 계속 처리합니다.
+    현재 컨텍스트(요청별 단계 시간 등)를 복사해 넘기므로 스레드 안의 측정도 요청에 기록됩니다.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        _blocking_executor, functools.partial(context.run, func, *args, **kwargs)
+    )
+
+
+async def map_bounded(
+    func: Callable[[T], Awaitable[R]], items: Iterable[T], limit: int
+) -> AsyncIterator[R]:
+    """
+    items 각각에 func를 최대 limit개까지 동시에 실행하고, 결과를 입력 순서대로 내보냅니다.
+    앞 항목이 끝나는 대로 바로 내보내므로 스트리밍 응답에 그대로 쓸 수 있습니다.
+    소비가 중간에 멈추면(클라이언트 연결 끊김 등) 남은 작업은 취소됩니다.
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(item: T) -> R:
+        async with semaphore:
+            return await func(item)
+
+    tasks = [asyncio.ensure_future(run(item)) for item in items]
+    try:
+        for task in tasks:
+            yield await task
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,228 @@
+# core/fake_backends.py
+"""
+네트워크나 모델 없이 성능을 측정하기 위한 결정적(deterministic) 가짜 백엔드입니다.
+LLM_BACKEND / EMBEDDING_BACKEND / STT_BACKEND / TTS_BACKEND 환경 변수를 "fake"로 설정하면 사용됩니다.
+지연 시간은 FAKE_*_LATENCY_MS 환경 변수로 조절합니다.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import time
+from typing import Any, AsyncIterator, Iterator, List, Sequence
+
+import numpy as np
+from dotenv import load_dotenv
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+load_dotenv()
+
+FAKE_LLM_LATENCY_MS = float(os.getenv("FAKE_LLM_LATENCY_MS", "300"))
+FAKE_LLM_TOKEN_DELAY_MS = float(os.getenv("FAKE_LLM_TOKEN_DELAY_MS", "10"))
+FAKE_LLM_RESPONSE_TOKENS = int(os.getenv("FAKE_LLM_RESPONSE_TOKENS", "40"))
+FAKE_EMBEDDING_DIM = int(os.getenv("FAKE_EMBEDDING_DIM", "1024"))
+FAKE_EMBEDDING_LATENCY_MS = float(os.getenv("FAKE_EMBEDDING_LATENCY_MS", "5"))
+FAKE_STT_LATENCY_MS = float(os.getenv("FAKE_STT_LATENCY_MS", "300"))
+FAKE_STT_TEXT = os.getenv("FAKE_STT_TEXT", "자기소개 관련 면접 질문 3개 찾아줘")
+# 오디오 1초당 추가로 걸리는 인식 시간(초). 긴 녹음일수록 오래 걸리는 Whisper를 흉내 냅니다.
+FAKE_STT_SECONDS_PER_AUDIO_S = float(os.getenv("FAKE_STT_SECONDS_PER_AUDIO_S", "0"))
+FAKE_TTS_LATENCY_MS = float(os.getenv("FAKE_TTS_LATENCY_MS", "100"))
+
+# 페르소나 분석 결과를 파싱하는 쪽(_parse_persona_response)이 기대하는 형식
+_PERSONA_ANSWER = """### 분석 결과
+- **당신의 대화 페르소나**: 별들의 궤도를 기록하는 천문학자
+- **판단 근거**: (가짜 응답) 체계적이고 목표 지향적인 표현이 반복됩니다.
+- **당신은 이런 점이 멋져요!**: (가짜 응답) 차분하게 계획을 세우는 점이 멋져요."""
+
+
+def _digest(text: str) -> int:
+    return int.from_bytes(hashlib.sha1(text.encode("utf-8")).digest()[:8], "big")
+
+
+def _fake_args(parameters: dict, prompt: str) -> dict:
+    """툴 인자 스키마를 보고 타입에 맞는 값을 채웁니다."""
+    args = {}
+    for name, schema in parameters.get("properties", {}).items():
+        if schema.get("type") == "integer":
+            args[name] = 3
+        elif name in parameters.get("required", []) or schema.get("type") == "string":
+            args[name] = prompt[:100]
+    return args
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    ChatOpenAI 대신 쓰는 가짜 채팅 모델입니다. 첫 토큰까지 latency_ms, 이후 토큰마다 token_delay_ms가 걸립니다.
+    bind_tools로 툴이 묶여 있으면 프롬프트 해시에 따라 툴 하나를 호출하거나 일반 답변을 합니다.
+    """
+
+    latency_ms: float = FAKE_LLM_LATENCY_MS
+    token_delay_ms: float = FAKE_LLM_TOKEN_DELAY_MS
+    response_tokens: int = FAKE_LLM_RESPONSE_TOKENS
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any):
+        from langchain_core.utils.function_calling import convert_to_openai_tool
+
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    def get_num_tokens(self, text: str) -> int:
+        return max(1, len(text) // 2)
+
+    def _respond(self, messages: List[BaseMessage], tools: List[dict] | None) -> AIMessage:
+        prompt = str(messages[-1].content)
+        digest = _digest(prompt)
+
+        if tools:
+            choice = digest % (len(tools) + 1)
+            if choice < len(tools):
+                function = tools[choice]["function"]
+                return AIMessage(
+                    content="",
+                    tool_calls=[
+                        {
+                            "name": function["name"],
+                            "args": _fake_args(function.get("parameters", {}), prompt),
+                            "id": f"call_{digest:016x}",
+                        }
+                    ],
+                )
+
+        if "당신의 대화 페르소나" in prompt:
+            return AIMessage(content=_PERSONA_ANSWER)
+        # 문장 단위 처리(음성 합성 등)를 시험할 수 있도록 8단어마다 문장을 끝냅니다.
+        words = " ".join(
+            f"응답{i}." if i % 8 == 7 else f"응답{i}" for i in range(max(0, self.response_tokens - 2))
+        )
+        return AIMessage(content=f"(가짜 응답) {words}".strip())
+
+    def _total_delay_s(self, message: AIMessage) -> float:
+        tokens = len(str(message.content).split())
+        return (self.latency_ms + tokens * self.token_delay_ms) / 1000
+
+    def _tool_call_chunk(self, message: AIMessage) -> ChatGenerationChunk:
+        return ChatGenerationChunk(
+            message=AIMessageChunk(
+                content="",
+                tool_call_chunks=[
+                    {
+                        "name": call["name"],
+                        "args": json.dumps(call["args"], ensure_ascii=False),
+                        "id": call["id"],
+                        "index": index,
+                    }
+                    for index, call in enumerate(message.tool_calls)
+                ],
+            )
+        )
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        message = self._respond(messages, kwargs.get("tools"))
+        time.sleep(self._total_delay_s(message))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        message = self._respond(messages, kwargs.get("tools"))
+        await asyncio.sleep(self._total_delay_s(message))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        message = self._respond(messages, kwargs.get("tools"))
+        time.sleep(self.latency_ms / 1000)
+        if message.tool_calls:
+            yield self._tool_call_chunk(message)
+            return
+        for index, word in enumerate(str(message.content).split()):
+            if index:
+                time.sleep(self.token_delay_ms / 1000)
+            token = word if index == 0 else f" {word}"
+            if run_manager:
+                run_manager.on_llm_new_token(token)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    async def _astream(
+        self, messages, stop=None, run_manager=None, **kwargs
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        message = self._respond(messages, kwargs.get("tools"))
+        await asyncio.sleep(self.latency_ms / 1000)
+        if message.tool_calls:
+            yield self._tool_call_chunk(message)
+            return
+        for index, word in enumerate(str(message.content).split()):
+            if index:
+                await asyncio.sleep(self.token_delay_ms / 1000)
+            token = word if index == 0 else f" {word}"
+            if run_manager:
+                await run_manager.on_llm_new_token(token)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+
+class FakeEmbeddingModel:
+    """SentenceTransformer 대신 쓰는 가짜 임베딩 모델입니다. 같은 텍스트는 항상 같은 단위 벡터가 됩니다."""
+
+    def __init__(self, dim: int = FAKE_EMBEDDING_DIM, latency_ms: float = FAKE_EMBEDDING_LATENCY_MS):
+        self.dim = dim
+        self.latency_ms = latency_ms
+
+    def encode(self, texts: List[str], batch_size: int = 32, **kwargs) -> np.ndarray:
+        time.sleep(self.latency_ms / 1000)
+        vectors = np.stack(
+            [np.random.default_rng(_digest(text)).standard_normal(self.dim) for text in texts]
+        ).astype(np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+class FakeSpeechToText:
+    """Whisper 대신 쓰는 가짜 음성 인식입니다. 오디오 내용과 관계없이 고정 문장을 반환합니다."""
+
+    def __init__(
+        self,
+        latency_ms: float = FAKE_STT_LATENCY_MS,
+        text: str = FAKE_STT_TEXT,
+        seconds_per_audio_s: float = FAKE_STT_SECONDS_PER_AUDIO_S,
+    ):
+        self.latency_ms = latency_ms
+        self.text = text
+        self.seconds_per_audio_s = seconds_per_audio_s
+
+    def __call__(self, audio: np.ndarray, sample_rate: int = 16000) -> str:
+        time.sleep(self.latency_ms / 1000 + self.seconds_per_audio_s * len(audio) / sample_rate)
+        return self.text
+
+
+def fake_decode_audio_bytes(data: bytes, sr: int = 16000) -> np.ndarray:
+    """
+    ffmpeg 없이 WAV(PCM 16bit)만 디코딩합니다. 가짜 음성 인식과 함께 벤치마크에서 씁니다.
+    다른 샘플레이트는 선형 보간으로 맞춥니다. 실제 디코더처럼 읽을 수 없는 입력이면 ValueError를 던집니다.
+    """
+    import io
+    import wave
+
+    try:
+        with wave.open(io.BytesIO(data), "rb") as f:
+            channels, rate = f.getnchannels(), f.getframerate()
+            frames = f.readframes(f.getnframes())
+    except (wave.Error, EOFError) as e:
+        raise ValueError(f"오디오 디코딩 실패: {e}") from e
+    samples = np.frombuffer(frames, dtype="<i2").astype(np.float32) / 32768.0
+    audio = samples.reshape(-1, channels).mean(axis=1)
+    if rate != sr and len(audio):
+        positions = np.arange(int(len(audio) * sr / rate)) * rate / sr
+        audio = np.interp(positions, np.arange(len(audio)), audio).astype(np.float32)
+    return audio
+
+
+class FakeTTSBackend:
+    """gTTS 대신 쓰는 가짜 음성 합성입니다. 텍스트 해시로 만든 바이트를 반환합니다."""
+
+    def __init__(self, latency_ms: float = FAKE_TTS_LATENCY_MS):
+        self.latency_ms = latency_ms
+
+    def synthesize(self, text: str, lang: str) -> bytes:
+        time.sleep(self.latency_ms / 1000)
+        return hashlib.sha256(f"{lang}:{text}".encode("utf-8")).digest() * 64
@@ -0,0 +1,242 @@
+# core/intent_router.py
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+from dotenv import load_dotenv
+
+from core.concurrency import run_blocking
+from db.interview_index import INTERVIEW_MAX_RESULTS
+from services.embedding_service import aembed_text, embed_text, embed_texts
+
+load_dotenv()
+
+INTENT_ROUTER_ENABLED = os.getenv("INTENT_ROUTER_ENABLED", "true").lower() == "true"
+# 이 값 이상으로 확신할 때만 LLM 라우팅을 건너뜁니다.
+INTENT_ROUTER_THRESHOLD = float(os.getenv("INTENT_ROUTER_THRESHOLD", "0.6"))
+
+# 툴 설명 외에 분류기 학습에 쓰는 예시 발화. "GeneralLLM"은 툴이 필요 없는 일반 대화입니다.
+INTENT_EXAMPLES: Dict[str, List[str]] = {
+    "predict_recipient_reaction": [
+        "내성적인 친구가 갑자기 단체 모임에 초대받으면 어떤 기분일까?",
+        "예민한 팀장님이 회의 중에 지적을 받으면 어떻게 생각할까",
+        "완벽주의 성향인 동료가 마감이 미뤄졌다는 소식을 들으면 어떤 감정일까",
+        "소심한 후배가 발표 중에 실수하면 속으로 어떤 생각을 할까?",
+        "자존심 강한 친구가 내기에서 지면 어떻게 느낄까",
+    ],
+    "advise_on_communication_style": [
+        "부장님께 '내일 회의 빠져도 될까요?'라고 보내도 괜찮을까?",
+        "처음 본 거래처 담당자에게 이렇게 메일 보내도 돼? '자료 빨리 보내주세요'",
+        "교수님한테 '과제 기한 연장해주세요'라고 말해도 실례가 아닐까",
+        "헤어진 연인에게 '잘 지내?'라고 문자 보내도 될까",
+        "선배한테 이렇게 말하면 기분 나빠하지 않을까? '그건 아닌 것 같아요'",
+    ],
+    "get_mbti_communication_advice": [
+        "INTJ인 친구가 약속을 갑자기 취소당하면 어떻게 생각해?",
+        "ENFP 상사한테 보고할 때 어떻게 말하는 게 좋아?",
+        "ISTJ 동료가 계획 없는 여행을 제안받으면 어떤 반응일까",
+        "ESFJ 엄마한테 '나 이번 명절에 못 가'라고 말하면 어떻게 생각할까",
+        "INFP인 남자친구와 싸웠을 때 어떻게 대화해야 할까",
+    ],
+    "refine_text_content": [
+        "이 글 좀 부드럽게 바꿔줘: 내일까지 자료 안 보내면 곤란합니다",
+        "다음 문장 오타 수정해줘 '안녕하세여 저는 신입사원 입니다'",
+        "이 내용 요약해줘: 오늘 회의에서는 예산과 일정, 인력 배치에 대해 논의했다",
+        "문장을 매끄럽게 다듬어줘 - 저는 그 일을 했고 그래서 그 일은 잘 되었고 좋았습니다",
+        "맞춤법 좀 봐줘: 어의없네 진짜 왠만하면 참을려고 했는데",
+    ],
+    "evaluate_user_answer": [
+        "질문: 자기소개 해주세요 답변: 저는 책임감이 강한 개발자입니다. 제 답변 평가해줘",
+        "면접 질문 '지원동기가 무엇인가요'에 이렇게 답했는데 피드백 부탁해: 회사의 비전에 공감해서 지원했습니다",
+        "내 면접 답변 어때? 질문은 장단점이고 답변은 장점은 꼼꼼함, 단점은 느림이야",
+        "이 면접 답변 STAR 기법으로 평가해줘",
+        "제가 한 면접 대답 좀 봐주세요. 질문: 갈등 해결 경험 답변: 팀원과 대화로 풀었습니다",
+    ],
+    "find_similar_qa_pairs": [
+        "자기소개 관련 면접 질문이랑 모범 답변 보여줘",
+        "지원동기 질문에 대한 예시 답변 찾아줘",
+        "리더십 경험 질문과 답변 예시 3개 알려줘",
+        "협업 관련 면접 질문과 답변 쌍 보여줘",
+        "입사 후 포부 질문의 모범 답안 예시 찾아줘",
+    ],
+    "find_similar_questions": [
+        "자기소개 관련 면접 질문 찾아줘",
+        "장단점에 대해 나올 만한 면접 질문 알려줘",
+        "갈등 해결과 비슷한 면접 질문 5개 뽑아줘",
+        "지원동기 관련 예상 질문 목록 보여줘",
+        "팀워크 주제로 나올 수 있는 질문 뭐가 있어?",
+    ],
+    "GeneralLLM": [
+        "안녕 반가워",
+        "오늘 날씨 어때?",
+        "너는 누구야?",
+        "고마워 도움이 많이 됐어",
+        "심심한데 재미있는 얘기 해줘",
+    ],
+}
+
+# 한글 조사가 바로 붙는 경우("INTJ인")가 많아 \b 대신 영문자 경계만 확인합니다.
+_MBTI_PATTERN = re.compile(r"(?<![A-Za-z])([EI][NS][TF][JP])(?![A-Za-z])", re.I)
+_COUNT_PATTERN = re.compile(r"(\d+)\s*(?:개|가지)")
+_QUOTED_PATTERN = re.compile(r"[\"'“‘「『]([^\"'”’」』]+)[\"'”’」』]")
+_REFINE_MODES = [
+    ("오타수정", re.compile(r"오타|맞춤법|띄어쓰기|교정")),
+    ("요약", re.compile(r"요약|줄여")),
+    ("부드럽게", re.compile(r"부드럽게|정중하게|공손하게")),
+    ("매끄럽게", re.compile(r"매끄럽게|자연스럽게|다듬")),
+]
+# 검색 주제를 뽑을 때 지울 요청 표현들
+_SEARCH_FILLERS = re.compile(
+    r"(관련(된)?|에\s*대한|대해|나올\s*(만한|수\s*있는)|몇\s*개|면접|예상|질문(이랑|과|의)?|답변|답안|모범|예시|쌍|목록|"
+    r"찾아\s*줘|알려\s*줘|보여\s*줘|뽑아\s*줘|추천해\s*줘|뭐가\s*있어\??|\d+\s*(개|가지)|주제로|수\s*있는|"
+    r"비슷한|유사한|좀)"
+)
+
+_EVALUATION_REQUEST_SUFFIX = re.compile(
+    r"[\s.]*(제\s*답변\s*)?(평가|피드백)\s*(좀\s*)?(부탁해|부탁드려요|해\s*줘|줘|해\s*주세요)[.!?]*\s*$"
+)
+
+
+def _extract_search_args(text: str) -> Dict[str, Any] | None:
+    topic = " ".join(_SEARCH_FILLERS.sub(" ", text).split()).strip(" ?.,")
+    if not topic:
+        return None
+    args: Dict[str, Any] = {"topic": topic}
+    count = _COUNT_PATTERN.search(text)
+    if count:
+        args["n"] = min(max(int(count.group(1)), 1), INTERVIEW_MAX_RESULTS)
+    return args
+
+
+def _extract_refine_args(text: str) -> Dict[str, Any] | None:
+    mode = next((name for name, pattern in _REFINE_MODES if pattern.search(text)), None)
+    quoted = _QUOTED_PATTERN.search(text)
+    if quoted:
+        target = quoted.group(1)
+    elif ":" in text:
+        target = text.split(":", 1)[1]
+    else:
+        return None
+    target = target.strip()
+    if not mode or not target:
+        return None
+    return {"text_to_refine": target, "refinement_mode": mode}
+
+
+def _extract_mbti_args(text: str) -> Dict[str, Any] | None:
+    mbti = _MBTI_PATTERN.search(text)
+    if not mbti:
+        return None
+    args = {"mbti_type": mbti.group(1).upper(), "situation": text}
+    quoted = _QUOTED_PATTERN.search(text)
+    if quoted:
+        args["my_message"] = quoted.group(1).strip()
+    return args
+
+
+def _extract_evaluation_args(text: str) -> Dict[str, Any] | None:
+    match = re.search(r"질문\s*[:：]\s*(.+?)\s*답변\s*[:：]\s*(.+)", text, re.S)
+    if not match:
+        return None
+    answer = _EVALUATION_REQUEST_SUFFIX.sub("", match.group(2)).strip()
+    return {"question": match.group(1).strip(), "user_answer": answer}
+
+
+# 인자를 확실히 뽑아낼 수 없는 툴은 LLM 라우팅으로 넘깁니다.
+_ARG_EXTRACTORS: Dict[str, Callable[[str], Dict[str, Any] | None]] = {
+    "find_similar_questions": _extract_search_args,
+    "find_similar_qa_pairs": _extract_search_args,
+    "refine_text_content": _extract_refine_args,
+    "get_mbti_communication_advice": _extract_mbti_args,
+    "evaluate_user_answer": _extract_evaluation_args,
+}
+
+
+@dataclass
+class RouteDecision:
+    tool_name: str | None  # None이면 LLM 라우팅으로 넘깁니다.
+    args: Dict[str, Any] | None
+    label: str
+    confidence: float
+    latency_ms: float
+
+
+class IntentRouter:
+    """
+    툴 설명과 예시 발화의 임베딩으로 학습한 분류기로 사용자 입력을 로컬에서 라우팅합니다.
+    확신도가 낮거나 인자를 뽑지 못하면 tool_name=None을 반환하여 LLM 라우팅으로 넘깁니다.
+    """
+
+    def __init__(
+        self,
+        tool_descriptions: Dict[str, str],
+        examples: Dict[str, List[str]] = INTENT_EXAMPLES,
+        threshold: float = INTENT_ROUTER_THRESHOLD,
+    ):
+        self.tool_descriptions = tool_descriptions
+        self.examples = examples
+        self.threshold = threshold
+        self._classifier = None
+        self._fit_lock = threading.Lock()
+
+    def _fit(self):
+        from sklearn.linear_model import LogisticRegression
+
+        texts, labels = [], []
+        for label, utterances in self.examples.items():
+            description = self.tool_descriptions.get(label)
+            for text in ([description] if description else []) + utterances:
+                texts.append(text)
+                labels.append(label)
+
+        classifier = LogisticRegression(max_iter=1000, C=10.0)
+        classifier.fit(np.asarray(embed_texts(texts), dtype=np.float32), labels)
+        return classifier
+
+    def _get_classifier(self):
+        if self._classifier is None:
+            with self._fit_lock:
+                if self._classifier is None:
+                    self._classifier = self._fit()
+        return self._classifier
+
+    def warmup(self):
+        """서버 시작 시 분류기를 미리 학습합니다."""
+        self._get_classifier()
+
+    def _decide(self, user_text: str, embedding: List[float], started: float) -> RouteDecision:
+        classifier = self._get_classifier()
+        probabilities = classifier.predict_proba(np.asarray([embedding], dtype=np.float32))[0]
+        best = int(np.argmax(probabilities))
+        label, confidence = str(classifier.classes_[best]), float(probabilities[best])
+
+        tool_name, args = None, None
+        if confidence >= self.threshold and label in _ARG_EXTRACTORS:
+            args = _ARG_EXTRACTORS[label](user_text)
+            if args is not None:
+                tool_name = label
+
+        return RouteDecision(
+            tool_name=tool_name,
+            args=args,
+            label=label,
+            confidence=confidence,
+            latency_ms=(time.perf_counter() - started) * 1000,
+        )
+
+    def route(self, user_text: str) -> RouteDecision:
+        started = time.perf_counter()
+        return self._decide(user_text, embed_text(user_text, use_cache=False), started)
+
+    async def aroute(self, user_text: str, embedding: List[float] | None = None) -> RouteDecision:
+        """embedding을 넘기면(배치 처리에서 미리 계산한 경우) 다시 임베딩하지 않습니다."""
+        started = time.perf_counter()
+        if self._classifier is None:
+            await run_blocking(self._get_classifier)
+        if embedding is None:
+            embedding = await aembed_text(user_text, use_cache=False)
+        return self._decide(user_text, embedding, started)
@@ -0,0 +1,538 @@
+# core/llm.py
+"""
+모든 LLM 호출이 거치는 게이트웨이입니다.
+
+채팅 모델(ChatOpenAI)은 (모델, temperature)별로 하나씩만 만들고, 모두 같은 HTTP 클라이언트를 공유합니다.
+HTTP 클라이언트의 전송 계층(transport)에서 다음을 처리하므로 호출하는 쪽(invoke, astream, bind_tools 등)은 바뀌지 않습니다.
+
+  - keep-alive 연결 풀 공유 (LLM_POOL_*)
+  - 전체/모델별 동시 요청 수 제한 (LLM_MAX_CONCURRENCY, LLM_MODEL_CONCURRENCY)
+    전체 제한은 우선순위 스케줄러(core/scheduler.py)가 클래스별 가중치와 상한에 따라 나눠 줍니다.
+  - 429/5xx 응답과 연결 실패 시 지터(jitter)를 준 지수 백오프 재시도 (LLM_MAX_RETRIES)
+  - 같은 요청이 동시에 여러 번 들어오면 한 번만 보내고 응답을 나눠 씀 (LLM_SINGLE_FLIGHT, 스트리밍 제외)
+
+OPENAI_BASE_URL을 로컬 모의 서버(benchmarks/mock_openai_server.py)로 바꾸면 네트워크 없이 시험할 수 있습니다.
+"""
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Tuple
+
+import httpx
+from dotenv import load_dotenv
+
+from core.metrics import LLM_GATEWAY_EVENTS, record_stage
+from core.scheduler import PriorityScheduler
+
+load_dotenv()
+
+# "openai"(기본) 또는 "fake"(벤치마크용 가짜 모델, core/fake_backends.py)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "openai").lower()
+
+# 프로세스 전체에서 동시에 보낼 수 있는 LLM 요청 수와, 모델별 제한("gpt-4o=4,gpt-4o-mini=12")
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_MODEL_CONCURRENCY = os.getenv("LLM_MODEL_CONCURRENCY", "")
+# 재시도 횟수와 백오프 구간(초). 실제 대기 시간은 0 ~ min(최대, 기본 × 2^시도) 사이의 무작위 값입니다.
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_RETRY_BASE_DELAY_S = float(os.getenv("LLM_RETRY_BASE_DELAY_S", "0.5"))
+LLM_RETRY_MAX_DELAY_S = float(os.getenv("LLM_RETRY_MAX_DELAY_S", "8"))
+LLM_SINGLE_FLIGHT = os.getenv("LLM_SINGLE_FLIGHT", "true").lower() == "true"
+LLM_POOL_MAX_CONNECTIONS = int(os.getenv("LLM_POOL_MAX_CONNECTIONS", "32"))
+LLM_POOL_MAX_KEEPALIVE = int(os.getenv("LLM_POOL_MAX_KEEPALIVE", "16"))
+LLM_POOL_KEEPALIVE_EXPIRY_S = float(os.getenv("LLM_POOL_KEEPALIVE_EXPIRY_S", "60"))
+LLM_REQUEST_TIMEOUT_S = float(os.getenv("LLM_REQUEST_TIMEOUT_S", "60"))
+
+_RETRY_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+# 응답 본문을 이미 풀어서 나눠 쓰므로, 인코딩/길이 관련 헤더는 다시 만들지 않습니다.
+_HOP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+
+def _parse_model_limits(spec: str) -> Dict[str, int]:
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        model, _, limit = item.partition("=")
+        limits[model.strip()] = int(limit)
+    return limits
+
+
+class _Semaphore:
+    """
+    스레드(동기 invoke)와 이벤트 루프(ainvoke/astream)가 함께 쓰는 세마포어입니다.
+    반환된 자리는 대기 순서대로 다음 대기자에게 바로 넘깁니다.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_use = 0
+        self._lock = threading.Lock()
+        self._waiters: deque = deque()
+
+    def acquire(self):
+        with self._lock:
+            if self.in_use < self.limit and not self._waiters:
+                self.in_use += 1
+                return
+            event = threading.Event()
+            self._waiters.append(event)
+        event.wait()
+
+    async def aacquire(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self.in_use < self.limit and not self._waiters:
+                self.in_use += 1
+                return
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+        try:
+            await waiter[1]
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    raise
+            # 자리를 이미 넘겨받았다면 돌려줍니다. (future가 취소됐으면 _wake에서 돌려줍니다)
+            if not waiter[1].cancelled():
+                self.release()
+            raise
+
+    def _wake(self, future: asyncio.Future):
+        if future.done():
+            self.release()
+        else:
+            future.set_result(None)
+
+    def release(self):
+        with self._lock:
+            if not self._waiters:
+                self.in_use -= 1
+                return
+            waiter = self._waiters.popleft()
+        if isinstance(waiter, threading.Event):
+            waiter.set()
+        else:
+            loop, future = waiter
+            loop.call_soon_threadsafe(self._wake, future)
+
+
+class LLMGateway:
+    """동시 요청 제한, 재시도, 중복 요청 합치기 정책과 통계를 담습니다. 동기/비동기 transport가 함께 씁니다."""
+
+    def __init__(
+        self,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        model_limits: Dict[str, int] | None = None,
+        max_retries: int = LLM_MAX_RETRIES,
+        base_delay_s: float = LLM_RETRY_BASE_DELAY_S,
+        max_delay_s: float = LLM_RETRY_MAX_DELAY_S,
+        single_flight: bool = LLM_SINGLE_FLIGHT,
+    ):
+        self.max_concurrency = max_concurrency
+        self.model_limits = (
+            _parse_model_limits(LLM_MODEL_CONCURRENCY) if model_limits is None else model_limits
+        )
+        self.max_retries = max_retries
+        self.base_delay_s = base_delay_s
+        self.max_delay_s = max_delay_s
+        self.single_flight = single_flight
+        # 전체 동시 요청 제한은 우선순위 클래스(interactive/batch/background)별로 나눠 줍니다.
+        self._global = PriorityScheduler("llm", max_concurrency)
+        self._models: Dict[str, _Semaphore] = {}
+        self._in_flight: Dict[Tuple[str, bytes], Future] = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "upstream_requests": 0,
+            "retries": 0,
+            "coalesced": 0,
+            "rate_limited": 0,
+            "server_errors": 0,
+            "failures": 0,
+            "queue_wait_s": 0.0,
+        }
+
+    def _count(self, key: str, amount: float = 1):
+        with self._lock:
+            self._stats[key] += amount
+        if key != "queue_wait_s":
+            LLM_GATEWAY_EVENTS.inc(amount, event=key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["queue_wait_s"] = round(stats["queue_wait_s"], 3)
+        stats["in_use"] = self._global.in_use
+        stats["max_concurrency"] = self.max_concurrency
+        stats["in_flight_keys"] = len(self._in_flight)
+        return stats
+
+    def _model_semaphore(self, model: str) -> _Semaphore:
+        with self._lock:
+            semaphore = self._models.get(model)
+            if semaphore is None:
+                limit = self.model_limits.get(model, self.max_concurrency)
+                semaphore = self._models[model] = _Semaphore(limit)
+        return semaphore
+
+    def acquire(self, model: str) -> Callable[[], None]:
+        """
+        자리를 얻을 때까지 기다린 뒤, 한 번만 호출해야 하는 반환 함수를 돌려줍니다.
+        전체 자리는 우선순위 스케줄러에서 먼저 받고(대화 요청이 앞서도록), 그다음 모델별 자리를 받습니다.
+        """
+        started = time.perf_counter()
+        release_global = self._global.acquire()
+        model_semaphore = self._model_semaphore(model)
+        try:
+            model_semaphore.acquire()
+        except BaseException:
+            release_global()
+            raise
+        self._record_wait(time.perf_counter() - started)
+        return self._releaser(release_global, model_semaphore)
+
+    async def aacquire(self, model: str) -> Callable[[], None]:
+        started = time.perf_counter()
+        release_global = await self._global.aacquire()
+        model_semaphore = self._model_semaphore(model)
+        try:
+            await model_semaphore.aacquire()
+        except BaseException:
+            release_global()
+            raise
+        self._record_wait(time.perf_counter() - started)
+        return self._releaser(release_global, model_semaphore)
+
+    def _record_wait(self, seconds: float):
+        self._count("queue_wait_s", seconds)
+        record_stage("llm_queue", seconds)
+
+    def _releaser(
+        self, release_global: Callable[[], None], model_semaphore: _Semaphore
+    ) -> Callable[[], None]:
+        released = False
+
+        def release():
+            nonlocal released
+            if not released:
+                released = True
+                model_semaphore.release()
+                release_global()
+
+        return release
+
+    def should_retry(self, response: httpx.Response | None, attempt: int) -> bool:
+        """response가 None이면 연결 실패입니다."""
+        if response is not None:
+            if response.status_code == 429:
+                self._count("rate_limited")
+            elif response.status_code >= 500:
+                self._count("server_errors")
+            if response.status_code not in _RETRY_STATUS_CODES:
+                return False
+        if attempt >= self.max_retries:
+            self._count("failures")
+            return False
+        self._count("retries")
+        return True
+
+    def backoff_s(self, response: httpx.Response | None, attempt: int) -> float:
+        """지터를 준 지수 백오프. 서버가 Retry-After를 주면 그보다 일찍 다시 보내지 않습니다."""
+        delay = random.uniform(0, min(self.max_delay_s, self.base_delay_s * 2**attempt))
+        retry_after = _retry_after_s(response) if response is not None else None
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay_s))
+        return delay
+
+    def join_in_flight(self, key: Tuple[str, bytes]) -> Tuple[Future, bool]:
+        """(결과를 받을 future, 직접 요청을 보내야 하는지)를 반환합니다."""
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self._stats["coalesced"] += 1
+                LLM_GATEWAY_EVENTS.inc(event="coalesced")
+                return future, False
+            future = self._in_flight[key] = Future()
+            return future, True
+
+    def finish_in_flight(self, key: Tuple[str, bytes]):
+        with self._lock:
+            self._in_flight.pop(key, None)
+
+
+def _retry_after_s(response: httpx.Response) -> float | None:
+    value = response.headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+def _describe(request: httpx.Request) -> Tuple[str, bool]:
+    """요청 본문에서 (모델 이름, 스트리밍 여부)를 읽습니다."""
+    try:
+        body = json.loads(request.content or b"{}")
+    except (ValueError, httpx.RequestNotRead):
+        return "", True
+    return str(body.get("model", "")), bool(body.get("stream"))
+
+
+def _snapshot(response: httpx.Response) -> Tuple[int, list, bytes]:
+    headers = [(k, v) for k, v in response.headers.items() if k.lower() not in _HOP_HEADERS]
+    return response.status_code, headers, response.content
+
+
+def _rebuild(snapshot: Tuple[int, list, bytes], request: httpx.Request) -> httpx.Response:
+    status_code, headers, content = snapshot
+    return httpx.Response(status_code, headers=headers, content=content, request=request)
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    """스트리밍 응답을 다 읽거나 닫을 때 동시 요청 자리를 돌려줍니다."""
+
+    def __init__(self, stream: httpx.SyncByteStream, release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+
+    def __iter__(self):
+        yield from self._stream
+
+    def close(self):
+        try:
+            self._stream.close()
+        finally:
+            self._release()
+
+
+class _AsyncReleasingStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+
+class GatewayTransport(httpx.BaseTransport):
+    """동기 HTTP 클라이언트용 transport (persona_analyzer의 invoke 등)."""
+
+    def __init__(self, gateway: LLMGateway, transport: httpx.BaseTransport):
+        self.gateway = gateway
+        self.transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        self.gateway._count("requests")
+        model, stream = _describe(request)
+        if stream:
+            return self._send(request, model, stream)
+        if not self.gateway.single_flight:
+            return _rebuild(_snapshot(self._send(request, model, stream)), request)
+
+        key = (str(request.url), request.content)
+        future, leader = self.gateway.join_in_flight(key)
+        if leader:
+            try:
+                future.set_result(_snapshot(self._send(request, model, stream)))
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                self.gateway.finish_in_flight(key)
+        return _rebuild(future.result(), request)
+
+    def _send(self, request: httpx.Request, model: str, stream: bool) -> httpx.Response:
+        attempt = 0
+        while True:
+            release = self.gateway.acquire(model)
+            response = None
+            try:
+                self.gateway._count("upstream_requests")
+                response = self.transport.handle_request(request)
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                release()
+                if not self.gateway.should_retry(None, attempt):
+                    raise
+            except BaseException:
+                release()
+                raise
+            else:
+                if not self.gateway.should_retry(response, attempt):
+                    if stream:
+                        response.stream = _ReleasingStream(response.stream, release)
+                        return response
+                    try:
+                        response.read()
+                    finally:
+                        response.close()
+                        release()
+                    return response
+                response.close()
+                release()
+            time.sleep(self.gateway.backoff_s(response, attempt))
+            attempt += 1
+
+    def close(self):
+        self.transport.close()
+
+
+class AsyncGatewayTransport(httpx.AsyncBaseTransport):
+    """비동기 HTTP 클라이언트용 transport (ainvoke, astream 등)."""
+
+    def __init__(self, gateway: LLMGateway, transport: httpx.AsyncBaseTransport):
+        self.gateway = gateway
+        self.transport = transport
+        self._tasks: set = set()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.gateway._count("requests")
+        model, stream = _describe(request)
+        if stream:
+            return await self._send(request, model, stream)
+        if not self.gateway.single_flight:
+            return _rebuild(_snapshot(await self._send(request, model, stream)), request)
+
+        key = (str(request.url), request.content)
+        future, leader = self.gateway.join_in_flight(key)
+        if leader:
+            # 먼저 보낸 쪽이 취소되어도 같은 응답을 기다리는 쪽은 결과를 받도록 별도 작업으로 보냅니다.
+            task = asyncio.ensure_future(self._resolve(future, key, request, model))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return _rebuild(await asyncio.shield(asyncio.wrap_future(future)), request)
+
+    async def _resolve(self, future: Future, key: Tuple[str, bytes], request: httpx.Request, model: str):
+        try:
+            future.set_result(_snapshot(await self._send(request, model, False)))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            self.gateway.finish_in_flight(key)
+
+    async def _send(self, request: httpx.Request, model: str, stream: bool) -> httpx.Response:
+        attempt = 0
+        while True:
+            release = await self.gateway.aacquire(model)
+            response = None
+            try:
+                self.gateway._count("upstream_requests")
+                response = await self.transport.handle_async_request(request)
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                release()
+                if not self.gateway.should_retry(None, attempt):
+                    raise
+            except BaseException:
+                release()
+                raise
+            else:
+                if not self.gateway.should_retry(response, attempt):
+                    if stream:
+                        response.stream = _AsyncReleasingStream(response.stream, release)
+                        return response
+                    try:
+                        await response.aread()
+                    finally:
+                        await response.aclose()
+                        release()
+                    return response
+                await response.aclose()
+                release()
+            await asyncio.sleep(self.gateway.backoff_s(response, attempt))
+            attempt += 1
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+gateway = LLMGateway()
+
+_http_clients: Tuple[httpx.Client, httpx.AsyncClient] | None = None
+_http_clients_lock = threading.Lock()
+
+
+def get_http_clients() -> Tuple[httpx.Client, httpx.AsyncClient]:
+    """모든 채팅 모델이 공유하는 (동기, 비동기) HTTP 클라이언트를 반환합니다."""
+    global _http_clients
+    if _http_clients is None:
+        with _http_clients_lock:
+            if _http_clients is None:
+                limits = httpx.Limits(
+                    max_connections=LLM_POOL_MAX_CONNECTIONS,
+                    max_keepalive_connections=LLM_POOL_MAX_KEEPALIVE,
+                    keepalive_expiry=LLM_POOL_KEEPALIVE_EXPIRY_S,
+                )
+                timeout = httpx.Timeout(LLM_REQUEST_TIMEOUT_S, connect=10.0)
+                _http_clients = (
+                    httpx.Client(
+                        transport=GatewayTransport(gateway, httpx.HTTPTransport(limits=limits)),
+                        timeout=timeout,
+                    ),
+                    httpx.AsyncClient(
+                        transport=AsyncGatewayTransport(
+                            gateway, httpx.AsyncHTTPTransport(limits=limits)
+                        ),
+                        timeout=timeout,
+                    ),
+                )
+    return _http_clients
+
+
+# (모델 이름, temperature)별로 프로세스에 하나씩만 만든 채팅 모델
+_chat_models: Dict[Tuple[str | None, float], Any] = {}
+_chat_models_lock = threading.Lock()
+
+
+def create_chat_model(model: str | None = None, temperature: float = 0.7):
+    """설정된 백엔드의 채팅 모델을 새로 만듭니다."""
+    if LLM_BACKEND == "fake":
+        from core.fake_backends import FakeChatModel
+
+        return FakeChatModel()
+
+    # langchain_openai(openai SDK) import가 무거우므로 모델을 처음 만들 때까지 미룹니다.
+    from langchain_openai import ChatOpenAI
+
+    http_client, http_async_client = get_http_clients()
+    return ChatOpenAI(
+        model=model or os.getenv("LLM_MODEL_NAME"),
+        temperature=temperature,
+        http_client=http_client,
+        http_async_client=http_async_client,
+        # 재시도는 게이트웨이가 동시 요청 제한과 함께 처리하므로 SDK 재시도는 끕니다.
+        max_retries=0,
+        # 스트리밍에서도 프롬프트/캐시 토큰 사용량을 받아 세션별 절약량을 기록합니다.
+        stream_usage=True,
+    )
+
+
+def get_chat_model(model: str | None = None, temperature: float = 0.7):
+    """공유 채팅 모델을 반환합니다. 설정이 같으면 모든 모듈이 같은 객체를 쓰며, 최초 호출 시에만 만듭니다."""
+    key = (model or os.getenv("LLM_MODEL_NAME"), temperature)
+    chat_model = _chat_models.get(key)
+    if chat_model is None:
+        with _chat_models_lock:
+            chat_model = _chat_models.get(key)
+            if chat_model is None:
+                chat_model = _chat_models[key] = create_chat_model(*key)
+    return chat_model
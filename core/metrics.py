@@ -0,0 +1,195 @@
+# core/metrics.py
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+# 음성 인식, LLM, 임베딩, TTS처럼 수 ms ~ 수십 초까지 걸리는 단계를 모두 담을 수 있는 구간(초)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_labels(labelnames: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [
+        '{}="{}"'.format(
+            name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        )
+        for name, value in zip(labelnames, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    """Prometheus 형식으로 내보내는 단순 누적 카운터입니다."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}{labels} {_format_value(value)}")
+        return lines
+
+
+class Gauge:
+    """Prometheus 형식으로 내보내는 현재 값(대기열 길이 등)입니다."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def set(self, value: float, **labels: str):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}{labels} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Prometheus 형식으로 내보내는 누적 구간 히스토그램입니다."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # 라벨 조합별 [구간별 개수..., 합계, 전체 개수]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value: float, **labels: str):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            state = self._values.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, state in sorted(self._values.items()):
+                for bound, count in zip(self.buckets, state):
+                    labels = _format_labels(self.labelnames, key, f'le="{bound}"')
+                    lines.append(f"{self.name}_bucket{labels} {_format_value(count)}")
+                labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{labels} {_format_value(state[-1])}")
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {_format_value(state[-2])}")
+                lines.append(f"{self.name}_count{labels} {_format_value(state[-1])}")
+        return lines
+
+
+REGISTRY: List[Counter | Gauge | Histogram] = []
+
+STAGE_DURATION = Histogram(
+    "assistant_stage_duration_seconds",
+    "처리 단계별 소요 시간(초)",
+    labelnames=("stage",),
+)
+STAGE_ERRORS = Counter(
+    "assistant_stage_errors_total",
+    "처리 단계별 오류 수",
+    labelnames=("stage",),
+)
+LLM_GATEWAY_EVENTS = Counter(
+    "assistant_llm_gateway_events_total",
+    "LLM 게이트웨이 이벤트 수 (요청, 재시도, 중복 합치기, 429 등)",
+    labelnames=("event",),
+)
+SCHEDULER_WAIT = Histogram(
+    "assistant_scheduler_wait_seconds",
+    "스케줄러에서 자리를 얻기까지 기다린 시간(초)",
+    labelnames=("resource", "priority"),
+)
+SCHEDULER_QUEUE_DEPTH = Gauge(
+    "assistant_scheduler_queue_depth",
+    "스케줄러에서 자리를 기다리는 작업 수",
+    labelnames=("resource", "priority"),
+)
+LLM_PROMPT_TOKENS = Counter(
+    "assistant_llm_prompt_tokens_total",
+    "라우팅 LLM 프롬프트 토큰 수 (prompt: 전체, cached: 제공자 프롬프트 캐시 적중, trimmed: 세션 창 밖으로 뺀 이전 대화)",
+    labelnames=("kind",),
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "assistant_http_request_duration_seconds",
+    "HTTP 요청 처리 시간(초)",
+    labelnames=("method", "endpoint", "status"),
+)
+
+# 현재 HTTP 요청에서 단계별로 누적한 소요 시간(초). 요청 밖(백그라운드 스레드 등)에서는 None입니다.
+request_timings: ContextVar[Dict[str, float] | None] = ContextVar(
+    "request_timings", default=None
+)
+
+
+def record_stage(stage: str, seconds: float, error: bool = False):
+    STAGE_DURATION.observe(seconds, stage=stage)
+    if error:
+        STAGE_ERRORS.inc(stage=stage)
+    timings = request_timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    """with 블록의 실행 시간을 단계 히스토그램과 현재 요청의 단계별 시간에 기록합니다."""
+    started = time.perf_counter()
+    error = False
+    try:
+        yield
+    except Exception:
+        error = True
+        raise
+    finally:
+        record_stage(stage, time.perf_counter() - started, error)
+
+
+def format_server_timing(timings: Dict[str, float]) -> str:
+    """단계별 시간을 Server-Timing 헤더 값(ms)으로 만듭니다. 예: "stt;dur=812.3, tts;dur=95.0" """
+    return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in timings.items())
+
+
+def render_metrics() -> str:
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
@@ -0,0 +1,272 @@
+# core/scheduler.py
+"""
+LLM 호출과 임베딩 계산 앞에 두는 우선순위 스케줄러입니다.
+
+요청은 세 가지 우선순위 클래스 중 하나로 처리됩니다. (현재 클래스는 contextvar로 전달되어 스레드 풀까지 이어집니다)
+  - interactive: /api/process-text/, /api/process-voice/, 웹소켓 대화 (기본값)
+  - batch      : /api/process-text/batch, /api/interview/evaluate/batch
+  - background : 페르소나 분석, 채팅 기록 색인(임베딩)
+
+자리가 나면 대기 중인 클래스 중 가상 시간(virtual time)이 가장 작은 클래스에 넘기는
+가중 공정 큐잉(weighted fair queuing)을 쓰므로, 가중치 비율대로 자리를 나눠 가지면서도
+낮은 클래스가 완전히 굶지는 않습니다. 클래스별 동시 실행 상한(SCHEDULER_CLASS_CAPS)을 넘으면
+자리가 남아도 기다립니다. (배치/백그라운드 작업이 몰려도 대화 요청 몫을 남겨 둡니다)
+"""
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List
+
+from dotenv import load_dotenv
+
+from core.metrics import SCHEDULER_QUEUE_DEPTH, SCHEDULER_WAIT
+
+load_dotenv()
+
+PRIORITIES = ("interactive", "batch", "background")
+
+
+def _parse_spec(spec: str) -> Dict[str, float]:
+    values = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, value = item.partition("=")
+        if name.strip() not in PRIORITIES:
+            raise ValueError(f"알 수 없는 우선순위 클래스입니다: {name}")
+        values[name.strip()] = float(value)
+    return values
+
+
+# 자리를 나눠 갖는 비율
+SCHEDULER_WEIGHTS = _parse_spec(
+    os.getenv("SCHEDULER_WEIGHTS", "interactive=8,batch=3,background=1")
+)
+# 클래스별 동시 실행 상한 (전체 자리 대비 비율, 최소 1자리)
+SCHEDULER_CLASS_CAPS = _parse_spec(
+    os.getenv("SCHEDULER_CLASS_CAPS", "interactive=1.0,batch=0.75,background=0.5")
+)
+
+current_priority: ContextVar[str] = ContextVar("current_priority", default="interactive")
+
+# 통계 조회용으로 만들어진 스케줄러를 모아 둡니다.
+SCHEDULERS: List["PriorityScheduler"] = []
+
+
+@contextmanager
+def priority(name: str):
+    """with 블록 안(과 그 안에서 run_blocking으로 넘긴 작업)의 LLM/임베딩 작업을 name 클래스로 처리합니다."""
+    if name not in PRIORITIES:
+        raise ValueError(f"알 수 없는 우선순위 클래스입니다: {name}")
+    token = current_priority.set(name)
+    try:
+        yield
+    finally:
+        current_priority.reset(token)
+
+
+class PriorityScheduler:
+    """
+    capacity개의 자리를 우선순위 클래스별 가중 공정 큐잉으로 나눠 주는 세마포어입니다.
+    스레드(acquire)와 이벤트 루프(aacquire)에서 함께 쓸 수 있고, 반환된 자리는 다음 대기자에게 바로 넘깁니다.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        capacity: int,
+        weights: Dict[str, float] = SCHEDULER_WEIGHTS,
+        caps: Dict[str, float] = SCHEDULER_CLASS_CAPS,
+    ):
+        self.name = name
+        self.capacity = max(1, capacity)
+        self.weights = {p: max(weights.get(p, 1.0), 1e-6) for p in PRIORITIES}
+        self.caps = {p: max(1, math.ceil(self.capacity * caps.get(p, 1.0))) for p in PRIORITIES}
+        self.in_use = 0
+        self._lock = threading.Lock()
+        self._queues: Dict[str, deque] = {p: deque() for p in PRIORITIES}
+        self._running = {p: 0 for p in PRIORITIES}
+        self._virtual_time = {p: 0.0 for p in PRIORITIES}
+        self._clock = 0.0  # 마지막으로 자리를 받은 클래스의 가상 시간
+        self._stats = {
+            p: {"granted": 0, "queued": 0, "wait_total_s": 0.0, "wait_max_s": 0.0}
+            for p in PRIORITIES
+        }
+        SCHEDULERS.append(self)
+
+    def _resolve(self, priority_name: str | None) -> str:
+        name = priority_name or current_priority.get()
+        return name if name in PRIORITIES else "interactive"
+
+    def _grant(self, priority_name: str):
+        """잠금을 잡은 상태에서 호출합니다."""
+        self.in_use += 1
+        self._running[priority_name] += 1
+        self._clock = self._virtual_time[priority_name]
+        self._virtual_time[priority_name] += 1.0 / self.weights[priority_name]
+
+    def _can_start(self, priority_name: str) -> bool:
+        return (
+            self.in_use < self.capacity
+            and self._running[priority_name] < self.caps[priority_name]
+            and not self._queues[priority_name]
+        )
+
+    def _enqueue(self, priority_name: str, waiter):
+        """잠금을 잡은 상태에서 호출합니다."""
+        queue = self._queues[priority_name]
+        if not queue:
+            # 한동안 쉬던 클래스가 밀린 몫을 한꺼번에 가져가지 않도록 가상 시간을 현재에 맞춥니다.
+            self._virtual_time[priority_name] = max(self._virtual_time[priority_name], self._clock)
+        queue.append(waiter)
+        self._stats[priority_name]["queued"] += 1
+        SCHEDULER_QUEUE_DEPTH.set(len(queue), resource=self.name, priority=priority_name)
+
+    def _next_waiter(self):
+        """비어 있는 자리를 넘겨받을 대기자를 고릅니다. 잠금을 잡은 상태에서 호출합니다."""
+        if self.in_use >= self.capacity:
+            return None
+        eligible = [
+            p for p in PRIORITIES if self._queues[p] and self._running[p] < self.caps[p]
+        ]
+        if not eligible:
+            return None
+        chosen = min(eligible, key=lambda p: (self._virtual_time[p], PRIORITIES.index(p)))
+        waiter = self._queues[chosen].popleft()
+        SCHEDULER_QUEUE_DEPTH.set(len(self._queues[chosen]), resource=self.name, priority=chosen)
+        self._grant(chosen)
+        return waiter
+
+    def _dispatch(self):
+        while True:
+            with self._lock:
+                waiter = self._next_waiter()
+            if waiter is None:
+                return
+            if isinstance(waiter, threading.Event):
+                waiter.set()
+            else:
+                loop, future, priority_name = waiter
+                loop.call_soon_threadsafe(self._wake, future, priority_name)
+
+    def _wake(self, future: asyncio.Future, priority_name: str):
+        if future.done():  # 기다리던 쪽이 취소되었으면 자리를 돌려줍니다.
+            self._release(priority_name)
+        else:
+            future.set_result(None)
+
+    def _release(self, priority_name: str):
+        with self._lock:
+            self.in_use -= 1
+            self._running[priority_name] -= 1
+        self._dispatch()
+
+    def _record_wait(self, priority_name: str, seconds: float):
+        with self._lock:
+            stats = self._stats[priority_name]
+            stats["granted"] += 1
+            stats["wait_total_s"] += seconds
+            stats["wait_max_s"] = max(stats["wait_max_s"], seconds)
+        SCHEDULER_WAIT.observe(seconds, resource=self.name, priority=priority_name)
+
+    def _releaser(self, priority_name: str) -> Callable[[], None]:
+        released = False
+
+        def release():
+            nonlocal released
+            if not released:
+                released = True
+                self._release(priority_name)
+
+        return release
+
+    def acquire(self, priority_name: str | None = None) -> Callable[[], None]:
+        """자리를 얻을 때까지 기다린 뒤, 자리를 돌려주는 함수를 반환합니다. (여러 번 호출해도 한 번만 반환)"""
+        name = self._resolve(priority_name)
+        started = time.perf_counter()
+        with self._lock:
+            if self._can_start(name):
+                self._grant(name)
+                event = None
+            else:
+                event = threading.Event()
+                self._enqueue(name, event)
+        if event is not None:
+            event.wait()
+        self._record_wait(name, time.perf_counter() - started)
+        return self._releaser(name)
+
+    async def aacquire(self, priority_name: str | None = None) -> Callable[[], None]:
+        name = self._resolve(priority_name)
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._can_start(name):
+                self._grant(name)
+                waiter = None
+            else:
+                waiter = (loop, loop.create_future(), name)
+                self._enqueue(name, waiter)
+        if waiter is not None:
+            try:
+                await waiter[1]
+            except asyncio.CancelledError:
+                with self._lock:
+                    queue = self._queues[name]
+                    if waiter in queue:
+                        queue.remove(waiter)
+                        SCHEDULER_QUEUE_DEPTH.set(len(queue), resource=self.name, priority=name)
+                        raise
+                # 자리를 이미 넘겨받았다면 돌려줍니다. (future가 취소됐으면 _wake에서 돌려줍니다)
+                if not waiter[1].cancelled():
+                    self._release(name)
+                raise
+        self._record_wait(name, time.perf_counter() - started)
+        return self._releaser(name)
+
+    @contextmanager
+    def slot(self, priority_name: str | None = None):
+        release = self.acquire(priority_name)
+        try:
+            yield
+        finally:
+            release()
+
+    @asynccontextmanager
+    async def aslot(self, priority_name: str | None = None):
+        release = await self.aacquire(priority_name)
+        try:
+            yield
+        finally:
+            release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "capacity": self.capacity,
+                "in_use": self.in_use,
+                "classes": {
+                    p: {
+                        "weight": self.weights[p],
+                        "cap": self.caps[p],
+                        "running": self._running[p],
+                        "queue_depth": len(self._queues[p]),
+                        "granted": self._stats[p]["granted"],
+                        "queued": self._stats[p]["queued"],
+                        "avg_wait_ms": round(
+                            self._stats[p]["wait_total_s"] / self._stats[p]["granted"] * 1000, 2
+                        )
+                        if self._stats[p]["granted"]
+                        else 0.0,
+                        "max_wait_ms": round(self._stats[p]["wait_max_s"] * 1000, 2),
+                    }
+                    for p in PRIORITIES
+                },
+            }
+
+
+def get_scheduler_stats() -> Dict[str, Any]:
+    return {scheduler.name: scheduler.stats() for scheduler in SCHEDULERS}
@@ -0,0 +1,76 @@
+# core/startup.py
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict
+
+
+@dataclass
+class _Resource:
+    name: str
+    loader: Callable[[], object]
+    required: bool
+    status: str = "pending"  # pending → loading → ready | failed
+    duration_s: float | None = None
+    error: str | None = None
+
+
+class ResourceWarmup:
+    """
+    모델, DB 클라이언트처럼 무거운 자원을 서버 시작 시 병렬로 미리 준비합니다.
+    자원별 상태와 준비에 걸린 시간을 기록하며, 준비 여부는 /readyz에서 확인합니다.
+    """
+
+    def __init__(self):
+        self._resources: Dict[str, _Resource] = {}
+        self._started_at: float | None = None
+        self.total_s: float | None = None
+
+    def register(self, name: str, loader: Callable[[], object], required: bool = True):
+        """loader는 블로킹 함수이며 별도 스레드에서 실행됩니다. required가 아니면 실패해도 준비 완료로 봅니다."""
+        self._resources[name] = _Resource(name, loader, required)
+
+    async def _load(self, resource: _Resource):
+        resource.status = "loading"
+        started = time.perf_counter()
+        try:
+            await asyncio.to_thread(resource.loader)
+        except Exception as e:
+            resource.status = "failed"
+            resource.error = str(e)
+            print(f"[시작] {resource.name} 준비 실패: {e}")
+        else:
+            resource.status = "ready"
+        resource.duration_s = time.perf_counter() - started
+        if resource.status == "ready":
+            print(f"[시작] {resource.name} 준비 완료 ({resource.duration_s:.2f}초)")
+
+    async def run(self):
+        """등록된 모든 자원을 동시에 준비합니다."""
+        self._started_at = time.perf_counter()
+        await asyncio.gather(*(self._load(resource) for resource in self._resources.values()))
+        self.total_s = time.perf_counter() - self._started_at
+        print(f"[시작] 전체 자원 준비 완료 ({self.total_s:.2f}초)")
+
+    def is_ready(self) -> bool:
+        return all(
+            resource.status == "ready" or (not resource.required and resource.status == "failed")
+            for resource in self._resources.values()
+        )
+
+    def status(self) -> dict:
+        return {
+            "ready": self.is_ready(),
+            "total_s": round(self.total_s, 3) if self.total_s is not None else None,
+            "resources": {
+                resource.name: {
+                    "status": resource.status,
+                    "duration_s": (
+                        round(resource.duration_s, 3) if resource.duration_s is not None else None
+                    ),
+                    "required": resource.required,
+                    **({"error": resource.error} if resource.error else {}),
+                }
+                for resource in self._resources.values()
+            },
+        }
@@ -0,0 +1,301 @@
+# db/interview_index.py
+import glob
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+INTERVIEW_INDEX_ENABLED = os.getenv("INTERVIEW_INDEX_ENABLED", "true").lower() == "true"
+# 벡터 저장 형식: float32(기본, 가장 빠름), float16(메모리 1/2), int8(메모리 약 1/4, recall이 조금 떨어짐)
+# NumPy에는 float16/int8 행렬곱 커널이 없어 검색 때마다 float32로 변환하므로, 코퍼스가 커서 메모리가 부족할 때만 바꿉니다.
+INTERVIEW_INDEX_DTYPE = os.getenv("INTERVIEW_INDEX_DTYPE", "float32")
+# 질문 하나짜리 검색을 인덱스로 처리할 최대 항목 수. 전수 탐색 비용은 항목 수에 비례하므로,
+# 이보다 큰 코퍼스에서는 질문 하나짜리 검색을 ChromaDB(HNSW)로 보내고 여러 질문을 한 번에 검색할 때만 인덱스를 씁니다.
+# (1024차원 기준 3천 개에서는 인덱스가 2배 빠르고, 2만 개에서는 ChromaDB가 3배 빠릅니다)
+INTERVIEW_INDEX_MAX_SINGLE_QUERY_ROWS = int(os.getenv("INTERVIEW_INDEX_MAX_SINGLE_QUERY_ROWS", "5000"))
+# 컬렉션이 바뀌었는지 확인하는 최소 간격(초)
+INTERVIEW_INDEX_RELOAD_INTERVAL_S = float(os.getenv("INTERVIEW_INDEX_RELOAD_INTERVAL_S", "30"))
+# 질문 하나당 돌려줄 수 있는 최대 검색 결과 수 (API 요청과 툴 인자의 상한)
+INTERVIEW_MAX_RESULTS = 10
+
+_SUPPORTED_DTYPES = ("float32", "float16", "int8")
+_INT8_SCALE = 127.0
+# 컬렉션에서 한 번에 읽어올 항목 수
+_LOAD_PAGE_SIZE = 5000
+# 검색 시 float32로 변환해 한 번에 곱할 행 수 (스레드별 버퍼: 행 수 × 차원 × 4바이트)
+_SEARCH_BLOCK_ROWS = 1024
+
+
+class _PackedStrings:
+    """
+    문자열 목록을 UTF-8 바이트 하나와 끝 위치 배열로 보관합니다. (항목마다 파이썬 str 객체를 두지 않아 메모리가 작습니다)
+    None은 길이 -1로 표시합니다.
+    """
+
+    def __init__(self, data: bytes = b"", ends: np.ndarray | None = None, missing: np.ndarray | None = None):
+        self._data = data
+        self._ends = ends if ends is not None else np.zeros(0, dtype=np.int64)
+        self._missing = missing
+
+    @classmethod
+    def from_values(cls, values: Sequence[str | None]) -> "_PackedStrings":
+        encoded = [value.encode("utf-8") if value is not None else b"" for value in values]
+        ends = np.cumsum([len(item) for item in encoded], dtype=np.int64)
+        missing = np.fromiter((value is None for value in values), dtype=bool, count=len(values))
+        return cls(b"".join(encoded), ends, missing if missing.any() else None)
+
+    @classmethod
+    def concat(cls, parts: List["_PackedStrings"]) -> "_PackedStrings":
+        if not parts:
+            return cls()
+        offsets = np.cumsum([0] + [len(part._data) for part in parts[:-1]], dtype=np.int64)
+        ends = np.concatenate([part._ends + offset for part, offset in zip(parts, offsets)])
+        missing = None
+        if any(part._missing is not None for part in parts):
+            missing = np.concatenate(
+                [part._missing if part._missing is not None else np.zeros(len(part), dtype=bool) for part in parts]
+            )
+        return cls(b"".join(part._data for part in parts), ends, missing)
+
+    def __len__(self) -> int:
+        return len(self._ends)
+
+    def __getitem__(self, i: int) -> str | None:
+        if self._missing is not None and self._missing[i]:
+            return None
+        start = int(self._ends[i - 1]) if i > 0 else 0
+        return self._data[start : int(self._ends[i])].decode("utf-8")
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._data) + self._ends.nbytes + (self._missing.nbytes if self._missing is not None else 0)
+
+
+@dataclass
+class _Snapshot:
+    matrix: np.ndarray  # (항목 수, 차원), 행마다 정규화된 벡터
+    scales: np.ndarray | None  # int8일 때 행별 배율 (원래 값 ≈ 저장 값 × 배율)
+    ids: _PackedStrings
+    questions: _PackedStrings
+    answers: _PackedStrings
+    fingerprint: Tuple
+    loaded_at: float
+
+
+class InterviewIndex:
+    """
+    면접 질문-답변 컬렉션 전체를 메모리의 정규화된 행렬로 올려 두고 정확한 코사인 top-k 검색을 합니다.
+    질문 수가 고정에 가까운 읽기 전용 코퍼스라 HNSW 대신 행렬곱 한 번과 argpartition으로 충분히 빠릅니다.
+    컬렉션이 바뀌면(다른 프로세스에서 embedding_data.py를 실행한 경우 등) 백그라운드에서 다시 읽어 교체합니다.
+    """
+
+    def __init__(
+        self,
+        collection_getter: Callable[[], object],
+        db_path: str,
+        dtype: str = INTERVIEW_INDEX_DTYPE,
+        reload_interval_s: float = INTERVIEW_INDEX_RELOAD_INTERVAL_S,
+        max_single_query_rows: int = INTERVIEW_INDEX_MAX_SINGLE_QUERY_ROWS,
+    ):
+        if dtype not in _SUPPORTED_DTYPES:
+            raise ValueError(f"지원하지 않는 INTERVIEW_INDEX_DTYPE입니다: {dtype}")
+        self.collection_getter = collection_getter
+        self.db_path = db_path
+        self.dtype = dtype
+        self.reload_interval_s = reload_interval_s
+        self.max_single_query_rows = max_single_query_rows
+        self._snapshot: _Snapshot | None = None
+        self._load_lock = threading.Lock()
+        self._reloading = False
+        self._last_check = 0.0
+        # 검색 스레드별로 재사용하는 float32 변환 버퍼
+        self._buffers = threading.local()
+
+    def _fingerprint(self, collection) -> Tuple:
+        """항목 수와 DB 파일(WAL 포함)의 수정 시각. 하나라도 바뀌면 다시 읽습니다."""
+        files = sorted(glob.glob(os.path.join(self.db_path, "chroma.sqlite3*")))
+        mtimes = tuple((os.path.basename(path), os.stat(path).st_mtime_ns) for path in files)
+        return (collection.count(), mtimes)
+
+    def _quantize(self, vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray | None]:
+        """(저장할 행렬, int8일 때 행별 배율)을 반환합니다."""
+        if self.dtype == "int8":
+            # 정규화된 벡터의 각 성분은 1/sqrt(차원) 정도로 작으므로, 행마다 최댓값 기준으로 배율을 잡습니다.
+            scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / _INT8_SCALE
+            return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+        return vectors.astype(self.dtype), None
+
+    def _build(self) -> _Snapshot:
+        collection = self.collection_getter()
+        fingerprint = self._fingerprint(collection)
+        blocks: List[np.ndarray] = []
+        scale_blocks: List[np.ndarray] = []
+        ids: List[_PackedStrings] = []
+        questions: List[_PackedStrings] = []
+        answers: List[_PackedStrings] = []
+
+        offset = 0
+        while True:
+            page = collection.get(
+                include=["embeddings", "documents", "metadatas"],
+                limit=_LOAD_PAGE_SIZE,
+                offset=offset,
+            )
+            if not page["ids"]:
+                break
+            vectors = np.asarray(page["embeddings"], dtype=np.float32)
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            quantized, scales = self._quantize(vectors / np.maximum(norms, 1e-12))
+            blocks.append(quantized)
+            if scales is not None:
+                scale_blocks.append(scales)
+            ids.append(_PackedStrings.from_values(page["ids"]))
+            questions.append(_PackedStrings.from_values(page["documents"]))
+            answers.append(_PackedStrings.from_values([(meta or {}).get("answer") for meta in page["metadatas"]]))
+            offset += len(page["ids"])
+
+        if blocks:
+            matrix = np.ascontiguousarray(np.concatenate(blocks))
+        else:
+            matrix = np.zeros((0, 0), dtype=np.float32)
+        scales = np.concatenate(scale_blocks) if scale_blocks else None
+        return _Snapshot(
+            matrix,
+            scales,
+            _PackedStrings.concat(ids),
+            _PackedStrings.concat(questions),
+            _PackedStrings.concat(answers),
+            fingerprint,
+            time.time(),
+        )
+
+    def load(self):
+        """컬렉션을 읽어 새 스냅샷으로 교체합니다. 교체 전까지는 기존 스냅샷으로 계속 검색합니다."""
+        with self._load_lock:
+            started = time.perf_counter()
+            snapshot = self._build()
+            self._snapshot = snapshot
+            self._last_check = time.monotonic()
+        print(
+            f"[면접 인덱스] {len(snapshot.questions)}개 항목 로드 완료 "
+            f"({self.dtype}, {snapshot.matrix.nbytes / 1e6:.1f}MB, {time.perf_counter() - started:.2f}초)"
+        )
+
+    def _reload_if_changed(self):
+        try:
+            if self._fingerprint(self.collection_getter()) != self._snapshot.fingerprint:
+                self.load()
+        except Exception as e:
+            print(f"[면접 인덱스] 다시 읽기 실패, 기존 인덱스를 유지합니다: {e}")
+        finally:
+            self._reloading = False
+
+    def _maybe_schedule_reload(self):
+        now = time.monotonic()
+        if self._reloading or now - self._last_check < self.reload_interval_s:
+            return
+        self._last_check = now
+        self._reloading = True
+        threading.Thread(target=self._reload_if_changed, daemon=True).start()
+
+    @property
+    def ready(self) -> bool:
+        return self._snapshot is not None
+
+    def serves(self, num_queries: int) -> bool:
+        """
+        이 개수의 질문을 인덱스로 검색하는 편이 ChromaDB보다 빠른지 반환합니다.
+        여러 질문은 행렬곱 한 번을 나눠 쓰므로 항상 인덱스로, 질문 하나는 항목 수가 작을 때만 인덱스로 검색합니다.
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            return False
+        return num_queries > 1 or len(snapshot.questions) <= self.max_single_query_rows
+
+    def stats(self) -> Dict:
+        snapshot = self._snapshot
+        if snapshot is None:
+            return {"ready": False}
+        return {
+            "ready": True,
+            "items": len(snapshot.questions),
+            "dtype": self.dtype,
+            "bytes": snapshot.matrix.nbytes + (snapshot.scales.nbytes if snapshot.scales is not None else 0),
+            "text_bytes": snapshot.ids.nbytes + snapshot.questions.nbytes + snapshot.answers.nbytes,
+            "loaded_at": snapshot.loaded_at,
+        }
+
+    def _scores(self, snapshot: _Snapshot, queries: np.ndarray) -> np.ndarray:
+        matrix = snapshot.matrix
+        if matrix.dtype == np.float32:
+            return queries @ matrix.T
+        # 캐시에 들어가는 크기의 블록씩 float32로 바꿔 곱합니다.
+        scores = np.empty((len(queries), len(matrix)), dtype=np.float32)
+        buffer = getattr(self._buffers, "block", None)
+        if buffer is None or buffer.shape[1] != matrix.shape[1]:
+            buffer = np.empty((_SEARCH_BLOCK_ROWS, matrix.shape[1]), dtype=np.float32)
+            self._buffers.block = buffer
+        for start in range(0, len(matrix), _SEARCH_BLOCK_ROWS):
+            rows = matrix[start : start + _SEARCH_BLOCK_ROWS]
+            block = buffer[: len(rows)]
+            np.copyto(block, rows)
+            np.matmul(queries, block.T, out=scores[:, start : start + len(rows)])
+        if snapshot.scales is not None:
+            scores *= snapshot.scales
+        return scores
+
+    def _search(
+        self, snapshot: _Snapshot, query_embeddings: Sequence[Sequence[float]], n: int
+    ) -> List[List[Tuple[int, float]]]:
+        total = len(snapshot.questions)
+        k = min(n, total)
+        if k <= 0:
+            return [[] for _ in query_embeddings]
+
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        queries /= np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        scores = self._scores(snapshot, queries)
+
+        if k < total:
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(total), (len(queries), total))
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        return [
+            [(int(i), float(s)) for i, s in zip(row, row_scores)]
+            for row, row_scores in zip(top, top_scores)
+        ]
+
+    def search(
+        self, query_embeddings: Sequence[Sequence[float]], n: int
+    ) -> List[List[Tuple[int, float]]]:
+        """질문별로 (항목 번호, 코사인 유사도)를 유사도가 높은 순서로 최대 n개 반환합니다."""
+        self._maybe_schedule_reload()
+        return self._search(self._snapshot, query_embeddings, n)
+
+    def query(self, query_embeddings: Sequence[Sequence[float]], n_results: int) -> Dict:
+        """ChromaDB collection.query와 같은 형식(documents, metadatas, distances)으로 결과를 반환합니다."""
+        self._maybe_schedule_reload()
+        snapshot = self._snapshot
+        hits = self._search(snapshot, query_embeddings, n_results)
+        return {
+            "ids": [[snapshot.ids[i] for i, _ in row] for row in hits],
+            "documents": [[snapshot.questions[i] for i, _ in row] for row in hits],
+            "metadatas": [
+                [
+                    {"answer": snapshot.answers[i]} if snapshot.answers[i] is not None else {}
+                    for i, _ in row
+                ]
+                for row in hits
+            ],
+            "distances": [[1.0 - score for _, score in row] for row in hits],
+        }
@@ -0,0 +1,311 @@
+# db/persona_job_store.py
+"""
+페르소나 분석 작업(job)의 상태와 결과를 SQLite에 저장합니다. 서버를 다시 시작해도 남습니다.
+
+  - 작업은 (chatroom_id, 대화 내용 해시)로 구분하며, 같은 키로 대기/실행 중인 작업은 하나만 둡니다.
+    (여러 프로세스가 같은 파일을 써도 부분 유일 인덱스로 중복 생성을 막습니다)
+  - 실행 중인 작업은 처리하는 프로세스(owner)와 임대 만료 시각(lease_expires_at)을 기록합니다.
+    처리하는 동안 heartbeat로 임대를 연장하며, 임대가 만료된 작업만 다른 프로세스가 다시 가져갑니다.
+  - current 플래그는 "채팅방의 현재 대화 내용으로 만든 결과"인지를 나타냅니다.
+    add_chat_history_to_db 등으로 대화 내용이 바뀌면 mark_chatroom_changed로 내려서,
+    대화 내용을 다시 읽지 않고 바로 돌려주는 캐시 결과에서 빠지게 합니다.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import List
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PERSONA_JOB_DB_PATH = os.getenv("PERSONA_JOB_DB_PATH", "./persona_jobs.sqlite3")
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+_COLUMNS = (
+    "job_id, chatroom_id, transcript_hash, status, result, error, current, created_at, updated_at, "
+    "owner, lease_expires_at"
+)
+
+
+@dataclass
+class PersonaJob:
+    job_id: str
+    chatroom_id: str
+    transcript_hash: str
+    status: str
+    result: dict | None
+    error: str | None
+    current: bool
+    created_at: float
+    updated_at: float
+    owner: str | None = None
+    lease_expires_at: float | None = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED)
+
+    def lease_expired(self, now: float | None = None) -> bool:
+        """실행 중인데 처리하던 프로세스의 임대가 끝난 작업인지 확인합니다. (임대 기록이 없는 예전 작업 포함)"""
+        if self.status != RUNNING:
+            return False
+        return self.lease_expires_at is None or self.lease_expires_at < (now or time.time())
+
+
+def _to_job(row) -> PersonaJob | None:
+    if row is None:
+        return None
+    (
+        job_id,
+        chatroom_id,
+        transcript_hash,
+        status,
+        result,
+        error,
+        current,
+        created,
+        updated,
+        owner,
+        lease_expires_at,
+    ) = row
+    return PersonaJob(
+        job_id=job_id,
+        chatroom_id=chatroom_id,
+        transcript_hash=transcript_hash,
+        status=status,
+        result=json.loads(result) if result else None,
+        error=error,
+        current=bool(current),
+        created_at=created,
+        updated_at=updated,
+        owner=owner,
+        lease_expires_at=lease_expires_at,
+    )
+
+
+class PersonaJobStore:
+    """페르소나 분석 작업을 SQLite(WAL)에 저장합니다."""
+
+    def __init__(self, path: str = PERSONA_JOB_DB_PATH):
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._lock = threading.Lock()
+        with self._lock:
+            # 작업 상태를 쓰는 동안에도 조회(폴링)가 막히지 않도록 WAL 모드를 씁니다.
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS persona_jobs (
+                    job_id TEXT PRIMARY KEY,
+                    chatroom_id TEXT NOT NULL,
+                    transcript_hash TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    current INTEGER NOT NULL DEFAULT 1,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    owner TEXT,
+                    lease_expires_at REAL
+                )
+                """
+            )
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(persona_jobs)")}
+            for column, kind in (("owner", "TEXT"), ("lease_expires_at", "REAL")):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE persona_jobs ADD COLUMN {column} {kind}")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS persona_jobs_key "
+                "ON persona_jobs (chatroom_id, transcript_hash, created_at)"
+            )
+            self._conn.execute(
+                "CREATE UNIQUE INDEX IF NOT EXISTS persona_jobs_active "
+                "ON persona_jobs (chatroom_id, transcript_hash) "
+                "WHERE status IN ('queued', 'running')"
+            )
+            self._conn.commit()
+
+    def get(self, job_id: str) -> PersonaJob | None:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM persona_jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return _to_job(row)
+
+    def latest_current_result(self, chatroom_id: str) -> PersonaJob | None:
+        """현재 대화 내용으로 만든 것으로 알려진 가장 최근의 성공한 작업을 반환합니다."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM persona_jobs "
+                "WHERE chatroom_id = ? AND status = ? AND current = 1 "
+                "ORDER BY updated_at DESC LIMIT 1",
+                (chatroom_id, SUCCEEDED),
+            ).fetchone()
+        return _to_job(row)
+
+    def find_reusable(self, chatroom_id: str, transcript_hash: str) -> PersonaJob | None:
+        """같은 대화 내용으로 대기/실행 중이거나 성공한 작업을 반환합니다. (대기/실행 중인 작업 우선)"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM persona_jobs "
+                "WHERE chatroom_id = ? AND transcript_hash = ? AND status IN (?, ?, ?) "
+                "ORDER BY status IN (?, ?) DESC, updated_at DESC LIMIT 1",
+                (chatroom_id, transcript_hash, QUEUED, RUNNING, SUCCEEDED, QUEUED, RUNNING),
+            ).fetchone()
+        return _to_job(row)
+
+    def create(self, chatroom_id: str, transcript_hash: str) -> tuple[PersonaJob, bool]:
+        """
+        대기 상태의 작업을 만들고 (작업, 새로 만들었는지)를 반환합니다.
+        같은 키로 대기/실행 중인 작업이 이미 있으면 그 작업을 반환합니다.
+        새 작업이 현재 대화 내용이 되므로, 다른 내용으로 만든 작업들은 current를 내립니다.
+        """
+        while True:
+            now = time.time()
+            job_id = uuid.uuid4().hex
+            with self._lock:
+                try:
+                    with self._conn:
+                        self._conn.execute(
+                            "UPDATE persona_jobs SET current = 0 "
+                            "WHERE chatroom_id = ? AND transcript_hash != ?",
+                            (chatroom_id, transcript_hash),
+                        )
+                        self._conn.execute(
+                            f"INSERT INTO persona_jobs ({_COLUMNS}) "
+                            "VALUES (?, ?, ?, ?, NULL, NULL, 1, ?, ?, NULL, NULL)",
+                            (job_id, chatroom_id, transcript_hash, QUEUED, now, now),
+                        )
+                except sqlite3.IntegrityError:
+                    row = self._conn.execute(
+                        f"SELECT {_COLUMNS} FROM persona_jobs "
+                        "WHERE chatroom_id = ? AND transcript_hash = ? AND status IN (?, ?)",
+                        (chatroom_id, transcript_hash, QUEUED, RUNNING),
+                    ).fetchone()
+                    if row is None:  # 그 사이에 끝났으면 다시 시도합니다.
+                        continue
+                    return _to_job(row), False
+            return self.get(job_id), True
+
+    def mark_current(self, job_id: str):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE persona_jobs SET current = 1 WHERE job_id = ?", (job_id,)
+            )
+
+    def clear_current(self, job_id: str):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE persona_jobs SET current = 0 WHERE job_id = ?", (job_id,)
+            )
+
+    def claim(self, job_id: str, owner: str, lease_s: float) -> bool:
+        """
+        대기 중인 작업을 owner가 실행 중인 것으로 바꾸고 lease_s초 동안 임대합니다.
+        이미 다른 곳에서 가져갔으면 False를 반환합니다.
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE persona_jobs SET status = ?, owner = ?, lease_expires_at = ?, updated_at = ? "
+                "WHERE job_id = ? AND status = ?",
+                (RUNNING, owner, now + lease_s, now, job_id, QUEUED),
+            )
+        return cursor.rowcount == 1
+
+    def heartbeat(self, job_ids: List[str], owner: str, lease_s: float):
+        """owner가 처리 중인 작업들의 임대를 연장합니다."""
+        if not job_ids:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE persona_jobs SET lease_expires_at = ? "
+                "WHERE job_id = ? AND owner = ? AND status = ?",
+                [(time.time() + lease_s, job_id, owner, RUNNING) for job_id in job_ids],
+            )
+
+    def requeue_expired(self, job_id: str) -> bool:
+        """임대가 만료된 실행 중 작업을 대기 상태로 되돌립니다. 되돌렸으면 True를 반환합니다."""
+        now = time.time()
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE persona_jobs SET status = ?, owner = NULL, lease_expires_at = NULL, updated_at = ? "
+                "WHERE job_id = ? AND status = ? AND (lease_expires_at IS NULL OR lease_expires_at < ?)",
+                (QUEUED, now, job_id, RUNNING, now),
+            )
+        return cursor.rowcount == 1
+
+    def finish(
+        self,
+        job_id: str,
+        result: dict | None = None,
+        error: str | None = None,
+        owner: str | None = None,
+    ) -> bool:
+        """
+        결과가 있으면 성공, 없으면 error와 함께 실패로 기록합니다.
+        owner를 주면 그 owner가 아직 실행 중인 작업일 때만 기록합니다. (임대가 만료돼 다른 곳이 가져간 경우 제외)
+        """
+        status = SUCCEEDED if result is not None else FAILED
+        query = (
+            "UPDATE persona_jobs SET status = ?, result = ?, error = ?, updated_at = ?, "
+            "lease_expires_at = NULL WHERE job_id = ?"
+        )
+        params = [
+            status,
+            json.dumps(result, ensure_ascii=False) if result is not None else None,
+            error,
+            time.time(),
+            job_id,
+        ]
+        if owner is not None:
+            query += " AND owner = ? AND status = ?"
+            params += [owner, RUNNING]
+        with self._lock, self._conn:
+            cursor = self._conn.execute(query, params)
+        return cursor.rowcount == 1
+
+    def mark_chatroom_changed(self, chatroom_id: str):
+        """채팅방 대화 내용이 바뀌었으므로 기존 결과를 캐시 결과에서 뺍니다."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE persona_jobs SET current = 0 WHERE chatroom_id = ? AND current = 1",
+                (chatroom_id,),
+            )
+
+    def active_jobs(self) -> List[PersonaJob]:
+        """대기/실행 중인 작업을 만든 순서대로 반환합니다. (서버 재시작 후 이어서 처리)"""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM persona_jobs WHERE status IN (?, ?) ORDER BY created_at",
+                ACTIVE_STATUSES,
+            ).fetchall()
+        return [_to_job(row) for row in rows]
+
+    def counts(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM persona_jobs GROUP BY status"
+            ).fetchall()
+        return dict(rows)
+
+
+_store: PersonaJobStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_persona_job_store() -> PersonaJobStore:
+    """처음 쓸 때 DB 파일을 엽니다. (채팅 기록 저장 경로에서도 호출됩니다)"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = PersonaJobStore()
+    return _store
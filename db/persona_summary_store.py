@@ -0,0 +1,89 @@
+# db/persona_summary_store.py
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PERSONA_SUMMARY_DB_PATH = os.getenv(
+    "PERSONA_SUMMARY_DB_PATH", "./persona_summaries.sqlite3"
+)
+
+
+def hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class PersonaSummary:
+    chatroom_id: str
+    summarized_chars: int  # 요약에 반영된 대화의 길이 (앞에서부터 문자 수)
+    prefix_hash: str  # 요약에 반영된 대화 앞부분의 해시
+    summary: str
+    updated_at: float
+
+
+class PersonaSummaryStore:
+    """채팅방별 누적 대화 요약을 SQLite에 저장합니다."""
+
+    def __init__(self, path: str = PERSONA_SUMMARY_DB_PATH):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS persona_summaries (
+                    chatroom_id TEXT PRIMARY KEY,
+                    summarized_chars INTEGER NOT NULL,
+                    prefix_hash TEXT NOT NULL,
+                    summary TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.commit()
+
+    def get(self, chatroom_id: str) -> PersonaSummary | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT chatroom_id, summarized_chars, prefix_hash, summary, updated_at "
+                "FROM persona_summaries WHERE chatroom_id = ?",
+                (chatroom_id,),
+            ).fetchone()
+        return PersonaSummary(*row) if row else None
+
+    def save(self, chatroom_id: str, summarized_chars: int, prefix_hash: str, summary: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO persona_summaries "
+                "(chatroom_id, summarized_chars, prefix_hash, summary, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (chatroom_id, summarized_chars, prefix_hash, summary, time.time()),
+            )
+            self._conn.commit()
+
+    def delete(self, chatroom_id: str):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM persona_summaries WHERE chatroom_id = ?", (chatroom_id,)
+            )
+            self._conn.commit()
+
+
+_store: PersonaSummaryStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_persona_summary_store() -> PersonaSummaryStore:
+    """처음 쓸 때 DB 파일을 엽니다."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = PersonaSummaryStore()
+    return _store
@@ -0,0 +1,215 @@
+# db/transcript_store.py
+"""
+채팅방 대화 원문을 SQLite(WAL)에 zlib으로 압축해 저장합니다.
+조회는 chatroom_id 기본 키 한 번으로 끝나며, 저장할 때 임베딩을 계산하지 않습니다.
+
+유사도 검색이 필요한 채팅방만 index_requested를 켜 두면, 백그라운드 색인기(db/vector_db.py의 ChatIndexer)가
+version이 indexed_version보다 앞선 채팅방을 모아 나중에 ChromaDB에 임베딩합니다.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import List, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TRANSCRIPT_DB_PATH = os.getenv("TRANSCRIPT_DB_PATH", "./transcripts.sqlite3")
+TRANSCRIPT_COMPRESSION_LEVEL = int(os.getenv("TRANSCRIPT_COMPRESSION_LEVEL", "6"))
+
+
+def _hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class TranscriptStore:
+    """채팅방별 대화 원문 저장소입니다."""
+
+    def __init__(self, path: str = TRANSCRIPT_DB_PATH, level: int = TRANSCRIPT_COMPRESSION_LEVEL):
+        self.level = level
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            # WAL에서는 NORMAL이어도 DB가 깨지지 않으며, 커밋마다 fsync하지 않아 쓰기가 빠릅니다.
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS transcripts (
+                    chatroom_id TEXT PRIMARY KEY,
+                    content BLOB NOT NULL,
+                    chars INTEGER NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    version INTEGER NOT NULL,
+                    index_requested INTEGER NOT NULL DEFAULT 0,
+                    indexed_version INTEGER NOT NULL DEFAULT 0,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS transcripts_pending_index "
+                "ON transcripts (index_requested, indexed_version, version)"
+            )
+            # 저장소 단위의 표시(예: ChromaDB 이전 기록을 모두 옮겼는지)를 남깁니다.
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS transcript_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+            self._conn.commit()
+
+    def _read(self, chatroom_id: str) -> Tuple[str, str, int] | None:
+        """(원문, 해시, version)을 반환합니다. 잠금을 잡은 상태에서 호출합니다."""
+        row = self._conn.execute(
+            "SELECT content, content_hash, version FROM transcripts WHERE chatroom_id = ?",
+            (chatroom_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        return zlib.decompress(row[0]).decode("utf-8"), row[1], row[2]
+
+    def _write(self, chatroom_id: str, content: str, version: int, index: bool | None):
+        """잠금을 잡은 상태에서 호출합니다. index가 None이면 색인 요청 여부를 그대로 둡니다."""
+        blob = zlib.compress(content.encode("utf-8"), self.level)
+        self._conn.execute(
+            """
+            INSERT INTO transcripts (chatroom_id, content, chars, content_hash, version, index_requested, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (chatroom_id) DO UPDATE SET
+                content = excluded.content,
+                chars = excluded.chars,
+                content_hash = excluded.content_hash,
+                version = excluded.version,
+                index_requested = CASE WHEN ? IS NULL THEN index_requested ELSE excluded.index_requested END,
+                updated_at = excluded.updated_at
+            """,
+            (
+                chatroom_id,
+                blob,
+                len(content),
+                _hash(content),
+                version,
+                int(bool(index)),
+                time.time(),
+                index,
+            ),
+        )
+
+    def exists(self, chatroom_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM transcripts WHERE chatroom_id = ?", (chatroom_id,)
+            ).fetchone()
+        return row is not None
+
+    def get(self, chatroom_id: str) -> str | None:
+        with self._lock:
+            stored = self._read(chatroom_id)
+        return stored[0] if stored else None
+
+    def get_versioned(self, chatroom_id: str) -> Tuple[str, int] | None:
+        """(원문, version)을 반환합니다. 색인기가 어느 버전을 색인했는지 기록할 때 씁니다."""
+        with self._lock:
+            stored = self._read(chatroom_id)
+        return (stored[0], stored[2]) if stored else None
+
+    def put(self, chatroom_id: str, content: str, index: bool | None = None) -> bool:
+        """대화 원문 전체를 저장합니다. 내용이 바뀌었으면 True를 반환합니다."""
+        with self._lock, self._conn:
+            stored = self._read(chatroom_id)
+            if stored is not None and stored[1] == _hash(content):
+                if index:
+                    self._request_index(chatroom_id)
+                return False
+            self._write(chatroom_id, content, (stored[2] if stored else 0) + 1, index)
+        return True
+
+    def append(self, chatroom_id: str, new_messages: str, index: bool | None = None) -> str:
+        """기존 대화 뒤에 새 메시지를 이어 저장하고, 이어 붙인 전체 원문을 반환합니다."""
+        with self._lock, self._conn:
+            stored = self._read(chatroom_id)
+            content, version = (stored[0], stored[2]) if stored else ("", 0)
+            if content and not content.endswith("\n"):
+                new_messages = "\n" + new_messages
+            content += new_messages
+            self._write(chatroom_id, content, version + 1, index)
+        return content
+
+    def _request_index(self, chatroom_id: str):
+        self._conn.execute(
+            "UPDATE transcripts SET index_requested = 1 WHERE chatroom_id = ?", (chatroom_id,)
+        )
+
+    def request_index(self, chatroom_id: str) -> bool:
+        """채팅방을 유사도 검색 대상으로 표시합니다. 채팅방이 없으면 False를 반환합니다."""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE transcripts SET index_requested = 1 WHERE chatroom_id = ?", (chatroom_id,)
+            )
+        return cursor.rowcount == 1
+
+    def pending_index(self, limit: int) -> List[str]:
+        """색인을 요청했지만 최신 버전이 아직 색인되지 않은 채팅방을 오래된 순서로 반환합니다."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT chatroom_id FROM transcripts "
+                "WHERE index_requested = 1 AND indexed_version < version "
+                "ORDER BY updated_at LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def mark_indexed(self, chatroom_id: str, version: int):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE transcripts SET indexed_version = MAX(indexed_version, ?) WHERE chatroom_id = ?",
+                (version, chatroom_id),
+            )
+
+    def get_meta(self, key: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM transcript_meta WHERE key = ?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO transcript_meta (key, value) VALUES (?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+                (key, value),
+            )
+
+    def stats(self) -> dict:
+        with self._lock:
+            rooms, chars, stored_bytes, requested, pending = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(chars), 0), COALESCE(SUM(LENGTH(content)), 0), "
+                "COALESCE(SUM(index_requested), 0), "
+                "COALESCE(SUM(index_requested = 1 AND indexed_version < version), 0) "
+                "FROM transcripts"
+            ).fetchone()
+        return {
+            "rooms": rooms,
+            "chars": chars,
+            "stored_bytes": stored_bytes,
+            "index_requested_rooms": requested,
+            "index_pending_rooms": pending,
+        }
+
+
+_store: TranscriptStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_transcript_store() -> TranscriptStore:
+    """처음 쓸 때 DB 파일을 엽니다."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = TranscriptStore()
+    return _store
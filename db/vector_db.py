@@ -1,62 +1,454 @@
 # db/vector_db.py
-import chromadb
-from sentence_transformers import SentenceTransformer
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Tuple
 
-try:
-    _chroma_client = chromadb.PersistentClient(path="./chat_db")
+from dotenv import load_dotenv
+from core.metrics import stage_timer
+from core.scheduler import priority
+from db.persona_job_store import get_persona_job_store
+from db.transcript_store import get_transcript_store
+from services.embedding_service import embed_texts
 
-    print("db/vector_db.py에서 임베딩 모델(dragonkue/bge-m3-ko)을 로드하는 중입니다...")
-    _embedding_model = SentenceTransformer("dragonkue/bge-m3-ko")
-    print("임베딩 모델 로드 완료.")
+load_dotenv()
 
-    _collection = _chroma_client.get_or_create_collection(
-        name="chat_history_collection",
-        metadata={"hnsw:space": "cosine"},
+# 채팅 기록을 나눠 저장할 청크 크기(문자 수)와, 임베딩 시 앞 청크에서 가져올 문맥 길이
+CHAT_CHUNK_SIZE = int(os.getenv("CHAT_CHUNK_SIZE", "1000"))
+CHAT_CHUNK_OVERLAP = int(os.getenv("CHAT_CHUNK_OVERLAP", "200"))
+# 대화 원문은 transcript_store에 바로 저장하고, 유사도 검색이 필요한 채팅방만 나중에 임베딩합니다.
+# true이면 모든 채팅방을 색인합니다. (false이면 저장 요청의 index 값이나 색인 요청 API로 표시한 채팅방만)
+CHAT_INDEX_ALL_ROOMS = os.getenv("CHAT_INDEX_ALL_ROOMS", "false").lower() == "true"
+# 색인기가 한 번에 임베딩할 채팅방 수
+CHAT_INDEX_BATCH_ROOMS = int(os.getenv("CHAT_INDEX_BATCH_ROOMS", "16"))
+# 저장 후 색인을 시작하기까지 기다리는 시간 (연달아 들어오는 메시지를 모아서 한 번에 색인)
+CHAT_INDEX_DELAY_S = float(os.getenv("CHAT_INDEX_DELAY_S", "2"))
+# 알림이 없어도 밀린 색인이 있는지 확인하는 간격 (재시작 직후, 실패 후 재시도)
+CHAT_INDEX_POLL_INTERVAL_S = float(os.getenv("CHAT_INDEX_POLL_INTERVAL_S", "30"))
+# 같은 채팅방에 대한 동시 쓰기를 막는 잠금 개수 (채팅방 id의 해시로 나눠 씁니다)
+CHAT_ROOM_LOCK_STRIPES = int(os.getenv("CHAT_ROOM_LOCK_STRIPES", "64"))
+
+# ChromaDB에만 있던 이전 기록을 원문 저장소로 모두 옮겼음을 나타내는 표시
+CHROMA_MIGRATED_META_KEY = "chroma_migrated_at"
+
+_chroma_client = None
+_collection = None
+_collection_lock = threading.Lock()
+
+
+def get_collection():
+    """
+    채팅 기록 컬렉션을 반환합니다. 최초 호출 시에만 ChromaDB 클라이언트를 엽니다.
+    초기화에 실패하면 None을 반환하고, 다음 호출 때 다시 시도합니다.
+    """
+    global _chroma_client, _collection
+    if _collection is not None:
+        return _collection
+
+    with _collection_lock:
+        if _collection is None:
+            try:
+                # chromadb import 자체가 무거우므로 처음 사용할 때까지 미룹니다.
+                import chromadb
+
+                _chroma_client = chromadb.PersistentClient(path="./chat_db")
+
+                _collection = _chroma_client.get_or_create_collection(
+                    name="chat_history_collection",
+                    metadata={"hnsw:space": "cosine"},
+                )
+                print("ChromaDB 컬렉션 준비 완료.")
+
+            except Exception as e:
+                print(f"ChromaDB 초기화 중 오류 발생: {e}")
+                _chroma_client = None
+                _collection = None
+    return _collection
+
+
+# 같은 채팅방에 대한 동시 저장이 청크를 엇갈리게 쓰지 않도록 잠급니다.
+# 채팅방마다 잠금을 만들면 조회만 한 id까지 쌓이므로, 고정된 개수의 잠금을 해시로 나눠 씁니다.
+_room_locks = [threading.Lock() for _ in range(max(1, CHAT_ROOM_LOCK_STRIPES))]
+
+
+def _room_lock(chatroom_id: str) -> threading.Lock:
+    return _room_locks[hash(chatroom_id) % len(_room_locks)]
+
+
+def _chunk_id(chatroom_id: str, chunk_index: int) -> str:
+    return f"{chatroom_id}::{chunk_index:06d}"
+
+
+def split_into_chunks(text: str, chunk_size: int = CHAT_CHUNK_SIZE) -> List[str]:
+    """
+    대화 로그를 메시지(줄) 경계에 맞춰 chunk_size 이하의 청크로 나눕니다.
+    청크를 순서대로 이어 붙이면 원문과 정확히 같아집니다.
+    """
+    chunks: List[str] = []
+    current = ""
+    for line in text.splitlines(keepends=True):
+        # 한 메시지가 청크보다 길면 강제로 자릅니다.
+        while len(line) > chunk_size:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(line[:chunk_size])
+            line = line[chunk_size:]
+        if current and len(current) + len(line) > chunk_size:
+            chunks.append(current)
+            current = ""
+        current += line
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _get_chunk_documents(chatroom_id: str) -> List[str]:
+    """채팅방에 저장된 청크 문서들을 순서대로 반환합니다."""
+    result = get_collection().get(
+        where={"chatroom_id": chatroom_id}, include=["documents", "metadatas"]
     )
-    print("ChromaDB 컬렉션 준비 완료.")
+    chunks = [
+        (meta["chunk_index"], doc)
+        for doc, meta in zip(result.get("documents") or [], result.get("metadatas") or [])
+        if meta and "chunk_index" in meta
+    ]
+    return [doc for _, doc in sorted(chunks)]
 
-except Exception as e:
-    print(f"ChromaDB 또는 임베딩 모델 초기화 중 오류 발생: {e}")
-    _chroma_client = None
-    _embedding_model = None
-    _collection = None
 
+def _get_legacy_document(chatroom_id: str) -> str | None:
+    """청크 저장 방식 이전에 채팅방 하나를 문서 하나로 저장했던 기록을 조회합니다."""
+    result = get_collection().get(ids=[chatroom_id], include=["documents"])
+    if result and result.get("documents"):
+        return result["documents"][0]
+    return None
 
-# 2. 채팅 기록 저장(임베딩) 함수
-def add_chat_history_to_db(chatroom_id: str, chat_content: str):
-    """주어진 채팅 내용을 임베딩하여 ChromaDB에 저장(또는 업데이트)합니다."""
-    if not all([_collection, _embedding_model, chat_content]):
-        print("DB, 모델 또는 내용이 준비되지 않아 저장을 건너뜁니다.")
+
+def _plan_chunks(chat_content: str, existing: List[str]) -> Tuple[List[str], List[int]]:
+    """
+    기존 청크(existing)와 비교해 새 청크 목록과, 그중 바뀌거나 새로 생긴 청크 위치를 반환합니다.
+    """
+    stored = "".join(existing)
+    if existing and chat_content.startswith(stored):
+        # 기존 대화 뒤에 메시지가 이어진 경우: 마지막 청크부터 다시 채웁니다.
+        start = len(existing) - 1
+        new_chunks = split_into_chunks(existing[-1] + chat_content[len(stored) :])
+    else:
+        # 처음 저장하거나 기존 대화 내용이 바뀐 경우: 전체를 다시 나눕니다.
+        start = 0
+        new_chunks = split_into_chunks(chat_content)
+
+    all_chunks = existing[:start] + new_chunks
+    changed = [
+        index
+        for index in range(start, len(all_chunks))
+        if index >= len(existing) or existing[index] != all_chunks[index]
+    ]
+    return all_chunks, changed
+
+
+def _embedding_texts(all_chunks: List[str], changed: List[int]) -> List[str]:
+    # 청크 경계에서 문맥이 끊기지 않도록 앞 청크의 끝부분을 붙여 임베딩합니다.
+    return [
+        (all_chunks[i - 1][-CHAT_CHUNK_OVERLAP:] if i > 0 and CHAT_CHUNK_OVERLAP else "")
+        + all_chunks[i]
+        for i in changed
+    ]
+
+
+def _store_chunks(
+    chatroom_id: str,
+    all_chunks: List[str],
+    changed: List[int],
+    existing_count: int,
+    embeddings: List[List[float]],
+):
+    if changed:
+        with stage_timer("chroma_upsert"):
+            get_collection().upsert(
+                ids=[_chunk_id(chatroom_id, i) for i in changed],
+                embeddings=embeddings,
+                documents=[all_chunks[i] for i in changed],
+                metadatas=[{"chatroom_id": chatroom_id, "chunk_index": i} for i in changed],
+            )
+    stale = range(len(all_chunks), existing_count)
+    if stale:
+        get_collection().delete(ids=[_chunk_id(chatroom_id, i) for i in stale])
+
+
+def _import_from_chroma(chatroom_id: str) -> bool:
+    """
+    원문 저장소가 생기기 전에 ChromaDB에만 저장된 채팅방을 원문 저장소로 옮깁니다. 옮긴 경우 True를 반환합니다.
+    청크로 저장돼 있던 채팅방은 이미 색인된 것으로 표시하고, 문서 하나로 저장된 기존 채팅방은
+    색인기가 청크로 나눠 다시 임베딩하도록 색인을 요청합니다.
+    """
+    if get_collection() is None:
+        return False
+    store = get_transcript_store()
+    chunks = _get_chunk_documents(chatroom_id)
+    if chunks:
+        store.put(chatroom_id, "".join(chunks), index=True)
+        store.mark_indexed(chatroom_id, store.get_versioned(chatroom_id)[1])
+        return True
+    legacy = _get_legacy_document(chatroom_id)
+    if legacy is None:
+        return False
+    store.put(chatroom_id, legacy, index=True)
+    chat_indexer.notify()
+    return True
+
+
+_migrated = False
+
+
+def is_chroma_migrated() -> bool:
+    """이전 기록을 모두 옮겼는지 확인합니다. 한 번 확인되면 다시 DB를 읽지 않습니다."""
+    global _migrated
+    if not _migrated:
+        _migrated = get_transcript_store().get_meta(CHROMA_MIGRATED_META_KEY) is not None
+    return _migrated
+
+
+def _ensure_imported(chatroom_id: str):
+    """
+    이전 기록 옮기기가 끝나기 전에 처음 쓰는 채팅방이면 ChromaDB에 남아 있는 기록을 먼저 옮겨 옵니다.
+    옮기기가 끝났으면 ChromaDB를 건드리지 않으며, ChromaDB 오류는 원문 저장/조회를 실패시키지 않습니다.
+    """
+    if is_chroma_migrated() or get_transcript_store().exists(chatroom_id):
         return
+    try:
+        with _room_lock(chatroom_id):
+            if not get_transcript_store().exists(chatroom_id) and _import_from_chroma(chatroom_id):
+                print(f"'{chatroom_id}' 채팅 기록을 ChromaDB에서 원문 저장소로 옮겼습니다.")
+    except Exception as e:
+        print(f"'{chatroom_id}' 이전 채팅 기록을 옮기지 못했습니다: {e}")
 
-    print(f"'{chatroom_id}'의 채팅 기록을 임베딩하여 DB에 저장합니다...")
-    embedding = _embedding_model.encode(chat_content).tolist()
 
-    _collection.upsert(
-        ids=[chatroom_id],
-        embeddings=[embedding],
-        documents=[chat_content],
-        metadatas=[{"chatroom_id": chatroom_id}],
-    )
-    print(f"'{chatroom_id}' 저장 완료.")
+def migrate_all_chatrooms() -> int:
+    """
+    ChromaDB에만 있는 모든 채팅방(청크 저장, 단일 문서 저장)을 원문 저장소로 옮기고,
+    다 옮겼다는 표시를 남겨 이후 요청에서는 ChromaDB를 조회하지 않게 합니다.
+    """
+    global _migrated
+    result = get_collection().get(include=["metadatas"])
+    chatroom_ids = {
+        meta["chatroom_id"] if meta and "chunk_index" in meta else doc_id
+        for doc_id, meta in zip(result["ids"], result.get("metadatas") or [])
+    }
+    store = get_transcript_store()
+    migrated = 0
+    for chatroom_id in sorted(chatroom_ids):
+        with _room_lock(chatroom_id):
+            if not store.exists(chatroom_id):
+                migrated += _import_from_chroma(chatroom_id)
+    store.set_meta(CHROMA_MIGRATED_META_KEY, str(time.time()))
+    _migrated = True
+    return migrated
 
 
-# 3. 채팅 기록 조회 함수 수정 (ChromaDB 사용)
-def get_chat_history_by_chatroom(chatroom_id: str) -> str | None:
-    """ChromaDB에서 chatroom_id를 기준으로 채팅 기록(원본 텍스트)을 조회합니다."""
-    if not _collection:
-        print("DB가 준비되지 않아 조회할 수 없습니다.")
-        return None
+def migrate_legacy_chatrooms() -> int:
+    """서버 시작 시 한 번 실행합니다. 이미 옮겼으면 ChromaDB를 열지 않습니다."""
+    if is_chroma_migrated():
+        return 0
+    if get_collection() is None:
+        raise RuntimeError("채팅 기록 ChromaDB를 열 수 없어 이전 기록을 옮기지 못했습니다.")
+    count = migrate_all_chatrooms()
+    print(f"이전 채팅 기록 {count}개 채팅방을 원문 저장소로 옮겼습니다.")
+    return count
+
+
+class ChatIndexer:
+    """
+    유사도 검색 대상으로 표시된 채팅방의 최신 대화를 백그라운드에서 ChromaDB에 임베딩합니다.
+    저장 직후 바로 돌지 않고 CHAT_INDEX_DELAY_S만큼 기다려, 연달아 들어온 메시지를 한 번에 색인합니다.
+    여러 채팅방의 바뀐 청크를 모아 embed_texts 한 번으로 임베딩하며, 스케줄러의 background 우선순위로 실행됩니다.
+    """
+
+    def __init__(
+        self,
+        batch_rooms: int = CHAT_INDEX_BATCH_ROOMS,
+        delay_s: float = CHAT_INDEX_DELAY_S,
+        poll_interval_s: float = CHAT_INDEX_POLL_INTERVAL_S,
+    ):
+        self.batch_rooms = batch_rooms
+        self.delay_s = delay_s
+        self.poll_interval_s = poll_interval_s
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._stats = {"batches": 0, "indexed_rooms": 0, "indexed_chunks": 0, "errors": 0}
+
+    def start(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="chat-indexer", daemon=True)
+                self._thread.start()
+
+    def notify(self):
+        """색인할 채팅방이 생겼음을 알립니다."""
+        self.start()
+        self._wake.set()
+
+    def shutdown(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.poll_interval_s)
+            self._wake.clear()
+            if self._stop.wait(self.delay_s):
+                break
+            with priority("background"):
+                while not self._stop.is_set() and self.index_pending() >= self.batch_rooms:
+                    pass
+
+    def index_pending(self) -> int:
+        """색인이 밀린 채팅방을 최대 batch_rooms개 색인하고, 처리한 채팅방 수를 반환합니다."""
+        store = get_transcript_store()
+        rooms = store.pending_index(self.batch_rooms)
+        if not rooms or get_collection() is None:
+            return 0
+        try:
+            plans = []
+            for chatroom_id in rooms:
+                stored = store.get_versioned(chatroom_id)
+                if stored is None:
+                    continue
+                content, version = stored
+                existing = _get_chunk_documents(chatroom_id)
+                all_chunks, changed = _plan_chunks(content, existing)
+                plans.append((chatroom_id, version, existing, all_chunks, changed))
+
+            texts = [t for *_, all_chunks, changed in plans for t in _embedding_texts(all_chunks, changed)]
+            embeddings = embed_texts(texts)
+
+            offset = 0
+            for chatroom_id, version, existing, all_chunks, changed in plans:
+                with _room_lock(chatroom_id):
+                    _store_chunks(
+                        chatroom_id,
+                        all_chunks,
+                        changed,
+                        len(existing),
+                        embeddings[offset : offset + len(changed)],
+                    )
+                    if not existing:
+                        # 문서 하나로 저장돼 있던 기존 기록이 있으면 청크로 바꿨으므로 지웁니다.
+                        get_collection().delete(ids=[chatroom_id])
+                offset += len(changed)
+                # 색인하는 동안 새 메시지가 들어왔다면 version이 앞서 있으므로 다음 차례에 다시 색인됩니다.
+                store.mark_indexed(chatroom_id, version)
+        except Exception as e:
+            print(f"채팅 기록 색인 중 오류 발생: {e}")
+            self._stats["errors"] += 1
+            return 0
+
+        self._stats["batches"] += 1
+        self._stats["indexed_rooms"] += len(plans)
+        self._stats["indexed_chunks"] += len(texts)
+        print(f"채팅방 {len(plans)}개 색인 완료. (임베딩한 청크 {len(texts)}개)")
+        return len(rooms)
+
+    def stats(self) -> dict:
+        return {**self._stats, **get_transcript_store().stats()}
+
+
+chat_indexer = ChatIndexer()
+
+
+# 2. 채팅 기록 저장 함수
+def _after_transcript_write(chatroom_id: str, changed: bool, index: bool | None):
+    """원문을 저장한 뒤의 후속 처리입니다. 여기서 실패해도 저장 자체는 끝났으므로 오류를 던지지 않습니다."""
+    if changed:
+        # 대화 내용이 바뀌었으므로 저장해 둔 페르소나 분석 결과를 더는 바로 돌려주지 않습니다.
+        try:
+            get_persona_job_store().mark_chatroom_changed(chatroom_id)
+        except sqlite3.Error as e:
+            print(f"'{chatroom_id}'의 페르소나 분석 결과를 갱신 대상으로 표시하지 못했습니다: {e}")
+    if changed or index:
+        chat_indexer.notify()
 
-    print(f"ChromaDB에서 '{chatroom_id}' 채팅 기록 조회 시도...")
 
+def add_chat_history_to_db(chatroom_id: str, chat_content: str, index: bool | None = None) -> bool:
+    """
+    주어진 채팅 내용 전체를 원문 저장소에 바로 저장합니다. 임베딩은 계산하지 않습니다.
+    index=True이거나 CHAT_INDEX_ALL_ROOMS가 켜져 있으면 유사도 검색 대상으로 표시해
+    백그라운드 색인기가 나중에 바뀐 청크만 임베딩합니다.
+    저장했으면 True, 내용이 없거나 저장소 오류로 저장하지 못했으면 False를 반환합니다.
+    """
+    if not chat_content:
+        print("내용이 없어 저장을 건너뜁니다.")
+        return False
+
+    index = True if CHAT_INDEX_ALL_ROOMS else index
     try:
-        result = _collection.get(ids=[chatroom_id], include=["documents"])
-        if result and result.get("documents"):
-            return result["documents"][0]
-        else:
-            return None
+        _ensure_imported(chatroom_id)
+        with stage_timer("transcript_write"):
+            changed = get_transcript_store().put(chatroom_id, chat_content, index=index)
+    except Exception as e:
+        print(f"채팅 기록 저장 중 오류 발생: {e}")
+        return False
+
+    _after_transcript_write(chatroom_id, changed, index)
+    print(f"'{chatroom_id}' 저장 완료. ({len(chat_content)}자)")
+    return True
+
+
+def append_chat_messages(chatroom_id: str, new_messages: str, index: bool | None = None) -> bool:
+    """
+    전체 로그 대신 새 메시지만 받아 기존 대화 뒤에 이어 저장합니다.
+    저장했으면 True, 내용이 없거나 저장소 오류로 저장하지 못했으면 False를 반환합니다.
+    """
+    if not new_messages:
+        print("내용이 없어 저장을 건너뜁니다.")
+        return False
+
+    index = True if CHAT_INDEX_ALL_ROOMS else index
+    try:
+        _ensure_imported(chatroom_id)
+        with stage_timer("transcript_write"):
+            content = get_transcript_store().append(chatroom_id, new_messages, index=index)
+    except Exception as e:
+        print(f"채팅 메시지 추가 중 오류 발생: {e}")
+        return False
+
+    _after_transcript_write(chatroom_id, True, index)
+    print(f"'{chatroom_id}' 메시지 추가 완료. (전체 {len(content)}자)")
+    return True
+
+
+def request_chatroom_index(chatroom_id: str) -> bool:
+    """채팅방을 유사도 검색 대상으로 표시합니다. 저장된 채팅방이 없으면 False를 반환합니다."""
+    _ensure_imported(chatroom_id)
+    if not get_transcript_store().request_index(chatroom_id):
+        return False
+    chat_indexer.notify()
+    return True
+
+
+# 3. 채팅 기록 조회 함수
+def get_chat_history_by_chatroom(chatroom_id: str) -> str | None:
+    """원문 저장소에서 chatroom_id(기본 키)로 채팅 기록(원본 텍스트)을 조회합니다."""
+    try:
+        with stage_timer("transcript_read"):
+            content = get_transcript_store().get(chatroom_id)
+        if content is not None:
+            return content
+        # 원문 저장소가 생기기 전에 ChromaDB에만 저장된 채팅방
+        _ensure_imported(chatroom_id)
+        return get_transcript_store().get(chatroom_id)
 
     except Exception as e:
         print(f"DB 조회 중 오류 발생: {e}")
         return None
+
+
+if __name__ == "__main__":
+    # python -m db.vector_db  : ChromaDB에만 있는 채팅방을 모두 원문 저장소로 옮깁니다.
+    count = migrate_all_chatrooms() if get_collection() else 0
+    print(f"✅ {count}개의 채팅방을 옮겼습니다.")
@@ -1,65 +1,269 @@
-import chromadb
+"""
+면접 질문-답변 데이터(data.json)를 임베딩하여 ChromaDB 컬렉션에 적재하는 CLI입니다.
+
+- 파일 전체를 메모리에 올리지 않고 항목 단위로 읽으며(JSON 배열 또는 JSON Lines), 배치 단위로 임베딩/저장합니다.
+- 항목 ID는 내용 해시이므로, 다시 실행하면 새로 추가되거나 바뀐 항목만 임베딩합니다.
+  원본에 없는 항목(삭제되었거나 내용이 바뀌기 전의 항목)은 기본으로 컬렉션에서 삭제합니다.
+- 배치마다 진행 위치를 체크포인트로 남겨, 중간에 중단되어도 이어서 실행할 수 있습니다.
+- 예전 스크립트로 순번 ID("0", "1", ...)를 써서 적재한 컬렉션은 정리하면서 내용 해시 ID로 바꿉니다.
+  (컬렉션 메타데이터의 id_scheme 표시로 구분합니다)
+
+사용법:
+    python embedding_data.py                       # data.json 증분 적재 (중단된 위치부터 재개)
+    python embedding_data.py --input dump.jsonl --batch-size 128
+    python embedding_data.py --no-prune            # 원본에 없는 항목을 지우지 않고 추가만
+    python embedding_data.py --rebuild             # 컬렉션을 비우고 처음부터 다시 적재
+"""
+import argparse
+import codecs
+import hashlib
 import json
-from sentence_transformers import SentenceTransformer
+import os
+import time
+from typing import Any, Dict, Iterator, List, Tuple
+
+import chromadb
+from services.embedding_service import embed_texts
 
-print("모델을 로드하는 중입니다...")
-model = SentenceTransformer("dragonkue/bge-m3-ko")
-print("모델 로드 완료.")
+COLLECTION_NAME = "my_interviews_with_bge_m3"
+# 항목 ID를 내용 해시로 만드는 컬렉션이라는 표시 (없으면 예전 순번 ID 컬렉션으로 봅니다)
+ID_SCHEME_KEY = "id_scheme"
+ID_SCHEME = "content-sha1"
 
-client = chromadb.PersistentClient(path="my_interview_db")
 
-try:
-    with open("data.json", "r", encoding="utf-8") as f:
-        json_data_list = json.load(f)
-except FileNotFoundError:
-    print(
-        "❌ 에러: 'data.json' 파일을 찾을 수 없습니다. 스크립트와 같은 경로에 파일이 있는지 확인하세요."
+def iter_json_items(
+    path: str, start_offset: int = 0, read_size: int = 1 << 20
+) -> Iterator[Tuple[Dict[str, Any], int]]:
+    """
+    JSON 배열(또는 JSON Lines) 파일에서 항목을 하나씩 읽어 (항목, 항목이 끝나는 바이트 위치)를 반환합니다.
+    start_offset에 이전에 반환된 바이트 위치를 넘기면 그 다음 항목부터 읽습니다.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    with open(path, "rb") as f:
+        f.seek(start_offset)
+        buf = ""
+        buf_offset = start_offset  # buf[0]에 해당하는 파일의 바이트 위치
+        at_start = start_offset == 0
+        eof = False
+
+        while True:
+            # 공백, 항목 구분자(,), BOM은 건너뜁니다.
+            pos = 0
+            while pos < len(buf) and (buf[pos].isspace() or buf[pos] in ",\ufeff"):
+                pos += 1
+
+            if pos < len(buf):
+                if at_start and buf[pos] == "[":
+                    buf_offset += len(buf[: pos + 1].encode("utf-8"))
+                    buf = buf[pos + 1 :]
+                    at_start = False
+                    continue
+                if buf[pos] == "]":
+                    return
+                at_start = False
+                try:
+                    item, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    # 항목이 아직 다 읽히지 않았으면 더 읽어서 다시 시도합니다.
+                    if eof:
+                        raise
+                else:
+                    buf_offset += len(buf[:end].encode("utf-8"))
+                    buf = buf[end:]
+                    yield item, buf_offset
+                    continue
+            elif eof:
+                return
+
+            chunk = f.read(read_size)
+            eof = not chunk
+            buf += text_decoder.decode(chunk, final=eof)
+
+
+def normalize_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """리스트 값은 ChromaDB 메타데이터로 저장할 수 있도록 문자열로 합칩니다."""
+    return {
+        key: ", ".join(map(str, value)) if isinstance(value, list) else value
+        for key, value in item.items()
+    }
+
+
+def content_id(payload: Dict[str, Any]) -> str:
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _load_checkpoint(path: str, state: Dict[str, Any]) -> int:
+    """입력 파일과 컬렉션이 같을 때만 저장된 바이트 위치를 반환합니다."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return 0
+    if all(saved.get(k) == v for k, v in state.items()):
+        return saved.get("byte_offset", 0)
+    return 0
+
+
+def _save_checkpoint(path: str, state: Dict[str, Any], byte_offset: int, items_done: int):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({**state, "byte_offset": byte_offset, "items_done": items_done}, f)
+    os.replace(tmp_path, path)
+
+
+def _progress(offset: int, size: int) -> float:
+    return offset / size if size else 1.0
+
+
+def _uses_content_ids(collection) -> bool:
+    """내용 해시 ID로 적재한 컬렉션인지 확인합니다. 비어 있는 컬렉션은 지금부터 내용 해시 ID를 씁니다."""
+    if (collection.metadata or {}).get(ID_SCHEME_KEY) == ID_SCHEME:
+        return True
+    if collection.count() == 0:
+        _mark_content_ids(collection)
+        return True
+    return False
+
+
+def _mark_content_ids(collection):
+    # 거리 함수(hnsw:*)는 만든 뒤 바꿀 수 없으므로 다시 넘기지 않습니다.
+    metadata = {
+        key: value for key, value in (collection.metadata or {}).items() if not key.startswith("hnsw:")
+    }
+    collection.modify(metadata={**metadata, ID_SCHEME_KEY: ID_SCHEME})
+
+
+def _ingest_batch(collection, batch: List[Dict[str, Any]], batch_size: int) -> Tuple[int, List[str]]:
+    """배치에서 컬렉션에 아직 없는 항목만 임베딩하여 추가합니다. (추가한 개수, 배치의 ID 목록)을 반환합니다."""
+    unique: Dict[str, Dict[str, Any]] = {}
+    for payload in batch:
+        unique.setdefault(content_id(payload), payload)
+
+    ids = list(unique)
+    existing = set(collection.get(ids=ids, include=[])["ids"])
+    new_ids = [doc_id for doc_id in ids if doc_id not in existing]
+    if not new_ids:
+        return 0, ids
+
+    payloads = [unique[doc_id] for doc_id in new_ids]
+    documents = [payload["question"] for payload in payloads]
+    collection.add(
+        ids=new_ids,
+        embeddings=embed_texts(documents, batch_size=batch_size),
+        metadatas=payloads,
+        documents=documents,
     )
-    exit()
+    return len(new_ids), ids
+
 
-processed_payloads = []
-for item in json_data_list:
-    new_item = {}
-    for key, value in item.items():
-        if isinstance(value, list):
-            new_item[key] = ", ".join(map(str, value))
-        else:
-            new_item[key] = value
-    processed_payloads.append(new_item)
+def main():
+    parser = argparse.ArgumentParser(description="면접 데이터를 임베딩하여 ChromaDB에 적재합니다.")
+    parser.add_argument("--input", default="data.json", help="JSON 배열 또는 JSON Lines 파일")
+    parser.add_argument("--db-path", default="my_interview_db")
+    parser.add_argument("--collection", default=COLLECTION_NAME)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--checkpoint", default=None, help="기본값: <input>.checkpoint.json")
+    parser.add_argument("--rebuild", action="store_true", help="컬렉션을 비우고 처음부터 적재")
+    parser.add_argument(
+        "--prune",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="원본에 없는 항목을 삭제 (기본값). --no-prune이면 추가만 합니다.",
+    )
+    args = parser.parse_args()
 
+    if not os.path.exists(args.input):
+        print(
+            f"❌ 에러: '{args.input}' 파일을 찾을 수 없습니다. 스크립트와 같은 경로에 파일이 있는지 확인하세요."
+        )
+        return
 
-collection_name = "my_interviews_with_bge_m3"
+    client = chromadb.PersistentClient(path=args.db_path)
+    if args.rebuild:
+        existing_collections = [c.name for c in client.list_collections()]
+        if args.collection in existing_collections:
+            client.delete_collection(name=args.collection)
+            print(f"기존 컬렉션 '{args.collection}'을(를) 초기화했습니다.")
+    collection = client.get_or_create_collection(
+        name=args.collection, metadata={"hnsw:space": "cosine", ID_SCHEME_KEY: ID_SCHEME}
+    )
+    legacy_ids = not _uses_content_ids(collection)
+    if legacy_ids:
+        if not args.prune:
+            print(
+                f"❌ 에러: '{args.collection}'은(는) 예전 순번 ID로 적재된 컬렉션입니다. "
+                "--no-prune으로 추가하면 같은 항목이 중복 저장되므로, 옵션 없이 실행해 정리하거나 --rebuild를 사용하세요."
+            )
+            return
+        print(f"'{args.collection}'은(는) 예전 순번 ID로 적재된 컬렉션입니다. 내용 해시 ID로 바꾸며 이전 항목을 정리합니다.")
 
-print(f"'{collection_name}' 컬렉션 확인 중...")
-existing_collections = [c.name for c in client.list_collections()]
-if collection_name in existing_collections:
-    client.delete_collection(name=collection_name)
-    print(f"기존 컬렉션 '{collection_name}'을(를) 초기화했습니다.")
-else:
-    print("기존 컬렉션이 없어 새로 생성합니다.")
+    checkpoint_path = args.checkpoint or f"{args.input}.checkpoint.json"
+    stat = os.stat(args.input)
+    state = {
+        "input": os.path.abspath(args.input),
+        "input_size": stat.st_size,
+        "input_mtime": stat.st_mtime,
+        "collection": args.collection,
+    }
+    start_offset = 0 if args.rebuild else _load_checkpoint(checkpoint_path, state)
+    if start_offset:
+        print(f"체크포인트에서 재개합니다. ({_progress(start_offset, stat.st_size):.1%} 지점부터)")
 
+    seen_ids = set()
+    items_read = embedded = 0
+    started = time.perf_counter()
+    batch: List[Dict[str, Any]] = []
+    offset = start_offset
 
-collection = client.get_or_create_collection(
-    name=collection_name, metadata={"hnsw:space": "cosine"}
-)
+    def flush():
+        nonlocal embedded
+        added, ids = _ingest_batch(collection, batch, args.batch_size)
+        embedded += added
+        if args.prune:
+            seen_ids.update(ids)
+        _save_checkpoint(checkpoint_path, state, offset, items_read)
+        elapsed = time.perf_counter() - started
+        print(
+            f"[{_progress(offset, stat.st_size):6.1%}] 읽음 {items_read}개, 임베딩 {embedded}개, "
+            f"건너뜀 {items_read - embedded}개 | {items_read / elapsed:.1f} items/s"
+        )
+        batch.clear()
 
-texts_to_embed = [item["question"] for item in processed_payloads]
+    # 정리(prune)하려면 원본의 모든 ID를 알아야 하므로, 재개할 때도 처음부터 읽되 이미 적재한 부분은 ID만 계산합니다.
+    for item, offset in iter_json_items(args.input, 0 if args.prune else start_offset):
+        if offset <= start_offset:
+            seen_ids.add(content_id(normalize_item(item)))
+            continue
+        batch.append(normalize_item(item))
+        items_read += 1
+        if len(batch) >= args.batch_size:
+            flush()
+    if batch:
+        flush()
 
-print(f"{len(texts_to_embed)}개의 텍스트를 임베딩하는 중입니다...")
-vectors_to_upload = model.encode(texts_to_embed).tolist()
-print("임베딩 완료.")
+    if args.prune and not seen_ids:
+        # 빈 파일로 컬렉션 전체가 지워지지 않도록 정리하지 않습니다.
+        print("⚠️ 원본에 항목이 없어 컬렉션을 정리하지 않았습니다.")
+    elif args.prune:
+        stale = [doc_id for doc_id in collection.get(include=[])["ids"] if doc_id not in seen_ids]
+        for i in range(0, len(stale), 1000):
+            collection.delete(ids=stale[i : i + 1000])
+        print(f"원본에 없는 항목 {len(stale)}개를 삭제했습니다.")
+        if legacy_ids:
+            _mark_content_ids(collection)
 
-ids_to_upload = [str(idx) for idx, item in enumerate(processed_payloads)]
-payloads_to_upload = processed_payloads
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
 
+    elapsed = time.perf_counter() - started
+    print(
+        f"✅ 읽은 항목 {items_read}개 중 {embedded}개를 새로 임베딩하여 '{args.collection}' 컬렉션에 저장했습니다. "
+        f"({elapsed:.1f}초, 임베딩 {embedded / elapsed if elapsed else 0:.1f} items/s, "
+        f"컬렉션 전체 {collection.count()}개)"
+    )
 
-collection.add(
-    ids=ids_to_upload,
-    embeddings=vectors_to_upload,
-    metadatas=payloads_to_upload,
-    documents=texts_to_embed,
-)
 
-print(
-    f"✅ 총 {len(payloads_to_upload)}개의 데이터 포인트를 '{collection_name}' 컬렉션에 성공적으로 저장했습니다."
-)
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,198 @@
 # main.py
-from api.router import router as api_router
+import asyncio
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+
+from api.router import router as api_router, stt_engine, tts_synthesizer
 from fastapi import (
     FastAPI,
     HTTPException,
+    Request,
     WebSocket,
     WebSocketDisconnect,
 )
-from services.persona_analyzer import (
-    analyze_persona_from_history,
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from services.persona_jobs import ChatroomNotFoundError, persona_jobs
+from services.voice_conversation import VoiceConversation
+from db.persona_job_store import PersonaJob
+from db.transcript_store import get_transcript_store
+from db.vector_db import chat_indexer, get_collection, migrate_legacy_chatrooms
+from core.intent_router import INTENT_ROUTER_ENABLED
+from db.interview_index import INTERVIEW_INDEX_ENABLED
+from core.metrics import (
+    HTTP_REQUEST_DURATION,
+    format_server_timing,
+    render_metrics,
+    request_timings,
 )
-from db.vector_db import get_chat_history_by_chatroom
-from schemas import AnalysisResponse
+from core.startup import ResourceWarmup
+from schemas import AnalysisResponse, PersonaJobResponse
+from services.embedding_batcher import EmbeddingQueueFullError
+from services.embedding_service import get_embedding_model
 from dotenv import load_dotenv
 
 load_dotenv()
 
-app = FastAPI(title="다목적 AI 어시스턴트 API")
+# 웹소켓 스트리밍 시 전송 대기 중인 이벤트의 최대 개수 (backpressure 기준)
+WS_STREAM_QUEUE_SIZE = int(os.getenv("WS_STREAM_QUEUE_SIZE", "64"))
+# 기존 동기 분석 엔드포인트가 작업 결과를 기다리는 최대 시간
+PERSONA_JOB_SYNC_TIMEOUT_S = float(os.getenv("PERSONA_JOB_SYNC_TIMEOUT_S", "120"))
+# 작업 상태 스트림에서 상태가 바뀌지 않아도 현재 상태를 다시 보내는 간격
+PERSONA_JOB_STREAM_HEARTBEAT_S = float(os.getenv("PERSONA_JOB_STREAM_HEARTBEAT_S", "15"))
+
+
+def _open_chat_db():
+    if get_collection() is None:
+        raise RuntimeError("채팅 기록 ChromaDB를 열 수 없습니다.")
+
+
+def _open_interview_db():
+    from tools.interview_tools import get_interview_collection
+
+    get_interview_collection()
+
+
+def _load_interview_index():
+    from tools.interview_tools import interview_index
+
+    interview_index.load()
+
+
+def _load_agent_llm():
+    # core.agent(langchain 툴 정의)는 import가 무거워 여기서 처음 불러옵니다.
+    from core.agent import get_llm_with_tools
+
+    get_llm_with_tools()
+
+
+def _fit_intent_router():
+    from core.agent import intent_router
+
+    intent_router.warmup()
+
+
+# 무거운 자원은 import 시점이 아니라 서버 시작 후 백그라운드에서 병렬로 준비합니다.
+startup_warmup = ResourceWarmup()
+startup_warmup.register("embedding_model", get_embedding_model)
+startup_warmup.register("stt_workers", stt_engine.warmup)
+startup_warmup.register("transcript_store", get_transcript_store)
+# 채팅 기록 ChromaDB는 색인과 이전 기록 변환에만 쓰므로, 열지 못해도 저장/조회는 동작합니다.
+startup_warmup.register("chat_db", _open_chat_db, required=False)
+# ChromaDB에만 있던 이전 채팅 기록을 한 번 옮겨 두면, 이후 저장/조회 요청은 ChromaDB를 조회하지 않습니다.
+startup_warmup.register("chat_migration", migrate_legacy_chatrooms, required=False)
+startup_warmup.register("interview_db", _open_interview_db)
+startup_warmup.register("llm", _load_agent_llm)
+if INTERVIEW_INDEX_ENABLED:
+    # 실패하면 ChromaDB로 검색하므로 준비 완료 조건에서는 제외합니다.
+    startup_warmup.register("interview_index", _load_interview_index, required=False)
+if INTENT_ROUTER_ENABLED:
+    # 실패해도 LLM 라우팅으로 동작하므로 준비 완료 조건에서는 제외합니다.
+    startup_warmup.register("intent_router", _fit_intent_router, required=False)
+# 서버 재시작 전에 끝나지 않은 페르소나 분석 작업을 이어서 처리합니다.
+startup_warmup.register("persona_jobs", persona_jobs.resume_pending, required=False)
+# 서버 재시작 전에 밀린 채팅 기록 색인을 이어서 처리합니다.
+startup_warmup.register("chat_indexer", chat_indexer.notify, required=False)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 서버는 바로 요청을 받기 시작하고(/healthz), 자원 준비가 끝나면 /readyz가 200을 반환합니다.
+    warmup_task = asyncio.create_task(startup_warmup.run())
+    yield
+    warmup_task.cancel()
+    stt_engine.shutdown()
+    persona_jobs.shutdown()
+    chat_indexer.shutdown()
+
+
+app = FastAPI(title="다목적 AI 어시스턴트 API", lifespan=lifespan)
 app.include_router(api_router, prefix="/api")
 
 
+@app.exception_handler(EmbeddingQueueFullError)
+async def embedding_queue_full(request: Request, exc: EmbeddingQueueFullError):
+    """임베딩 대기열이 가득 차면 어느 엔드포인트에서 나왔든 500 대신 503으로 알립니다. (STT 대기열과 같은 방식)"""
+    return JSONResponse({"detail": str(exc)}, status_code=503)
+
+
+@app.middleware("http")
+async def add_server_timing(request: Request, call_next):
+    """
+    요청마다 단계별(STT, 라우팅 LLM, 툴, 임베딩, ChromaDB, TTS 등) 소요 시간을 모아
+    Server-Timing 응답 헤더로 돌려줍니다. (스트리밍 응답은 헤더를 보내기 전까지의 시간만 포함)
+    """
+    timings: dict = {}
+    token = request_timings.set(timings)
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        request_timings.reset(token)
+    elapsed = time.perf_counter() - started
+
+    route = request.scope.get("route")
+    HTTP_REQUEST_DURATION.observe(
+        elapsed,
+        method=request.method,
+        endpoint=getattr(route, "name", "unmatched"),
+        status=str(response.status_code),
+    )
+    response.headers["Server-Timing"] = format_server_timing({**timings, "total": elapsed})
+    return response
+
+
 @app.get("/", summary="API 서버 동작 확인")
 def read_root():
     return {"message": "AI 어시스턴트 API 서버가 정상적으로 동작하고 있습니다."}
 
 
+@app.get("/healthz", summary="프로세스 동작 확인")
+def healthz():
+    """프로세스가 살아 있으면 항상 200을 반환합니다. (모델 준비 여부와 무관)"""
+    return {"status": "ok"}
+
+
+@app.get("/readyz", summary="요청 처리 준비 확인")
+def readyz():
+    """모델과 DB 등 자원 준비가 끝났으면 200, 아니면 503을 반환합니다. 자원별 준비 시간도 함께 반환합니다."""
+    status = startup_warmup.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+@app.get("/metrics", summary="Prometheus 지표", response_class=PlainTextResponse)
+def metrics():
+    """단계별 처리 시간 히스토그램과 오류 수를 Prometheus 텍스트 형식으로 반환합니다."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
 # 페르소나 분석
+def _job_response(job: PersonaJob, cached: bool = False) -> dict:
+    return {
+        "job_id": job.job_id,
+        "chatroom_id": job.chatroom_id,
+        "status": job.status,
+        "cached": cached,
+        "result": job.result,
+        "error": job.error,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at,
+    }
+
+
+def _submit_persona_job(chatroom_id: str) -> tuple[PersonaJob, bool]:
+    if not chatroom_id:
+        raise HTTPException(status_code=400, detail="채팅방 ID가 필요합니다.")
+    try:
+        return persona_jobs.submit(chatroom_id)
+    except ChatroomNotFoundError:
+        raise HTTPException(
+            status_code=404,
+            detail=f"'{chatroom_id}'에 해당하는 채팅방을 찾을 수 없거나 대화 내용이 없습니다.",
+        )
+
+
 @app.post(
     "/analyze/chatroom/{chatroom_id}",
     response_model=AnalysisResponse,
@@ -34,42 +202,254 @@ def read_root():
 def analyze_chatroom_endpoint(chatroom_id: str):
     """
     채팅방 ID를 받아 해당 채팅방의 대화 페르소나 분석을 요청하는 엔드포인트입니다.
+    분석 작업을 만들고(또는 같은 대화 내용의 작업/결과를 재사용하고) 끝날 때까지 기다려 결과를 반환합니다.
     """
-    if not chatroom_id:
-        raise HTTPException(status_code=400, detail="채팅방 ID가 필요합니다.")
-    chat_history = get_chat_history_by_chatroom(chatroom_id)
+    job, _ = _submit_persona_job(chatroom_id)
+    if not job.done:
+        job = persona_jobs.wait(job.job_id, timeout=PERSONA_JOB_SYNC_TIMEOUT_S)
 
-    if not chat_history:
+    if job.status == "succeeded":
+        return job.result
+    if not job.done:
         raise HTTPException(
-            status_code=404,
-            detail=f"'{chatroom_id}'에 해당하는 채팅방을 찾을 수 없거나 대화 내용이 없습니다.",
+            status_code=504,
+            detail=f"분석이 아직 끝나지 않았습니다. GET /analyze/jobs/{job.job_id} 로 결과를 확인해주세요.",
         )
-    analysis_result = analyze_persona_from_history(chat_history)
+    raise HTTPException(
+        status_code=500,
+        detail="대화 내용 분석에 실패했습니다. 나중에 다시 시도해주세요.",
+    )
 
-    if not analysis_result:
-        raise HTTPException(
-            status_code=500,
-            detail="대화 내용 분석에 실패했습니다. 나중에 다시 시도해주세요.",
-        )
 
-    return analysis_result
+@app.post(
+    "/analyze/chatroom/{chatroom_id}/jobs",
+    response_model=PersonaJobResponse,
+    status_code=202,
+    summary="채팅방 페르소나 분석 작업 요청",
+)
+def create_analysis_job(chatroom_id: str):
+    """
+    분석 작업 ID를 바로 반환합니다. (202)
+    현재 대화 내용으로 이미 분석한 결과가 있으면 결과를 담아 200으로 반환하고,
+    같은 대화 내용으로 진행 중인 작업이 있으면 새로 만들지 않고 그 작업을 반환합니다.
+    """
+    job, _ = _submit_persona_job(chatroom_id)
+    if job.status == "succeeded":
+        return JSONResponse(_job_response(job, cached=True), status_code=200)
+    return _job_response(job)
+
+
+@app.get(
+    "/analyze/jobs/{job_id}",
+    response_model=PersonaJobResponse,
+    summary="페르소나 분석 작업 조회",
+)
+def get_analysis_job(job_id: str):
+    job = persona_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"'{job_id}' 작업을 찾을 수 없습니다.")
+    return _job_response(job)
+
+
+@app.get("/analyze/jobs/{job_id}/stream", summary="페르소나 분석 작업 상태 스트리밍")
+async def stream_analysis_job(job_id: str):
+    """
+    작업 상태가 바뀔 때마다 NDJSON 한 줄씩 보내고, 작업이 끝나면(결과 포함) 응답을 닫습니다.
+    상태가 바뀌지 않아도 PERSONA_JOB_STREAM_HEARTBEAT_S마다 현재 상태를 다시 보냅니다.
+    """
+    job = await asyncio.to_thread(persona_jobs.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"'{job_id}' 작업을 찾을 수 없습니다.")
+
+    async def events():
+        current = job
+        last_sent = None
+        while True:
+            if current.status != last_sent or current.done:
+                yield json.dumps(_job_response(current), ensure_ascii=False) + "\n"
+                last_sent = current.status
+                sent_at = time.monotonic()
+            if current.done:
+                return
+            # 상태 변화(대기 -> 실행 중)를 놓치지 않도록 1초 단위로 다시 확인합니다.
+            current = await persona_jobs.await_job(job_id, timeout=1.0) or current
+            if time.monotonic() - sent_at >= PERSONA_JOB_STREAM_HEARTBEAT_S:
+                last_sent = None
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+async def _stream_agent_response(websocket: WebSocket, user_text: str, session_id):
+    """
+    에이전트 이벤트를 웹소켓으로 흘려보냅니다.
+    생성(producer)과 전송(consumer) 사이에 크기가 제한된 큐를 두어, 클라이언트가 느리면
+    큐가 차서 LLM 스트림 소비가 멈추고(backpressure), 밀린 토큰은 한 프레임으로 합쳐 보냅니다.
+    """
+    from core.agent import stream_user_request
+
+    queue: asyncio.Queue = asyncio.Queue(maxsize=WS_STREAM_QUEUE_SIZE)
+    started = time.perf_counter()
+
+    async def produce():
+        try:
+            async for event in stream_user_request(user_text, session_id=session_id):
+                await queue.put(event)
+        except Exception as e:
+            await queue.put(
+                {"type": "final", "result": {"error": f"응답 생성 중 오류: {e}"}}
+            )
+        finally:
+            await queue.put(None)
+
+    producer = asyncio.create_task(produce())
+    first_token_ms = None
+    token_frames = 0
+    final_result = None
+    pending_tokens: list[str] = []
+    pending_tool = None  # 여러 툴이 동시에 실행될 때 합치는 중인 토큰의 툴 이름
+
+    async def flush_tokens():
+        nonlocal first_token_ms, token_frames
+        if not pending_tokens:
+            return
+        if first_token_ms is None:
+            first_token_ms = (time.perf_counter() - started) * 1000
+        frame = {"type": "token", "session_id": session_id, "content": "".join(pending_tokens)}
+        if pending_tool is not None:
+            frame["tool"] = pending_tool
+        await websocket.send_json(frame)
+        token_frames += 1
+        pending_tokens.clear()
+
+    try:
+        finished = False
+        while not finished:
+            # 전송이 밀리는 동안 쌓인 이벤트를 한 번에 꺼내 연속된 토큰을 합칩니다.
+            events = [await queue.get()]
+            while not queue.empty():
+                events.append(queue.get_nowait())
+
+            for event in events:
+                if event is not None and event["type"] == "token":
+                    # 다른 툴의 토큰끼리는 섞이지 않도록 툴이 바뀌면 먼저 내보냅니다.
+                    if event.get("tool") != pending_tool:
+                        await flush_tokens()
+                        pending_tool = event.get("tool")
+                    pending_tokens.append(event["content"])
+                    continue
+
+                await flush_tokens()
+                if event is None:
+                    finished = True
+                    break
+                if event["type"] == "final":
+                    final_result = event["result"]
+                else:
+                    await websocket.send_json({**event, "session_id": session_id})
+            await flush_tokens()
+    finally:
+        producer.cancel()
+
+    await websocket.send_json(
+        {
+            "type": "done",
+            "session_id": session_id,
+            "result": final_result,
+            "metrics": {
+                "time_to_first_token_ms": (
+                    round(first_token_ms, 1) if first_token_ms is not None else None
+                ),
+                "total_ms": round((time.perf_counter() - started) * 1000, 1),
+                "token_frames": token_frames,
+            },
+        }
+    )
 
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
+    """
+    스트리밍 대화 엔드포인트입니다.
+    클라이언트는 {"user_text": ..., "session_id": ...} 형식의 JSON을 보내고,
+    서버는 token / tool_start / tool_end 프레임을 순서대로 보낸 뒤 마지막에 done 프레임을 보냅니다.
+    """
     await websocket.accept()
     print("✅ 웹소켓 연결 성공 및 수락 완료")
 
     try:
         while True:
             data = await websocket.receive_text()
-            print(f"클라이언트로부터 받은 메시지: {data}")
-            await websocket.send_text(f"서버가 받은 메시지: {data}")
+            try:
+                message = json.loads(data)
+            except json.JSONDecodeError:
+                # JSON이 아닌 일반 텍스트는 사용자 메시지로 취급합니다.
+                message = {"user_text": data}
+
+            user_text = message.get("user_text") if isinstance(message, dict) else None
+            if not user_text:
+                await websocket.send_json(
+                    {"type": "error", "detail": "'user_text' 필드가 필요합니다."}
+                )
+                continue
+
+            await _stream_agent_response(
+                websocket, user_text, session_id=message.get("session_id")
+            )
     except WebSocketDisconnect:
         print("🔌 클라이언트 연결이 끊어졌습니다.")
     except Exception as e:
         print(f"🚨 웹소켓 에러 발생: {e}")
 
 
+@app.websocket("/ws/voice")
+async def voice_websocket_endpoint(
+    websocket: WebSocket, session_id: str | None = None, lang: str = "ko"
+):
+    """
+    음성 대화 엔드포인트입니다. (/ws/voice?session_id=...&lang=ko, lang은 음성 인식과 음성 합성에 함께 쓰입니다)
+    클라이언트는 마이크 오디오를 PCM s16le, mono, 16kHz 바이너리 프레임으로 계속 보내고,
+    필요하면 텍스트 프레임으로 {"type": "end_turn"}(발화 끝 알림), {"type": "cancel"}(답변 중단)을 보냅니다.
+    서버는 vad / transcript 이벤트를 보내고, 답변은 문장마다 audio 이벤트(JSON) 뒤에 MP3 바이너리 프레임을,
+    턴이 끝나면 time_to_first_audio_ms 등이 담긴 turn_done 이벤트를 보냅니다.
+    """
+    await websocket.accept()
+    conversation = VoiceConversation(
+        websocket.send_json,
+        websocket.send_bytes,
+        stt_engine,
+        tts_synthesizer,
+        session_id=session_id,
+        lang=lang,
+    )
+    conversation.start()
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes") is not None:
+                await conversation.feed_audio(message["bytes"])
+                continue
+            try:
+                control = json.loads(message.get("text") or "")
+            except json.JSONDecodeError:
+                control = None
+            command = control.get("type") if isinstance(control, dict) else None
+            if command == "end_turn":
+                await conversation.end_turn()
+            elif command == "cancel":
+                conversation.cancel_response()
+            else:
+                await conversation.send_json(
+                    {"type": "error", "detail": "알 수 없는 제어 메시지입니다. (end_turn, cancel)"}
+                )
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        print(f"🚨 음성 웹소켓 에러 발생: {e}")
+    finally:
+        await conversation.close()
+
+
 # uvicorn main:app --reload --host 0.0.0.0 --port 8000
 # uvicorn main:app --reload --port 8000
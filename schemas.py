@@ -1,6 +1,8 @@
 # schemas.py
-from pydantic import BaseModel
-from typing import Any, Dict
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List
+
+from db.interview_index import INTERVIEW_MAX_RESULTS
 
 
 class UserRequest(BaseModel):
@@ -18,6 +20,15 @@ class FinalResponse(BaseModel):
 class ChatHistoryItem(BaseModel):
     chatroom_id: str
     content: str
+    # true이면 유사도 검색 대상으로 색인합니다. (생략하면 기존 설정 유지)
+    index: bool | None = None
+
+
+class ChatMessagesItem(BaseModel):
+    """기존 대화 뒤에 이어 붙일 새 메시지"""
+
+    content: str
+    index: bool | None = None
 
 
 class AnalysisResponse(BaseModel):
@@ -26,3 +37,37 @@ class AnalysisResponse(BaseModel):
     persona: str
     reasoning: str
     feedback: str
+
+
+class PersonaJobResponse(BaseModel):
+    """페르소나 분석 작업 상태"""
+
+    job_id: str
+    chatroom_id: str
+    status: str  # queued, running, succeeded, failed
+    cached: bool = False  # 이전에 끝난 작업의 결과를 그대로 돌려준 경우 True
+    result: AnalysisResponse | None = None
+    error: str | None = None
+    created_at: float
+    updated_at: float
+
+
+class TextBatchRequest(BaseModel):
+    """여러 텍스트 입력을 한 번에 처리하는 요청"""
+
+    texts: List[str]
+    stream: bool = False  # True면 결과를 NDJSON으로 한 줄씩 스트리밍합니다.
+
+
+class AnswerEvaluationItem(BaseModel):
+    question: str
+    user_answer: str
+
+
+class AnswerEvaluationBatchRequest(BaseModel):
+    """모의 면접 세션이 끝날 때 여러 답변을 한 번에 평가하는 요청"""
+
+    items: List[AnswerEvaluationItem]
+    include_references: bool = False  # 질문별로 유사한 모범 질문-답변 쌍을 함께 반환
+    n_references: int = Field(1, ge=1, le=INTERVIEW_MAX_RESULTS)
+    stream: bool = False
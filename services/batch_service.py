@@ -0,0 +1,87 @@
+# services/batch_service.py
+import os
+from typing import Any, AsyncIterator, Dict, List
+
+from dotenv import load_dotenv
+
+from core.agent import process_user_request
+from core.concurrency import map_bounded, run_blocking
+from core.intent_router import INTENT_ROUTER_ENABLED
+from core.scheduler import priority
+from services.embedding_service import embed_texts
+from tools.interview_tools import evaluate_user_answer, find_reference_qa_pairs
+
+load_dotenv()
+
+# 한 요청에 담을 수 있는 최대 항목 수와, 항목들을 동시에 처리할 최대 개수(LLM 호출 동시성)
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "50"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "4"))
+
+
+async def process_text_batch(texts: List[str]) -> AsyncIterator[Dict[str, Any]]:
+    """
+    여러 텍스트 입력을 process_user_request로 처리하고 결과를 입력 순서대로 내보냅니다.
+    로컬 라우팅용 임베딩은 한 배치로 미리 계산합니다. LLM/임베딩 작업은 batch 우선순위로 처리됩니다.
+    """
+    embeddings: List[List[float]] | List[None] = [None] * len(texts)
+    if INTENT_ROUTER_ENABLED and texts:
+        try:
+            with priority("batch"):
+                embeddings = await run_blocking(embed_texts, texts)
+        except Exception as e:
+            print(f"배치 임베딩 중 오류 발생, 항목별로 임베딩합니다: {e}")
+
+    async def handle(index: int) -> Dict[str, Any]:
+        try:
+            with priority("batch"):
+                response = await process_user_request(texts[index], embeddings[index])
+        except Exception as e:
+            response = {"error": f"요청 처리 중 오류: {e}"}
+        return {
+            "index": index,
+            "input_type": "text",
+            "original_text": texts[index],
+            "response": response,
+        }
+
+    async for result in map_bounded(handle, range(len(texts)), BATCH_MAX_CONCURRENCY):
+        yield result
+
+
+async def evaluate_answers_batch(
+    items: List[Dict[str, str]], include_references: bool = False, n_references: int = 1
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    면접 질문-답변 목록을 평가하고 결과를 입력 순서대로 내보냅니다.
+    include_references가 True면 질문별 유사 모범 답변을 한 번의 배치 검색으로 함께 찾습니다.
+    """
+    references = None
+    if include_references and items:
+        try:
+            with priority("batch"):
+                references = await find_reference_qa_pairs(
+                    [item["question"] for item in items], n=n_references
+                )
+        except Exception as e:
+            print(f"모범 답변 검색 중 오류 발생: {e}")
+
+    async def handle(index: int) -> Dict[str, Any]:
+        item = items[index]
+        result: Dict[str, Any] = {
+            "index": index,
+            "question": item["question"],
+            "user_answer": item["user_answer"],
+        }
+        try:
+            with priority("batch"):
+                result["feedback"] = await evaluate_user_answer.ainvoke(
+                    {"question": item["question"], "user_answer": item["user_answer"]}
+                )
+        except Exception as e:
+            result["error"] = f"답변 평가 중 오류: {e}"
+        if references is not None:
+            result["references"] = references[index]
+        return result
+
+    async for result in map_bounded(handle, range(len(items)), BATCH_MAX_CONCURRENCY):
+        yield result
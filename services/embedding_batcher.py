@@ -0,0 +1,153 @@
+# services/embedding_batcher.py
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Sequence
+
+from core.metrics import request_timings
+from core.scheduler import PRIORITIES, current_priority, priority
+
+
+class EmbeddingQueueFullError(RuntimeError):
+    """임베딩 대기열이 가득 차 요청을 받을 수 없을 때 발생합니다."""
+
+
+class EmbeddingBatcher:
+    """
+    여러 호출자의 단건 임베딩 요청을 모아 한 번의 배치 encode 호출로 처리하는 스케줄러입니다.
+    배치가 max_batch_size에 도달하거나 max_wait_ms가 지나면 즉시 처리(flush)합니다.
+
+    요청마다 호출자의 우선순위 클래스(core/scheduler.py)와 요청별 단계 시간(request_timings)을 함께 넣어 두고,
+    모은 배치를 우선순위별로 나눠 그 클래스로 encode합니다. encode에 걸린 시간은 timing_stage 이름으로
+    각 호출자의 요청 시간에 더해 Server-Timing에 나오게 합니다.
+    """
+
+    def __init__(
+        self,
+        encode_batch: Callable[[List[str]], Sequence[Sequence[float]]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        max_queue_size: int = 1024,
+        timing_stage: str = "embedding_encode",
+    ):
+        self._encode_batch = encode_batch
+        self.timing_stage = timing_stage
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_s = max(0.0, max_wait_ms) / 1000
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        self._worker: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._max_batch = 0
+        self._batch_size_hist: dict[int, int] = {}
+        self._wait_total_s = 0.0
+        self._wait_max_s = 0.0
+        self._rejected = 0
+
+    def submit(self, text: str) -> Future:
+        """텍스트 하나를 대기열에 넣고, 임베딩 결과(List[float])를 담을 Future를 반환합니다."""
+        self._ensure_worker()
+        future: Future = Future()
+        try:
+            self._queue.put_nowait(
+                (text, future, time.perf_counter(), current_priority.get(), request_timings.get())
+            )
+        except queue.Full:
+            with self._stats_lock:
+                self._rejected += 1
+            raise EmbeddingQueueFullError("임베딩 요청이 많아 잠시 후 다시 시도해주세요.")
+        return future
+
+    def encode(self, text: str, timeout: float | None = None) -> List[float]:
+        """submit 후 결과가 나올 때까지 기다립니다."""
+        return self.submit(text).result(timeout=timeout)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "batches": self._batches,
+                "items": self._items,
+                "avg_batch_size": self._items / self._batches if self._batches else 0.0,
+                "max_batch_size": self._max_batch,
+                "batch_size_histogram": dict(sorted(self._batch_size_hist.items())),
+                "avg_queue_wait_ms": (
+                    self._wait_total_s / self._items * 1000 if self._items else 0.0
+                ),
+                "max_queue_wait_ms": self._wait_max_s * 1000,
+                "queue_depth": self._queue.qsize(),
+                "rejected": self._rejected,
+            }
+
+    def _ensure_worker(self):
+        if self._worker is not None:
+            return
+        with self._start_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name="embedding-batcher", daemon=True
+                )
+                self._worker.start()
+
+    def _collect_batch(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait_s
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            started = time.perf_counter()
+            # 대기 중 취소된 요청은 배치에서 제외합니다.
+            batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            self._record(len(batch), [started - item[2] for item in batch])
+            groups: Dict[str, list] = {}
+            for item in batch:
+                groups.setdefault(item[3], []).append(item)
+            # 높은 우선순위 클래스부터 처리합니다.
+            for name in sorted(groups, key=PRIORITIES.index):
+                self._encode_group(name, groups[name])
+
+    def _encode_group(self, priority_name: str, items: list):
+        started = time.perf_counter()
+        try:
+            with priority(priority_name):
+                vectors = self._encode_batch([item[0] for item in items])
+        except Exception as e:
+            self._add_timing(items, time.perf_counter() - started)
+            for item in items:
+                item[1].set_exception(e)
+            return
+        # 호출자가 결과를 받기 전에 시간을 더해 두어야 응답 헤더에 빠지지 않습니다.
+        self._add_timing(items, time.perf_counter() - started)
+        for item, vector in zip(items, vectors):
+            item[1].set_result(list(vector))
+
+    def _add_timing(self, items: list, seconds: float):
+        for item in items:
+            timings = item[4]
+            if timings is not None:
+                timings[self.timing_stage] = timings.get(self.timing_stage, 0.0) + seconds
+
+    def _record(self, size: int, waits: List[float]):
+        with self._stats_lock:
+            self._batches += 1
+            self._items += size
+            self._max_batch = max(self._max_batch, size)
+            self._batch_size_hist[size] = self._batch_size_hist.get(size, 0) + 1
+            self._wait_total_s += sum(waits)
+            self._wait_max_s = max(self._wait_max_s, max(waits))
@@ -0,0 +1,277 @@
+# services/embedding_cache.py
+import hashlib
+import os
+import sqlite3
+import threading
+import unicodedata
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Iterator, List
+
+import numpy as np
+
+
+def normalize_text(text: str) -> str:
+    """캐시 키 생성을 위해 유니코드 정규화 및 공백 정리를 수행합니다."""
+    return " ".join(unicodedata.normalize("NFKC", text).split()).lower()
+
+
+def make_cache_key(text: str, model_name: str) -> str:
+    return hashlib.sha1(f"{model_name}\x00{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+class _DiskVectorStore:
+    """
+    float16 벡터를 메모리 맵 파일에 저장하는 영구 저장소입니다.
+    키 -> 슬롯 인덱스는 SQLite에 보관하며, 용량이 가득 차면 가장 오래된 슬롯부터 덮어씁니다.
+
+    여러 프로세스(uvicorn 워커)가 같은 디렉터리를 써도 되도록, 슬롯 할당은 SQLite 쓰기 트랜잭션
+    (BEGIN IMMEDIATE) 안에서 하고, 항목마다 벡터의 체크섬을 저장해 다른 프로세스가 덮어쓰는 중인
+    슬롯을 읽으면 캐시 미스로 처리합니다.
+    """
+
+    def __init__(self, directory: str, max_entries: int):
+        os.makedirs(directory, exist_ok=True)
+        self.max_entries = max_entries
+        self._vectors_path = os.path.join(directory, "vectors.f16")
+        self._db = sqlite3.connect(
+            os.path.join(directory, "index.sqlite3"),
+            check_same_thread=False,
+            timeout=30,
+            isolation_level=None,  # 트랜잭션은 직접 BEGIN IMMEDIATE로 엽니다.
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, slot INTEGER UNIQUE, checksum INTEGER)"
+        )
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(entries)")}
+        if "checksum" not in columns:
+            self._db.execute("ALTER TABLE entries ADD COLUMN checksum INTEGER")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER)"
+        )
+        self._vectors: np.memmap | None = None
+        self._dim = self._get_meta("dim")
+        if self._dim:
+            with self._transaction():
+                self._resize(self._dim)
+            self._open_vectors(self._dim)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+
+    def _get_meta(self, name: str) -> int | None:
+        row = self._db.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, name: str, value: int):
+        self._db.execute(
+            "INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, value)
+        )
+
+    def _resize(self, dim: int):
+        """
+        저장된 용량(max_entries)과 현재 설정이 다르면 파일을 맞춥니다. (트랜잭션 안에서 호출)
+        늘리면 기존 항목을 그대로 두고 파일만 키우며, 줄이면 범위를 벗어난 슬롯의 항목을 지웁니다.
+        """
+        stored = self._get_meta("max_entries")
+        expected_bytes = self.max_entries * dim * 2
+        size = os.path.getsize(self._vectors_path) if os.path.exists(self._vectors_path) else 0
+        if stored is None and size not in (0, expected_bytes):
+            # 용량을 기록하기 전 버전이 만든 파일: 실제 크기에서 용량을 계산합니다.
+            stored = size // (dim * 2)
+        if stored is not None and stored != self.max_entries:
+            if self.max_entries < stored:
+                self._db.execute("DELETE FROM entries WHERE slot >= ?", (self.max_entries,))
+                next_slot = self._get_meta("next_slot") or 0
+                self._set_meta("next_slot", next_slot % self.max_entries)
+            print(f"임베딩 디스크 캐시 용량을 {stored} -> {self.max_entries}개로 조정합니다.")
+        if size != expected_bytes or not os.path.exists(self._vectors_path):
+            # 다른 프로세스와 동시에 파일을 만들며 덮어쓰지 않도록 트랜잭션 안에서 크기를 맞춥니다.
+            with open(self._vectors_path, "ab") as f:
+                f.truncate(expected_bytes)
+        self._set_meta("max_entries", self.max_entries)
+
+    def _open_vectors(self, dim: int):
+        # 파일은 _resize에서 만들고 크기를 맞춰 둡니다.
+        self._vectors = np.memmap(
+            self._vectors_path, dtype=np.float16, mode="r+", shape=(self.max_entries, dim)
+        )
+
+    def get(self, key: str) -> np.ndarray | None:
+        if self._vectors is None:
+            return None
+        row = self._db.execute(
+            "SELECT slot, checksum FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or row[0] >= self.max_entries:
+            return None
+        vector = np.array(self._vectors[row[0]])
+        if row[1] is not None and zlib.crc32(vector.tobytes()) != row[1]:
+            return None
+        return vector.astype(np.float32)
+
+    def put(self, key: str, vector: np.ndarray):
+        if self._vectors is None:
+            # 임베딩 차원은 첫 저장 시점에 결정됩니다. (다른 프로세스가 먼저 정했을 수 있음)
+            with self._transaction():
+                self._dim = self._get_meta("dim") or int(vector.shape[0])
+                self._set_meta("dim", self._dim)
+                self._resize(self._dim)
+            self._open_vectors(self._dim)
+        if vector.shape[0] != self._dim:
+            return
+
+        half = vector.astype(np.float16)
+        with self._transaction():
+            if self._db.execute("SELECT 1 FROM entries WHERE key = ?", (key,)).fetchone():
+                return
+            next_slot = self._get_meta("next_slot") or 0
+            slot = next_slot % self.max_entries
+            self._db.execute("DELETE FROM entries WHERE slot = ?", (slot,))
+            self._vectors[slot] = half
+            self._db.execute(
+                "INSERT INTO entries (key, slot, checksum) VALUES (?, ?, ?)",
+                (key, slot, zlib.crc32(half.tobytes())),
+            )
+            self._set_meta("next_slot", next_slot + 1)
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def flush(self):
+        if self._vectors is not None:
+            self._vectors.flush()
+
+
+class EmbeddingCache:
+    """
+    (텍스트, 모델명) 기준 임베딩 캐시입니다.
+    1차: 크기가 제한된 인메모리 LRU, 2차: 재시작 후에도 유지되는 디스크(memmap, float16) 저장소.
+    디스크 쓰기는 전용 스레드 하나에서 순서대로 처리하므로 put은 메모리에만 넣고 바로 돌아옵니다.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        memory_max_entries: int = 4096,
+        disk_dir: str | None = None,
+        disk_max_entries: int = 50000,
+    ):
+        self.model_name = model_name
+        self.memory_max_entries = memory_max_entries
+        self._memory: OrderedDict[str, List[float]] = OrderedDict()
+        self._disk = _DiskVectorStore(disk_dir, disk_max_entries) if disk_dir else None
+        self._disk_writer = (
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding-cache-writer")
+            if self._disk is not None
+            else None
+        )
+        self._lock = threading.Lock()
+        # 디스크 조회/쓰기는 메모리 조회를 막지 않도록 따로 잠급니다.
+        self._disk_lock = threading.Lock()
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @property
+    def has_disk(self) -> bool:
+        return self._disk is not None
+
+    def get(self, text: str, include_disk: bool = True) -> List[float] | None:
+        """
+        캐시된 벡터를 반환합니다. include_disk=False이면 메모리만 확인하므로 이벤트 루프에서 불러도 됩니다.
+        (이때 디스크 저장소가 있으면 미스로 세지 않으며, 호출자가 이어서 get_disk를 부릅니다)
+        """
+        key = make_cache_key(text, self.model_name)
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self._memory_hits += 1
+                return vector
+            if self._disk is None:
+                self._misses += 1
+                return None
+        return self.get_disk(text) if include_disk else None
+
+    def get_disk(self, text: str) -> List[float] | None:
+        """디스크 저장소만 확인합니다. (SQLite 조회와 memmap 읽기가 있으므로 스레드 풀에서 부르세요)"""
+        if self._disk is None:
+            return None
+        key = make_cache_key(text, self.model_name)
+        with self._disk_lock:
+            disk_vector = self._disk.get(key)
+        with self._lock:
+            if disk_vector is None:
+                self._misses += 1
+                return None
+            self._disk_hits += 1
+            vector = disk_vector.tolist()
+            self._put_memory(key, vector)
+            return vector
+
+    def put(self, text: str, vector: List[float]):
+        key = make_cache_key(text, self.model_name)
+        with self._lock:
+            self._put_memory(key, vector)
+        if self._disk_writer is not None:
+            self._disk_writer.submit(self._put_disk, key, np.asarray(vector, dtype=np.float32))
+
+    def _put_disk(self, key: str, vector: np.ndarray):
+        try:
+            with self._disk_lock:
+                self._disk.put(key, vector)
+        except Exception as e:
+            print(f"임베딩 디스크 캐시 저장 중 오류 발생: {e}")
+
+    def _put_memory(self, key: str, vector: List[float]):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_max_entries:
+            self._memory.popitem(last=False)
+            self._evictions += 1
+
+    def flush(self):
+        """밀린 디스크 쓰기를 모두 끝내고 memmap을 파일에 씁니다."""
+        if self._disk_writer is not None:
+            try:
+                self._disk_writer.submit(lambda: None).result()
+            except RuntimeError:
+                # 인터프리터 종료 중에는 쓰기 스레드가 남은 작업을 이미 끝내고 멈춘 상태입니다.
+                pass
+        with self._disk_lock:
+            if self._disk is not None:
+                self._disk.flush()
+
+    def _disk_entries(self) -> int:
+        if self._disk is None:
+            return 0
+        with self._disk_lock:
+            return len(self._disk)
+
+    def stats(self) -> dict:
+        disk_entries = self._disk_entries()
+        with self._lock:
+            lookups = self._memory_hits + self._disk_hits + self._misses
+            return {
+                "memory_hits": self._memory_hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "hit_ratio": (
+                    (self._memory_hits + self._disk_hits) / lookups if lookups else 0.0
+                ),
+                "memory_entries": len(self._memory),
+                "memory_evictions": self._evictions,
+                "disk_entries": disk_entries,
+            }
@@ -0,0 +1,153 @@
+# services/embedding_service.py
+import asyncio
+import atexit
+import os
+import threading
+from typing import List
+
+from dotenv import load_dotenv
+
+from core.concurrency import run_blocking
+from core.metrics import stage_timer
+from core.scheduler import PriorityScheduler
+from services.embedding_batcher import EmbeddingBatcher
+from services.embedding_cache import EmbeddingCache
+
+load_dotenv()
+
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "dragonkue/bge-m3-ko")
+# "sentence_transformers"(기본) 또는 "fake"(벤치마크용 가짜 모델, core/fake_backends.py)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "sentence_transformers").lower()
+# 단건 임베딩 요청을 모아 처리하는 마이크로 배치 설정
+EMBEDDING_BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "32"))
+EMBEDDING_BATCH_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "5"))
+EMBEDDING_QUEUE_MAX_SIZE = int(os.getenv("EMBEDDING_QUEUE_MAX_SIZE", "1024"))
+# 반복되는 질의(예: "자기소개", "지원동기")를 위한 2단계 임베딩 캐시 설정
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+EMBEDDING_CACHE_MEMORY_MAX_ENTRIES = int(
+    os.getenv("EMBEDDING_CACHE_MEMORY_MAX_ENTRIES", "4096")
+)
+EMBEDDING_CACHE_DISK_MAX_ENTRIES = int(
+    os.getenv("EMBEDDING_CACHE_DISK_MAX_ENTRIES", "50000")
+)
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "./embedding_cache")
+# 동시에 실행할 encode 호출 수. 모델이 CPU 코어를 모두 쓰므로 기본은 1입니다.
+EMBEDDING_MAX_CONCURRENCY = int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "1"))
+
+# 프로세스당 하나의 임베딩 모델만 유지합니다. (import 시점에는 로드하지 않음)
+_embedding_model = None
+_model_lock = threading.Lock()
+
+
+def get_embedding_model():
+    """공유 임베딩 모델을 반환합니다. 최초 호출 시에만 모델을 로드합니다."""
+    global _embedding_model
+    if _embedding_model is not None:
+        return _embedding_model
+
+    with _model_lock:
+        if _embedding_model is None and EMBEDDING_BACKEND == "fake":
+            from core.fake_backends import FakeEmbeddingModel
+
+            _embedding_model = FakeEmbeddingModel()
+        if _embedding_model is None:
+            # sentence_transformers(torch) import 자체가 무거우므로 로드 시점까지 미룹니다.
+            from sentence_transformers import SentenceTransformer
+
+            print(f"임베딩 모델({EMBEDDING_MODEL_NAME})을 로드하는 중입니다...")
+            _embedding_model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+            print("임베딩 모델 로드 완료.")
+    return _embedding_model
+
+
+# 대화 요청의 임베딩이 채팅 기록 저장 같은 대량 임베딩 뒤에 밀리지 않도록 우선순위에 따라 자리를 나눠 줍니다.
+_scheduler = PriorityScheduler("embedding", EMBEDDING_MAX_CONCURRENCY)
+
+
+def embed_texts(texts: List[str], batch_size: int = 32) -> List[List[float]]:
+    """
+    여러 텍스트를 batch_size씩 encode 호출로 임베딩합니다.
+    배치마다 스케줄러에서 자리를 받으므로, 긴 백그라운드 작업 사이에도 대화 요청이 끼어들 수 있습니다.
+    """
+    if not texts:
+        return []
+    model = get_embedding_model()
+    vectors: List[List[float]] = []
+    for start in range(0, len(texts), batch_size):
+        with _scheduler.slot(), stage_timer("embedding_encode"):
+            vectors.extend(
+                model.encode(texts[start : start + batch_size], batch_size=batch_size).tolist()
+            )
+    return vectors
+
+
+_batcher = EmbeddingBatcher(
+    encode_batch=lambda texts: embed_texts(texts, batch_size=EMBEDDING_BATCH_MAX_SIZE),
+    max_batch_size=EMBEDDING_BATCH_MAX_SIZE,
+    max_wait_ms=EMBEDDING_BATCH_WAIT_MS,
+    max_queue_size=EMBEDDING_QUEUE_MAX_SIZE,
+)
+
+
+_cache: EmbeddingCache | None = None
+if EMBEDDING_CACHE_ENABLED:
+    try:
+        _cache = EmbeddingCache(
+            # 가짜 모델의 벡터가 실제 모델의 캐시와 섞이지 않도록 키를 구분합니다.
+            model_name="fake" if EMBEDDING_BACKEND == "fake" else EMBEDDING_MODEL_NAME,
+            memory_max_entries=EMBEDDING_CACHE_MEMORY_MAX_ENTRIES,
+            disk_dir=EMBEDDING_CACHE_DIR or None,
+            disk_max_entries=EMBEDDING_CACHE_DISK_MAX_ENTRIES,
+        )
+        atexit.register(_cache.flush)
+    except Exception as e:
+        print(f"임베딩 캐시 초기화 중 오류 발생: {e}")
+        _cache = None
+
+
+def embed_text(text: str, use_cache: bool = True) -> List[float]:
+    """
+    단일 텍스트를 임베딩합니다.
+    캐시에 없으면 동시에 들어온 다른 요청들과 함께 하나의 배치로 묶여 처리됩니다.
+    """
+    if use_cache and _cache is not None:
+        cached = _cache.get(text)
+        if cached is not None:
+            return cached
+
+    with stage_timer("embedding"):
+        embedding = _batcher.encode(text)
+
+    if use_cache and _cache is not None:
+        _cache.put(text, embedding)
+    return embedding
+
+
+async def aembed_text(text: str, use_cache: bool = True) -> List[float]:
+    """
+    embed_text의 비동기 버전입니다. 배치 결과를 기다리는 동안 이벤트 루프를 막지 않습니다.
+    이벤트 루프에서는 메모리 캐시만 확인하고, 디스크 캐시 조회는 스레드 풀에서 합니다.
+    """
+    if use_cache and _cache is not None:
+        cached = _cache.get(text, include_disk=False)
+        if cached is None and _cache.has_disk:
+            cached = await run_blocking(_cache.get_disk, text)
+        if cached is not None:
+            return cached
+
+    with stage_timer("embedding"):
+        embedding = await asyncio.wrap_future(_batcher.submit(text))
+
+    if use_cache and _cache is not None:
+        _cache.put(text, embedding)
+    return embedding
+
+
+def get_batcher_stats() -> dict:
+    """마이크로 배치 통계(배치 크기 분포, 대기열 대기 시간 등)를 반환합니다."""
+    return _batcher.stats()
+
+
+def get_cache_stats() -> dict:
+    """임베딩 캐시 적중/미스 및 항목 수를 반환합니다."""
+    return _cache.stats() if _cache is not None else {}
@@ -1,14 +1,19 @@
 # services/persona_analyzer.py
-from langchain_openai import ChatOpenAI
 import os
 from dotenv import load_dotenv
 
+from core.llm import get_chat_model
+from db.persona_summary_store import get_persona_summary_store, hash_text
+
 load_dotenv()
 
-_internal_llm = ChatOpenAI(
-    model=os.getenv("LLM_MODEL_NAME", "gpt-4o-mini"),
-    temperature=0.7,
-)
+
+def _llm():
+    return get_chat_model(
+        model=os.getenv("LLM_MODEL_NAME", "gpt-4o-mini"),
+        temperature=0.7,
+    )
+
 
 # --- 6가지 페르소나 상세 정보 ---
 HEXACO_PERSONA_DESCRIPTIONS = """
@@ -33,20 +38,30 @@ HEXACO_PERSONA_DESCRIPTIONS = """
 """
 
 
-def analyze_persona_from_history(chat_history: str) -> dict | None:
-    """대화 기록(chat_history)을 직접 받아 페르소나를 분석하고 결과를 딕셔너리로 반환합니다."""
-    if not chat_history:
-        print("분석할 대화 내용이 없습니다.")
-        return None
+# 대화가 길어져도 프롬프트가 무한정 커지지 않도록 하는 토큰 예산
+PERSONA_TRANSCRIPT_TOKEN_BUDGET = int(os.getenv("PERSONA_TRANSCRIPT_TOKEN_BUDGET", "3000"))
+# 요약 없이 원문 그대로 넣을 최근 대화의 토큰 수
+PERSONA_RECENT_TOKENS = int(os.getenv("PERSONA_RECENT_TOKENS", "1000"))
+# 요약을 갱신할 때 한 번에 LLM에 넘길 새 대화의 토큰 수
+PERSONA_SUMMARY_CHUNK_TOKENS = int(os.getenv("PERSONA_SUMMARY_CHUNK_TOKENS", "2000"))
 
-    prompt = f"""
+
+def _count_tokens(text: str) -> int:
+    try:
+        return _llm().get_num_tokens(text)
+    except Exception:
+        # 토크나이저를 쓸 수 없는 모델이면 대략적인 값으로 계산합니다.
+        return len(text) // 2
+
+
+def _build_persona_prompt(conversation: str) -> str:
+    return f"""
     당신은 HEXACO 성격 모델 기반의 대화 스타일 분석가입니다.
     아래 6가지 페르소나 설명과 사용자 대화 내용을 바탕으로, 이 대화에서 사용자의 페르소나를 분석해주세요.
 
     {HEXACO_PERSONA_DESCRIPTIONS}  
     ---
-    ### 사용자 대화 내용
-    {chat_history}
+    {conversation}
     ---
     ### 분석 요청
     위 대화 내용에서 사용자 'B'의 스타일에 가장 적합한 페르소나를 **단 하나만** 선택하고, 아래 형식에 맞춰 분석 결과를 작성해주세요.
@@ -57,23 +72,174 @@ def analyze_persona_from_history(chat_history: str) -> dict | None:
     - **당신은 이런 점이 멋져요!**: 
     """
 
+
+def _parse_persona_response(response_text: str) -> dict | None:
+    lines = response_text.strip().split("\n- ")
+    result = {}
+    for line in lines:
+        if ":" in line:
+            key, value = line.split(":", 1)
+            key = key.strip().replace("*", "")
+            if key == "당신의 대화 페르소나":
+                result["persona"] = value.strip()
+            elif key == "판단 근거":
+                result["reasoning"] = value.strip()
+            elif key == "당신은 이런 점이 멋져요!":
+                result["feedback"] = value.strip()
+
+    return result if "persona" in result else None
+
+
+def _split_recent_tail(chat_history: str, tail_tokens: int) -> int:
+    """최근 대화가 tail_tokens 안에 들어오도록, 원문으로 남길 부분의 시작 위치(문자 인덱스)를 반환합니다."""
+    position = len(chat_history)
+    used = 0
+    for line in reversed(chat_history.splitlines(keepends=True)):
+        used += _count_tokens(line)
+        if used > tail_tokens:
+            break
+        position -= len(line)
+    return position
+
+
+def _split_by_tokens(text: str, max_tokens: int) -> list[str]:
+    pieces, current, current_tokens = [], "", 0
+    for line in text.splitlines(keepends=True):
+        line_tokens = _count_tokens(line)
+        if current and current_tokens + line_tokens > max_tokens:
+            pieces.append(current)
+            current, current_tokens = "", 0
+        current += line
+        current_tokens += line_tokens
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def _extend_summary(summary: str, new_messages: str) -> str:
+    prompt = f"""
+    당신은 대화 기록을 요약하는 분석가입니다. 이 요약은 이후 사용자 'B'의 대화 페르소나(HEXACO) 분석에 사용됩니다.
+    기존 요약에 새 대화 내용을 반영하여 갱신된 요약을 작성해주세요.
+    사용자 'B'의 말투, 감정 표현, 대화 주도 여부, 가치관이 드러나는 발언과 대표적인 표현(짧은 인용)을 중심으로 남기고,
+    전체 분량은 15문장 이내로 유지해주세요.
+
+    ### 기존 요약
+    {summary or "(없음)"}
+
+    ### 새 대화 내용
+    {new_messages}
+
+    ### 갱신된 요약
+    """
+    return _llm().invoke(prompt).content.strip()
+
+
+def _compress_summary(summary: str, max_tokens: int) -> str:
+    prompt = f"""
+    아래는 사용자 'B'의 대화 페르소나(HEXACO) 분석에 쓰일 대화 요약입니다.
+    말투, 감정 표현, 대화 주도 여부, 가치관이 드러나는 내용은 남기고 겹치거나 덜 중요한 내용은 빼서,
+    약 {max_tokens}토큰 이내로 더 짧게 다시 요약해주세요.
+
+    ### 요약
+    {summary}
+
+    ### 짧게 다시 쓴 요약
+    """
+    return _llm().invoke(prompt).content.strip()
+
+
+def _truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """text의 앞부분을 max_tokens 안에 들어오는 가장 긴 길이로 자릅니다."""
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if _count_tokens(text[:middle]) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low]
+
+
+def _fit_summary(summary: str, max_tokens: int) -> str:
+    """
+    요약은 "15문장 이내" 지시만으로는 길이가 보장되지 않으므로, 토큰 수를 세어 max_tokens를 넘으면
+    한 번 더 짧게 요약하고, 그래도 넘으면 잘라냅니다.
+    """
+    if max_tokens <= 0:
+        return ""
+    if _count_tokens(summary) <= max_tokens:
+        return summary
+    summary = _compress_summary(summary, max_tokens)
+    if _count_tokens(summary) <= max_tokens:
+        return summary
+    return _truncate_to_tokens(summary, max_tokens)
+
+
+def update_rolling_summary(chatroom_id: str, chat_history: str) -> tuple[str, str]:
+    """
+    채팅방의 누적 요약을 지난 분석 이후 새로 추가된 대화로만 갱신합니다.
+    (요약, 요약에 포함되지 않은 최근 대화 원문)을 반환하며, 둘을 합쳐 PERSONA_TRANSCRIPT_TOKEN_BUDGET 안에 들어오게 합니다.
+    """
+    cut = _split_recent_tail(chat_history, PERSONA_RECENT_TOKENS)
+    store = get_persona_summary_store()
+    record = store.get(chatroom_id)
+
+    if (
+        record
+        and record.summarized_chars <= cut
+        and hash_text(chat_history[: record.summarized_chars]) == record.prefix_hash
+    ):
+        summary, start = record.summary, record.summarized_chars
+    else:
+        # 처음 분석하거나 이전 대화 내용이 바뀐 경우 처음부터 요약합니다.
+        summary, start = "", 0
+
+    new_part = chat_history[start:cut]
+    if not new_part.strip():
+        cut = start
+    recent = chat_history[cut:]
+    summary_budget = PERSONA_TRANSCRIPT_TOKEN_BUDGET - _count_tokens(recent)
+
+    if new_part.strip():
+        for piece in _split_by_tokens(new_part, PERSONA_SUMMARY_CHUNK_TOKENS):
+            summary = _extend_summary(summary, piece)
+        summary = _fit_summary(summary, summary_budget)
+        store.save(chatroom_id, cut, hash_text(chat_history[:cut]), summary)
+    else:
+        # 저장된 요약이 예산 설정이 바뀌기 전에 만든 것일 수 있으므로 다시 확인합니다.
+        fitted = _fit_summary(summary, summary_budget)
+        if fitted != summary:
+            summary = fitted
+            store.save(chatroom_id, cut, hash_text(chat_history[:cut]), summary)
+
+    return summary, recent
+
+
+def analyze_persona_from_history(
+    chat_history: str, chatroom_id: str | None = None
+) -> dict | None:
+    """
+    대화 기록(chat_history)을 직접 받아 페르소나를 분석하고 결과를 딕셔너리로 반환합니다.
+    chatroom_id가 주어지고 대화가 토큰 예산을 넘으면, 채팅방별 누적 요약과 최근 대화만으로 프롬프트를 구성합니다.
+    """
+    if not chat_history:
+        print("분석할 대화 내용이 없습니다.")
+        return None
+
     try:
-        response_text = _internal_llm.invoke(prompt).content
-
-        lines = response_text.strip().split("\n- ")
-        result = {}
-        for line in lines:
-            if ":" in line:
-                key, value = line.split(":", 1)
-                key = key.strip().replace("*", "")
-                if key == "당신의 대화 페르소나":
-                    result["persona"] = value.strip()
-                elif key == "판단 근거":
-                    result["reasoning"] = value.strip()
-                elif key == "당신은 이런 점이 멋져요!":
-                    result["feedback"] = value.strip()
-
-        return result if "persona" in result else None
+        if chatroom_id and _count_tokens(chat_history) > PERSONA_TRANSCRIPT_TOKEN_BUDGET:
+            summary, recent = update_rolling_summary(chatroom_id, chat_history)
+            conversation = f"""### 이전 대화 요약
+    {summary}
+
+    ### 최근 사용자 대화 내용
+    {recent}"""
+        else:
+            conversation = f"""### 사용자 대화 내용
+    {chat_history}"""
+
+        response_text = _llm().invoke(_build_persona_prompt(conversation)).content
+        return _parse_persona_response(response_text)
 
     except Exception as e:
         print(f"페르소나 분석 중 오류 발생: {e}")
@@ -0,0 +1,231 @@
+# services/persona_jobs.py
+"""
+페르소나 분석을 비동기 작업(job)으로 처리합니다.
+
+  - submit: 현재 대화 내용으로 만든 결과가 있으면 바로 돌려주고, 같은 대화 내용으로 대기/실행 중인
+            작업이 있으면 그 작업을 돌려주며, 없을 때만 새 작업을 만들어 작업 스레드에 넘깁니다.
+  - 작업 상태와 결과는 db/persona_job_store.py(SQLite)에 남으므로, 서버가 다시 시작되면
+    resume_pending으로 끝나지 않은 작업을 이어서 처리합니다.
+  - 실행 중인 작업은 PERSONA_JOB_LEASE_S 동안 이 프로세스에 임대되며, 처리하는 동안 heartbeat로 연장합니다.
+    다른 프로세스(또는 재시작된 서버)는 임대가 만료된 작업만 다시 가져가므로 같은 작업이 두 번 실행되지 않습니다.
+  - 작업 스레드의 LLM 호출은 background 우선순위로 처리됩니다. (대화 요청보다 늦어져도 됨)
+"""
+import asyncio
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+from core.scheduler import priority
+from db.persona_job_store import QUEUED, PersonaJob, get_persona_job_store
+from db.persona_summary_store import hash_text
+from db.vector_db import get_chat_history_by_chatroom
+from services.persona_analyzer import analyze_persona_from_history
+
+load_dotenv()
+
+# 동시에 실행할 페르소나 분석 작업 수
+PERSONA_JOB_WORKERS = int(os.getenv("PERSONA_JOB_WORKERS", "2"))
+# 다른 프로세스가 처리 중인 작업을 기다릴 때 저장소를 다시 읽는 간격
+PERSONA_JOB_POLL_INTERVAL_S = float(os.getenv("PERSONA_JOB_POLL_INTERVAL_S", "0.5"))
+# 실행 중인 작업의 임대 시간. 이 시간 동안 heartbeat가 없으면 처리하던 프로세스가 죽은 것으로 봅니다.
+PERSONA_JOB_LEASE_S = float(os.getenv("PERSONA_JOB_LEASE_S", "60"))
+
+
+class ChatroomNotFoundError(LookupError):
+    """분석할 대화 내용이 없는 채팅방입니다."""
+
+
+class PersonaJobService:
+    def __init__(self, workers: int = PERSONA_JOB_WORKERS, lease_s: float = PERSONA_JOB_LEASE_S):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="persona-job")
+        self._lock = threading.Lock()
+        # 이 프로세스에서 실행 중인 작업의 완료 알림 (job_id -> Future)
+        self._futures: dict[str, Future] = {}
+        self.lease_s = lease_s
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._running: set[str] = set()
+        self._stop = threading.Event()
+        self._heartbeat_thread: threading.Thread | None = None
+
+    @property
+    def store(self):
+        return get_persona_job_store()
+
+    def _enqueue(self, job: PersonaJob, chat_history: str):
+        with self._lock:
+            if job.job_id in self._futures:
+                return
+            future: Future = Future()
+            self._futures[job.job_id] = future
+        self._executor.submit(self._run, job, chat_history, future)
+
+    def _start_heartbeat(self):
+        if self._heartbeat_thread is not None:
+            return
+        with self._lock:
+            if self._heartbeat_thread is None:
+                self._heartbeat_thread = threading.Thread(
+                    target=self._heartbeat_loop, name="persona-job-heartbeat", daemon=True
+                )
+                self._heartbeat_thread.start()
+
+    def _heartbeat_loop(self):
+        while not self._stop.wait(self.lease_s / 3):
+            with self._lock:
+                running = list(self._running)
+            try:
+                self.store.heartbeat(running, self.owner, self.lease_s)
+            except Exception as e:
+                print(f"페르소나 분석 작업 임대 연장 중 오류 발생: {e}")
+
+    def _run(self, job: PersonaJob, chat_history: str, future: Future):
+        try:
+            if not self.store.claim(job.job_id, self.owner, self.lease_s):
+                return  # 다른 작업 스레드(또는 프로세스)가 이미 처리 중입니다.
+            with self._lock:
+                self._running.add(job.job_id)
+            self._start_heartbeat()
+            try:
+                with priority("background"):
+                    result = analyze_persona_from_history(chat_history, chatroom_id=job.chatroom_id)
+                if result:
+                    self.store.finish(job.job_id, result=result, owner=self.owner)
+                else:
+                    self.store.finish(job.job_id, error="대화 내용 분석에 실패했습니다.", owner=self.owner)
+            except Exception as e:
+                print(f"페르소나 분석 작업 '{job.job_id}' 처리 중 오류 발생: {e}")
+                self.store.finish(job.job_id, error=f"작업 처리 중 오류: {e}", owner=self.owner)
+        finally:
+            with self._lock:
+                self._running.discard(job.job_id)
+                self._futures.pop(job.job_id, None)
+            future.set_result(None)
+
+    def submit(self, chatroom_id: str) -> tuple[PersonaJob, bool]:
+        """
+        채팅방 분석 작업을 요청하고 (작업, 새로 만들었는지)를 반환합니다.
+        대화 내용이 없으면 ChatroomNotFoundError를 던집니다.
+        """
+        cached = self.store.latest_current_result(chatroom_id)
+        if cached is not None:
+            return cached, False
+
+        chat_history = get_chat_history_by_chatroom(chatroom_id)
+        if not chat_history:
+            raise ChatroomNotFoundError(chatroom_id)
+
+        transcript_hash = hash_text(chat_history)
+        job = self.store.find_reusable(chatroom_id, transcript_hash)
+        if job is not None:
+            if job.status == "succeeded" and not job.current:
+                # 대화 내용이 바뀌었다가 같은 내용으로 돌아온 경우: 예전 결과를 다시 씁니다.
+                self.store.mark_current(job.job_id)
+                self._keep_current_if_unchanged(job, transcript_hash)
+            return job, False
+
+        job, created = self.store.create(chatroom_id, transcript_hash)
+        self._keep_current_if_unchanged(job, transcript_hash)
+        self._enqueue(job, chat_history)
+        return job, created
+
+    def _keep_current_if_unchanged(self, job: PersonaJob, transcript_hash: str):
+        """
+        대화 내용을 읽은 뒤 current를 켜기 전에 새 메시지가 저장됐을 수 있으므로, 저장소를 다시 읽어
+        내용이 바뀌었으면 current를 내립니다. (저장 경로는 원문을 쓴 뒤 mark_chatroom_changed를 호출하므로,
+        current를 켠 뒤에 들어온 저장은 그쪽에서 내립니다)
+        """
+        chat_history = get_chat_history_by_chatroom(job.chatroom_id)
+        if not chat_history or hash_text(chat_history) != transcript_hash:
+            self.store.clear_current(job.job_id)
+            job.current = False
+
+    def get(self, job_id: str) -> PersonaJob | None:
+        return self.store.get(job_id)
+
+    def wait(self, job_id: str, timeout: float | None = None) -> PersonaJob | None:
+        """
+        작업이 끝나거나 timeout이 지날 때까지 기다린 뒤 작업 상태를 반환합니다.
+        다른 프로세스가 처리 중인 작업이면 저장소를 주기적으로 다시 읽습니다.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                future = self._futures.get(job_id)
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if future is not None:
+                try:
+                    future.result(timeout=remaining)
+                except TimeoutError:
+                    pass
+            job = self.store.get(job_id)
+            if job is None or job.done or (deadline is not None and time.monotonic() >= deadline):
+                return job
+            if future is None and job.lease_expired():
+                # 처리하던 프로세스가 죽은 작업은 이 프로세스가 이어받습니다.
+                self._resume(job)
+                continue
+            if future is None:
+                time.sleep(min(PERSONA_JOB_POLL_INTERVAL_S, remaining or PERSONA_JOB_POLL_INTERVAL_S))
+
+    async def await_job(self, job_id: str, timeout: float | None = None) -> PersonaJob | None:
+        """이벤트 루프를 막지 않고 wait와 같은 일을 합니다."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                future = self._futures.get(job_id)
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if future is not None:
+                try:
+                    await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), remaining)
+                except asyncio.TimeoutError:
+                    pass
+            job = await asyncio.to_thread(self.store.get, job_id)
+            if job is None or job.done or (deadline is not None and time.monotonic() >= deadline):
+                return job
+            if future is None and job.lease_expired():
+                await asyncio.to_thread(self._resume, job)
+                continue
+            if future is None:
+                await asyncio.sleep(
+                    min(PERSONA_JOB_POLL_INTERVAL_S, remaining or PERSONA_JOB_POLL_INTERVAL_S)
+                )
+
+    def _resume(self, job: PersonaJob) -> bool:
+        """
+        대기 중이거나 임대가 만료된 작업을 이 프로세스의 작업 스레드에 넘깁니다. 넘겼으면 True를 반환합니다.
+        그 사이에 대화 내용이 바뀐 작업은 실패로 기록합니다. (다시 요청하면 새 내용으로 분석)
+        """
+        if job.status != QUEUED and not self.store.requeue_expired(job.job_id):
+            return False  # 다른 프로세스가 아직 처리 중입니다.
+        chat_history = get_chat_history_by_chatroom(job.chatroom_id)
+        if not chat_history or hash_text(chat_history) != job.transcript_hash:
+            self.store.finish(job.job_id, error="작업 대기 중 대화 내용이 바뀌었습니다. 다시 요청해주세요.")
+            return False
+        self._enqueue(job, chat_history)
+        return True
+
+    def resume_pending(self) -> int:
+        """
+        서버 재시작 전에 끝나지 않은 작업을 다시 작업 스레드에 넘기고 그 수를 반환합니다.
+        실행 중인 작업은 임대가 만료된 것(처리하던 프로세스가 멈춘 것)만 이어받습니다.
+        """
+        now = time.time()
+        resumed = 0
+        for job in self.store.active_jobs():
+            if job.status == QUEUED or job.lease_expired(now):
+                resumed += self._resume(job)
+        if resumed:
+            print(f"끝나지 않은 페르소나 분석 작업 {resumed}개를 이어서 처리합니다.")
+        return resumed
+
+    def shutdown(self):
+        self._stop.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+persona_jobs = PersonaJobService()
@@ -0,0 +1,192 @@
+# services/semantic_cache.py
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+from services.embedding_service import aembed_text
+
+load_dotenv()
+
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "512"))
+
+
+@dataclass
+class CachePolicy:
+    """
+    툴별 캐시 정책입니다.
+    exact_fields는 값이 정확히 같아야 하는 인자(모드, MBTI 유형, 조언 대상 메시지 등)이고,
+    나머지 인자는 인자별 임베딩 유사도로 비교합니다.
+    threshold가 None이면 정확히 같은 입력만 캐시합니다.
+    """
+
+    threshold: float | None = 0.95
+    ttl_s: float = 3600.0
+    exact_fields: Tuple[str, ...] = ()
+
+
+@dataclass
+class _Entry:
+    value: Any
+    created: float
+    latency_s: float
+    group: str
+    vector: np.ndarray | None
+
+
+@dataclass
+class _ToolStats:
+    exact_hits: int = 0
+    semantic_hits: int = 0
+    misses: int = 0
+    saved_latency_s: float = 0.0
+    llm_latency_s: float = 0.0
+    evictions: int = 0
+
+
+def _digest(payload: Any) -> str:
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class SemanticCache:
+    """
+    LLM 전용 툴 앞에 두는 응답 캐시입니다.
+    1단계: 인자 전체의 해시가 같은 요청, 2단계: exact_fields가 같고 나머지 인자 각각의 임베딩 유사도가 임계값 이상인 요청.
+    """
+
+    def __init__(
+        self,
+        policies: Dict[str, CachePolicy],
+        max_entries_per_tool: int = SEMANTIC_CACHE_MAX_ENTRIES,
+        enabled: bool = SEMANTIC_CACHE_ENABLED,
+    ):
+        self.policies = policies
+        self.max_entries_per_tool = max_entries_per_tool
+        self.enabled = enabled
+        self._entries: Dict[str, OrderedDict[str, _Entry]] = {
+            name: OrderedDict() for name in policies
+        }
+        self._stats: Dict[str, _ToolStats] = {name: _ToolStats() for name in policies}
+
+    async def run(
+        self, tool_name: str, args: Dict[str, Any], compute: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """캐시에 있으면 저장된 응답을, 없으면 compute()를 실행해 결과를 저장하고 반환합니다."""
+        policy = self.policies.get(tool_name)
+        if not self.enabled or policy is None:
+            return await compute()
+
+        entries = self._entries[tool_name]
+        stats = self._stats[tool_name]
+        now = time.monotonic()
+        exact_key = _digest(args)
+        group = _digest({k: args.get(k) for k in policy.exact_fields})
+
+        entry = entries.get(exact_key)
+        if entry is not None and now - entry.created <= policy.ttl_s:
+            entries.move_to_end(exact_key)
+            stats.exact_hits += 1
+            stats.saved_latency_s += entry.latency_s
+            return entry.value
+
+        vector = None
+        if policy.threshold is not None:
+            vector = await self._embed(args, policy)
+            if vector is not None:
+                found = self._find_similar(entries, group, vector, policy, now)
+                if found is not None:
+                    key, entry = found
+                    # 비슷한 표현으로 자주 찾는 항목도 정확히 일치한 경우처럼 최근 사용으로 옮깁니다.
+                    entries.move_to_end(key)
+                    stats.semantic_hits += 1
+                    stats.saved_latency_s += entry.latency_s
+                    return entry.value
+
+        stats.misses += 1
+        started = time.perf_counter()
+        value = await compute()
+        latency_s = time.perf_counter() - started
+        stats.llm_latency_s += latency_s
+
+        entries[exact_key] = _Entry(value, time.monotonic(), latency_s, group, vector)
+        entries.move_to_end(exact_key)
+        self._evict(tool_name, policy)
+        return value
+
+    async def _embed(self, args: Dict[str, Any], policy: CachePolicy) -> np.ndarray | None:
+        """
+        exact_fields를 뺀 인자 값을 하나씩 임베딩해 (인자 수, 차원) 행렬로 반환합니다.
+        인자 이름까지 한 문장으로 임베딩하면 공통된 틀 때문에 서로 다른 입력도 유사도가 높게 나오므로,
+        값만 따로 임베딩하고 비교도 인자별로 합니다.
+        """
+        values = [str(v) for k, v in sorted(args.items()) if k not in policy.exact_fields]
+        if not values:
+            return None
+        try:
+            # 툴 입력은 거의 반복되지 않으므로 임베딩 캐시는 거치지 않습니다.
+            vectors = np.asarray(
+                await asyncio.gather(*(aembed_text(v, use_cache=False) for v in values)),
+                dtype=np.float32,
+            )
+        except Exception as e:
+            print(f"시맨틱 캐시 임베딩 중 오류 발생: {e}")
+            return None
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        if not np.all(norms):
+            return None
+        return vectors / norms
+
+    @staticmethod
+    def _find_similar(
+        entries: OrderedDict, group: str, vector: np.ndarray, policy: CachePolicy, now: float
+    ) -> Tuple[str, _Entry] | None:
+        """가장 비슷한 항목의 (키, 항목)을 반환합니다."""
+        candidates = [
+            (k, e)
+            for k, e in entries.items()
+            if e.group == group
+            and e.vector is not None
+            and e.vector.shape == vector.shape
+            and now - e.created <= policy.ttl_s
+        ]
+        if not candidates:
+            return None
+        # 모든 인자가 각각 임계값 이상으로 비슷해야 같은 요청으로 봅니다. (가장 덜 비슷한 인자 기준)
+        scores = np.einsum("nfd,fd->nf", np.stack([e.vector for _, e in candidates]), vector).min(axis=1)
+        best = int(np.argmax(scores))
+        return candidates[best] if scores[best] >= policy.threshold else None
+
+    def _evict(self, tool_name: str, policy: CachePolicy):
+        entries = self._entries[tool_name]
+        now = time.monotonic()
+        for key in [k for k, e in entries.items() if now - e.created > policy.ttl_s]:
+            del entries[key]
+            self._stats[tool_name].evictions += 1
+        while len(entries) > self.max_entries_per_tool:
+            entries.popitem(last=False)
+            self._stats[tool_name].evictions += 1
+
+    def stats(self) -> Dict[str, dict]:
+        report = {}
+        for name, s in self._stats.items():
+            lookups = s.exact_hits + s.semantic_hits + s.misses
+            report[name] = {
+                "exact_hits": s.exact_hits,
+                "semantic_hits": s.semantic_hits,
+                "misses": s.misses,
+                "hit_ratio": (s.exact_hits + s.semantic_hits) / lookups if lookups else 0.0,
+                "saved_llm_latency_s": round(s.saved_latency_s, 3),
+                "avg_llm_latency_s": round(s.llm_latency_s / s.misses, 3) if s.misses else 0.0,
+                "entries": len(self._entries[name]),
+                "evictions": s.evictions,
+            }
+        return report
@@ -0,0 +1,340 @@
+# services/session_context.py
+"""
+session_id별 대화 기록을 보관하고, 라우팅 LLM에 넣을 토큰 예산 안의 대화 창(window)을 만듭니다.
+
+  - 세션은 마지막 사용 순서(LRU)로 SESSION_MAX_SESSIONS개까지 메모리에 두고, SESSION_TTL_S 동안
+    쓰이지 않으면 버립니다. 턴은 (역할, 내용, 토큰 수) 튜플로만 저장하며 토큰 수는 저장할 때 한 번만 셉니다.
+  - SESSION_STORE_PATH를 정하면 턴을 SQLite에도 기록해, 메모리에서 밀려나거나 서버가 다시 시작돼도 이어서 씁니다.
+  - 대화 창의 시작 위치는 예산을 넘을 때만 한꺼번에(예산의 SESSION_WINDOW_KEEP_RATIO만 남도록) 옮깁니다.
+    매 턴 한 턴씩 밀어내면 프롬프트 앞부분이 매번 바뀌어 제공자의 프롬프트 캐시가 맞지 않기 때문입니다.
+  - 턴마다 프롬프트 토큰, 캐시된 토큰, 창 밖으로 뺀 토큰을 기록해 절약량을 보고합니다.
+"""
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, NamedTuple, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SESSION_CONTEXT_ENABLED = os.getenv("SESSION_CONTEXT_ENABLED", "true").lower() == "true"
+SESSION_MAX_SESSIONS = int(os.getenv("SESSION_MAX_SESSIONS", "1000"))
+SESSION_TTL_S = float(os.getenv("SESSION_TTL_S", "3600"))
+# 세션별로 보관하는 최대 턴 수 (사용자 발화와 답변을 각각 한 턴으로 셉니다)
+SESSION_MAX_TURNS = int(os.getenv("SESSION_MAX_TURNS", "100"))
+# 라우팅 LLM에 넣을 이전 대화의 토큰 예산
+SESSION_CONTEXT_TOKEN_BUDGET = int(os.getenv("SESSION_CONTEXT_TOKEN_BUDGET", "2000"))
+# 예산을 넘어 창을 옮길 때 남길 비율
+SESSION_WINDOW_KEEP_RATIO = float(os.getenv("SESSION_WINDOW_KEEP_RATIO", "0.5"))
+# 툴 결과를 답변 턴으로 저장할 때의 최대 길이(문자 수)
+SESSION_ASSISTANT_MAX_CHARS = int(os.getenv("SESSION_ASSISTANT_MAX_CHARS", "1000"))
+# 세션별로 보관하는 턴별 토큰 사용 기록 수
+SESSION_USAGE_HISTORY = int(os.getenv("SESSION_USAGE_HISTORY", "50"))
+# 비어 있으면 메모리에만 둡니다.
+SESSION_STORE_PATH = os.getenv("SESSION_STORE_PATH", "")
+
+USER, ASSISTANT = "user", "assistant"
+
+
+class Turn(NamedTuple):
+    seq: int
+    role: str
+    content: str
+    tokens: int
+
+
+class ContextWindow(NamedTuple):
+    turns: List[Turn]
+    tokens: int  # 창에 들어간 턴의 토큰 수
+    trimmed_tokens: int  # 보관 중이지만 예산 때문에 창에서 뺀 턴의 토큰 수
+    start: int  # 창의 첫 턴 번호 (이전 턴과 같으면 프롬프트 앞부분이 그대로 유지됨)
+
+
+@dataclass
+class _Session:
+    turns: deque = field(default_factory=lambda: deque(maxlen=SESSION_MAX_TURNS))
+    next_seq: int = 0
+    window_start: int = 0
+    last_active: float = field(default_factory=time.time)
+    last_prompt: Tuple[int, int] | None = None  # (창 시작 번호, 프롬프트 토큰 수)
+    usage: deque = field(default_factory=lambda: deque(maxlen=SESSION_USAGE_HISTORY))
+
+
+def _default_count_tokens(text: str) -> int:
+    try:
+        from core.llm import get_chat_model
+
+        return get_chat_model(temperature=0.7).get_num_tokens(text)
+    except Exception:
+        # 토크나이저를 쓸 수 없는 모델이면 대략적인 값으로 계산합니다.
+        return len(text) // 2
+
+
+class _SQLitePersistence:
+    """세션 턴을 SQLite에 기록합니다. (모든 호출은 SessionStore의 잠금 안에서 이뤄집니다)"""
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS session_turns (
+                session_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL,
+                tokens INTEGER NOT NULL,
+                PRIMARY KEY (session_id, seq)
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                window_start INTEGER NOT NULL,
+                last_active REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def load(self, session_id: str, ttl_s: float) -> _Session | None:
+        row = self._conn.execute(
+            "SELECT window_start, last_active FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        if time.time() - row[1] > ttl_s:
+            self.delete(session_id)
+            return None
+        rows = self._conn.execute(
+            "SELECT seq, role, content, tokens FROM session_turns WHERE session_id = ? "
+            "ORDER BY seq DESC LIMIT ?",
+            (session_id, SESSION_MAX_TURNS),
+        ).fetchall()
+        session = _Session(window_start=row[0], last_active=row[1])
+        session.turns.extend(Turn(*r) for r in reversed(rows))
+        session.next_seq = session.turns[-1].seq + 1 if session.turns else 0
+        return session
+
+    def save(self, session_id: str, session: _Session, new_turns: List[Turn]):
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO session_turns (session_id, seq, role, content, tokens) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(session_id, *turn) for turn in new_turns],
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, window_start, last_active) "
+                "VALUES (?, ?, ?)",
+                (session_id, session.window_start, session.last_active),
+            )
+            if session.turns:
+                # 메모리에서 밀려난 오래된 턴은 디스크에서도 지웁니다.
+                self._conn.execute(
+                    "DELETE FROM session_turns WHERE session_id = ? AND seq < ?",
+                    (session_id, session.turns[0].seq),
+                )
+
+    def delete(self, session_id: str):
+        with self._conn:
+            self._conn.execute("DELETE FROM session_turns WHERE session_id = ?", (session_id,))
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def delete_expired(self, before: float):
+        with self._conn:
+            self._conn.execute(
+                "DELETE FROM session_turns WHERE session_id IN "
+                "(SELECT session_id FROM sessions WHERE last_active < ?)",
+                (before,),
+            )
+            self._conn.execute("DELETE FROM sessions WHERE last_active < ?", (before,))
+
+
+class SessionStore:
+    def __init__(
+        self,
+        max_sessions: int = SESSION_MAX_SESSIONS,
+        ttl_s: float = SESSION_TTL_S,
+        token_budget: int = SESSION_CONTEXT_TOKEN_BUDGET,
+        keep_ratio: float = SESSION_WINDOW_KEEP_RATIO,
+        path: str = SESSION_STORE_PATH,
+        count_tokens: Callable[[str], int] = _default_count_tokens,
+    ):
+        self.max_sessions = max_sessions
+        self.ttl_s = ttl_s
+        self.token_budget = token_budget
+        self.keep_ratio = keep_ratio
+        self.count_tokens = count_tokens
+        self._persistence = _SQLitePersistence(path) if path else None
+        self._sessions: OrderedDict[str, _Session] = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_sweep = time.time()
+        self._stats = {
+            "turns": 0,
+            "evicted": 0,
+            "expired": 0,
+            "prompt_tokens": 0,
+            "cached_tokens": 0,
+            "trimmed_tokens": 0,
+        }
+
+    @property
+    def persistent(self) -> bool:
+        return self._persistence is not None
+
+    def _sweep(self, now: float):
+        """오래 쓰이지 않은 세션과 개수 상한을 넘은 세션을 버립니다. 잠금을 잡은 상태에서 호출합니다."""
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_active <= self.ttl_s:
+                break
+            del self._sessions[session_id]
+            self._stats["expired"] += 1
+        while len(self._sessions) > self.max_sessions:
+            # 디스크에 기록 중이면 메모리에서만 내리고, 다음에 쓰일 때 다시 읽습니다.
+            self._sessions.popitem(last=False)
+            self._stats["evicted"] += 1
+        if self._persistence is not None and now - self._last_sweep > 60:
+            self._persistence.delete_expired(now - self.ttl_s)
+            self._last_sweep = now
+
+    def _get(self, session_id: str, create: bool) -> _Session | None:
+        """잠금을 잡은 상태에서 호출합니다."""
+        now = time.time()
+        session = self._sessions.get(session_id)
+        if session is not None and now - session.last_active > self.ttl_s:
+            del self._sessions[session_id]
+            self._stats["expired"] += 1
+            if self._persistence is not None:
+                self._persistence.delete(session_id)
+            session = None
+        if session is None and self._persistence is not None:
+            session = self._persistence.load(session_id, self.ttl_s)
+        if session is None:
+            if not create:
+                return None
+            session = _Session()
+        self._sessions[session_id] = session
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def window(self, session_id: str | None) -> ContextWindow:
+        """session_id의 이전 대화 중 토큰 예산 안에 드는 부분을 반환합니다."""
+        if not session_id:
+            return ContextWindow([], 0, 0, 0)
+        with self._lock:
+            session = self._get(session_id, create=False)
+            if session is None or not session.turns:
+                return ContextWindow([], 0, 0, 0)
+            turns = list(session.turns)
+            start = max(session.window_start, turns[0].seq)
+            in_window = [turn for turn in turns if turn.seq >= start]
+            tokens = sum(turn.tokens for turn in in_window)
+            if tokens > self.token_budget:
+                # 남길 양만큼 될 때까지 오래된 턴을 빼되, 창은 항상 사용자 턴에서 시작합니다.
+                keep = self.token_budget * self.keep_ratio
+                while in_window and (tokens > keep or in_window[0].role != USER):
+                    tokens -= in_window.pop(0).tokens
+                start = in_window[0].seq if in_window else session.next_seq
+            session.window_start = start
+            trimmed = sum(turn.tokens for turn in turns if turn.seq < start)
+            return ContextWindow(in_window, tokens, trimmed, start)
+
+    def record_turn(
+        self,
+        session_id: str | None,
+        user_text: str,
+        assistant_text: str,
+        usage: Dict[str, Any] | None = None,
+    ):
+        """사용자 발화와 답변을 저장하고, 라우팅 LLM을 호출했다면 토큰 사용 기록(usage)을 남깁니다."""
+        if not session_id:
+            return
+        user_tokens = self.count_tokens(user_text)
+        assistant_tokens = self.count_tokens(assistant_text) if assistant_text else 0
+        with self._lock:
+            session = self._get(session_id, create=True)
+            new_turns = [Turn(session.next_seq, USER, user_text, user_tokens)]
+            if assistant_text:
+                new_turns.append(Turn(session.next_seq + 1, ASSISTANT, assistant_text, assistant_tokens))
+            session.turns.extend(new_turns)
+            session.next_seq = new_turns[-1].seq + 1
+            session.last_active = time.time()
+            self._stats["turns"] += 1
+            if usage is not None:
+                usage = {"seq": new_turns[0].seq, **usage}
+                session.usage.append(usage)
+                self._stats["prompt_tokens"] += usage.get("prompt_tokens") or 0
+                self._stats["cached_tokens"] += usage.get("cached_tokens") or 0
+                self._stats["trimmed_tokens"] += usage.get("trimmed_tokens") or 0
+            if self._persistence is not None:
+                self._persistence.save(session_id, session, new_turns)
+            self._sweep(session.last_active)
+
+    def cacheable_prefix(self, session_id: str | None, window_start: int, fixed_tokens: int) -> int:
+        """
+        이전 턴 프롬프트와 앞부분이 같을 것으로 예상되는 토큰 수를 반환합니다.
+        창 시작 위치가 그대로면 이전 프롬프트 전체가 이번 프롬프트의 앞부분이 되고,
+        옮겨졌으면 시스템 프롬프트와 툴 정의(fixed_tokens)만 같습니다.
+        """
+        if not session_id:
+            return fixed_tokens
+        with self._lock:
+            session = self._sessions.get(session_id)
+            last = session.last_prompt if session is not None else None
+        if last is not None and last[0] == window_start:
+            return max(fixed_tokens, last[1])
+        return fixed_tokens
+
+    def remember_prompt(self, session_id: str | None, window_start: int, prompt_tokens: int):
+        if not session_id:
+            return
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.last_prompt = (window_start, prompt_tokens)
+
+    def usage(self, session_id: str) -> Dict[str, Any] | None:
+        """세션의 턴별 토큰 사용 기록과 합계를 반환합니다."""
+        with self._lock:
+            session = self._get(session_id, create=False)
+            if session is None:
+                return None
+            turns = list(session.usage)
+            stored_turns = len(session.turns)
+        totals = {
+            key: sum(turn.get(key) or 0 for turn in turns)
+            for key in ("prompt_tokens", "cached_tokens", "trimmed_tokens", "cacheable_prefix_tokens")
+        }
+        return {"session_id": session_id, "stored_turns": stored_turns, "turns": turns, "totals": totals}
+
+    def clear(self, session_id: str) -> bool:
+        with self._lock:
+            existed = self._sessions.pop(session_id, None) is not None
+            if self._persistence is not None:
+                self._persistence.delete(session_id)
+        return existed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            sessions = len(self._sessions)
+        prompt = stats["prompt_tokens"]
+        return {
+            "enabled": SESSION_CONTEXT_ENABLED,
+            "persistent": self.persistent,
+            "sessions_in_memory": sessions,
+            "token_budget": self.token_budget,
+            **stats,
+            "cached_ratio": round(stats["cached_tokens"] / prompt, 4) if prompt else 0.0,
+        }
+
+
+session_store = SessionStore()
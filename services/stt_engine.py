@@ -0,0 +1,254 @@
+# services/stt_engine.py
+"""
+Whisper 음성 인식 워커 프로세스 풀입니다.
+
+업로드된 녹음은 서버 프로세스에서 디코딩한 뒤 VAD(services/vad.py)로 침묵을 잘라내고,
+쉼을 기준으로 Whisper 입력 창(30초)보다 짧은 청크로 나눠 여러 워커에서 동시에 변환한 뒤 순서대로 이어 붙입니다.
+언어(STT_LANGUAGE)를 정해 두면 청크마다 언어 자동 감지를 하지 않으며, 언어와 모델 크기는 요청마다 바꿀 수 있습니다.
+"""
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from typing import Iterator, List, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+from core.concurrency import map_bounded, run_blocking
+from core.metrics import stage_timer
+from services.vad import VAD_SAMPLE_RATE, speech_regions
+
+load_dotenv()
+
+STT_MODEL_NAME = os.getenv("STT_MODEL_NAME", "base")
+# "whisper"(기본) 또는 "fake"(벤치마크용 가짜 음성 인식, core/fake_backends.py)
+STT_BACKEND = os.getenv("STT_BACKEND", "whisper").lower()
+STT_WORKERS = int(os.getenv("STT_WORKERS", "2"))
+# 처리 중인 요청 외에 대기열에서 기다릴 수 있는 최대 요청 수
+STT_MAX_PENDING = int(os.getenv("STT_MAX_PENDING", "8"))
+# 기본 인식 언어. "auto"이면 Whisper가 언어를 감지합니다. (긴 녹음은 첫 청크에서 한 번만 감지)
+STT_LANGUAGE = os.getenv("STT_LANGUAGE", "ko")
+# 요청에서 고를 수 있는 모델 크기. 워커마다 처음 요청될 때 로드해 메모리에 두므로 필요한 것만 허용하세요.
+STT_ALLOWED_MODELS = [
+    name.strip() for name in os.getenv("STT_ALLOWED_MODELS", "tiny,base,small").split(",") if name.strip()
+]
+# 녹음의 침묵을 잘라내고 쉼에서 나눠 병렬로 변환합니다. false이면 녹음 전체를 한 번에 변환합니다.
+STT_VAD_ENABLED = os.getenv("STT_VAD_ENABLED", "true").lower() == "true"
+# 이 길이 이상의 쉼을 청크를 나눌 수 있는 지점으로 봅니다.
+STT_SPLIT_SILENCE_MS = int(os.getenv("STT_SPLIT_SILENCE_MS", "500"))
+# 청크 최대 길이. Whisper는 30초 단위로 입력을 채워 처리하므로 그보다 짧게, 가능한 한 가득 채워 묶습니다.
+STT_CHUNK_MAX_S = float(os.getenv("STT_CHUNK_MAX_S", "28"))
+# 요청 하나가 동시에 워커에 넘길 최대 청크 수 (0이면 워커 수)
+STT_CHUNK_PARALLELISM = int(os.getenv("STT_CHUNK_PARALLELISM", "0"))
+
+# --- 워커 프로세스 전용 상태 ---
+_worker_tool = None
+
+
+def _init_worker(model_name: str, torch_threads: int):
+    """각 워커 프로세스가 시작될 때 Whisper 모델을 한 번만 미리 로드합니다."""
+    global _worker_tool
+    try:
+        import torch
+
+        torch.set_num_threads(torch_threads)
+    except Exception:
+        pass
+
+    if STT_BACKEND == "fake":
+        from core.fake_backends import FakeSpeechToText
+
+        _worker_tool = FakeSpeechToText()
+        return
+
+    from tools.speech_to_text import SpeechToTextTool
+
+    _worker_tool = SpeechToTextTool(whisper_model_name=model_name)
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _transcribe_chunk_in_worker(
+    audio: np.ndarray, language: str | None, model_name: str | None
+) -> Tuple[str, str | None]:
+    """파형(mono 16kHz float32) 하나를 변환해 (텍스트, 인식한 언어)를 반환합니다."""
+    if STT_BACKEND == "fake":
+        return _worker_tool(audio), language
+    result = _worker_tool.transcribe(audio, language=language, model_name=model_name)
+    return result["text"], result.get("language", language)
+
+
+def _decode(data: bytes) -> np.ndarray:
+    if STT_BACKEND == "fake":
+        from core.fake_backends import fake_decode_audio_bytes
+
+        return fake_decode_audio_bytes(data)
+
+    from tools.speech_to_text import decode_audio_bytes
+
+    return decode_audio_bytes(data)
+
+
+def split_for_transcription(
+    audio: np.ndarray,
+    split_silence_ms: int = STT_SPLIT_SILENCE_MS,
+    chunk_max_s: float = STT_CHUNK_MAX_S,
+) -> List[np.ndarray]:
+    """
+    침묵을 잘라낸 음성 구간들을 순서대로 chunk_max_s 이하의 청크로 묶습니다.
+    음성이 없으면 빈 목록을 반환합니다.
+    """
+    max_samples = int(chunk_max_s * VAD_SAMPLE_RATE)
+    chunks: List[np.ndarray] = []
+    current: List[np.ndarray] = []
+    length = 0
+    previous_end = 0
+    for start, end in speech_regions(audio, min_silence_ms=split_silence_ms, max_region_s=chunk_max_s):
+        # 긴 구간을 나눈 자리에서는 앞뒤 여유(padding)가 겹치므로 같은 소리를 두 번 넣지 않습니다.
+        start = max(start, previous_end)
+        previous_end = end
+        if current and length + (end - start) > max_samples:
+            chunks.append(np.concatenate(current))
+            current, length = [], 0
+        current.append(audio[start:end])
+        length += end - start
+    if current:
+        chunks.append(np.concatenate(current))
+    return chunks
+
+
+class STTQueueFullError(RuntimeError):
+    """음성 인식 대기열이 가득 차 요청을 받을 수 없을 때 발생합니다."""
+
+
+class SpeechToTextEngine:
+    """
+    Whisper 모델을 미리 로드한 워커 프로세스 풀로 음성 인식을 처리합니다.
+    요청은 크기가 제한된 대기열을 거쳐 풀에 전달되므로, 이벤트 루프를 막지 않고 여러 코어로 확장됩니다.
+    """
+
+    def __init__(
+        self,
+        model_name: str = STT_MODEL_NAME,
+        workers: int = STT_WORKERS,
+        max_pending: int = STT_MAX_PENDING,
+        vad: bool = STT_VAD_ENABLED,
+    ):
+        self.model_name = model_name
+        self.vad = vad
+        self.workers = max(1, workers)
+        self.capacity = self.workers + max(0, max_pending)
+        self._in_flight = 0
+        self._executor: ProcessPoolExecutor | None = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            torch_threads = max(1, (os.cpu_count() or 1) // self.workers)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                # torch/whisper는 fork 이후 안전하지 않으므로 spawn 방식으로 워커를 생성합니다.
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.model_name, torch_threads),
+            )
+        return self._executor
+
+    def warmup(self):
+        """워커 프로세스를 미리 띄워 첫 요청 전에 모델 로드를 끝냅니다."""
+        executor = self._get_executor()
+        for future in [executor.submit(_ping) for _ in range(self.workers)]:
+            future.result()
+
+    def resolve_options(self, language: str | None, model_name: str | None) -> Tuple[str | None, str]:
+        """요청의 언어/모델을 기본값과 합쳐 검증합니다. 허용하지 않는 모델이면 ValueError를 발생시킵니다."""
+        language = (language or STT_LANGUAGE).strip().lower()
+        model_name = model_name or self.model_name
+        if model_name != self.model_name and model_name not in STT_ALLOWED_MODELS:
+            raise ValueError(
+                f"사용할 수 없는 음성 인식 모델입니다: {model_name} "
+                f"(사용 가능: {', '.join(sorted({self.model_name, *STT_ALLOWED_MODELS}))})"
+            )
+        return (None if language == "auto" else language), model_name
+
+    async def transcribe(
+        self, data: bytes, language: str | None = None, model_name: str | None = None
+    ) -> str:
+        """
+        오디오 바이트를 메모리에서 디코딩하여 텍스트로 변환합니다.
+        침묵을 잘라내고 긴 녹음은 쉼에서 나눠 여러 워커에서 동시에 변환한 뒤 순서대로 이어 붙입니다.
+        """
+        language, model_name = self.resolve_options(language, model_name)
+        with self._admit(), stage_timer("stt"):
+            with stage_timer("stt_decode"):
+                audio = await run_blocking(_decode, data)
+            if not self.vad:
+                return (await self._run_chunk(audio, language, model_name))[0]
+            with stage_timer("stt_vad"):
+                chunks = await run_blocking(split_for_transcription, audio)
+            return await self._transcribe_chunks(chunks, language, model_name)
+
+    async def transcribe_array(
+        self, audio, language: str | None = None, model_name: str | None = None
+    ) -> str:
+        """이미 VAD로 잘린 mono 16kHz float32 파형 하나를 텍스트로 변환합니다. (음성 대화의 구간)"""
+        language, model_name = self.resolve_options(language, model_name)
+        with self._admit(), stage_timer("stt"):
+            return (await self._run_chunk(audio, language, model_name))[0]
+
+    async def _transcribe_chunks(
+        self, chunks: List[np.ndarray], language: str | None, model_name: str
+    ) -> str:
+        if not chunks:
+            return ""
+        texts: List[str] = []
+        if language is None and len(chunks) > 1:
+            # 언어 감지는 첫 청크에서 한 번만 하고, 나머지 청크는 감지한 언어로 변환합니다.
+            text, language = await self._run_chunk(chunks[0], None, model_name)
+            texts.append(text)
+            chunks = chunks[1:]
+
+        async def run(chunk: np.ndarray) -> str:
+            return (await self._run_chunk(chunk, language, model_name))[0]
+
+        parallelism = STT_CHUNK_PARALLELISM or self.workers
+        texts += [text async for text in map_bounded(run, chunks, parallelism)]
+        return " ".join(text.strip() for text in texts if text and text.strip())
+
+    @contextmanager
+    def _admit(self) -> Iterator[None]:
+        """요청 하나가 대기열 한 자리를 차지합니다. (청크 수와 관계없이)"""
+        if self._in_flight >= self.capacity:
+            raise STTQueueFullError("음성 인식 요청이 많아 잠시 후 다시 시도해주세요.")
+        self._in_flight += 1
+        try:
+            yield
+        finally:
+            self._in_flight -= 1
+
+    async def _run_chunk(
+        self, audio: np.ndarray, language: str | None, model_name: str
+    ) -> Tuple[str, str | None]:
+        try:
+            future = self._get_executor().submit(_transcribe_chunk_in_worker, audio, language, model_name)
+            return await asyncio.wrap_future(future)
+        except BrokenProcessPool:
+            # 워커가 비정상 종료되면 다음 요청부터 새 풀을 사용합니다.
+            self._executor = None
+            raise
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "in_flight": self._in_flight,
+            "capacity": self.capacity,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,212 @@
+# services/vad.py
+"""
+에너지(RMS) 기반 음성 구간 검출(VAD)입니다. 입력은 mono 16kHz float32 파형(-1.0 ~ 1.0)입니다.
+
+프레임(VAD_FRAME_MS)마다 에너지를 dBFS로 계산해, 배경 소음 수준(하위 10% 분위)보다 VAD_MARGIN_DB 이상
+크고 VAD_MIN_DB보다 큰 프레임을 음성으로 봅니다. 짧게 튀는 소리(VAD_MIN_SPEECH_MS 미만)는 버리고,
+음성 구간 앞뒤에 VAD_PADDING_MS만큼 여유를 둡니다.
+
+  - speech_regions : 녹음 전체에서 음성 구간 (시작, 끝) 샘플 위치 목록
+  - StreamingSegmenter: 실시간으로 들어오는 오디오를 받아 쉼(pause)마다 구간을 잘라 내보내고,
+                        더 긴 침묵이 이어지면 발화(turn)가 끝난 것으로 알립니다.
+"""
+import os
+from typing import List, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+VAD_SAMPLE_RATE = 16000
+VAD_FRAME_MS = int(os.getenv("VAD_FRAME_MS", "30"))
+# 이보다 작은 소리는 배경 소음이 아주 작아도 음성으로 보지 않습니다.
+VAD_MIN_DB = float(os.getenv("VAD_MIN_DB", "-45"))
+# 배경 소음 수준보다 이만큼 커야 음성으로 봅니다.
+VAD_MARGIN_DB = float(os.getenv("VAD_MARGIN_DB", "12"))
+VAD_MIN_SPEECH_MS = int(os.getenv("VAD_MIN_SPEECH_MS", "150"))
+VAD_PADDING_MS = int(os.getenv("VAD_PADDING_MS", "200"))
+# 이 길이 이상 조용하면 구간을 자릅니다. (문장 사이 쉼)
+VAD_SEGMENT_SILENCE_MS = int(os.getenv("VAD_SEGMENT_SILENCE_MS", "400"))
+# 이 길이 이상 조용하면 발화가 끝난 것으로 봅니다. (음성 대화의 턴 종료)
+VAD_TURN_SILENCE_MS = int(os.getenv("VAD_TURN_SILENCE_MS", "900"))
+# 쉼 없이 이어지는 구간도 이 길이가 되면 자릅니다.
+VAD_MAX_SEGMENT_S = float(os.getenv("VAD_MAX_SEGMENT_S", "20"))
+
+
+def frame_energies_db(audio: np.ndarray, frame_samples: int) -> np.ndarray:
+    """프레임별 RMS 에너지(dBFS)를 반환합니다. 끝에 남는 짧은 프레임은 버립니다."""
+    frames = len(audio) // frame_samples
+    if frames == 0:
+        return np.zeros(0, dtype=np.float32)
+    blocks = audio[: frames * frame_samples].reshape(frames, frame_samples).astype(np.float32)
+    rms = np.sqrt(np.mean(blocks * blocks, axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-10))
+
+
+def _threshold_db(energies: np.ndarray, noise_floor_db: float | None = None) -> float:
+    if noise_floor_db is None:
+        noise_floor_db = float(np.percentile(energies, 10)) if len(energies) else VAD_MIN_DB
+    return max(VAD_MIN_DB, noise_floor_db + VAD_MARGIN_DB)
+
+
+def _runs(mask: np.ndarray) -> List[Tuple[int, int]]:
+    """True가 이어지는 구간을 (시작, 끝) 프레임 위치로 반환합니다."""
+    padded = np.concatenate(([False], mask, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    return list(zip(edges[::2].tolist(), edges[1::2].tolist()))
+
+
+def speech_regions(
+    audio: np.ndarray,
+    sample_rate: int = VAD_SAMPLE_RATE,
+    min_silence_ms: int = VAD_SEGMENT_SILENCE_MS,
+    max_region_s: float | None = None,
+) -> List[Tuple[int, int]]:
+    """
+    음성 구간을 (시작, 끝) 샘플 위치로 반환합니다. min_silence_ms보다 짧은 쉼으로 떨어진 구간은 합칩니다.
+    max_region_s를 주면 그보다 긴 구간은 그 안에서 가장 조용한 프레임을 기준으로 나눕니다.
+    """
+    frame = max(1, sample_rate * VAD_FRAME_MS // 1000)
+    energies = frame_energies_db(audio, frame)
+    if len(energies) == 0:
+        return []
+    speech = energies > _threshold_db(energies)
+
+    min_speech = max(1, VAD_MIN_SPEECH_MS // VAD_FRAME_MS)
+    gap = max(1, min_silence_ms // VAD_FRAME_MS)
+    regions: List[List[int]] = []
+    for start, end in _runs(speech):
+        if regions and start - regions[-1][1] < gap:
+            regions[-1][1] = end
+        else:
+            regions.append([start, end])
+    regions = [r for r in regions if r[1] - r[0] >= min_speech]
+
+    if max_region_s:
+        max_frames = max(1, int(max_region_s * 1000 // VAD_FRAME_MS))
+        split: List[List[int]] = []
+        for start, end in regions:
+            while end - start > max_frames:
+                # 구간 뒤쪽 절반에서 가장 조용한 프레임에서 자릅니다. (단어 중간에서 자르지 않도록)
+                window = energies[start + max_frames // 2 : start + max_frames]
+                cut = start + max_frames // 2 + int(np.argmin(window))
+                split.append([start, cut])
+                start = cut
+            split.append([start, end])
+        regions = split
+
+    padding = VAD_PADDING_MS * sample_rate // 1000
+    total = len(audio)
+    return [
+        (max(0, start * frame - padding), min(total, end * frame + padding))
+        for start, end in regions
+    ]
+
+
+class StreamingSegmenter:
+    """
+    실시간 오디오를 조금씩 받아(feed) 음성 구간을 잘라 내보냅니다.
+    feed는 이벤트 목록을 반환합니다.
+        ("speech_start", None)   침묵 뒤에 음성이 시작됨
+        ("segment", 파형)        쉼(VAD_SEGMENT_SILENCE_MS) 또는 최대 길이로 잘린 음성 구간
+        ("turn_end", None)       마지막 음성 뒤로 VAD_TURN_SILENCE_MS 이상 조용함
+    배경 소음 수준은 음성이 아닌 프레임의 에너지로 계속 갱신합니다.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = VAD_SAMPLE_RATE,
+        segment_silence_ms: int = VAD_SEGMENT_SILENCE_MS,
+        turn_silence_ms: int = VAD_TURN_SILENCE_MS,
+        max_segment_s: float = VAD_MAX_SEGMENT_S,
+    ):
+        self.sample_rate = sample_rate
+        self.frame = max(1, sample_rate * VAD_FRAME_MS // 1000)
+        self.segment_silence_frames = max(1, segment_silence_ms // VAD_FRAME_MS)
+        self.turn_silence_frames = max(self.segment_silence_frames, turn_silence_ms // VAD_FRAME_MS)
+        self.min_speech_frames = max(1, VAD_MIN_SPEECH_MS // VAD_FRAME_MS)
+        self.padding_frames = VAD_PADDING_MS // VAD_FRAME_MS
+        self.max_segment_frames = max(1, int(max_segment_s * 1000 // VAD_FRAME_MS))
+        self.noise_floor_db: float | None = None
+        self._pending = np.zeros(0, dtype=np.float32)  # 아직 프레임이 되지 못한 샘플
+        self._preroll: List[np.ndarray] = []  # 음성 시작 전 여유 프레임
+        self._frames: List[np.ndarray] = []  # 현재 구간의 프레임
+        self._speech_frames = 0
+        self._silence_frames = 0
+        self._in_turn = False  # 이번 발화에서 음성이 한 번이라도 나왔는지
+
+    def _is_speech(self, energy_db: float) -> bool:
+        speech = energy_db > _threshold_db(np.zeros(0), self.noise_floor_db)
+        if not speech:
+            # 조용한 프레임으로 배경 소음 수준을 천천히 따라갑니다.
+            if self.noise_floor_db is None:
+                self.noise_floor_db = energy_db
+            else:
+                self.noise_floor_db = 0.95 * self.noise_floor_db + 0.05 * energy_db
+        return speech
+
+    def _cut(self) -> np.ndarray | None:
+        """현재 구간을 내보냅니다. 음성이 너무 짧으면 버립니다."""
+        frames, speech = self._frames, self._speech_frames
+        self._frames, self._speech_frames = [], 0
+        if speech < self.min_speech_frames:
+            return None
+        # 끝에 붙은 침묵은 여유(padding)만큼만 남깁니다.
+        keep = len(frames) - max(0, self._silence_frames - self.padding_frames)
+        return np.concatenate(frames[:keep])
+
+    def feed(self, audio: np.ndarray) -> List[Tuple[str, np.ndarray | None]]:
+        events: List[Tuple[str, np.ndarray | None]] = []
+        samples = np.concatenate((self._pending, audio.astype(np.float32, copy=False)))
+        usable = len(samples) // self.frame * self.frame
+        self._pending = samples[usable:]
+        if usable == 0:
+            return events
+
+        energies = frame_energies_db(samples[:usable], self.frame)
+        for index, energy in enumerate(energies.tolist()):
+            frame = samples[index * self.frame : (index + 1) * self.frame]
+            if self._is_speech(energy):
+                if not self._frames:
+                    if not self._in_turn:
+                        events.append(("speech_start", None))
+                    self._frames = self._preroll
+                    self._preroll = []
+                self._in_turn = True
+                self._frames.append(frame)
+                self._speech_frames += 1
+                self._silence_frames = 0
+                if len(self._frames) >= self.max_segment_frames:
+                    segment = self._cut()
+                    if segment is not None:
+                        events.append(("segment", segment))
+                continue
+
+            self._silence_frames += 1
+            if self._frames:
+                self._frames.append(frame)
+                if self._silence_frames >= self.segment_silence_frames:
+                    segment = self._cut()
+                    if segment is not None:
+                        events.append(("segment", segment))
+            else:
+                self._preroll = (self._preroll + [frame])[-self.padding_frames:] if self.padding_frames else []
+            if self._in_turn and self._silence_frames >= self.turn_silence_frames:
+                self._in_turn = False
+                events.append(("turn_end", None))
+        return events
+
+    def flush(self) -> List[Tuple[str, np.ndarray | None]]:
+        """클라이언트가 발화 끝을 직접 알릴 때 남은 구간과 턴 종료를 내보냅니다."""
+        events: List[Tuple[str, np.ndarray | None]] = []
+        if self._frames:
+            segment = self._cut()
+            if segment is not None:
+                events.append(("segment", segment))
+        if self._in_turn:
+            events.append(("turn_end", None))
+        self._in_turn = False
+        self._silence_frames = 0
+        self._pending = np.zeros(0, dtype=np.float32)
+        return events
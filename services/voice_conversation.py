@@ -0,0 +1,255 @@
+# services/voice_conversation.py
+"""
+웹소켓 음성 대화(/ws/voice) 한 연결의 처리 흐름입니다. 음성 인식, LLM, 음성 합성이 서로 겹쳐 진행됩니다.
+
+  1. 클라이언트가 보내는 PCM 오디오 조각을 VAD(services/vad.py)로 나눠, 쉼마다 잘린 구간을
+     사용자가 아직 말하는 중에도 바로 음성 인식 워커 풀에 넘깁니다.
+  2. 더 긴 침묵(또는 클라이언트의 end_turn)으로 발화가 끝나면, 구간별 인식 결과를 순서대로 이어 붙여
+     에이전트(stream_user_request)에 넘깁니다.
+  3. 에이전트 답변 토큰을 문장 단위로 모아, 문장이 끝나는 대로 TextToSpeechTool.stream_sentences로 합성해
+     뒤 문장이 생성되는 동안 앞 문장의 음성을 먼저 보냅니다.
+
+턴마다 발화 종료 시점부터 첫 음성 조각을 보내기까지의 시간(time_to_first_audio_ms)을 turn_done 이벤트로 알립니다.
+"""
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List
+
+import numpy as np
+from dotenv import load_dotenv
+
+from core.metrics import record_stage
+from services.stt_engine import SpeechToTextEngine, STTQueueFullError
+from services.vad import VAD_SAMPLE_RATE, StreamingSegmenter
+from tools.text_to_speech import SentenceBuffer, TextToSpeechTool
+
+load_dotenv()
+
+# 답변 중에 사용자가 다시 말하기 시작하면 진행 중인 답변을 멈춥니다. (에코 제거가 없는 환경에서는 끄세요)
+VOICE_BARGE_IN = os.getenv("VOICE_BARGE_IN", "false").lower() == "true"
+
+
+@dataclass
+class _Turn:
+    index: int
+    stt_tasks: List[asyncio.Task] = field(default_factory=list)
+    speech_seconds: float = 0.0
+    ended_at: float = 0.0
+
+
+def _speakable_text(result: Dict[str, Any]) -> str:
+    """토큰 스트림 없이 끝난 답변(툴 결과 등)에서 읽어 줄 텍스트를 뽑습니다."""
+    if "error" in result and "response" not in result:
+        return str(result["error"])
+    response = result.get("response")
+    if isinstance(response, list):
+        return "\n".join(_speakable_text(item) for item in response)
+    if isinstance(response, str):
+        return response
+    if isinstance(response, dict):
+        return "\n".join(str(value) for value in response.values() if isinstance(value, str))
+    return ""
+
+
+class VoiceConversation:
+    def __init__(
+        self,
+        send_json: Callable[[Dict[str, Any]], Awaitable[None]],
+        send_bytes: Callable[[bytes], Awaitable[None]],
+        stt_engine: SpeechToTextEngine,
+        tts: TextToSpeechTool,
+        session_id: str | None = None,
+        lang: str = "ko",
+    ):
+        self._send_json = send_json
+        self._send_bytes = send_bytes
+        self.stt_engine = stt_engine
+        self.tts = tts
+        self.session_id = session_id
+        self.lang = lang
+        self.segmenter = StreamingSegmenter()
+        self._send_lock = asyncio.Lock()
+        self._odd_byte = b""
+        self._turn = _Turn(index=1)
+        self._turns: asyncio.Queue = asyncio.Queue()
+        self._worker: asyncio.Task | None = None
+        self._response: asyncio.Task | None = None
+        self._responding: _Turn | None = None  # 지금 답변 중인 턴
+
+    async def send_json(self, payload: Dict[str, Any]):
+        async with self._send_lock:
+            await self._send_json(payload)
+
+    def start(self):
+        self._worker = asyncio.ensure_future(self._run_turns())
+
+    # --- 입력 (사용자 음성) ---
+
+    async def feed_audio(self, data: bytes):
+        """PCM s16le, mono, 16kHz 오디오 조각을 받습니다."""
+        data = self._odd_byte + data
+        usable = len(data) // 2 * 2
+        self._odd_byte = data[usable:]
+        audio = np.frombuffer(data[:usable], dtype="<i2").astype(np.float32) / 32768.0
+        await self._handle_events(self.segmenter.feed(audio))
+
+    async def end_turn(self):
+        """클라이언트가 발화 끝을 직접 알립니다. (누르고 말하기 방식)"""
+        await self._handle_events(self.segmenter.flush())
+
+    async def _handle_events(self, events):
+        for event, segment in events:
+            if event == "speech_start":
+                if VOICE_BARGE_IN and self._response is not None and not self._response.done():
+                    self.cancel_response()
+                await self.send_json({"type": "vad", "event": "speech_start", "turn": self._turn.index})
+            elif event == "segment":
+                # 사용자가 계속 말하는 동안에도 앞 구간의 음성 인식을 먼저 시작합니다.
+                self._turn.stt_tasks.append(
+                    asyncio.ensure_future(self.stt_engine.transcribe_array(segment, language=self.lang))
+                )
+                seconds = len(segment) / VAD_SAMPLE_RATE
+                self._turn.speech_seconds += seconds
+                await self.send_json(
+                    {
+                        "type": "vad",
+                        "event": "segment",
+                        "turn": self._turn.index,
+                        "duration_ms": round(seconds * 1000, 1),
+                    }
+                )
+            elif event == "turn_end":
+                turn, self._turn = self._turn, _Turn(index=self._turn.index + 1)
+                turn.ended_at = time.perf_counter()
+                await self.send_json({"type": "vad", "event": "turn_end", "turn": turn.index})
+                if turn.stt_tasks:
+                    self._turns.put_nowait(turn)
+
+    def cancel_response(self):
+        if self._response is not None and not self._response.done():
+            self._response.cancel()
+
+    # --- 출력 (답변 음성) ---
+
+    async def _run_turns(self):
+        while (turn := await self._turns.get()) is not None:
+            self._responding = turn
+            self._response = asyncio.ensure_future(self._respond(turn))
+            try:
+                await self._response
+            except asyncio.CancelledError:
+                if self._worker is not None and self._worker.cancelling():
+                    raise
+                await self.send_json({"type": "interrupted", "turn": turn.index})
+            except Exception as e:
+                await self.send_json(
+                    {"type": "error", "turn": turn.index, "detail": f"음성 답변 생성 중 오류: {e}"}
+                )
+
+    async def _transcribe(self, turn: _Turn) -> str:
+        texts = []
+        for result in await asyncio.gather(*turn.stt_tasks, return_exceptions=True):
+            if isinstance(result, STTQueueFullError):
+                await self.send_json({"type": "error", "turn": turn.index, "detail": str(result)})
+            elif isinstance(result, Exception):
+                await self.send_json(
+                    {"type": "error", "turn": turn.index, "detail": f"음성 인식 중 오류: {result}"}
+                )
+            elif result and result.strip():
+                texts.append(result.strip())
+        return " ".join(texts)
+
+    async def _respond(self, turn: _Turn):
+        from core.agent import stream_user_request
+
+        text = await self._transcribe(turn)
+        stt_done = time.perf_counter()
+        metrics: Dict[str, Any] = {
+            "speech_ms": round(turn.speech_seconds * 1000, 1),
+            "segments": len(turn.stt_tasks),
+            # 발화가 끝난 뒤 음성 인식 결과를 기다린 시간 (앞 구간은 말하는 동안 이미 인식됨)
+            "stt_wait_ms": round((stt_done - turn.ended_at) * 1000, 1),
+            "time_to_first_token_ms": None,
+            "time_to_first_audio_ms": None,
+        }
+        await self.send_json({"type": "transcript", "turn": turn.index, "text": text})
+        if not text:
+            await self.send_json({"type": "turn_done", "turn": turn.index, "metrics": metrics})
+            return
+
+        result: Dict[str, Any] = {}
+
+        async def sentences() -> AsyncIterator[str]:
+            nonlocal result
+            # 툴이 여럿이면 토큰이 섞여 오므로 툴별로 문장을 모읍니다.
+            buffers: Dict[str | None, SentenceBuffer] = {}
+            spoke = False
+            async for event in stream_user_request(text, session_id=self.session_id):
+                if event["type"] == "token":
+                    if metrics["time_to_first_token_ms"] is None:
+                        metrics["time_to_first_token_ms"] = round(
+                            (time.perf_counter() - turn.ended_at) * 1000, 1
+                        )
+                    buffer = buffers.setdefault(event.get("tool"), SentenceBuffer())
+                    for sentence in buffer.add(event["content"]):
+                        spoke = True
+                        yield sentence
+                elif event["type"] == "final":
+                    result = event["result"]
+            for buffer in buffers.values():
+                for sentence in buffer.flush():
+                    spoke = True
+                    yield sentence
+            if not spoke:
+                for sentence in SentenceBuffer().add(_speakable_text(result) + "\n"):
+                    yield sentence
+
+        index = 0
+        async for sentence, audio in self.tts.stream_sentences(sentences(), self.lang):
+            if metrics["time_to_first_audio_ms"] is None:
+                first_audio_s = time.perf_counter() - turn.ended_at
+                metrics["time_to_first_audio_ms"] = round(first_audio_s * 1000, 1)
+                record_stage("voice_first_audio", first_audio_s)
+            async with self._send_lock:
+                await self._send_json(
+                    {
+                        "type": "audio",
+                        "turn": turn.index,
+                        "index": index,
+                        "text": sentence,
+                        "format": "mp3",
+                        "bytes": len(audio),
+                    }
+                )
+                await self._send_bytes(audio)
+            index += 1
+
+        metrics["sentences"] = index
+        metrics["total_ms"] = round((time.perf_counter() - turn.ended_at) * 1000, 1)
+        await self.send_json(
+            {
+                "type": "turn_done",
+                "turn": turn.index,
+                "transcript": text,
+                "result": json.loads(json.dumps(result, ensure_ascii=False, default=str)),
+                "metrics": metrics,
+            }
+        )
+
+    async def close(self):
+        """연결이 끊기면 진행 중인 인식/답변과, 답변 차례를 기다리던 턴의 음성 인식까지 모두 멈춥니다."""
+        turns = [self._turn, self._responding] if self._responding is not None else [self._turn]
+        while not self._turns.empty():
+            turn = self._turns.get_nowait()
+            if turn is not None:
+                turns.append(turn)
+        self._turns.put_nowait(None)
+        for turn in turns:
+            for task in turn.stt_tasks:
+                task.cancel()
+        if self._worker is not None:
+            self._worker.cancel()
+        self.cancel_response()
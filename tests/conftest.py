@@ -0,0 +1,28 @@
+# tests/conftest.py
+"""
+테스트는 가짜 백엔드(core/fake_backends.py)로 실행하며, 저장소 파일(DB, 캐시)을 임시 디렉터리에 만듭니다.
+설정은 모듈 import 시점에 읽으므로 앱 모듈을 불러오기 전에 환경 변수를 정합니다.
+ChromaDB처럼 상대 경로("./chat_db")를 쓰는 저장소가 저장소의 파일을 건드리지 않도록 임시 디렉터리에서 실행합니다.
+"""
+import os
+import sys
+import tempfile
+
+_WORKDIR = tempfile.mkdtemp(prefix="tests_")
+
+for _name in ("LLM_BACKEND", "EMBEDDING_BACKEND", "STT_BACKEND", "TTS_BACKEND"):
+    os.environ[_name] = "fake"
+os.environ.update(
+    OPENAI_API_KEY="fake",
+    FAKE_LLM_LATENCY_MS="0",
+    FAKE_LLM_TOKEN_DELAY_MS="0",
+    FAKE_EMBEDDING_LATENCY_MS="0",
+    EMBEDDING_CACHE_DIR="",
+    TTS_CACHE_DIR="",
+    SESSION_STORE_PATH="",
+    PERSONA_JOB_DB_PATH=os.path.join(_WORKDIR, "persona_jobs.sqlite3"),
+    TRANSCRIPT_DB_PATH=os.path.join(_WORKDIR, "transcripts.sqlite3"),
+    PERSONA_SUMMARY_DB_PATH=os.path.join(_WORKDIR, "persona_summaries.sqlite3"),
+)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(_WORKDIR)
@@ -0,0 +1,72 @@
+# tests/test_agent_stream.py
+import asyncio
+
+import core.agent as agent
+
+
+def test_stream_user_request_applies_backpressure_to_tool_events(monkeypatch):
+    tool_call = {"name": "find_similar_questions", "args": {"topic": "리더십"}}
+    produced = []
+    max_depth = 0
+
+    async def route_locally(user_text, embedding=None):
+        return tool_call
+
+    async def stream_tool_call(call, queue, tag_tokens):
+        nonlocal max_depth
+        for i in range(20):
+            await queue.put({"type": "token", "content": str(i)})
+            produced.append(i)
+            max_depth = max(max_depth, queue.qsize())
+        return {"agent_name": call["name"], "request_args": call["args"], "response": "done"}
+
+    monkeypatch.setattr(agent, "AGENT_STREAM_QUEUE_SIZE", 2)
+    monkeypatch.setattr(agent, "_route_locally", route_locally)
+    monkeypatch.setattr(agent, "_stream_tool_call", stream_tool_call)
+
+    async def consume_slowly():
+        events = []
+        async for event in agent.stream_user_request("리더십 질문 찾아줘"):
+            events.append(event)
+            if event["type"] == "token" and event["content"] == "0":
+                # 소비자가 멈춘 동안 생산자도 큐 크기만큼만 앞서 나갑니다.
+                await asyncio.sleep(0.05)
+                assert len(produced) <= 1 + 2 + 1
+        return events
+
+    events = asyncio.run(consume_slowly())
+    assert [event["content"] for event in events[:-1]] == [str(i) for i in range(20)]
+    assert events[-1]["type"] == "final"
+    assert events[-1]["result"]["response"] == "done"
+    assert max_depth <= 2
+
+
+def test_cancelled_stream_leaves_no_pending_tasks(monkeypatch):
+    tool_call = {"name": "find_similar_questions", "args": {"topic": "리더십"}}
+
+    async def route_locally(user_text, embedding=None):
+        return tool_call
+
+    async def stream_tool_call(call, queue, tag_tokens):
+        await queue.put({"type": "token", "content": "0"})
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(agent, "_route_locally", route_locally)
+    monkeypatch.setattr(agent, "_stream_tool_call", stream_tool_call)
+
+    async def disconnect_mid_stream():
+        first = asyncio.Event()
+
+        async def consume():
+            async for _ in agent.stream_user_request("리더십 질문 찾아줘"):
+                first.set()
+
+        consumer = asyncio.ensure_future(consume())
+        await first.wait()
+        await asyncio.sleep(0.01)  # 스트림이 다음 이벤트를 기다리는 중에 연결이 끊깁니다.
+        consumer.cancel()
+        for _ in range(5):
+            await asyncio.sleep(0)
+        return [task for task in asyncio.all_tasks() if task is not asyncio.current_task() and not task.done()]
+
+    assert asyncio.run(disconnect_mid_stream()) == []
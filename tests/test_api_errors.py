@@ -0,0 +1,49 @@
+# tests/test_api_errors.py
+import asyncio
+
+import httpx
+
+import main
+from services.embedding_batcher import EmbeddingQueueFullError
+
+
+def _post(path: str, **kwargs) -> httpx.Response:
+    async def send():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(path, **kwargs)
+
+    return asyncio.run(send())
+
+
+def test_embedding_queue_full_maps_to_503(monkeypatch):
+    import core.agent
+
+    async def overloaded(*args, **kwargs):
+        raise EmbeddingQueueFullError("임베딩 요청이 많아 잠시 후 다시 시도해주세요.")
+
+    monkeypatch.setattr(core.agent, "process_user_request", overloaded)
+    response = _post("/api/process-text/", json={"user_text": "안녕", "session_id": "s1"})
+
+    assert response.status_code == 503
+    assert "잠시 후" in response.json()["detail"]
+
+
+def test_evaluation_batch_rejects_out_of_range_n_references():
+    item = {"question": "자기소개 해주세요", "user_answer": "저는 개발자입니다."}
+    for n_references in (-5, 0, 11):
+        response = _post(
+            "/api/interview/evaluate/batch",
+            json={"items": [item], "include_references": True, "n_references": n_references},
+        )
+        assert response.status_code == 422
+
+
+def test_undecodable_voice_upload_is_a_client_error():
+    response = _post(
+        "/api/process-voice/",
+        files={"audio_file": ("voice.wav", b"not really audio", "audio/wav")},
+        data={"session_id": "s1"},
+    )
+    assert response.status_code == 400
+    assert "디코딩" in response.json()["detail"]
@@ -0,0 +1,78 @@
+# tests/test_chatroom_api.py
+import asyncio
+import sqlite3
+
+import httpx
+
+import main
+from db.transcript_store import get_transcript_store
+
+
+def _post(path: str, **kwargs) -> httpx.Response:
+    async def send():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(path, **kwargs)
+
+    return asyncio.run(send())
+
+
+def test_chatroom_writes_complete_before_responding():
+    response = _post("/api/chatrooms/", json={"chatroom_id": "api-room", "content": "나: 안녕"})
+    assert response.status_code == 200
+    response = _post("/api/chatrooms/api-room/messages", json={"content": "상대: 반가워"})
+    assert response.status_code == 200
+    assert get_transcript_store().get("api-room") == "나: 안녕\n상대: 반가워"
+
+
+def test_chatroom_write_failure_is_reported_as_503(monkeypatch):
+    store = get_transcript_store()
+
+    def locked(*args, **kwargs):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(store, "append", locked)
+    monkeypatch.setattr(store, "put", locked)
+
+    for path, body in (
+        ("/api/chatrooms/", {"chatroom_id": "locked-room", "content": "나: 안녕"}),
+        ("/api/chatrooms/locked-room/messages", {"content": "나: 안녕"}),
+    ):
+        response = _post(path, json=body)
+        assert response.status_code == 503
+        assert "다시 시도" in response.json()["detail"]
+
+
+def test_chroma_failure_does_not_fail_transcript_writes(monkeypatch):
+    from db import vector_db
+
+    def broken(chatroom_id):
+        raise RuntimeError("chroma unavailable")
+
+    monkeypatch.setattr(vector_db, "_migrated", False)
+    monkeypatch.setattr(vector_db, "_import_from_chroma", broken)
+
+    response = _post("/api/chatrooms/", json={"chatroom_id": "no-chroma-room", "content": "나: 안녕"})
+    assert response.status_code == 200
+    assert _post("/api/chatrooms/no-chroma-index-room/index").status_code == 404
+
+
+def test_migrated_store_never_queries_chroma(monkeypatch):
+    from db import vector_db
+
+    calls = []
+    monkeypatch.setattr(vector_db, "_migrated", False)
+    monkeypatch.setattr(vector_db, "get_collection", lambda: calls.append("collection") or _EmptyCollection())
+    assert vector_db.migrate_legacy_chatrooms() == 0
+    assert vector_db.is_chroma_migrated()
+
+    calls.clear()
+    monkeypatch.setattr(vector_db, "_import_from_chroma", lambda chatroom_id: calls.append(chatroom_id))
+    assert vector_db.get_chat_history_by_chatroom("unknown-room") is None
+    assert vector_db.append_chat_messages("fresh-room", "나: 안녕")
+    assert calls == []
+
+
+class _EmptyCollection:
+    def get(self, **kwargs):
+        return {"ids": [], "metadatas": []}
@@ -0,0 +1,46 @@
+# tests/test_embedding_batcher.py
+import threading
+
+from core.metrics import request_timings
+from core.scheduler import current_priority, priority
+from services.embedding_batcher import EmbeddingBatcher
+
+
+def _recording_batcher(calls: list, release: threading.Event | None = None) -> EmbeddingBatcher:
+    def encode_batch(texts):
+        if release is not None:
+            release.wait(5)
+        calls.append((current_priority.get(), list(texts)))
+        return [[float(len(text))] for text in texts]
+
+    return EmbeddingBatcher(encode_batch, max_batch_size=8, max_wait_ms=200)
+
+
+def test_batches_are_split_and_encoded_per_priority_class():
+    calls = []
+    release = threading.Event()
+    batcher = _recording_batcher(calls, release)
+    with priority("background"):
+        background = batcher.submit("bg")
+    interactive = batcher.submit("hi")
+    with priority("batch"):
+        batch = batcher.submit("batch")
+    release.set()
+
+    assert background.result(5) == [2.0]
+    assert interactive.result(5) == [2.0]
+    assert batch.result(5) == [5.0]
+    # 한 번에 모인 요청도 우선순위별로 나눠, 높은 클래스부터 그 클래스로 encode합니다.
+    assert calls == [("interactive", ["hi"]), ("batch", ["batch"]), ("background", ["bg"])]
+
+
+def test_encode_time_is_added_to_caller_request_timings():
+    calls = []
+    batcher = _recording_batcher(calls)
+    timings = {}
+    token = request_timings.set(timings)
+    try:
+        assert batcher.encode("text", timeout=5) == [4.0]
+    finally:
+        request_timings.reset(token)
+    assert timings["embedding_encode"] >= 0.0
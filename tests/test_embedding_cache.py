@@ -0,0 +1,80 @@
+# tests/test_embedding_cache.py
+import numpy as np
+
+from services.embedding_cache import EmbeddingCache, _DiskVectorStore
+
+
+def _vector(seed: int, dim: int = 8) -> list:
+    return np.random.default_rng(seed).standard_normal(dim).astype(np.float32).tolist()
+
+
+def test_memory_lru_evicts_least_recently_used():
+    cache = EmbeddingCache("model", memory_max_entries=2)
+    cache.put("a", _vector(1))
+    cache.put("b", _vector(2))
+    assert cache.get("a") is not None  # a가 최근 사용됨
+    cache.put("c", _vector(3))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.stats()["memory_evictions"] == 1
+
+
+def test_disk_tier_survives_memory_eviction(tmp_path):
+    cache = EmbeddingCache("model", memory_max_entries=1, disk_dir=str(tmp_path))
+    cache.put("a", _vector(1))
+    cache.put("b", _vector(2))
+    cache.flush()
+
+    assert cache.get("a", include_disk=False) is None
+    vector = cache.get_disk("a")
+    assert np.allclose(vector, _vector(1), atol=1e-2)
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_disk_ring_overwrites_oldest_slot(tmp_path):
+    store = _DiskVectorStore(str(tmp_path), max_entries=2)
+    for i, key in enumerate("abc"):
+        store.put(key, np.asarray(_vector(i)))
+
+    assert store.get("a") is None
+    assert store.get("b") is not None and store.get("c") is not None
+    assert len(store) == 2
+
+
+def test_growing_capacity_keeps_entries(tmp_path):
+    store = _DiskVectorStore(str(tmp_path), max_entries=2)
+    store.put("a", np.asarray(_vector(1)))
+    store.flush()
+
+    grown = _DiskVectorStore(str(tmp_path), max_entries=4)
+    assert np.allclose(grown.get("a"), _vector(1), atol=1e-2)
+    for i, key in enumerate("bcd"):
+        grown.put(key, np.asarray(_vector(i + 2)))
+    assert all(grown.get(key) is not None for key in "abcd")
+
+
+def test_shrinking_capacity_drops_out_of_range_slots(tmp_path):
+    store = _DiskVectorStore(str(tmp_path), max_entries=4)
+    for i, key in enumerate("abcd"):
+        store.put(key, np.asarray(_vector(i)))
+    store.flush()
+
+    shrunk = _DiskVectorStore(str(tmp_path), max_entries=2)
+    assert shrunk.get("c") is None and shrunk.get("d") is None
+    assert shrunk.get("a") is not None
+    shrunk.put("e", np.asarray(_vector(9)))
+    assert len(shrunk) == 2
+
+
+def test_stores_sharing_a_directory_do_not_reuse_slots(tmp_path):
+    first = _DiskVectorStore(str(tmp_path), max_entries=8)
+    second = _DiskVectorStore(str(tmp_path), max_entries=8)
+    for i in range(3):
+        first.put(f"first-{i}", np.asarray(_vector(i)))
+        second.put(f"second-{i}", np.asarray(_vector(100 + i)))
+
+    for i in range(3):
+        assert np.allclose(first.get(f"second-{i}"), _vector(100 + i), atol=1e-2)
+        assert np.allclose(second.get(f"first-{i}"), _vector(i), atol=1e-2)
@@ -0,0 +1,62 @@
+# tests/test_embedding_data.py
+import json
+import sys
+
+import chromadb
+
+import embedding_data
+from services.embedding_service import embed_texts
+
+
+def _run(monkeypatch, *args):
+    monkeypatch.setattr(sys, "argv", ["embedding_data.py", *args])
+    embedding_data.main()
+
+
+def _write_items(path, items):
+    path.write_text(json.dumps(items, ensure_ascii=False), encoding="utf-8")
+
+
+def test_legacy_sequential_ids_are_replaced_by_content_ids(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "db")
+    items = [{"question": f"질문 {i}", "answer": f"답변 {i}"} for i in range(3)]
+    # 예전 스크립트처럼 순번 ID로 적재된 컬렉션
+    legacy = chromadb.PersistentClient(path=db_path).get_or_create_collection(
+        name=embedding_data.COLLECTION_NAME, metadata={"hnsw:space": "cosine"}
+    )
+    legacy.add(
+        ids=[str(i) for i in range(3)],
+        embeddings=embed_texts([item["question"] for item in items]),
+        documents=[item["question"] for item in items],
+        metadatas=items,
+    )
+    data = tmp_path / "data.json"
+    _write_items(data, items)
+
+    _run(monkeypatch, "--input", str(data), "--db-path", db_path, "--no-prune")
+    assert legacy.count() == 3  # 중복이 생기지 않도록 --no-prune은 거부합니다.
+
+    _run(monkeypatch, "--input", str(data), "--db-path", db_path)
+    collection = chromadb.PersistentClient(path=db_path).get_collection(embedding_data.COLLECTION_NAME)
+    ids = collection.get(include=[])["ids"]
+    assert sorted(ids) == sorted(embedding_data.content_id(item) for item in items)
+    assert collection.metadata[embedding_data.ID_SCHEME_KEY] == embedding_data.ID_SCHEME
+
+    # 바뀐 항목은 이전 내용의 항목이 남지 않습니다.
+    items[0]["answer"] = "고친 답변"
+    _write_items(data, items)
+    _run(monkeypatch, "--input", str(data), "--db-path", db_path)
+    ids = collection.get(include=[])["ids"]
+    assert sorted(ids) == sorted(embedding_data.content_id(item) for item in items)
+
+
+def test_empty_input_keeps_collection(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "db")
+    data = tmp_path / "data.json"
+    _write_items(data, [{"question": "질문", "answer": "답변"}])
+    _run(monkeypatch, "--input", str(data), "--db-path", db_path)
+
+    data.write_text("", encoding="utf-8")
+    _run(monkeypatch, "--input", str(data), "--db-path", db_path)
+    collection = chromadb.PersistentClient(path=db_path).get_collection(embedding_data.COLLECTION_NAME)
+    assert collection.count() == 1
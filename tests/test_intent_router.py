@@ -0,0 +1,90 @@
+# tests/test_intent_router.py
+import time
+
+import numpy as np
+import pytest
+
+from core.intent_router import (
+    IntentRouter,
+    _extract_evaluation_args,
+    _extract_mbti_args,
+    _extract_refine_args,
+    _extract_search_args,
+)
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("리더십 관련 면접 질문 3개 찾아줘", {"topic": "리더십", "n": 3}),
+        ("팀워크에 대한 예상 질문이랑 모범 답변 알려줘", {"topic": "팀워크"}),
+        ("협업 관련 질문 50개 뽑아줘", {"topic": "협업", "n": 10}),  # 검색 결과 수 상한
+        ("면접 질문 찾아줘", None),  # 주제가 없으면 LLM에 넘깁니다.
+    ],
+)
+def test_extract_search_args(text, expected):
+    assert _extract_search_args(text) == expected
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        (
+            "이 문장 맞춤법 교정해줘: 안녕하세여 반갑습니당",
+            {"text_to_refine": "안녕하세여 반갑습니당", "refinement_mode": "오타수정"},
+        ),
+        (
+            '"내일 뵐께요" 좀 부드럽게 바꿔줘',
+            {"text_to_refine": "내일 뵐께요", "refinement_mode": "부드럽게"},
+        ),
+        ("이거 요약해줘", None),  # 다듬을 문장이 없음
+        ('"오늘 회의 취소" 이거 어때', None),  # 다듬는 방식이 없음
+    ],
+)
+def test_extract_refine_args(text, expected):
+    assert _extract_refine_args(text) == expected
+
+
+def test_extract_mbti_args():
+    text = 'INTJ인 친구한테 "내일 못 가"라고 말하려는데 어떻게 해?'
+    assert _extract_mbti_args(text) == {"mbti_type": "INTJ", "situation": text, "my_message": "내일 못 가"}
+    assert _extract_mbti_args("enfp한테 어떻게 말해") == {
+        "mbti_type": "ENFP",
+        "situation": "enfp한테 어떻게 말해",
+    }
+    assert _extract_mbti_args("mbti가 뭐야") is None
+
+
+def test_extract_evaluation_args():
+    assert _extract_evaluation_args("질문: 자기소개 해주세요 답변: 저는 개발자입니다. 평가해줘") == {
+        "question": "자기소개 해주세요",
+        "user_answer": "저는 개발자입니다",
+    }
+    assert _extract_evaluation_args("자기소개 평가해줘") is None
+
+
+class _StubClassifier:
+    def __init__(self, label: str, confidence: float):
+        self.classes_ = np.array([label, "chitchat"])
+        self._probabilities = np.array([[confidence, 1.0 - confidence]])
+
+    def predict_proba(self, embeddings):
+        return self._probabilities
+
+
+@pytest.mark.parametrize(
+    "confidence, text, expected_tool",
+    [
+        (0.95, "리더십 관련 면접 질문 3개 찾아줘", "find_similar_questions"),
+        (0.5, "리더십 관련 면접 질문 3개 찾아줘", None),  # 확신도가 낮음
+        (0.95, "면접 질문 찾아줘", None),  # 인자를 뽑지 못함
+    ],
+)
+def test_decide_falls_back_to_llm_unless_confident_with_args(confidence, text, expected_tool):
+    router = IntentRouter({}, threshold=0.8)
+    router._classifier = _StubClassifier("find_similar_questions", confidence)
+    decision = router._decide(text, [0.0], time.perf_counter())
+
+    assert decision.tool_name == expected_tool
+    assert decision.label == "find_similar_questions"
+    assert (decision.args is not None) == (expected_tool is not None)
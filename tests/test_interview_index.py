@@ -0,0 +1,109 @@
+# tests/test_interview_index.py
+import numpy as np
+import pytest
+
+from db.interview_index import InterviewIndex
+
+
+class _FakeCollection:
+    """ChromaDB 컬렉션 중 InterviewIndex가 쓰는 count/get만 흉내 냅니다."""
+
+    def __init__(self, embeddings: np.ndarray):
+        self.embeddings = embeddings
+
+    def count(self) -> int:
+        return len(self.embeddings)
+
+    def get(self, include, limit, offset):
+        rows = range(offset, min(offset + limit, len(self.embeddings)))
+        return {
+            "ids": [f"id-{i}" for i in rows],
+            "embeddings": self.embeddings[offset : offset + limit].tolist(),
+            "documents": [f"질문 {i}" for i in rows],
+            "metadatas": [{"answer": f"답변 {i}"} if i % 2 == 0 else None for i in rows],
+        }
+
+
+def _index(tmp_path, dtype: str, rows: int = 1500, dim: int = 32) -> tuple[InterviewIndex, np.ndarray]:
+    # 행 수를 검색 블록(1024행)보다 크게 잡아 블록 경계도 확인합니다.
+    embeddings = np.random.default_rng(0).standard_normal((rows, dim)).astype(np.float32)
+    collection = _FakeCollection(embeddings)
+    index = InterviewIndex(lambda: collection, str(tmp_path), dtype=dtype, reload_interval_s=3600)
+    index.load()
+    return index, embeddings
+
+
+def _exact_top(embeddings: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    matrix = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    scores = (queries / np.linalg.norm(queries, axis=1, keepdims=True)) @ matrix.T
+    return np.argsort(-scores, axis=1)[:, :k], np.sort(scores, axis=1)[:, ::-1][:, :k]
+
+
+@pytest.mark.parametrize(
+    "dtype, min_recall, atol",
+    [("float32", 1.0, 1e-5), ("float16", 0.9, 5e-3), ("int8", 0.8, 3e-2)],
+)
+def test_search_matches_exact_cosine_top_k(tmp_path, dtype, min_recall, atol):
+    index, embeddings = _index(tmp_path, dtype)
+    queries = np.random.default_rng(1).standard_normal((4, embeddings.shape[1])).astype(np.float32)
+    expected_ids, expected_scores = _exact_top(embeddings, queries, k=10)
+
+    hits = index.search(queries.tolist(), n=10)
+    assert [len(row) for row in hits] == [10] * 4
+    for row, ids, scores in zip(hits, expected_ids, expected_scores):
+        got_scores = [score for _, score in row]
+        assert got_scores == sorted(got_scores, reverse=True)
+        recall = len({i for i, _ in row} & set(ids.tolist())) / len(ids)
+        assert recall >= min_recall
+        assert np.allclose(got_scores, scores, atol=atol)
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16", "int8"])
+def test_search_finds_stored_vector_itself(tmp_path, dtype):
+    index, embeddings = _index(tmp_path, dtype)
+    hits = index.search([embeddings[1234].tolist()], n=1)
+    assert hits[0][0][0] == 1234
+    assert hits[0][0][1] == pytest.approx(1.0, abs=1e-2)
+
+
+def test_search_handles_n_larger_than_corpus_and_non_positive_n(tmp_path):
+    index, _ = _index(tmp_path, "float32", rows=3)
+    query = [np.ones(32).tolist()]
+    assert len(index.search(query, n=10)[0]) == 3
+    assert index.search(query, n=0) == [[]]
+
+
+def test_query_returns_chroma_shaped_result(tmp_path):
+    index, embeddings = _index(tmp_path, "float32", rows=4)
+    result = index.query([embeddings[2].tolist()], n_results=2)
+
+    assert result["ids"][0][0] == "id-2"
+    assert result["documents"][0][0] == "질문 2"
+    assert result["metadatas"][0][0] == {"answer": "답변 2"}
+    assert result["distances"][0][0] == pytest.approx(0.0, abs=1e-5)
+
+
+def test_unsupported_dtype_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        InterviewIndex(lambda: None, str(tmp_path), dtype="float64")
+
+
+def test_query_keeps_missing_answers_and_unicode_text(tmp_path):
+    index, embeddings = _index(tmp_path, "float32", rows=4)
+    result = index.query([embeddings[3].tolist(), embeddings[0].tolist()], n_results=1)
+
+    assert result["documents"] == [["질문 3"], ["질문 0"]]
+    assert result["metadatas"] == [[{}], [{"answer": "답변 0"}]]
+
+
+def test_single_queries_fall_back_above_row_limit(tmp_path):
+    embeddings = np.random.default_rng(0).standard_normal((50, 8)).astype(np.float32)
+    collection = _FakeCollection(embeddings)
+    index = InterviewIndex(lambda: collection, str(tmp_path), reload_interval_s=3600, max_single_query_rows=10)
+    assert not index.serves(1)
+
+    index.load()
+    assert not index.serves(1)
+    assert index.serves(2)
+    index.max_single_query_rows = 50
+    assert index.serves(1)
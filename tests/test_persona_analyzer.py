@@ -0,0 +1,40 @@
+# tests/test_persona_analyzer.py
+from services import persona_analyzer as module
+
+
+def _use_char_tokens(monkeypatch, budget: int, recent: int):
+    # 토크나이저 대신 문자 수를 토큰 수로 씁니다.
+    monkeypatch.setattr(module, "_count_tokens", len)
+    monkeypatch.setattr(module, "PERSONA_TRANSCRIPT_TOKEN_BUDGET", budget)
+    monkeypatch.setattr(module, "PERSONA_RECENT_TOKENS", recent)
+    monkeypatch.setattr(module, "PERSONA_SUMMARY_CHUNK_TOKENS", 1000)
+
+
+def test_rolling_summary_and_recent_fit_token_budget(monkeypatch):
+    _use_char_tokens(monkeypatch, budget=100, recent=40)
+    compress_calls = []
+    monkeypatch.setattr(module, "_extend_summary", lambda summary, new: "요약" * 200)
+    monkeypatch.setattr(
+        module, "_compress_summary", lambda summary, max_tokens: compress_calls.append(max_tokens) or "짧은 요약"
+    )
+    chat_history = "".join(f"B: 메시지 {i}\n" for i in range(50))
+
+    summary, recent = module.update_rolling_summary("budget-room", chat_history)
+
+    assert summary == "짧은 요약"
+    assert compress_calls == [100 - len(recent)]
+    assert len(summary) + len(recent) <= 100
+
+
+def test_summary_is_truncated_when_compression_is_still_too_long(monkeypatch):
+    _use_char_tokens(monkeypatch, budget=100, recent=40)
+    monkeypatch.setattr(module, "_extend_summary", lambda summary, new: "요약" * 200)
+    monkeypatch.setattr(module, "_compress_summary", lambda summary, max_tokens: "여전히 긴 요약" * 50)
+    chat_history = "".join(f"B: 메시지 {i}\n" for i in range(50))
+
+    summary, recent = module.update_rolling_summary("truncate-room", chat_history)
+
+    assert len(summary) + len(recent) == 100
+    assert summary == ("여전히 긴 요약" * 50)[: len(summary)]
+    # 다음 분석에서는 예산에 맞춰 저장된 요약을 그대로 씁니다.
+    assert module.get_persona_summary_store().get("truncate-room").summary == summary
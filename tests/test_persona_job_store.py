@@ -0,0 +1,141 @@
+# tests/test_persona_job_store.py
+import time
+
+from db.persona_job_store import FAILED, QUEUED, RUNNING, SUCCEEDED, PersonaJobStore
+
+
+def _store(tmp_path) -> PersonaJobStore:
+    return PersonaJobStore(str(tmp_path / "jobs.sqlite3"))
+
+
+def test_create_dedups_active_jobs_per_transcript(tmp_path):
+    store = _store(tmp_path)
+    job, created = store.create("room", "hash-1")
+    same, created_again = store.create("room", "hash-1")
+    other, created_other = store.create("room", "hash-2")
+
+    assert created and not created_again
+    assert same.job_id == job.job_id
+    assert created_other and other.job_id != job.job_id
+    # 새 내용으로 작업을 만들면 이전 내용의 작업은 current에서 빠집니다.
+    assert not store.get(job.job_id).current
+
+
+def test_create_makes_new_job_after_previous_finished(tmp_path):
+    store = _store(tmp_path)
+    job, _ = store.create("room", "hash")
+    assert store.claim(job.job_id, "worker-a", lease_s=60)
+    store.finish(job.job_id, result={"mbti": "INTJ"}, owner="worker-a")
+
+    again, created = store.create("room", "hash")
+    assert created and again.job_id != job.job_id
+    assert store.find_reusable("room", "hash").job_id == again.job_id
+
+
+def test_claim_is_exclusive(tmp_path):
+    store = _store(tmp_path)
+    job, _ = store.create("room", "hash")
+
+    assert store.claim(job.job_id, "worker-a", lease_s=60)
+    assert not store.claim(job.job_id, "worker-b", lease_s=60)
+    claimed = store.get(job.job_id)
+    assert claimed.status == RUNNING and claimed.owner == "worker-a"
+    assert not claimed.lease_expired()
+
+
+def test_requeue_only_after_lease_expires(tmp_path):
+    store = _store(tmp_path)
+    job, _ = store.create("room", "hash")
+    store.claim(job.job_id, "worker-a", lease_s=60)
+    assert not store.requeue_expired(job.job_id)
+
+    # 임대가 만료된 것처럼 만료 시각을 과거로 돌립니다.
+    store.heartbeat([job.job_id], "worker-a", lease_s=-1)
+    assert store.get(job.job_id).lease_expired()
+    assert store.requeue_expired(job.job_id)
+    assert store.get(job.job_id).status == QUEUED
+    assert store.claim(job.job_id, "worker-b", lease_s=60)
+
+
+def test_heartbeat_extends_only_own_lease(tmp_path):
+    store = _store(tmp_path)
+    job, _ = store.create("room", "hash")
+    store.claim(job.job_id, "worker-a", lease_s=1)
+    before = store.get(job.job_id).lease_expires_at
+
+    store.heartbeat([job.job_id], "worker-b", lease_s=600)
+    assert store.get(job.job_id).lease_expires_at == before
+    store.heartbeat([job.job_id], "worker-a", lease_s=600)
+    assert store.get(job.job_id).lease_expires_at > time.time() + 500
+
+
+def test_finish_ignores_stale_owner(tmp_path):
+    store = _store(tmp_path)
+    job, _ = store.create("room", "hash")
+    store.claim(job.job_id, "worker-a", lease_s=-1)
+    assert store.requeue_expired(job.job_id)
+    store.claim(job.job_id, "worker-b", lease_s=60)
+
+    # 임대가 만료된 뒤 늦게 끝난 worker-a의 결과는 기록하지 않습니다.
+    assert not store.finish(job.job_id, result={"mbti": "ENFP"}, owner="worker-a")
+    assert store.get(job.job_id).status == RUNNING
+    assert store.finish(job.job_id, error="실패", owner="worker-b")
+    assert store.get(job.job_id).status == FAILED
+    assert store.counts() == {FAILED: 1}
+    assert SUCCEEDED not in store.counts()
+
+
+def test_resume_pending_skips_jobs_with_live_lease(tmp_path, monkeypatch):
+    from db.persona_summary_store import hash_text
+    from db.transcript_store import get_transcript_store
+    from services import persona_jobs as module
+
+    store = _store(tmp_path)
+    monkeypatch.setattr(module, "get_persona_job_store", lambda: store)
+    monkeypatch.setattr(module, "analyze_persona_from_history", lambda text, chatroom_id=None: {"mbti": "INTJ"})
+    transcript = "나: 안녕\n상대: 반가워"
+    get_transcript_store().put("resume-room", transcript)
+
+    live, _ = store.create("resume-room", hash_text(transcript))
+    store.claim(live.job_id, "other-process", lease_s=60)
+    service = module.PersonaJobService(workers=1, lease_s=60)
+    try:
+        assert service.resume_pending() == 0
+        assert store.get(live.job_id).owner == "other-process"
+
+        # 처리하던 프로세스가 멈춰 임대가 만료되면 이어받아 끝냅니다.
+        store.heartbeat([live.job_id], "other-process", lease_s=-1)
+        assert service.resume_pending() == 1
+        job = service.wait(live.job_id, timeout=5)
+        assert job.status == SUCCEEDED and job.owner == service.owner
+    finally:
+        service.shutdown()
+
+
+def test_submit_does_not_mark_stale_transcript_current(tmp_path, monkeypatch):
+    from db.vector_db import add_chat_history_to_db
+    from services import persona_jobs as module
+
+    store = _store(tmp_path)
+    monkeypatch.setattr(module, "get_persona_job_store", lambda: store)
+    monkeypatch.setattr(module, "analyze_persona_from_history", lambda text, chatroom_id=None: {"mbti": "INTJ"})
+    monkeypatch.setattr("db.vector_db.get_persona_job_store", lambda: store)
+    add_chat_history_to_db("race-room", "나: 안녕")
+
+    create = store.create
+
+    def create_after_write(chatroom_id, transcript_hash):
+        # submit이 대화 내용을 읽은 뒤, 작업을 만들기 전에 새 메시지가 저장된 경우
+        add_chat_history_to_db(chatroom_id, "나: 안녕\n상대: 반가워")
+        return create(chatroom_id, transcript_hash)
+
+    monkeypatch.setattr(store, "create", create_after_write)
+    service = module.PersonaJobService(workers=1, lease_s=60)
+    try:
+        job, created = service.submit("race-room")
+        assert created and not job.current
+        assert service.wait(job.job_id, timeout=5).status == SUCCEEDED
+        assert not store.get(job.job_id).current
+        assert store.latest_current_result("race-room") is None
+    finally:
+        service.shutdown()
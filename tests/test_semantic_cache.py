@@ -0,0 +1,91 @@
+# tests/test_semantic_cache.py
+import asyncio
+
+import numpy as np
+
+from services.semantic_cache import CachePolicy, SemanticCache
+from tools.agent_tools import response_cache
+
+
+class _Counter:
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        return f"응답 {self.calls}"
+
+
+def _run(cache, tool_name, args, compute):
+    return asyncio.run(cache.run(tool_name, args, compute))
+
+
+def test_different_messages_for_same_recipient_miss():
+    cache = SemanticCache(response_cache.policies)
+    compute = _Counter()
+    recipient = "꼼꼼하고 예민한 팀장님"
+
+    first = _run(
+        cache,
+        "advise_on_communication_style",
+        {"recipient_description": recipient, "my_message": "내일 보고서 늦을 것 같아요."},
+        compute,
+    )
+    second = _run(
+        cache,
+        "advise_on_communication_style",
+        {"recipient_description": recipient, "my_message": "회의 시간을 옮겨도 될까요?"},
+        compute,
+    )
+
+    assert compute.calls == 2
+    assert first != second
+    assert cache.stats()["advise_on_communication_style"]["misses"] == 2
+
+
+def test_same_arguments_hit():
+    cache = SemanticCache(response_cache.policies)
+    compute = _Counter()
+    args = {"recipient_description": "친한 친구", "situation_description": "약속에 30분 늦음"}
+
+    first = _run(cache, "predict_recipient_reaction", args, compute)
+    second = _run(cache, "predict_recipient_reaction", dict(args), compute)
+
+    assert compute.calls == 1
+    assert first == second
+
+
+def test_each_field_must_be_similar():
+    cache = SemanticCache(response_cache.policies)
+    compute = _Counter()
+    recipient = "친한 친구"
+
+    for situation in ("약속에 30분 늦음", "생일을 깜빡함"):
+        _run(
+            cache,
+            "predict_recipient_reaction",
+            {"recipient_description": recipient, "situation_description": situation},
+            compute,
+        )
+
+    assert compute.calls == 2
+
+
+def test_semantic_hit_refreshes_lru_position():
+    cache = SemanticCache({"tool": CachePolicy(threshold=0.9)}, max_entries_per_tool=2, enabled=True)
+    # 주제마다 정해진 벡터를 쓰고, "리더십 질문"과 "리더십 문항"은 같은 벡터로 봅니다.
+    vectors = {"리더십": [1.0, 0.0, 0.0], "협업": [0.0, 1.0, 0.0], "갈등": [0.0, 0.0, 1.0]}
+
+    async def embed(args, policy):
+        return np.asarray([vectors[args["topic"].split()[0]]], dtype=np.float32)
+
+    cache._embed = embed
+    compute = _Counter()
+    _run(cache, "tool", {"topic": "리더십 질문"}, compute)
+    _run(cache, "tool", {"topic": "협업 질문"}, compute)
+    # 비슷한 표현으로 찾은 "리더십" 항목이 최근 사용으로 옮겨져, 새 항목이 들어올 때 "협업" 항목이 밀려납니다.
+    assert _run(cache, "tool", {"topic": "리더십 문항"}, compute) == "응답 1"
+    _run(cache, "tool", {"topic": "갈등 질문"}, compute)
+
+    assert _run(cache, "tool", {"topic": "리더십 질문"}, compute) == "응답 1"
+    assert _run(cache, "tool", {"topic": "협업 질문"}, compute) == "응답 4"
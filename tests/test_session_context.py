@@ -0,0 +1,64 @@
+# tests/test_session_context.py
+from services.session_context import ASSISTANT, USER, SessionStore
+
+
+def _store(tmp_path=None, **kwargs) -> SessionStore:
+    # 글자 수를 토큰 수로 셉니다.
+    kwargs.setdefault("path", str(tmp_path / "sessions.sqlite3") if tmp_path else "")
+    return SessionStore(count_tokens=len, **kwargs)
+
+
+def test_window_is_empty_for_unknown_or_missing_session():
+    store = _store()
+    assert store.window(None).turns == []
+    assert store.window("missing").turns == []
+
+
+def test_window_keeps_all_turns_within_budget():
+    store = _store(token_budget=100)
+    store.record_turn("s", "aaaa", "bbbb")
+    store.record_turn("s", "cccc", "dddd")
+
+    window = store.window("s")
+    assert [turn.content for turn in window.turns] == ["aaaa", "bbbb", "cccc", "dddd"]
+    assert (window.tokens, window.trimmed_tokens, window.start) == (16, 0, 0)
+
+
+def test_window_trims_to_keep_ratio_and_starts_at_user_turn():
+    store = _store(token_budget=20, keep_ratio=0.5)
+    for i in range(3):
+        store.record_turn("s", f"u{i}" * 2, f"a{i}" * 2)  # 턴마다 4토큰
+
+    window = store.window("s")  # 24토큰 > 20 이므로 10토큰 이하만 남깁니다.
+    assert [turn.content for turn in window.turns] == ["u2u2", "a2a2"]
+    assert window.turns[0].role == USER
+    assert (window.tokens, window.trimmed_tokens, window.start) == (8, 16, 4)
+
+
+def test_window_start_stays_put_until_budget_is_exceeded_again():
+    store = _store(token_budget=20, keep_ratio=0.5)
+    for i in range(3):
+        store.record_turn("s", f"u{i}" * 2, f"a{i}" * 2)
+    first = store.window("s")
+
+    # 예산 안에서는 창 시작 위치를 옮기지 않아 프롬프트 앞부분이 그대로 유지됩니다.
+    store.record_turn("s", "u3u3", "a3a3")
+    second = store.window("s")
+    assert second.start == first.start
+    assert [turn.role for turn in second.turns] == [USER, ASSISTANT, USER, ASSISTANT]
+
+    store.record_turn("s", "u4u4", "a4a4")
+    store.record_turn("s", "u5u5", "a5a5")
+    third = store.window("s")
+    assert third.start > second.start
+    assert third.tokens <= 10
+
+
+def test_window_survives_restart_with_persistence(tmp_path):
+    store = _store(tmp_path, token_budget=100)
+    store.record_turn("s", "hello", "world")
+
+    restarted = _store(tmp_path, token_budget=100)
+    assert [turn.content for turn in restarted.window("s").turns] == ["hello", "world"]
+    assert restarted.clear("s")
+    assert restarted.window("s").turns == []
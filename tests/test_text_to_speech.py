@@ -0,0 +1,67 @@
+# tests/test_text_to_speech.py
+import os
+
+from tools.text_to_speech import SentenceBuffer, TTSAudioCache, split_sentences
+
+
+def test_split_sentences_on_punctuation_and_newlines():
+    assert split_sentences("안녕하세요. 반갑습니다! 잘 지내요?") == ["안녕하세요.", "반갑습니다!", "잘 지내요?"]
+    assert split_sentences("첫 줄\n\n둘째 줄") == ["첫 줄", "둘째 줄"]
+
+
+def test_split_sentences_keeps_decimal_points_and_skips_blank_text():
+    assert split_sentences("3.14는 원주율입니다.") == ["3.14는 원주율입니다."]
+    assert split_sentences("   \n ") == []
+
+
+def test_split_sentences_attaches_short_fragments_to_previous_sentence():
+    # 한 글자짜리 조각만 따로 합성하지 않도록 앞 문장에 붙입니다.
+    assert split_sentences("좋아요. a") == ["좋아요. a"]
+    assert split_sentences("a. 좋아요.") == ["a.", "좋아요."]
+
+
+def test_sentence_buffer_emits_sentences_as_they_finish():
+    buffer = SentenceBuffer()
+    assert buffer.add("안녕") == []
+    assert buffer.add("하세요. 오늘") == ["안녕하세요."]
+    assert buffer.add(" 날씨가") == []
+    assert buffer.add(" 좋네요! 산책") == ["오늘 날씨가 좋네요!"]
+    assert buffer.add("\n") == ["산책"]
+
+
+def test_sentence_buffer_flush_returns_the_unfinished_tail_once():
+    buffer = SentenceBuffer()
+    assert buffer.add("끝나지 않은 문장") == []
+    assert buffer.flush() == ["끝나지 않은 문장"]
+    assert buffer.flush() == []
+
+
+def _disk_keys(path) -> set:
+    return {name[: -len(".mp3")] for name in os.listdir(path) if name.endswith(".mp3")}
+
+
+def test_disk_tier_evicts_least_recently_used(tmp_path):
+    cache = TTSAudioCache(memory_max_bytes=1, disk_dir=str(tmp_path), disk_max_bytes=35)
+    for key in ("a", "b", "c"):
+        cache.put(key, b"x" * 10)
+    cache.put("d", b"y")
+    assert cache.get("a") == b"x" * 10  # 디스크 적중: a가 가장 최근 사용이 됩니다.
+    assert cache.stats()["disk_hits"] == 1
+
+    cache.put("e", b"z" * 10)
+    # 먼저 쓴 a가 아니라 가장 오래 사용되지 않은 b를 지웁니다.
+    assert _disk_keys(tmp_path) == {"a", "c", "d", "e"}
+    assert cache.stats()["disk_bytes"] == 31
+
+
+def test_disk_index_is_rebuilt_from_existing_files(tmp_path):
+    first = TTSAudioCache(memory_max_bytes=1, disk_dir=str(tmp_path), disk_max_bytes=100)
+    first.put("old", b"x" * 10)
+    first.put("new", b"x" * 10)
+    os.utime(tmp_path / "old.mp3", (1, 1))
+
+    # 재시작한 프로세스는 기존 파일 크기를 포함해 용량을 계산하고, mtime이 오래된 파일부터 지웁니다.
+    second = TTSAudioCache(memory_max_bytes=1, disk_dir=str(tmp_path), disk_max_bytes=25)
+    second.put("next", b"x" * 10)
+    assert _disk_keys(tmp_path) == {"new", "next"}
+    assert second.stats()["disk_bytes"] == 20
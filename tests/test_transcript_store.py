@@ -0,0 +1,65 @@
+# tests/test_transcript_store.py
+from db.transcript_store import TranscriptStore
+
+
+def _store(tmp_path) -> TranscriptStore:
+    return TranscriptStore(str(tmp_path / "transcripts.sqlite3"))
+
+
+def test_append_joins_messages_with_newline_and_bumps_version(tmp_path):
+    store = _store(tmp_path)
+    assert store.append("room", "나: 안녕") == "나: 안녕"
+    assert store.append("room", "상대: 반가워") == "나: 안녕\n상대: 반가워"
+    assert store.append("room", "나: 뭐해?\n") == "나: 안녕\n상대: 반가워\n나: 뭐해?\n"
+    assert store.append("room", "상대: 쉬어") == "나: 안녕\n상대: 반가워\n나: 뭐해?\n상대: 쉬어"
+    assert store.get_versioned("room") == (store.get("room"), 4)
+
+
+def test_put_only_changes_version_when_content_changes(tmp_path):
+    store = _store(tmp_path)
+    assert store.put("room", "대화")
+    assert not store.put("room", "대화")
+    assert store.get_versioned("room") == ("대화", 1)
+    assert store.put("room", "다른 대화")
+    assert store.get_versioned("room")[1] == 2
+    assert store.get("missing") is None and not store.exists("missing")
+
+
+def test_pending_index_and_mark_indexed(tmp_path):
+    store = _store(tmp_path)
+    store.append("plain", "저장만")
+    store.append("indexed", "색인할 대화", index=True)
+    assert store.pending_index(10) == ["indexed"]
+
+    store.mark_indexed("indexed", 1)
+    assert store.pending_index(10) == []
+
+    # 색인 요청은 그대로 두고 새 메시지가 오면 다시 색인 대상이 됩니다.
+    store.append("indexed", "새 메시지")
+    assert store.pending_index(10) == ["indexed"]
+    # 늦게 끝난 이전 버전의 색인 결과가 최신 버전 기록을 되돌리지 않습니다.
+    store.mark_indexed("indexed", 2)
+    store.mark_indexed("indexed", 1)
+    assert store.pending_index(10) == []
+
+
+def test_request_index_marks_existing_rooms_only(tmp_path):
+    store = _store(tmp_path)
+    store.put("room", "대화")
+    assert store.pending_index(10) == []
+    assert store.request_index("room")
+    assert not store.request_index("missing")
+    assert store.pending_index(10) == ["room"]
+    # put에 index=None을 넘기면 기존 요청을 그대로 둡니다.
+    store.put("room", "바뀐 대화")
+    assert store.pending_index(10) == ["room"]
+
+
+def test_stats_reports_compressed_size(tmp_path):
+    store = _store(tmp_path)
+    content = "나: 같은 말을 반복합니다.\n" * 200
+    store.put("room", content, index=True)
+    stats = store.stats()
+    assert stats["rooms"] == 1 and stats["chars"] == len(content)
+    assert stats["stored_bytes"] < len(content.encode("utf-8")) / 10
+    assert (stats["index_requested_rooms"], stats["index_pending_rooms"]) == (1, 1)
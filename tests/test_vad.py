@@ -0,0 +1,70 @@
+# tests/test_vad.py
+import numpy as np
+
+from services.vad import VAD_SAMPLE_RATE, StreamingSegmenter, speech_regions
+
+
+def _noise(seconds: float, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return (rng.standard_normal(int(seconds * VAD_SAMPLE_RATE)) * 0.001).astype(np.float32)
+
+
+def _tone(seconds: float) -> np.ndarray:
+    t = np.arange(int(seconds * VAD_SAMPLE_RATE)) / VAD_SAMPLE_RATE
+    return (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def _feed_in_chunks(segmenter: StreamingSegmenter, audio: np.ndarray, chunk_s: float = 0.1) -> list:
+    chunk = int(chunk_s * VAD_SAMPLE_RATE)
+    events = []
+    for start in range(0, len(audio), chunk):
+        events.extend(segmenter.feed(audio[start : start + chunk]))
+    return events
+
+
+def test_speech_regions_finds_each_utterance():
+    audio = np.concatenate([_noise(1.0), _tone(1.0), _noise(1.0, 1), _tone(0.5), _noise(1.0, 2)])
+    regions = speech_regions(audio)
+
+    assert len(regions) == 2
+    (first_start, first_end), (second_start, _) = regions
+    # 여유(padding)를 두더라도 음성이 시작하기 전 침묵 안에서 시작합니다.
+    assert 0.7 * VAD_SAMPLE_RATE <= first_start <= 1.0 * VAD_SAMPLE_RATE
+    assert 2.0 * VAD_SAMPLE_RATE <= first_end <= 2.3 * VAD_SAMPLE_RATE
+    assert second_start >= first_end
+
+
+def test_speech_regions_splits_long_regions():
+    audio = np.concatenate([_noise(0.5), _tone(5.0), _noise(0.5, 1)])
+    regions = speech_regions(audio, max_region_s=2.0)
+    assert len(regions) >= 3
+
+
+def test_streaming_segmenter_cuts_segments_at_pauses_and_ends_turn():
+    segmenter = StreamingSegmenter(segment_silence_ms=300, turn_silence_ms=900)
+    audio = np.concatenate([_noise(0.5), _tone(0.6), _noise(0.45, 1), _tone(0.6), _noise(1.2, 2)])
+    events = _feed_in_chunks(segmenter, audio)
+
+    kinds = [kind for kind, _ in events]
+    assert kinds == ["speech_start", "segment", "segment", "turn_end"]
+    for _, segment in events[1:3]:
+        # 음성 길이에 앞뒤 여유(padding)와 잘린 쉼 일부를 더한 정도입니다.
+        assert 0.6 * VAD_SAMPLE_RATE <= len(segment) <= 1.2 * VAD_SAMPLE_RATE
+
+
+def test_streaming_segmenter_drops_short_clicks():
+    segmenter = StreamingSegmenter()
+    audio = np.concatenate([_noise(0.5), _tone(0.03), _noise(1.5, 1)])
+    kinds = [kind for kind, _ in _feed_in_chunks(segmenter, audio)]
+    # 짧은 잡음도 발화 시작으로는 알리지만, 구간으로는 내보내지 않습니다.
+    assert "segment" not in kinds
+
+
+def test_streaming_segmenter_flush_emits_remaining_segment():
+    segmenter = StreamingSegmenter()
+    events = _feed_in_chunks(segmenter, np.concatenate([_noise(0.5), _tone(0.6)]))
+    assert [kind for kind, _ in events] == ["speech_start"]
+
+    flushed = segmenter.flush()
+    assert [kind for kind, _ in flushed] == ["segment", "turn_end"]
+    assert segmenter.flush() == []
@@ -0,0 +1,51 @@
+# tests/test_voice_conversation.py
+import asyncio
+
+import numpy as np
+
+from services.voice_conversation import VoiceConversation
+
+
+class _StalledSTT:
+    """인식이 끝나지 않는 음성 인식 엔진입니다. 취소되었는지 확인하는 데 씁니다."""
+
+    def __init__(self):
+        self.started = 0
+
+    async def transcribe_array(self, segment, language=None):
+        self.started += 1
+        await asyncio.Event().wait()
+
+
+def test_close_cancels_stt_of_queued_and_current_turns():
+    async def scenario():
+        sent = []
+
+        async def send_json(payload):
+            sent.append(payload)
+
+        async def send_bytes(data):
+            pass
+
+        stt = _StalledSTT()
+        conversation = VoiceConversation(send_json, send_bytes, stt, tts=None)
+        conversation.start()
+        segment = np.zeros(1600, dtype=np.float32)
+        # 두 턴은 발화가 끝나 답변 차례를 기다리고(첫 턴은 인식 결과를 기다리는 중), 세 번째 턴은 말하는 중입니다.
+        await conversation._handle_events([("segment", segment), ("turn_end", None)])
+        await conversation._handle_events([("segment", segment), ("turn_end", None)])
+        await conversation._handle_events([("segment", segment)])
+        await asyncio.sleep(0)
+        tasks = [
+            task
+            for task in asyncio.all_tasks()
+            if task is not asyncio.current_task() and task is not conversation._worker
+            and task is not conversation._response
+        ]
+        assert stt.started == 3 and len(tasks) == 3
+
+        await conversation.close()
+        await asyncio.sleep(0)
+        assert all(task.cancelled() for task in tasks)
+
+    asyncio.run(scenario())
@@ -1,17 +1,40 @@
 # tools/agent_tools.py
 from langchain_core.tools import tool
-from langchain_openai import ChatOpenAI
 from dotenv import load_dotenv
-import os
+
+from core.llm import get_chat_model
+from core.metrics import stage_timer
+from services.semantic_cache import CachePolicy, SemanticCache
 
 load_dotenv()
 
-_internal_llm = ChatOpenAI(model=os.getenv("LLM_MODEL_NAME"), temperature=0.7)
+# 비슷한 입력이 반복되는 LLM 전용 툴의 응답 캐시 (툴별 유사도 임계값)
+# 글 다듬기는 글자 하나 차이도 결과가 달라지므로 완전히 같은 입력만 재사용합니다.
+# 특정 메시지에 대한 조언은 다른 메시지에 돌려주면 안 되므로 my_message는 정확히 같아야 합니다.
+response_cache = SemanticCache(
+    {
+        "predict_recipient_reaction": CachePolicy(threshold=0.95),
+        "advise_on_communication_style": CachePolicy(
+            threshold=0.97, exact_fields=("my_message",)
+        ),
+        "get_mbti_communication_advice": CachePolicy(
+            threshold=0.95, exact_fields=("mbti_type", "my_message")
+        ),
+        "refine_text_content": CachePolicy(
+            threshold=None, exact_fields=("refinement_mode",)
+        ),
+    }
+)
+
+
+async def _ask_llm(prompt: str) -> str:
+    with stage_timer("tool_llm"):
+        return (await get_chat_model(temperature=0.7).ainvoke(prompt)).content
 
 
 # 상대방 생각/감정 예측 툴
 @tool
-def predict_recipient_reaction(
+async def predict_recipient_reaction(
     recipient_description: str, situation_description: str
 ) -> str:
     """
@@ -36,7 +59,14 @@ def predict_recipient_reaction(
     """
 
     try:
-        response = _internal_llm.invoke(prompt).content
+        response = await response_cache.run(
+            "predict_recipient_reaction",
+            {
+                "recipient_description": recipient_description,
+                "situation_description": situation_description,
+            },
+            lambda: _ask_llm(prompt),
+        )
         return response
     except Exception as e:
         print(f"상대방 생각 예측 중 오류 발생: {e}")
@@ -45,7 +75,7 @@ def predict_recipient_reaction(
 
 # 상황별 대화 조언 툴
 @tool
-def advise_on_communication_style(recipient_description: str, my_message: str) -> str:
+async def advise_on_communication_style(recipient_description: str, my_message: str) -> str:
     """
     (영문 설명) Checks if a message is appropriate for a specific recipient and provides advice on how to improve it, based on the LLM's communication expertise.
     (한글 번역) 특정 수신자에게 메시지를 보내도 괜찮은지 확인하고, LLM의 커뮤니케이션 전문 지식에 기반하여 더 나은 표현을 조언합니다.
@@ -69,7 +99,11 @@ def advise_on_communication_style(recipient_description: str, my_message: str) -
     """
 
     try:
-        response = _internal_llm.invoke(prompt).content
+        response = await response_cache.run(
+            "advise_on_communication_style",
+            {"recipient_description": recipient_description, "my_message": my_message},
+            lambda: _ask_llm(prompt),
+        )
         return response
     except Exception as e:
         print(f"대화 조언 중 오류 발생: {e}")
@@ -78,7 +112,7 @@ def advise_on_communication_style(recipient_description: str, my_message: str) -
 
 # 특정 mbti를 가진 사람이 어떻게 생각하는 지
 @tool
-def get_mbti_communication_advice(
+async def get_mbti_communication_advice(
     mbti_type: str,
     situation: str,
     my_message: str = "",
@@ -123,7 +157,11 @@ def get_mbti_communication_advice(
         """
 
     try:
-        response = _internal_llm.invoke(prompt).content
+        response = await response_cache.run(
+            "get_mbti_communication_advice",
+            {"mbti_type": mbti_type, "situation": situation, "my_message": my_message},
+            lambda: _ask_llm(prompt),
+        )
         return response
     except Exception as e:
         print(f"MBTI 소통 조언 중 오류 발생: {e}")
@@ -132,7 +170,7 @@ def get_mbti_communication_advice(
 
 # 글 다듬기 툴
 @tool
-def refine_text_content(text_to_refine: str, refinement_mode: str) -> str:
+async def refine_text_content(text_to_refine: str, refinement_mode: str) -> str:
     """
     (영문 설명) Refines a given text based on a specified mode. Available modes are "부드럽게" (soften), "매끄럽게" (smoothen), "오타수정" (proofread), and "요약" (summarize).
     (한글 번역) 주어진 텍스트를 명시된 모드에 따라 다듬습니다. 사용 가능한 모드: "부드럽게", "매끄럽게", "오타수정", "요약".
@@ -153,7 +191,11 @@ def refine_text_content(text_to_refine: str, refinement_mode: str) -> str:
         prompt = base_prompt
 
     try:
-        response = _internal_llm.invoke(prompt).content
+        response = await response_cache.run(
+            "refine_text_content",
+            {"text_to_refine": text_to_refine, "refinement_mode": refinement_mode},
+            lambda: _ask_llm(prompt),
+        )
         return response
     except Exception as e:
         print(f"글 다듬기 중 오류 발생: {e}")
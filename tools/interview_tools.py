@@ -1,46 +1,81 @@
 # tools/interview_tools.py
 
-import chromadb
-from typing import List, Dict
-from sentence_transformers import SentenceTransformer
+import threading
+from typing import Annotated, List, Dict
 from langchain_core.tools import tool
-from langchain_openai import ChatOpenAI
 from dotenv import load_dotenv
-import os
+from pydantic import Field
 
+from core.concurrency import run_blocking
+from core.llm import get_chat_model
+from core.metrics import stage_timer
+from db.interview_index import INTERVIEW_INDEX_ENABLED, INTERVIEW_MAX_RESULTS, InterviewIndex
+from services.embedding_service import aembed_text, embed_texts
 
-print("tools/interview_tools.py에서 임베딩 모델을 로드하는 중입니다...")
-_embedding_model = SentenceTransformer("dragonkue/bge-m3-ko")
-
-_chroma_client = chromadb.PersistentClient(path="my_interview_db")
+_db_path = "my_interview_db"
 _collection_name = "my_interviews_with_bge_m3"
-_collection = _chroma_client.get_or_create_collection(
-    name=_collection_name, metadata={"hnsw:space": "cosine"}
-)
+_collection = None
+_collection_lock = threading.Lock()
 load_dotenv()
-model = ChatOpenAI(model=os.getenv("LLM_MODEL_NAME"), temperature=0.7)
+
+
+def get_interview_collection():
+    """면접 질문 컬렉션을 반환합니다. 최초 호출 시에만 ChromaDB 클라이언트를 엽니다."""
+    global _collection
+    if _collection is None:
+        with _collection_lock:
+            if _collection is None:
+                # chromadb import 자체가 무거우므로 처음 조회할 때까지 미룹니다.
+                import chromadb
+
+                client = chromadb.PersistentClient(path=_db_path)
+                _collection = client.get_or_create_collection(
+                    name=_collection_name, metadata={"hnsw:space": "cosine"}
+                )
+    return _collection
+
+
+# 서버 시작 시 컬렉션 전체를 메모리에 올려 두는 검색 인덱스. 준비 전이거나 꺼져 있으면 ChromaDB로 조회하며,
+# 코퍼스가 크면 질문 하나짜리 검색도 ChromaDB로 조회합니다. (InterviewIndex.serves 참고)
+interview_index = InterviewIndex(get_interview_collection, db_path=_db_path)
+
+# 툴 인자 스키마에도 상한을 넣어 LLM이 범위 밖의 개수를 고르지 않게 합니다.
+SearchCount = Annotated[int, Field(ge=1, le=INTERVIEW_MAX_RESULTS)]
+
+
+async def _query_interview_db(query_embeddings: List[List[float]], n: int) -> Dict:
+    if INTERVIEW_INDEX_ENABLED and interview_index.serves(len(query_embeddings)):
+        with stage_timer("interview_index_query"):
+            return await run_blocking(interview_index.query, query_embeddings, n)
+    with stage_timer("chroma_query"):
+        return await run_blocking(
+            get_interview_collection().query,
+            query_embeddings=query_embeddings,
+            n_results=n,
+            include=["documents", "metadatas"],
+        )
 
 
 @tool
-def find_similar_questions(topic: str, n: int = 3) -> List[str]:
+async def find_similar_questions(topic: str, n: SearchCount = 3) -> List[str]:
     """
     주어진 주제(topic)와 가장 유사한 질문들을 벡터 DB에서 검색하여 반환합니다.
 
     Args:
         topic (str): 검색할 주제 키워드입니다.
-        n (int): 검색할 유사 질문의 개수입니다.
+        n (int): 검색할 유사 질문의 개수입니다. (1 ~ 10)
 
     Returns:
         List[str]: 검색된 유사 질문 텍스트의 리스트를 반환합니다.
     """
-    query_embedding = _embedding_model.encode(topic).tolist()
-    results = _collection.query(query_embeddings=[query_embedding], n_results=n)
+    query_embedding = await aembed_text(topic)
+    results = await _query_interview_db([query_embedding], n)
     retrieved_questions = results["documents"][0] if results.get("documents") else []
     return retrieved_questions
 
 
 @tool
-def evaluate_user_answer(question: str, user_answer: str) -> str:
+async def evaluate_user_answer(question: str, user_answer: str) -> str:
     """
     주어진 면접 질문에 대한 사용자의 답변을 평가하고 건설적인 피드백을 제공합니다.
     """
@@ -61,29 +96,26 @@ def evaluate_user_answer(question: str, user_answer: str) -> str:
     - **좋은 점 (Good Points)**: (답변에서 칭찬할 만한 구체적인 부분)
     - **개선할 점 (Areas for Improvement)**: (답변을 더 좋게 만들기 위한 구체적인 조언)
     """
-    feedback = model.invoke(prompt).content
+    with stage_timer("tool_llm"):
+        feedback = (await get_chat_model(temperature=0.7).ainvoke(prompt)).content
     return feedback
 
 
 @tool
-def find_similar_qa_pairs(topic: str, n: int = 3) -> List[Dict[str, str]]:
+async def find_similar_qa_pairs(topic: str, n: SearchCount = 3) -> List[Dict[str, str]]:
     """
     주어진 주제와 유사한 <질문, 답변> 쌍을 벡터 DB에서 검색하여 반환합니다.
     질문은 문서(document)에서, 답변은 메타데이터(metadata)에서 가져옵니다.
 
     Args:
         topic (str): 검색할 주제 키워드입니다.
-        n (int): 검색할 질문-답변 쌍의 개수입니다.
+        n (int): 검색할 질문-답변 쌍의 개수입니다. (1 ~ 10)
 
     Returns:
         List[Dict[str, str]]: {'question': ..., 'answer': ...} 형태의 딕셔너리 리스트.
     """
-    query_embedding = _embedding_model.encode(topic).tolist()
-    results = _collection.query(
-        query_embeddings=[query_embedding],
-        n_results=n,
-        include=["documents", "metadatas"],
-    )
+    query_embedding = await aembed_text(topic)
+    results = await _query_interview_db([query_embedding], n)
     qa_pairs = []
     if results.get("documents") and results.get("metadatas"):
         retrieved_docs = results["documents"][0]
@@ -97,3 +129,23 @@ def find_similar_qa_pairs(topic: str, n: int = 3) -> List[Dict[str, str]]:
             )
 
     return qa_pairs
+
+
+async def find_reference_qa_pairs(questions: List[str], n: int = 1) -> List[List[Dict[str, str]]]:
+    """
+    여러 면접 질문 각각과 유사한 <질문, 답변> 쌍을 한 번에 검색합니다. (배치 평가용, 툴이 아님)
+    질문들을 한 배치로 임베딩하고 벡터 DB도 한 번만 조회하며, 결과는 입력 순서와 같습니다.
+    """
+    if not questions:
+        return []
+    query_embeddings = await run_blocking(embed_texts, questions)
+    results = await _query_interview_db(query_embeddings, n)
+    documents = results.get("documents") or [[] for _ in questions]
+    metadatas = results.get("metadatas") or [[] for _ in questions]
+    return [
+        [
+            {"question": doc, "answer": (meta or {}).get("answer", "저장된 답변 없음")}
+            for doc, meta in zip(docs, metas)
+        ]
+        for docs, metas in zip(documents, metadatas)
+    ]
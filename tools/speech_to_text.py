@@ -1,9 +1,37 @@
 # tools/speech_to_text.py
 
-from typing import Type
+from typing import Any, Dict, Type
 from pydantic import BaseModel, Field
 import os
-import whisper
+import subprocess
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+def decode_audio_bytes(data: bytes, sr: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    업로드된 오디오 바이트를 임시 파일 없이 ffmpeg 파이프로 디코딩하여
+    Whisper 입력 형식(mono, 16kHz, float32 파형)으로 변환합니다.
+    디코딩할 수 없는 입력(클라이언트 오류)이면 ValueError를 던집니다.
+    """
+    cmd = [
+        "ffmpeg",
+        "-nostdin",
+        "-threads", "0",
+        "-i", "pipe:0",
+        "-f", "s16le",
+        "-ac", "1",
+        "-acodec", "pcm_s16le",
+        "-ar", str(sr),
+        "pipe:1",
+    ]  # fmt: skip
+    try:
+        out = subprocess.run(cmd, input=data, capture_output=True, check=True).stdout
+    except subprocess.CalledProcessError as e:
+        raise ValueError(f"오디오 디코딩 실패: {e.stderr.decode(errors='ignore')}") from e
+
+    return np.frombuffer(out, np.int16).flatten().astype(np.float32) / 32768.0
 
 
 class SpeechToTextToolInput(BaseModel):
@@ -24,31 +52,65 @@ class SpeechToTextTool:
     args_schema: Type[BaseModel] = SpeechToTextToolInput
 
     def __init__(self, whisper_model_name: str = "base"):
-        try:
-            print(f"Whisper 모델 '{whisper_model_name}' 로드 중...")
-            self.model = whisper.load_model(whisper_model_name)
-            print(f"Whisper 모델 '{whisper_model_name}' 로드 완료.")
-        except Exception as e:
-            print(f"Whisper 모델 로드 중 오류 발생: {e}")
-            self.model = None
+        self.whisper_model_name = whisper_model_name
+        # 요청마다 모델 크기를 고를 수 있도록, 한 번 로드한 모델은 이름별로 보관합니다.
+        self._models: Dict[str, Any] = {}
+        self.model = self._get_model(whisper_model_name)
+
+    def _get_model(self, model_name: str):
+        if model_name not in self._models:
+            try:
+                # whisper(torch) import가 무거우므로, 디코딩만 하는 서버 프로세스에서는 불러오지 않습니다.
+                import whisper
+
+                print(f"Whisper 모델 '{model_name}' 로드 중...")
+                self._models[model_name] = whisper.load_model(model_name)
+                print(f"Whisper 모델 '{model_name}' 로드 완료.")
+            except Exception as e:
+                print(f"Whisper 모델 로드 중 오류 발생: {e}")
+                return None
+        return self._models[model_name]
+
+    def transcribe(
+        self,
+        audio: np.ndarray | str,
+        language: str | None = None,
+        model_name: str | None = None,
+    ) -> Dict[str, Any]:
+        """
+        Whisper 결과(text, language 등)를 그대로 반환합니다.
+        language를 주면 언어 자동 감지(인코더 한 번 더 실행)를 건너뜁니다.
+        """
+        model = self._get_model(model_name or self.whisper_model_name)
+        if model is None:
+            raise RuntimeError(f"Whisper 모델 '{model_name or self.whisper_model_name}'을 로드하지 못했습니다.")
+        return model.transcribe(audio, language=language)
 
-    def _run(self, audio_path: str) -> str:
+    def _run(
+        self,
+        audio_path: str | None = None,
+        audio: np.ndarray | None = None,
+        language: str | None = None,
+        model_name: str | None = None,
+    ) -> str:
         """
-        오디오 파일을 텍스트로 변환하는 실제 로직을 실행합니다.
+        오디오 파일(audio_path) 또는 이미 디코딩된 파형(audio)을 텍스트로 변환하는 실제 로직을 실행합니다.
         """
         if self.model is None:
             return "오디오 변환 서비스를 사용할 수 없습니다. Whisper 모델 로드에 실패했습니다."
 
-        if not os.path.exists(audio_path):
+        if audio is None and not os.path.exists(audio_path):
             return f"오디오 파일 경로를 찾을 수 없습니다: {audio_path}"
 
         try:
-            result = self.model.transcribe(audio_path)
+            result = self.transcribe(
+                audio if audio is not None else audio_path, language=language, model_name=model_name
+            )
 
             transcribed_text = result["text"]
             return transcribed_text
         except Exception as e:
             raise Exception(f"오디오 변환 중 예외 발생: {e}")
 
-    def __call__(self, audio_path: str) -> str:
-        return self._run(audio_path)
+    def __call__(self, audio_path: str | None = None, audio: np.ndarray | None = None, **kwargs) -> str:
+        return self._run(audio_path=audio_path, audio=audio, **kwargs)
@@ -1,9 +1,245 @@
 # tools/text_to_speech.py
+import asyncio
+import hashlib
 import io
-from gtts import gTTS
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import AsyncIterable, AsyncIterator, List, Protocol, Tuple
+
+from dotenv import load_dotenv
+
+from core.concurrency import run_blocking
+from core.metrics import stage_timer
+
+load_dotenv()
+
+TTS_CACHE_MEMORY_MAX_BYTES = int(
+    os.getenv("TTS_CACHE_MEMORY_MAX_BYTES", str(64 * 1024 * 1024))
+)
+TTS_CACHE_DISK_MAX_BYTES = int(
+    os.getenv("TTS_CACHE_DISK_MAX_BYTES", str(1024 * 1024 * 1024))
+)
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", "./tts_cache")
+# "gtts"(기본) 또는 "fake"(벤치마크용 가짜 음성 합성, core/fake_backends.py)
+TTS_BACKEND = os.getenv("TTS_BACKEND", "gtts").lower()
+# 스트리밍 시 현재 문장을 보내는 동안 미리 합성해 둘 다음 문장 수
+TTS_PREFETCH_SENTENCES = int(os.getenv("TTS_PREFETCH_SENTENCES", "2"))
+
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?。…])\s+|\n+")
+
+
+def split_sentences(text: str) -> List[str]:
+    """텍스트를 문장 단위로 나눕니다. 너무 짧은 조각은 앞 문장에 붙입니다."""
+    sentences: List[str] = []
+    for part in _SENTENCE_BOUNDARY.split(text):
+        part = part.strip()
+        if not part:
+            continue
+        if sentences and len(part) < 2:
+            sentences[-1] = f"{sentences[-1]} {part}"
+        else:
+            sentences.append(part)
+    return sentences
+
+
+class SentenceBuffer:
+    """
+    LLM 토큰처럼 조금씩 들어오는 텍스트를 모아, 끝난 문장만 꺼내 줍니다.
+    마지막 문장 경계 뒤의 텍스트는 다음 토큰이 올 때까지 남겨 둡니다.
+    """
+
+    def __init__(self):
+        self._text = ""
+
+    def add(self, text: str) -> List[str]:
+        self._text += text
+        last = None
+        for last in _SENTENCE_BOUNDARY.finditer(self._text):
+            pass
+        if last is None:
+            return []
+        done, self._text = self._text[: last.start()], self._text[last.end() :]
+        return split_sentences(done)
+
+    def flush(self) -> List[str]:
+        done, self._text = self._text, ""
+        return split_sentences(done)
+
+
+class TTSBackend(Protocol):
+    """문장 하나를 MP3 바이트로 합성하는 백엔드 인터페이스입니다."""
+
+    def synthesize(self, text: str, lang: str) -> bytes: ...
+
+
+class GTTSBackend:
+    def synthesize(self, text: str, lang: str) -> bytes:
+        from gtts import gTTS
+
+        mp3_fp = io.BytesIO()
+        tts = gTTS(text=text, lang=lang)
+        tts.write_to_fp(mp3_fp)
+        return mp3_fp.getvalue()
+
+
+def _default_backend() -> TTSBackend:
+    if TTS_BACKEND == "fake":
+        from core.fake_backends import FakeTTSBackend
+
+        return FakeTTSBackend()
+    return GTTSBackend()
+
+
+class TTSAudioCache:
+    """
+    (문장, 언어) 해시를 키로 하는 합성 음성 캐시입니다.
+    메모리 LRU(바이트 크기 제한) 뒤에 디스크 계층을 두어 재시작 후에도 재사용합니다.
+
+    디스크 계층도 LRU입니다. 파일 목록과 전체 크기는 처음 쓸 때 한 번만 읽어(mtime 순) 메모리에 두고,
+    적중하면 mtime을 갱신하므로 재시작 후에도 사용 순서가 이어집니다.
+    """
+
+    def __init__(
+        self,
+        memory_max_bytes: int = TTS_CACHE_MEMORY_MAX_BYTES,
+        disk_dir: str | None = TTS_CACHE_DIR,
+        disk_max_bytes: int = TTS_CACHE_DISK_MAX_BYTES,
+    ):
+        self.memory_max_bytes = memory_max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        # 디스크 파일 키 -> 크기 (오래 사용되지 않은 순서). None이면 아직 디렉터리를 읽지 않았습니다.
+        self._disk_index: OrderedDict[str, int] | None = None
+        self._disk_bytes = 0
+        self._disk_lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(text: str, lang: str) -> str:
+        return hashlib.sha256(f"{lang}\x00{text}".encode("utf-8")).hexdigest()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.mp3")
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return audio
+
+        if self.disk_dir and os.path.exists(self._disk_path(key)):
+            try:
+                with open(self._disk_path(key), "rb") as f:
+                    audio = f.read()
+                os.utime(self._disk_path(key))
+            except OSError:
+                audio = None
+            if audio:
+                self._touch_disk(key, len(audio))
+                with self._lock:
+                    self.disk_hits += 1
+                    self._put_memory(key, audio)
+                return audio
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, audio: bytes):
+        with self._lock:
+            self._put_memory(key, audio)
+        if self.disk_dir:
+            try:
+                tmp_path = f"{self._disk_path(key)}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(audio)
+                os.replace(tmp_path, self._disk_path(key))
+                self._touch_disk(key, len(audio))
+            except OSError as e:
+                print(f"TTS 디스크 캐시 저장 중 오류 발생: {e}")
+
+    def _put_memory(self, key: str, audio: bytes):
+        if key in self._memory:
+            self._memory_bytes -= len(self._memory.pop(key))
+        self._memory[key] = audio
+        self._memory_bytes += len(audio)
+        while self._memory_bytes > self.memory_max_bytes and len(self._memory) > 1:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _load_disk_index(self):
+        """디스크 잠금을 잡은 상태에서 호출합니다."""
+        entries = []
+        for entry in os.scandir(self.disk_dir):
+            if entry.name.endswith(".mp3"):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, entry.name[: -len(".mp3")], stat.st_size))
+        entries.sort()
+        self._disk_index = OrderedDict((key, size) for _, key, size in entries)
+        self._disk_bytes = sum(self._disk_index.values())
+
+    def _touch_disk(self, key: str, size: int):
+        """디스크 파일을 가장 최근에 사용한 것으로 기록하고, 용량을 넘으면 오래 사용되지 않은 파일부터 지웁니다."""
+        with self._disk_lock:
+            if self._disk_index is None:
+                self._load_disk_index()
+            self._disk_bytes += size - self._disk_index.pop(key, 0)
+            self._disk_index[key] = size
+            while self._disk_bytes > self.disk_max_bytes and len(self._disk_index) > 1:
+                evicted, evicted_size = self._disk_index.popitem(last=False)
+                self._disk_bytes -= evicted_size
+                try:
+                    os.remove(self._disk_path(evicted))
+                except OSError:
+                    pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": (
+                    (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0
+                ),
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_bytes": self._disk_bytes,
+            }
 
 
 class TextToSpeechTool:
+    def __init__(
+        self, backend: TTSBackend | None = None, cache: TTSAudioCache | None = None
+    ):
+        self.backend = backend or _default_backend()
+        self.cache = cache if cache is not None else TTSAudioCache()
+
+    def synthesize_sentence(self, sentence: str, lang: str = "ko") -> bytes:
+        """문장 하나를 합성합니다. 이미 합성한 문장은 캐시에서 바로 반환합니다."""
+        key = TTSAudioCache.make_key(sentence, lang)
+        audio = self.cache.get(key)
+        if audio is None:
+            with stage_timer("tts"):
+                audio = self.backend.synthesize(sentence, lang)
+            self.cache.put(key, audio)
+        return audio
+
     def __call__(self, text: str, lang: str = "ko") -> bytes:
         """
         주어진 텍스트를 음성 데이터(bytes)로 변환하여 메모리에서 바로 반환합니다.
@@ -11,9 +247,58 @@ class TextToSpeechTool:
         if not text.strip():
             raise ValueError("음성으로 변환할 텍스트가 없습니다.")
 
-        mp3_fp = io.BytesIO()
-        tts = gTTS(text=text, lang=lang)
-        tts.write_to_fp(mp3_fp)
-        mp3_fp.seek(0)
+        return b"".join(
+            self.synthesize_sentence(sentence, lang) for sentence in split_sentences(text)
+        )
+
+    async def stream(self, text: str, lang: str = "ko") -> AsyncIterator[bytes]:
+        """
+        문장 단위로 합성한 MP3 조각을 순서대로 내보냅니다.
+        첫 문장이 준비되는 즉시 전송을 시작하고, 그동안 다음 문장들을 미리 합성합니다.
+        """
+        sentences = split_sentences(text)
+        if not sentences:
+            raise ValueError("음성으로 변환할 텍스트가 없습니다.")
+
+        async def source():
+            for sentence in sentences:
+                yield sentence
+
+        async for _, audio in self.stream_sentences(source(), lang):
+            yield audio
+
+    async def stream_sentences(
+        self, sentences: AsyncIterable[str], lang: str = "ko"
+    ) -> AsyncIterator[Tuple[str, bytes]]:
+        """
+        아직 생성 중인 문장 스트림(sentences)을 받아 (문장, MP3 조각)을 순서대로 내보냅니다.
+        문장이 도착하는 대로 최대 TTS_PREFETCH_SENTENCES개 앞서 합성을 시작하므로,
+        LLM이 다음 문장을 생성하는 동안 앞 문장의 합성과 전송이 함께 진행됩니다.
+        """
+        pending: asyncio.Queue = asyncio.Queue(maxsize=TTS_PREFETCH_SENTENCES + 1)
+
+        async def feed():
+            try:
+                async for sentence in sentences:
+                    task = asyncio.ensure_future(
+                        run_blocking(self.synthesize_sentence, sentence, lang)
+                    )
+                    await pending.put((sentence, task))
+            except Exception as e:
+                await pending.put(e)  # 문장 스트림에서 난 오류는 받는 쪽에서 다시 던집니다.
+                return
+            await pending.put(None)
 
-        return mp3_fp.read()
+        feeder = asyncio.ensure_future(feed())
+        try:
+            while (item := await pending.get()) is not None:
+                if isinstance(item, Exception):
+                    raise item
+                sentence, task = item
+                yield sentence, await task
+        finally:
+            feeder.cancel()
+            while not pending.empty():
+                item = pending.get_nowait()
+                if isinstance(item, tuple):
+                    item[1].cancel()